@@ -0,0 +1,101 @@
+"""
+Benchmark the import time of the API application.
+
+Runs ``python -X importtime -c "import hana_ai.api.app"`` in fresh
+interpreters and reports the total import time and the modules with the
+largest cumulative import time. It also lists heavy modules that were
+imported although the routers only need them on first use, and exits with
+status 1 if the median import time exceeds ``--budget``.
+
+Usage::
+
+    python load-tests/bench_importtime.py --repeat 5 --top 15 --budget 1.0
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+MODULE = "hana_ai.api.app"
+
+# Modules that must not be imported by importing the application
+DEFERRED_MODULES = (
+    "torch",
+    "langgraph",
+    "langchain",
+    "langchain_core",
+    "gen_ai_hub",
+    "hana_ml",
+    "pandas",
+    "hana_ai.tools.toolkit",
+    "hana_ai.agents.hanaml_agent_with_memory",
+    "hana_ai.api.gpu_utils",
+)
+
+
+def parse_importtime(stderr):
+    """Parse ``-X importtime`` output into (module, self_us, cumulative_us, depth) tuples."""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return entries
+
+
+def measure():
+    """Import the application once in a fresh interpreter."""
+    code = (
+        f"import sys; import {MODULE}; "
+        f"print(','.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    lines = result.stdout.strip().splitlines()
+    loaded = [module for module in (lines[-1] if lines else "").split(",") if module]
+    return parse_importtime(result.stderr), loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters to measure")
+    parser.add_argument("--top", type=int, default=15, help="Modules to list by cumulative time")
+    parser.add_argument("--budget", type=float, default=1.0, help="Maximum median import time in seconds")
+    args = parser.parse_args()
+
+    totals = []
+    entries, loaded = [], []
+    for _ in range(args.repeat):
+        entries, loaded = measure()
+        totals.append(next(cumulative for name, _, cumulative, _ in entries if name == MODULE) / 1e6)
+
+    median = statistics.median(totals)
+    print(f"import {MODULE}: median {median:.3f}s, min {min(totals):.3f}s, max {max(totals):.3f}s "
+          f"over {args.repeat} runs")
+
+    print(f"\nTop {args.top} top-level imports by cumulative time (last run)")
+    print(f"{'cumulative ms':>14}{'self ms':>10}  module")
+    top_level = sorted((entry for entry in entries if entry[3] <= 1), key=lambda entry: -entry[2])
+    for name, self_us, cumulative_us, _ in top_level[:args.top]:
+        print(f"{cumulative_us / 1000:>14.1f}{self_us / 1000:>10.1f}  {name}")
+
+    print(f"\nTop {args.top} modules by self time (last run)")
+    for name, self_us, _, _ in sorted(entries, key=lambda entry: -entry[1])[:args.top]:
+        print(f"{self_us / 1000:>14.1f}  {name}")
+
+    if loaded:
+        print(f"\nDeferred modules imported eagerly: {', '.join(loaded)}")
+    if median > args.budget or loaded:
+        print(f"\nFAIL: budget {args.budget:.3f}s")
+        sys.exit(1)
+    print(f"\nOK: within budget {args.budget:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
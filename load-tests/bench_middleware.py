@@ -0,0 +1,162 @@
+"""
+Benchmark per-request middleware overhead.
+
+Compares the previous stack of five ``BaseHTTPMiddleware`` classes (request
+logging, security headers, external call prevention, metrics, rate limiting)
+with the single pure ASGI ``APIMiddleware``. Both run in front of the same
+trivial endpoints; the overhead is the time per request above the bare app.
+
+Requests are sent concurrently through an in-process ASGI transport, so no
+server or network is involved.
+
+Usage::
+
+    python load-tests/bench_middleware.py --requests 5000 --concurrency 50
+"""
+import argparse
+import asyncio
+import logging
+import time
+
+import httpx
+from starlette.applications import Starlette
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from hana_ai.api.config import settings
+from hana_ai.api.logging import get_request_id, log_request_details
+from hana_ai.api.metrics import record_request_metric, setup_metrics
+from hana_ai.api.middleware import APIMiddleware
+from hana_ai.api.rate_limit import client_key, create_rate_limiter
+from hana_ai.api.security import validate_external_request
+
+
+# The previous middleware classes, as registered in app.py
+class RequestLoggerMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        request_id = get_request_id(request)
+        start_time = time.time()
+        response = await call_next(request)
+        request.state.status_code = response.status_code
+        log_request_details(request, start_time)
+        response.headers["X-Request-ID"] = request_id
+        return response
+
+
+class SecurityHeadersMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        response = await call_next(request)
+        response.headers["X-Content-Type-Options"] = "nosniff"
+        response.headers["X-Frame-Options"] = "DENY"
+        response.headers["X-XSS-Protection"] = "1; mode=block"
+        response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
+        response.headers["Content-Security-Policy"] = "default-src 'self'"
+        return response
+
+
+class ExternalCallPreventionMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        if settings.RESTRICT_EXTERNAL_CALLS:
+            host = request.headers.get("Host", "")
+            if host:
+                is_valid, reason = validate_external_request(f"https://{host}")
+                if not is_valid:
+                    return JSONResponse(status_code=403, content={"detail": reason})
+        return await call_next(request)
+
+
+class MetricsMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        start_time = time.time()
+        response = await call_next(request)
+        record_request_metric(request.method, request.url.path, response.status_code, time.time() - start_time)
+        return response
+
+
+class RateLimitMiddleware(BaseHTTPMiddleware):
+    def __init__(self, app):
+        super().__init__(app)
+        self.limiter = create_rate_limiter(10 ** 9)
+
+    async def dispatch(self, request, call_next):
+        client_host = request.client.host if request.client else "unknown"
+        key = client_key(request.headers.get("X-API-Key", ""), client_host)
+        result = self.limiter.check(key, request.url.path)
+        if not result.allowed:
+            return Response(status_code=429)
+        response = await call_next(request)
+        response.headers.update(result.headers())
+        return response
+
+
+async def json_endpoint(request):
+    return JSONResponse({"status": "ok"})
+
+
+async def stream_endpoint(request):
+    async def chunks():
+        for _ in range(10):
+            yield b"x" * 1024
+    return StreamingResponse(chunks(), media_type="application/octet-stream")
+
+
+def build_app(stack):
+    app = Starlette(routes=[Route("/json", json_endpoint), Route("/stream", stream_endpoint)])
+    if stack == "legacy":
+        for middleware in (RequestLoggerMiddleware, SecurityHeadersMiddleware, ExternalCallPreventionMiddleware,
+                           MetricsMiddleware, RateLimitMiddleware):
+            app.add_middleware(middleware)
+    elif stack == "asgi":
+        app.add_middleware(APIMiddleware, limiter=create_rate_limiter(10 ** 9))
+    return app
+
+
+async def run_load(app, path, total, concurrency):
+    """Send ``total`` requests with ``concurrency`` in flight; return seconds per request."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://localhost") as client:
+        # Warm up
+        for _ in range(20):
+            await client.get(path)
+
+        remaining = total
+
+        async def worker():
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                response = await client.get(path, headers={"X-API-Key": "bench"})
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return (time.perf_counter() - start) / total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=5000, help="Requests per stack and endpoint")
+    parser.add_argument("--concurrency", type=int, default=50, help="Requests in flight")
+    args = parser.parse_args()
+
+    # Keep request logs out of the measurement and the output
+    logging.disable(logging.CRITICAL)
+    setup_metrics()
+    settings.DEVELOPMENT_MODE = False
+    settings.RESTRICT_EXTERNAL_CALLS = True
+
+    print(f"{args.requests} requests per run, concurrency {args.concurrency}")
+    print(f"{'endpoint':<10}{'stack':<8}{'us/req':>10}{'overhead us':>14}")
+    for path in ("/json", "/stream"):
+        results = {
+            stack: asyncio.run(run_load(build_app(stack), path, args.requests, args.concurrency))
+            for stack in ("bare", "legacy", "asgi")
+        }
+        for stack, seconds in results.items():
+            overhead = (seconds - results["bare"]) * 1e6
+            print(f"{path:<10}{stack:<8}{seconds * 1e6:>10.1f}{overhead:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Benchmark response serialization for /dataframes/query.
+
+Compares the CPU time and payload size of the JSON path (pandas DataFrame ->
+row dicts -> JSON) with the columnar Arrow IPC and Parquet paths, which build
+Arrow tables straight from the cursor's row chunks.
+
+No database is needed: rows are generated in the shape returned by the HANA
+driver (tuples of Python values).
+
+Usage::
+
+    python load-tests/bench_serialization.py --rows 50000 --repeat 5
+"""
+import argparse
+import datetime
+import decimal
+import json
+import random
+import time
+
+import pandas as pd
+
+from hana_ai.api.formats import PARQUET_AVAILABLE, serialize_table
+from hana_ai.api.streaming import PYARROW_AVAILABLE, rows_to_record_batch
+
+COLUMNS = ["ID", "CUSTOMER", "REGION", "AMOUNT", "PRICE", "QUANTITY", "CREATED_AT", "ACTIVE"]
+
+
+def generate_rows(count, seed=42):
+    """Generate synthetic result rows with typical HANA column types."""
+    rng = random.Random(seed)
+    regions = ["EMEA", "APJ", "NA", "LATAM"]
+    start = datetime.datetime(2024, 1, 1)
+    return [
+        (
+            i,
+            f"Customer {rng.randint(1, 5000):05d}",
+            rng.choice(regions),
+            rng.random() * 10000,
+            decimal.Decimal(f"{rng.randint(1, 99999) / 100:.2f}"),
+            rng.randint(1, 500),
+            start + datetime.timedelta(seconds=rng.randint(0, 31_536_000)),
+            rng.random() > 0.5,
+        )
+        for i in range(count)
+    ]
+
+
+def json_path(rows, chunk_size):
+    """Current JSON path: pandas DataFrame, row dicts, stdlib json."""
+    df = pd.DataFrame.from_records(rows, columns=COLUMNS)
+    records = df.to_dict(orient="records")
+    payload = {"columns": COLUMNS, "data": records, "row_count": len(records), "query_time": 0.0}
+    return json.dumps(payload, default=str).encode("utf-8")
+
+
+def arrow_table(rows, chunk_size):
+    """Build an Arrow table from row chunks as the columnar path does."""
+    import pyarrow as pa
+
+    batches = []
+    schema = None
+    for start in range(0, len(rows), chunk_size):
+        batch = rows_to_record_batch(COLUMNS, rows[start:start + chunk_size], schema)
+        schema = batch.schema
+        batches.append(batch)
+    return pa.Table.from_batches(batches, schema=schema)
+
+
+def arrow_path(rows, chunk_size):
+    """Columnar path producing an Arrow IPC stream."""
+    return serialize_table(arrow_table(rows, chunk_size), "arrow")
+
+
+def parquet_path(rows, chunk_size):
+    """Columnar path producing a Parquet file."""
+    return serialize_table(arrow_table(rows, chunk_size), "parquet")
+
+
+def measure(fn, rows, chunk_size, repeat):
+    """Return the best CPU time over ``repeat`` runs and the payload size."""
+    best = float("inf")
+    size = 0
+    for _ in range(repeat):
+        start = time.process_time()
+        payload = fn(rows, chunk_size)
+        best = min(best, time.process_time() - start)
+        size = len(payload)
+    return best, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=50000, help="Number of result rows")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per format; the best is reported")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="Rows per fetched chunk")
+    args = parser.parse_args()
+
+    rows = generate_rows(args.rows)
+    paths = [("json", json_path)]
+    if PYARROW_AVAILABLE:
+        paths.append(("arrow", arrow_path))
+    if PARQUET_AVAILABLE:
+        paths.append(("parquet", parquet_path))
+
+    results = [(name, *measure(fn, rows, args.chunk_size, args.repeat)) for name, fn in paths]
+    baseline_time, baseline_size = results[0][1], results[0][2]
+
+    print(f"{args.rows} rows, {len(COLUMNS)} columns, best of {args.repeat}")
+    print(f"{'format':<10}{'cpu ms':>10}{'speedup':>10}{'bytes':>14}{'size':>8}")
+    for name, cpu_time, size in results:
+        print(
+            f"{name:<10}{cpu_time * 1000:>10.1f}{baseline_time / cpu_time:>9.1f}x"
+            f"{size:>14,}{size / baseline_size:>7.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
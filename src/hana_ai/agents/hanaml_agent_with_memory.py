@@ -215,7 +215,7 @@ class HANAMLAgentWithMemory(object):
                                                                   input_messages_key="question",
                                                                   history_messages_key="history")
 
-    def run(self, question):
+    def run(self, question, callbacks=None):
         """
         Chat with the chatbot.
 
@@ -223,11 +223,14 @@ class HANAMLAgentWithMemory(object):
         ----------
         question : str
             The question to ask.
+        callbacks : list of BaseCallbackHandler, optional
+            Additional callback handlers for this run, e.g. to stream tokens and tool events.
+            Default to None.
         """
         try:
             response = self.agent_with_chat_history.invoke({"question": question},
                                                            config={**self.config,  # Preserve session_id
-                                                                   "callbacks": [self.observation_callback]
+                                                                   "callbacks": [self.observation_callback] + list(callbacks or [])
                                                                    })
         except Exception as e:
             error_message = str(e)
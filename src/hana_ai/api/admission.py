@@ -0,0 +1,279 @@
+"""
+Admission control with priority classes and queue-delay-based load shedding.
+
+Each worker processes at most ``ADMISSION_MAX_CONCURRENT`` requests at once;
+further requests wait for a slot in one queue per priority class. Freed
+slots go to the highest waiting class first:
+
+1. ``interactive``: reads such as queries, lookups and job status
+2. ``conversation``: agent conversations and other LLM-driven requests
+3. ``batch``: job submissions, forecasts and bulk writes
+
+Health, readiness and metrics requests are never queued or shed.
+
+Overload is detected from the measured queueing delay, in the manner of
+CoDel: a short queue that drains is fine, but when requests keep waiting
+longer than ``ADMISSION_TARGET_DELAY_SECONDS`` for a whole
+``ADMISSION_INTERVAL_SECONDS``, there is a standing queue and every waiting
+request would eventually time out. While overloaded, batch requests are
+rejected on arrival, conversations wait at most the target delay and
+interactive requests at most the interval. Rejections are immediate ``503``
+responses with ``Retry-After``, so clients back off while the admitted
+requests still finish within their deadlines.
+"""
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+from .config import settings
+from .deadline import remaining_time
+from .env_constants import METRICS_ENDPOINT
+from .metrics import record_admission, record_shed_request
+
+logger = logging.getLogger(__name__)
+
+# Priority classes, served in this order
+PRIORITIES = ("interactive", "conversation", "batch")
+
+# Paths that are never queued or shed
+ADMISSION_EXEMPT_PATHS = {"/", "/health", "/health/live", "/health/ready", METRICS_ENDPOINT, "/debug/profile"}
+
+class AdmissionController:
+    """
+    Priority admission queue shedding load when queueing delay stays high.
+
+    Runs on the event loop of the worker; it is not thread-safe.
+
+    Parameters
+    ----------
+    max_concurrent : int
+        Requests processed at once
+    target_delay : float
+        Acceptable standing queueing delay in seconds
+    interval : float
+        Seconds the queueing delay must stay above target to be overload
+    queue_timeout : float
+        Longest wait for a slot in seconds without overload
+    max_queue : int
+        Waiting requests; beyond it, the newest request of a lower priority
+        class than the arriving one is shed, or else the arriving one
+    route_priorities : Dict[str, str], optional
+        Priority class by path prefix, or by ``"METHOD /prefix"``; the
+        longest matching prefix wins and other routes are interactive
+    """
+    def __init__(self, max_concurrent: int, target_delay: float, interval: float, queue_timeout: float,
+                 max_queue: int, route_priorities: Optional[Dict[str, str]] = None):
+        self.max_concurrent = max(1, max_concurrent)
+        self.target_delay = target_delay
+        self.interval = interval
+        self.queue_timeout = queue_timeout
+        self.max_queue = max_queue
+        rules = []
+        for key, priority in (route_priorities or {}).items():
+            if priority not in PRIORITIES:
+                logger.warning(f"Ignoring unknown admission priority {priority!r} for {key}")
+                continue
+            method, _, prefix = key.rpartition(" ")
+            rules.append((method.upper(), prefix, priority))
+        # Longest prefixes first, method-specific rules before others of the same prefix
+        self.route_priorities = sorted(rules, key=lambda rule: (len(rule[1]), bool(rule[0])), reverse=True)
+        self.in_flight = 0
+        self.overloaded = False
+        self._queues: Dict[str, Deque[Tuple[float, asyncio.Future]]] = {priority: deque() for priority in PRIORITIES}
+        # End of the interval after which queueing delay above target is overload
+        self._above_target_until: Optional[float] = None
+
+    def priority(self, method: str, path: str) -> Optional[str]:
+        """
+        Get the priority class of a request.
+
+        Parameters
+        ----------
+        method : str
+            HTTP method
+        path : str
+            Request path
+
+        Returns
+        -------
+        str or None
+            The priority class, or None if the request is exempt from
+            admission control
+        """
+        if path in ADMISSION_EXEMPT_PATHS:
+            return None
+        for rule_method, prefix, priority in self.route_priorities:
+            if path.startswith(prefix) and (not rule_method or rule_method == method):
+                return priority
+        return "interactive"
+
+    @property
+    def waiting(self) -> int:
+        """Number of requests waiting for a slot."""
+        return sum(len(queue) for queue in self._queues.values())
+
+    @property
+    def retry_after(self) -> int:
+        """Seconds a rejected client should wait before retrying."""
+        return max(1, math.ceil(self.interval))
+
+    def _observe(self, queue_delay: float, now: float):
+        """Update the overload state with the queueing delay of a request leaving the queue."""
+        if queue_delay < self.target_delay or self.waiting == 0:
+            if self.overloaded:
+                logger.info("Admission queue drained, no longer shedding load")
+            self._above_target_until = None
+            self.overloaded = False
+        elif self._above_target_until is None:
+            self._above_target_until = now + self.interval
+        elif now >= self._above_target_until and not self.overloaded:
+            logger.warning(f"Queueing delay above {self.target_delay:g}s for {self.interval:g}s, shedding load")
+            self.overloaded = True
+
+    def _max_wait(self, priority: str) -> Optional[float]:
+        """Longest wait for a slot, or None to reject the request on arrival."""
+        if not self.overloaded:
+            wait = self.queue_timeout
+        elif priority == "interactive":
+            wait = self.interval
+        elif priority == "conversation":
+            wait = self.target_delay
+        else:
+            return None
+        remaining = remaining_time()
+        return min(wait, remaining) if remaining is not None else wait
+
+    def _shed(self, priority: str) -> bool:
+        record_shed_request(priority)
+        return False
+
+    def _make_room(self, priority: str) -> bool:
+        """Shed the newest waiting request of a lower priority class; False if there is none."""
+        for lower in reversed(PRIORITIES[PRIORITIES.index(priority) + 1:]):
+            queue = self._queues[lower]
+            while queue:
+                _, future = queue.pop()
+                if not future.done():
+                    future.set_result(False)
+                    self._shed(lower)
+                    return True
+        return False
+
+    def _expire(self, queue: Deque[Tuple[float, asyncio.Future]], entry: Tuple[float, asyncio.Future], priority: str):
+        enqueued_at, future = entry
+        if future.done():
+            return
+        try:
+            queue.remove(entry)
+        except ValueError:
+            pass
+        now = time.monotonic()
+        self._observe(now - enqueued_at, now)
+        future.set_result(False)
+        self._shed(priority)
+
+    async def admit(self, priority: str) -> bool:
+        """
+        Wait for a slot.
+
+        Parameters
+        ----------
+        priority : str
+            Priority class of the request
+
+        Returns
+        -------
+        bool
+            True if the request was admitted and must call ``release`` when
+            done, False if it was shed
+        """
+        now = time.monotonic()
+        if self.in_flight < self.max_concurrent:
+            self.in_flight += 1
+            self._observe(0.0, now)
+            record_admission(priority, 0.0)
+            return True
+
+        max_wait = self._max_wait(priority)
+        if max_wait is None or max_wait <= 0:
+            return self._shed(priority)
+        if self.waiting >= self.max_queue and not self._make_room(priority):
+            return self._shed(priority)
+
+        loop = asyncio.get_running_loop()
+        queue = self._queues[priority]
+        entry = (now, loop.create_future())
+        queue.append(entry)
+        timer = loop.call_later(max_wait, self._expire, queue, entry, priority)
+        try:
+            admitted = await asyncio.shield(entry[1])
+        except asyncio.CancelledError:
+            # Client went away while waiting; pass on a slot handed over meanwhile
+            future = entry[1]
+            if future.done() and future.result():
+                self.release()
+            else:
+                future.cancel()
+                try:
+                    queue.remove(entry)
+                except ValueError:
+                    pass
+            raise
+        finally:
+            timer.cancel()
+        if admitted:
+            record_admission(priority, time.monotonic() - now)
+        return admitted
+
+    def release(self):
+        """Free the slot of a finished request, handing it to the highest waiting class."""
+        now = time.monotonic()
+        for priority in PRIORITIES:
+            queue = self._queues[priority]
+            while queue:
+                enqueued_at, future = queue.popleft()
+                if future.done():
+                    continue
+                self._observe(now - enqueued_at, now)
+                future.set_result(True)
+                return
+        self.in_flight -= 1
+
+    def stats(self) -> Dict[str, object]:
+        """
+        Get the admission state.
+
+        Returns
+        -------
+        Dict[str, object]
+            In-flight and waiting requests per class, and the overload state
+        """
+        return {
+            "in_flight": self.in_flight,
+            "max_concurrent": self.max_concurrent,
+            "waiting": {priority: len(queue) for priority, queue in self._queues.items()},
+            "overloaded": self.overloaded,
+        }
+
+def create_admission_controller() -> Optional[AdmissionController]:
+    """
+    Create the admission controller from the settings.
+
+    Returns
+    -------
+    AdmissionController or None
+        The controller, or None if admission control is disabled
+    """
+    if not settings.ADMISSION_CONTROL_ENABLED:
+        return None
+    return AdmissionController(
+        settings.ADMISSION_MAX_CONCURRENT,
+        settings.ADMISSION_TARGET_DELAY_SECONDS,
+        settings.ADMISSION_INTERVAL_SECONDS,
+        settings.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+        settings.ADMISSION_MAX_QUEUE,
+        settings.ADMISSION_ROUTE_PRIORITIES
+    )
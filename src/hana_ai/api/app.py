@@ -1,36 +1,82 @@
 """
 Main FastAPI application for the HANA AI Toolkit API.
+
+Importing this module is kept cheap so containers become ready quickly:
+routers import hana_ml, langchain and the toolkit on first use, GPU
+utilities are only loaded when GPU acceleration is enabled, and logging,
+metrics and other startup work run in the application lifespan. Slow
+initialization (GPU setup, LLM client warm-up, importing the deferred
+modules, environment validation) continues in a background thread after
+the application has started; the instance reports ready once it finished.
+Health endpoints serve cached validation results and dependency probe
+snapshots, which are refreshed in the background.
 """
+import importlib
 import logging
-import socket
-from typing import List, Dict, Any
-from fastapi import FastAPI, Depends, Request, Response
+import threading
+from contextlib import asynccontextmanager
+from typing import List, Dict, Any, Optional
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.middleware.httpsredirect import HTTPSRedirectMiddleware
 from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
 from starlette.middleware.sessions import SessionMiddleware
-from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
 
+from .auth import api_key_header, get_api_key
 from .config import settings
-from .routers import agents, dataframes, tools, vectorstore
-from .middleware import (
-    RequestLoggerMiddleware, 
-    SecurityHeadersMiddleware,
-    RateLimitMiddleware,
-    MetricsMiddleware
-)
-from .logging import setup_logging
+from .deadline import DeadlineExceeded
+from .failover import ConcurrencyLimitExceededError
+from .health import health_monitor
+from .routers import agents, dataframes, jobs, tools, vectorstore
+from .middleware import APIMiddleware
+from .jobs import job_manager
+from .logging import setup_logging, shutdown_logging
 from .metrics import setup_metrics, get_metrics
-from .security import validate_external_request
-from .validation import validate_environment
+from .responses import FastJSONResponse
+from .security import is_internal_ip
+from .tracing import tracer
+from .validation import validation_cache
 
-# Configure logging
-setup_logging()
 logger = logging.getLogger(__name__)
 
-# Initialize metrics
-setup_metrics()
+# Modules the routers import on first use. They are imported after startup
+# in the background, or before forking workers (see serve.preload), so that
+# the first request does not wait for them.
+DEFERRED_IMPORTS = (
+    "hana_ml.dataframe",
+    "hana_ai.tools.toolkit",
+    "hana_ai.agents.hanaml_agent_with_memory",
+    "hana_ai.agents.hana_sql_agent",
+    "hana_ai.smart_dataframe",
+    "hana_ai.vectorstore.hana_vector_engine",
+    "hana_ai.vectorstore.embedding_service",
+)
+
+def import_deferred_modules():
+    """
+    Import the heavy modules the routers load on first use.
+    
+    Failures are logged; the affected endpoints report the import error
+    when they are called.
+    """
+    for name in DEFERRED_IMPORTS:
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            logger.warning(f"Failed to import {name}: {str(e)}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run startup work before serving requests and clean up afterwards."""
+    setup_logging()
+    setup_metrics()
+    await startup()
+    try:
+        yield
+    finally:
+        await shutdown()
 
 # Create FastAPI application
 app = FastAPI(
@@ -39,36 +85,14 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/api/docs" if settings.DEVELOPMENT_MODE else None,
     redoc_url="/api/redoc" if settings.DEVELOPMENT_MODE else None,
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan,
 )
 
-# Custom middleware to prevent external calls
-class ExternalCallPreventionMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
-        # Check if the request is trying to access external resources
-        # This is a simplified implementation focused on the Host header
-        if settings.RESTRICT_EXTERNAL_CALLS:
-            host = request.headers.get("Host", "")
-            if host:
-                is_valid, reason = validate_external_request(f"https://{host}")
-                if not is_valid:
-                    logger.warning(f"Blocked potential external request: {reason}")
-                    return JSONResponse(
-                        status_code=403,
-                        content={
-                            "detail": "External calls are not allowed by this application",
-                            "reason": reason
-                        }
-                    )
-        
-        # Process the request
-        return await call_next(request)
-
-# Add middleware
-app.add_middleware(RequestLoggerMiddleware)
-app.add_middleware(SecurityHeadersMiddleware)
-app.add_middleware(ExternalCallPreventionMiddleware)  # Add our new middleware
-app.add_middleware(MetricsMiddleware)
-app.add_middleware(RateLimitMiddleware, rate_limit_per_minute=settings.RATE_LIMIT_PER_MINUTE)
+# Add middleware. Request IDs, host validation (external call prevention),
+# rate limiting, security headers, logging and metrics run in one pure ASGI
+# middleware.
+app.add_middleware(APIMiddleware, rate_limit_per_minute=settings.RATE_LIMIT_PER_MINUTE)
 app.add_middleware(GZipMiddleware, minimum_size=1000)
 app.add_middleware(SessionMiddleware, secret_key=settings.SESSION_SECRET_KEY)
 
@@ -88,98 +112,125 @@ app.add_middleware(
 # Register routers
 app.include_router(agents.router, prefix="/api/v1/agents", tags=["Agents"])
 app.include_router(dataframes.router, prefix="/api/v1/dataframes", tags=["DataFrames"])
+app.include_router(jobs.router, prefix="/api/v1/jobs", tags=["Jobs"])
 app.include_router(tools.router, prefix="/api/v1/tools", tags=["Tools"])
 app.include_router(vectorstore.router, prefix="/api/v1/vectorstore", tags=["VectorStore"])
 
-# Startup and shutdown events
-@app.on_event("startup")
-async def startup():
-    """Initialize resources on application startup."""
-    logger.info("Starting HANA AI Toolkit API")
+def configure_gpu():
+    """Apply NVIDIA settings and create the Multi-GPU Manager."""
+    import os
+    # Set CUDA device order
+    os.environ["CUDA_DEVICE_ORDER"] = settings.NVIDIA_CUDA_DEVICE_ORDER
+    # Set visible devices
+    os.environ["CUDA_VISIBLE_DEVICES"] = settings.NVIDIA_CUDA_VISIBLE_DEVICES
+    # Set TF32 precision (Ampere+ GPUs)
+    os.environ["NVIDIA_TF32_OVERRIDE"] = str(settings.NVIDIA_TF32_OVERRIDE)
+    # Set CUDA cache settings
+    os.environ["CUDA_CACHE_MAXSIZE"] = str(settings.NVIDIA_CUDA_CACHE_MAXSIZE)
+    os.environ["CUDA_CACHE_PATH"] = settings.NVIDIA_CUDA_CACHE_PATH
     
-    # Set NVIDIA environment variables for optimal GPU performance
-    if settings.ENABLE_GPU_ACCELERATION:
-        import os
-        # Set CUDA device order
-        os.environ["CUDA_DEVICE_ORDER"] = settings.NVIDIA_CUDA_DEVICE_ORDER
-        # Set visible devices
-        os.environ["CUDA_VISIBLE_DEVICES"] = settings.NVIDIA_CUDA_VISIBLE_DEVICES
-        # Set TF32 precision (Ampere+ GPUs)
-        os.environ["NVIDIA_TF32_OVERRIDE"] = str(settings.NVIDIA_TF32_OVERRIDE)
-        # Set CUDA cache settings
-        os.environ["CUDA_CACHE_MAXSIZE"] = str(settings.NVIDIA_CUDA_CACHE_MAXSIZE)
-        os.environ["CUDA_CACHE_PATH"] = settings.NVIDIA_CUDA_CACHE_PATH
-        
-        # Initialize PyTorch settings if available
-        try:
-            import torch
-            # Enable TF32 precision if available
-            if hasattr(torch.backends, "cuda") and hasattr(torch.backends.cuda, "matmul"):
-                torch.backends.cuda.matmul.allow_tf32 = True
-            if hasattr(torch.backends, "cudnn"):
-                torch.backends.cudnn.allow_tf32 = True
+    # Initialize PyTorch settings if available
+    try:
+        import torch
+        # Enable TF32 precision if available
+        if hasattr(torch.backends, "cuda") and hasattr(torch.backends.cuda, "matmul"):
+            torch.backends.cuda.matmul.allow_tf32 = True
+        if hasattr(torch.backends, "cudnn"):
+            torch.backends.cudnn.allow_tf32 = True
+            
+        # Set memory fraction
+        if torch.cuda.is_available():
+            for i in range(torch.cuda.device_count()):
+                torch.cuda.set_per_process_memory_fraction(settings.CUDA_MEMORY_FRACTION, i)
                 
-            # Set memory fraction
-            if torch.cuda.is_available():
-                for i in range(torch.cuda.device_count()):
-                    torch.cuda.set_per_process_memory_fraction(settings.CUDA_MEMORY_FRACTION, i)
-                    
-            logger.info(f"GPU acceleration enabled with {torch.cuda.device_count()} devices")
-        except ImportError:
-            logger.info("PyTorch not available, some GPU optimizations disabled")
-        except Exception as e:
-            logger.warning(f"Error configuring GPU settings: {str(e)}")
+        logger.info(f"GPU acceleration enabled with {torch.cuda.device_count()} devices")
+    except ImportError:
+        logger.info("PyTorch not available, some GPU optimizations disabled")
+    except Exception as e:
+        logger.warning(f"Error configuring GPU settings: {str(e)}")
     
-    # Initialize Multi-GPU Manager if GPU acceleration is enabled
-    if settings.ENABLE_GPU_ACCELERATION:
+    # Initialize Multi-GPU Manager
+    try:
         from .gpu_utils import MultiGPUManager
-        try:
-            app.state.gpu_manager = MultiGPUManager(
-                strategy=settings.MULTI_GPU_STRATEGY,
-                memory_fraction=settings.CUDA_MEMORY_FRACTION,
-                enable_mixed_precision=True
-            )
-            logger.info(f"Multi-GPU Manager initialized with strategy: {settings.MULTI_GPU_STRATEGY}")
-        except Exception as e:
-            logger.warning(f"Failed to initialize Multi-GPU Manager: {str(e)}")
-    
-    # Run environment validation
-    validation_results = validate_environment()
-    app.state.validation_results = validation_results
-    
-    # Log validation results
-    if validation_results["overall"]["status"] == "error":
-        logger.error(
-            f"Environment validation failed: {validation_results['overall']['message']}", 
-            extra={"validation": validation_results}
-        )
-    elif validation_results["overall"]["status"] == "warning":
-        logger.warning(
-            f"Environment validation warnings: {validation_results['overall']['message']}",
-            extra={"validation": validation_results}
-        )
-    else:
-        logger.info(
-            "Environment validation passed successfully",
-            extra={"validation": validation_results}
+        app.state.gpu_manager = MultiGPUManager(
+            strategy=settings.MULTI_GPU_STRATEGY,
+            memory_fraction=settings.CUDA_MEMORY_FRACTION,
+            enable_mixed_precision=True
         )
+        logger.info(f"Multi-GPU Manager initialized with strategy: {settings.MULTI_GPU_STRATEGY}")
+    except Exception as e:
+        logger.warning(f"Failed to initialize Multi-GPU Manager: {str(e)}")
+
+def warm_up():
+    """
+    Initialize slow resources after startup.
+    
+    Runs in a background thread so startup is not delayed; the instance
+    reports ready once it finished. Each step is optional and only logs its
+    failures.
+    """
+    try:
+        # Set NVIDIA environment variables for optimal GPU performance
+        if settings.ENABLE_GPU_ACCELERATION:
+            configure_gpu()
+        
+        # Warm up the LLM client cache so the first request does not pay for
+        # SDK initialization
+        if settings.LLM_CACHE_WARMUP:
+            from .dependencies import warm_up_llm_cache
+            warm_up_llm_cache(app.state)
+        
+        # Import the modules the routers load on first use
+        if settings.IMPORT_WARMUP:
+            import_deferred_modules()
+        
+        # Run environment validation
+        validation_cache.refresh()
+    except Exception as e:
+        logger.error(f"Startup warm-up failed: {str(e)}", exc_info=True)
+    finally:
+        health_monitor.set_warmed_up()
+
+async def startup():
+    """Initialize resources on application startup."""
+    logger.info("Starting HANA AI Toolkit API")
     
     # Initialize connection pool
     app.state.connection_pool = {}
     
     # Initialize agent sessions
     app.state.agent_sessions = {}
+    
+    # Start the job workers and resume jobs queued before a restart
+    job_manager.set_runner(jobs.run_job)
+    await run_in_threadpool(job_manager.start)
+    
+    # Probe dependencies in the background for the health endpoints
+    health_monitor.start()
+    
+    # Continue slow initialization in the background; readiness waits for it
+    app.state.warmup_thread = threading.Thread(target=warm_up, name="startup-warmup", daemon=True)
+    app.state.warmup_thread.start()
 
-@app.on_event("shutdown")
 async def shutdown():
     """Clean up resources on application shutdown."""
     logger.info("Shutting down HANA AI Toolkit API")
+    # Fail readiness so load balancers stop sending new requests
+    health_monitor.set_draining()
+    # Stop taking jobs and let running ones finish; worker recycling and SIGHUP
+    # run this too, so jobs still running are re-queued for the next worker
+    await run_in_threadpool(job_manager.shutdown, False, settings.JOB_DRAIN_TIMEOUT, True)
+    health_monitor.stop()
+    # Export the remaining trace spans
+    tracer.shutdown()
     # Close all database connections
     for conn in app.state.connection_pool.values():
         try:
             conn.close()
         except Exception as e:
             logger.error(f"Error closing database connection: {str(e)}")
+    # Write the queued log records
+    shutdown_logging()
 
 # Health check endpoint
 @app.get(
@@ -192,19 +243,18 @@ async def health_check(request: Request):
     """
     Health check endpoint to verify the API is running.
     
-    Also checks connection to database if available.
+    Reports the cached environment validation status and the latest
+    dependency probe snapshot; no dependency is queried by the request.
     """
-    from hana_ml.dataframe import ConnectionContext
-    from .dependencies import get_connection_context
-    
-    # Use validation results if available
-    if hasattr(app.state, "validation_results"):
-        status = app.state.validation_results["overall"]["status"]
+    # Use cached validation results if available
+    validation_results = validation_cache.get()
+    if validation_results is not None:
+        status = validation_results["overall"]["status"]
         health_status = {
             "status": "healthy" if status == "ok" else ("degraded" if status == "warning" else "unhealthy"),
             "service": "HANA AI Toolkit API",
             "version": "1.0.0",
-            "message": app.state.validation_results["overall"]["message"]
+            "message": validation_results["overall"]["message"]
         }
     else:
         health_status = {
@@ -213,49 +263,171 @@ async def health_check(request: Request):
             "version": "1.0.0"
         }
     
-    # Check database if we have connections
-    if hasattr(app.state, "connection_pool") and app.state.connection_pool:
-        try:
-            # Try to get a connection
-            conn = next(iter(app.state.connection_pool.values()))
-            
-            # Test query
-            conn.sql("SELECT 1 FROM DUMMY").collect()
+    # Add the latest dependency probe results
+    snapshot = health_monitor.snapshot()
+    if snapshot is not None:
+        database = snapshot["checks"].get("database", {})
+        if database.get("status") == "up":
             health_status["database"] = "connected"
-        except Exception as e:
-            health_status["status"] = "degraded"
+        elif database.get("status") == "down":
             health_status["database"] = "disconnected"
-            health_status["database_error"] = str(e)
+            health_status["database_error"] = database.get("error")
+        if snapshot["status"] != "healthy" and health_status["status"] == "healthy":
+            health_status["status"] = "degraded"
+        health_status["checks"] = snapshot["checks"]
+        health_status["checked_age_seconds"] = snapshot["age_seconds"]
     
     return health_status
 
+@app.get(
+    "/health",
+    tags=["Health"],
+    summary="Dependency status",
+    description="Get the latest dependency probe results; does not affect readiness"
+)
+async def dependency_health():
+    """
+    Report the dependencies of the instance.
+    
+    Serves the latest probe snapshot with a ``services`` entry per probe for
+    monitors. Always returns 200: dependencies are shared by all instances,
+    so their failures are reported here rather than failing readiness.
+    """
+    snapshot = health_monitor.snapshot()
+    if snapshot is None:
+        return {"status": "unknown", "checks": {}, "services": {}}
+    services = {
+        name: {"is_healthy": check.get("status") != "down", "status": check.get("status")}
+        for name, check in snapshot["checks"].items()
+    }
+    return {**snapshot, "services": services}
+
+@app.get(
+    "/health/live",
+    tags=["Health"],
+    summary="Liveness probe",
+    description="Succeed while the process serves requests, independent of dependencies"
+)
+async def liveness_check():
+    """
+    Liveness probe for the orchestrator.
+    
+    Dependency failures do not fail liveness, so an outage of the database
+    does not restart the instance.
+    """
+    return health_monitor.liveness()
+
+@app.get(
+    "/health/ready",
+    tags=["Health"],
+    summary="Readiness probe",
+    description="Succeed once startup and warm-up finished, until the instance shuts down"
+)
+async def readiness_check():
+    """
+    Readiness probe for the orchestrator and load balancers.
+    
+    Returns 503 before startup and warm-up finished and while the instance
+    shuts down. Dependency outages do not fail readiness; see ``/health``.
+    """
+    readiness = health_monitor.readiness()
+    return JSONResponse(
+        status_code=200 if readiness["ready"] else 503,
+        content={**readiness, "status": "ready" if readiness["ready"] else "not_ready"}
+    )
+
+async def authorize_validation_refresh(
+    refresh: bool = Query(False, description="Validate again instead of serving the cached results (requires an API key)"),
+    api_key: Optional[str] = Depends(api_key_header)
+) -> bool:
+    """
+    Require a valid API key for forced validation refreshes only.
+    
+    Parameters
+    ----------
+    refresh : bool
+        Whether the client asks to validate again
+    api_key : str, optional
+        The API key provided in the X-API-Key header
+        
+    Returns
+    -------
+    bool
+        Whether to validate again
+    """
+    if refresh:
+        await get_api_key(api_key)
+    return refresh
+
 # Detailed validation endpoint
 @app.get(
     "/validate",
     tags=["Health"],
     summary="Environment validation",
-    description="Run comprehensive environment validation checks"
+    description="Get the latest environment validation results"
 )
-async def validation_check(request: Request):
+async def validation_check(refresh: bool = Depends(authorize_validation_refresh)):
     """
-    Run validation checks on the environment.
+    Get the results of the environment validation checks.
     
-    This endpoint runs comprehensive checks on the environment, including:
+    The checks cover:
     - System configuration
     - NVIDIA GPU availability and configuration
     - HANA database connectivity
     - SAP AI Core SDK integration
     - Required environment variables
-    """
-    # Trigger a new validation
-    from .validation import validate_environment
-    validation_results = validate_environment()
     
-    # Update stored results
-    app.state.validation_results = validation_results
+    Results are cached and refreshed in the background. ``refresh=true``
+    validates again on request; it is authenticated like the API routes
+    and returns results younger than ``VALIDATION_MIN_REFRESH_SECONDS`` as
+    they are.
+    """
+    if refresh:
+        validation_results = await run_in_threadpool(validation_cache.refresh)
+    else:
+        validation_results = validation_cache.get()
     
+    if validation_results is None:
+        return {
+            "overall": {
+                "status": "pending",
+                "message": "Environment validation has not completed yet"
+            }
+        }
     return validation_results
 
+def internal_only(request: Request, resource: str):
+    """
+    Reject requests from outside the BTP internal networks.
+    
+    Parameters
+    ----------
+    request : Request
+        The incoming request
+    resource : str
+        Name of the protected resource for the error message
+        
+    Returns
+    -------
+    JSONResponse or None
+        A 403 response for external clients, None for internal ones
+    """
+    # Get client IP address
+    client_host = request.client.host if request.client else "unknown"
+    forwarded_for = request.headers.get("X-Forwarded-For", "")
+    ip = forwarded_for.split(",")[0].strip() if forwarded_for else client_host
+    
+    if is_internal_ip(ip):
+        return None
+    
+    logger.warning(f"Blocked {resource.lower()} access from external IP: {ip}")
+    return JSONResponse(
+        status_code=403,
+        content={
+            "detail": f"{resource} is only available from internal BTP networks"
+        }
+    )
+
 # Metrics endpoint - Restricted to BTP internal networks only
 @app.get(
     "/metrics", 
@@ -268,35 +440,76 @@ async def metrics(request: Request):
     Endpoint for scraping Prometheus metrics.
     Restricted to BTP internal networks only.
     """
-    # Get client IP address
-    client_host = request.client.host if request.client else "unknown"
-    forwarded_for = request.headers.get("X-Forwarded-For", "")
-    ip = forwarded_for.split(",")[0].strip() if forwarded_for else client_host
+    rejection = internal_only(request, "Metrics endpoint")
+    if rejection is not None:
+        return rejection
     
-    # Check if IP is internal
-    is_internal = False
+    return Response(content=get_metrics(), media_type="text/plain")
+
+# CPU profiling endpoint - Restricted to BTP internal networks only
+@app.get(
+    "/debug/profile",
+    tags=["Monitoring"],
+    summary="CPU profile (internal BTP networks only)",
+    description="Sample the Python stacks of all threads of this worker and return a flamegraph profile"
+)
+async def debug_profile(
+    request: Request,
+    seconds: float = Query(10.0, gt=0, description="Profiling time, capped at PROFILER_MAX_SECONDS"),
+    format: str = Query("speedscope", pattern="^(speedscope|collapsed)$", description="speedscope JSON or collapsed stacks"),
+    idle: bool = Query(False, description="Include threads waiting on locks, queues or sockets")
+):
+    """
+    Profile the worker process serving the request.
     
-    # Local development IPs are always allowed
-    if ip in ["127.0.0.1", "localhost", "::1"]:
-        is_internal = True
-    else:
-        # Use the security module to check if IP is within BTP ranges
-        from .security import is_ip_in_range, BTP_IP_RANGES
-        for ip_range in BTP_IP_RANGES:
-            if is_ip_in_range(ip, ip_range):
-                is_internal = True
-                break
+    Open ``speedscope`` output at https://www.speedscope.app; ``collapsed``
+    output is the input format of ``flamegraph.pl``. Sampling overhead is
+    kept below ``PROFILER_MAX_OVERHEAD`` of one CPU and reported in the
+    ``X-Profile-Overhead`` header. Restricted to internal BTP networks.
+    """
+    rejection = internal_only(request, "Profiling endpoint")
+    if rejection is not None:
+        return rejection
+    if not settings.PROFILER_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
     
-    if not is_internal:
-        logger.warning(f"Blocked metrics access from external IP: {ip}")
-        return JSONResponse(
-            status_code=403,
-            content={
-                "detail": "Metrics endpoint is only available from internal BTP networks"
-            }
-        )
+    from .profiler import ProfilerBusyError, profiler
+    try:
+        profile = await run_in_threadpool(profiler.profile, seconds, idle)
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     
-    return Response(content=get_metrics(), media_type="text/plain")
+    headers = {
+        "X-Profile-Samples": str(profile.samples),
+        "X-Profile-Overhead": f"{profile.overhead:.4f}",
+    }
+    if format == "collapsed":
+        return Response(content=profile.collapsed(), media_type="text/plain", headers=headers)
+    headers["Content-Disposition"] = 'attachment; filename="profile.speedscope.json"'
+    return JSONResponse(content=profile.speedscope(), headers=headers)
+
+@app.exception_handler(DeadlineExceeded)
+async def deadline_exceeded_handler(request: Request, exc: DeadlineExceeded):
+    """
+    Report work stopped at the request deadline as a gateway timeout.
+    """
+    logger.warning(f"{request.method} {request.url.path} stopped: {str(exc)}")
+    return JSONResponse(
+        status_code=504,
+        content={"detail": str(exc), "type": type(exc).__name__}
+    )
+
+@app.exception_handler(ConcurrencyLimitExceededError)
+async def concurrency_limit_handler(request: Request, exc: ConcurrencyLimitExceededError):
+    """
+    Report calls rejected by an adaptive backend concurrency limit as overload.
+    """
+    logger.warning(f"{request.method} {request.url.path} rejected: {str(exc)}")
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc), "type": type(exc).__name__},
+        headers={"Retry-After": "1"}
+    )
 
 # Global exception handler
 @app.exception_handler(Exception)
@@ -0,0 +1,47 @@
+"""
+Lazily started background threads.
+
+Threads do not survive ``fork``: a server that forks its worker processes
+after the parent started a thread leaves the workers without it. A
+``BackgroundThread`` is therefore started on first use, and again the
+first time it is used in a forked process.
+"""
+import os
+import threading
+from typing import Callable, Optional
+
+
+class BackgroundThread:
+    """
+    Daemon thread started on first use in each process.
+
+    Parameters
+    ----------
+    target : Callable[[], None]
+        Function run by the thread
+    name : str
+        Thread name
+    """
+
+    def __init__(self, target: Callable[[], None], name: str):
+        self.target = target
+        self.name = name
+        self.thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def ensure_started(self):
+        """Start the thread unless it was started in this process."""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self.thread = threading.Thread(target=self.target, name=self.name, daemon=True)
+            self.thread.start()
+            self._pid = os.getpid()
+
+    @property
+    def running(self) -> bool:
+        """Whether the thread was started in this process and is still alive."""
+        return self._pid == os.getpid() and self.thread is not None and self.thread.is_alive()
@@ -0,0 +1,513 @@
+"""
+Response caching for idempotent read endpoints.
+
+This module implements the response cache controlled by ``ENABLE_CACHING``
+and ``CACHE_TTL_SECONDS``. Responses are stored as serialized bytes in a
+byte-size bounded LRU, keyed by a canonical fingerprint of the route, the
+normalized request parameters and the API key scope. Cached responses carry
+``ETag`` and ``Cache-Control`` headers and conditional requests are answered
+with ``304 Not Modified``.
+
+Routes with a stale TTL (``CACHE_STALE_TTLS``) keep expired responses for
+that long. While the HANA circuit breaker is open, when the request deadline
+is about to expire, or when producing the response fails with a server
+error, such a response is served instead, marked with ``X-Cache: STALE`` and
+a ``Warning: 110`` header, and revalidated in the background once the
+circuit half-opens.
+"""
+import asyncio
+import contextvars
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import HTTPException, Request, Response
+from fastapi.encoders import jsonable_encoder
+from starlette.concurrency import run_in_threadpool
+
+from .config import settings
+from .deadline import remaining_time
+from .metrics import record_cache_event, update_cache_size
+from .responses import dumps
+from .singleflight import response_flight
+from .timing import database_breaker
+
+logger = logging.getLogger(__name__)
+
+# Quoted string literals and quoted identifiers are kept verbatim
+_SQL_TOKEN_PATTERN = re.compile(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\")")
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+@dataclass
+class CacheEntry:
+    """A cached, serialized response."""
+    body: bytes
+    etag: str
+    media_type: str
+    created_at: float
+    expires_at: float
+    stale_until: float = 0.0
+
+    @property
+    def size(self) -> int:
+        """Size of the cached body in bytes."""
+        return len(self.body)
+
+    def is_fresh(self, now: Optional[float] = None) -> bool:
+        """Check whether the entry is still within its TTL."""
+        return (now or time.time()) < self.expires_at
+
+    def is_usable_stale(self, now: Optional[float] = None) -> bool:
+        """Check whether the entry may still be served stale."""
+        return (now or time.time()) < self.stale_until
+
+
+class ResponseCache:
+    """
+    Byte-size bounded LRU cache for serialized responses.
+
+    Parameters
+    ----------
+    max_bytes : int
+        Maximum total size of cached bodies in bytes
+    default_ttl : int
+        TTL in seconds for routes without an explicit TTL
+    route_ttls : Dict[str, int], optional
+        Per-route TTLs in seconds
+    stale_ttls : Dict[str, int], optional
+        Per-route seconds expired entries are kept to be served stale;
+        entries of other routes are dropped when they expire
+    """
+
+    def __init__(self, max_bytes: int, default_ttl: int, route_ttls: Optional[Dict[str, int]] = None,
+                 stale_ttls: Optional[Dict[str, int]] = None):
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.route_ttls = dict(route_ttls or {})
+        self.stale_ttls = dict(stale_ttls or {})
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def ttl_for(self, route: str) -> int:
+        """
+        Get the TTL for a route.
+
+        Parameters
+        ----------
+        route : str
+            Route identifier, e.g. ``"dataframes.query"``
+
+        Returns
+        -------
+        int
+            TTL in seconds
+        """
+        return self.route_ttls.get(route, self.default_ttl)
+
+    def stale_ttl_for(self, route: str) -> int:
+        """
+        Get the time a route's responses may be served stale.
+
+        Parameters
+        ----------
+        route : str
+            Route identifier, e.g. ``"dataframes.query"``
+
+        Returns
+        -------
+        int
+            Seconds after expiry, 0 if the route is never served stale
+        """
+        return self.stale_ttls.get(route, 0)
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """
+        Get a fresh entry from the cache.
+
+        Parameters
+        ----------
+        key : str
+            Cache key
+
+        Returns
+        -------
+        CacheEntry or None
+            The entry if present and not expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            now = time.time()
+            if not entry.is_fresh(now):
+                # Expired entries are kept for stale use until the stale TTL passes
+                if not entry.is_usable_stale(now):
+                    self._remove(key)
+                    update_cache_size(self._size)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def get_stale(self, key: str) -> Optional[CacheEntry]:
+        """
+        Get an entry that may be served stale.
+
+        Lookups are not counted as hits or misses.
+
+        Parameters
+        ----------
+        key : str
+            Cache key
+
+        Returns
+        -------
+        CacheEntry or None
+            The entry if present and within its stale TTL
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or not entry.is_usable_stale():
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, body: bytes, media_type: str, ttl: int, stale_ttl: int = 0) -> CacheEntry:
+        """
+        Store a serialized response.
+
+        Bodies larger than the whole cache are not stored.
+
+        Parameters
+        ----------
+        key : str
+            Cache key
+        body : bytes
+            Serialized response body
+        media_type : str
+            Response media type
+        ttl : int
+            TTL in seconds
+        stale_ttl : int, optional
+            Seconds after expiry the entry may be served stale
+
+        Returns
+        -------
+        CacheEntry
+            The created entry
+        """
+        now = time.time()
+        entry = CacheEntry(
+            body=body,
+            etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+            media_type=media_type,
+            created_at=now,
+            expires_at=now + ttl,
+            stale_until=now + ttl + stale_ttl
+        )
+        if entry.size > self.max_bytes:
+            return entry
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._size += entry.size
+            while self._size > self.max_bytes and self._entries:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+            update_cache_size(self._size)
+        return entry
+
+    def invalidate(self, prefix: Optional[str] = None):
+        """
+        Remove entries from the cache.
+
+        Parameters
+        ----------
+        prefix : str, optional
+            Only remove keys starting with this prefix. Removes everything if omitted.
+        """
+        with self._lock:
+            for key in [k for k in self._entries if prefix is None or k.startswith(prefix)]:
+                self._remove(key)
+            update_cache_size(self._size)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns
+        -------
+        Dict[str, Any]
+            Entry count, size and hit ratio
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "size_bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= entry.size
+
+
+def normalize_sql(sql: str) -> str:
+    """
+    Canonicalize a SQL statement for use in a cache key.
+
+    Whitespace runs are collapsed, trailing semicolons removed and text outside
+    quoted literals and quoted identifiers is upper-cased, which matches how
+    HANA treats unquoted identifiers and keywords.
+
+    Parameters
+    ----------
+    sql : str
+        SQL statement
+
+    Returns
+    -------
+    str
+        Normalized statement
+    """
+    parts = _SQL_TOKEN_PATTERN.split(sql.strip())
+    normalized = []
+    for i, part in enumerate(parts):
+        if i % 2:
+            # Quoted literal or identifier
+            normalized.append(part)
+        else:
+            normalized.append(_WHITESPACE_PATTERN.sub(" ", part).upper())
+    return "".join(normalized).strip().rstrip(";").strip()
+
+
+def make_cache_key(route: str, api_key: Optional[str], params: Dict[str, Any]) -> str:
+    """
+    Build a canonical cache key.
+
+    Parameters
+    ----------
+    route : str
+        Route identifier
+    api_key : str, optional
+        API key of the caller; only a hash of it is part of the key
+    params : Dict[str, Any]
+        Normalized request parameters
+
+    Returns
+    -------
+    str
+        Cache key of the form ``"<route>:<digest>"``
+    """
+    scope = hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:16]
+    canonical = json.dumps(
+        {"scope": scope, "params": jsonable_encoder(params)},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str
+    )
+    return f"{route}:{hashlib.sha256(canonical.encode('utf-8')).hexdigest()}"
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def _entry_response(request: Request, entry: CacheEntry, cache_status: str) -> Response:
+    now = time.time()
+    headers = {
+        "ETag": entry.etag,
+        "Cache-Control": f"private, max-age={max(0, int(entry.expires_at - now))}",
+        "Age": str(max(0, int(now - entry.created_at))),
+        "X-Cache": cache_status,
+    }
+    if cache_status == "STALE":
+        headers["Warning"] = '110 - "Response is Stale"'
+    if _etag_matches(request, entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type=entry.media_type, headers=headers)
+
+
+def serialize_json(content: Any) -> bytes:
+    """
+    Serialize a response payload to JSON bytes.
+
+    Parameters
+    ----------
+    content : Any
+        Payload, including pydantic models and DataFrames
+
+    Returns
+    -------
+    bytes
+        UTF-8 encoded JSON
+    """
+    return dumps(content)
+
+
+async def cached_json_response(
+    request: Request,
+    route: str,
+    api_key: Optional[str],
+    params: Dict[str, Any],
+    producer: Callable[[], Any]
+) -> Response:
+    """
+    Serve a JSON response from the cache or produce and cache it.
+
+    Requests with ``Cache-Control: no-cache`` skip the lookup but still
+    refresh the cached entry; they are never served stale.
+
+    Parameters
+    ----------
+    request : Request
+        The FastAPI request object
+    route : str
+        Route identifier used for the key, TTL and metrics
+    api_key : str, optional
+        API key of the caller
+    params : Dict[str, Any]
+        Normalized request parameters
+    producer : Callable[[], Any]
+        Computes the payload on a miss. Synchronous producers run in the
+        thread pool so they do not block the event loop.
+
+    Returns
+    -------
+    Response
+        The (possibly cached) response
+    """
+    key = make_cache_key(route, api_key, params)
+
+    if not settings.ENABLE_CACHING:
+        # Still coalesce identical in-flight requests
+        async def produce_body() -> bytes:
+            return await _produce_body(producer)
+
+        body = await response_flight.do_async(key, produce_body)
+        return Response(content=body, media_type="application/json")
+
+    bypass = "no-cache" in request.headers.get("cache-control", "").lower()
+
+    stale = None
+    if not bypass:
+        entry = response_cache.get(key)
+        if entry is not None:
+            record_cache_event(route, "hit")
+            return _entry_response(request, entry, "HIT")
+        stale = response_cache.get_stale(key)
+        if stale is not None and _should_serve_stale():
+            return _stale_response(request, key, route, stale, producer)
+
+    record_cache_event(route, "miss")
+
+    async def produce_entry() -> CacheEntry:
+        return await _produce_entry(key, route, producer)
+
+    try:
+        # Concurrent misses for the same key share a single execution
+        entry = await response_flight.do_async(key, produce_entry)
+    except Exception as e:
+        if stale is None or (isinstance(e, HTTPException) and e.status_code < 500):
+            raise
+        logger.warning(f"Serving stale {route} response after error: {str(e)}")
+        return _stale_response(request, key, route, stale, producer)
+    return _entry_response(request, entry, "MISS")
+
+
+async def _produce_entry(key: str, route: str, producer: Callable[[], Any]) -> CacheEntry:
+    body = await _produce_body(producer)
+    return response_cache.set(
+        key, body, "application/json", response_cache.ttl_for(route), response_cache.stale_ttl_for(route)
+    )
+
+
+async def _produce_body(producer: Callable[[], Any]) -> bytes:
+    if asyncio.iscoroutinefunction(producer):
+        content = await producer()
+    else:
+        content = await run_in_threadpool(producer)
+    return serialize_json(content)
+
+
+def _should_serve_stale() -> bool:
+    """Whether producing a fresh response is bound to fail or miss the deadline."""
+    if database_breaker().is_open:
+        return True
+    remaining = remaining_time()
+    return remaining is not None and remaining < settings.CACHE_STALE_IF_DEADLINE_SECONDS
+
+
+def _stale_response(
+    request: Request,
+    key: str,
+    route: str,
+    entry: CacheEntry,
+    producer: Callable[[], Any]
+) -> Response:
+    record_cache_event(route, "stale")
+    _schedule_revalidation(key, route, producer)
+    return _entry_response(request, entry, "STALE")
+
+
+# Background revalidations by cache key
+_revalidations: Dict[str, "asyncio.Future"] = {}
+
+
+def _schedule_revalidation(key: str, route: str, producer: Callable[[], Any]):
+    """
+    Refresh a stale entry in the background once the HANA circuit half-opens.
+
+    At most one revalidation per key runs at a time. It runs outside the
+    request context, so the deadline and stage timings of the request that
+    served the stale response do not apply.
+    """
+    if key in _revalidations:
+        return
+
+    async def produce_entry() -> CacheEntry:
+        return await _produce_entry(key, route, producer)
+
+    async def revalidate():
+        try:
+            await asyncio.sleep(database_breaker().seconds_until_half_open())
+            await response_flight.do_async(key, produce_entry)
+            record_cache_event(route, "revalidated")
+        except Exception as e:
+            logger.info(f"Revalidation of stale {route} response failed: {str(e)}")
+        finally:
+            _revalidations.pop(key, None)
+
+    _revalidations[key] = contextvars.Context().run(asyncio.ensure_future, revalidate())
+
+
+# Global response cache instance
+response_cache = ResponseCache(
+    max_bytes=settings.CACHE_MAX_BYTES,
+    default_ttl=settings.CACHE_TTL_SECONDS,
+    route_ttls=settings.CACHE_ROUTE_TTLS,
+    stale_ttls=settings.CACHE_STALE_TTLS
+)
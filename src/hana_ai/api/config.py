@@ -15,13 +15,78 @@ from .env_constants import (
     DEFAULT_NVIDIA_VISIBLE_DEVICES,
     DEFAULT_NVIDIA_DRIVER_CAPABILITIES,
     DEFAULT_RATE_LIMIT,
+    DEFAULT_RATE_LIMIT_BACKEND,
+    DEFAULT_RATE_LIMIT_SQLITE_PATH,
+    DEFAULT_RATE_LIMIT_MAX_KEYS,
+    DEFAULT_RATE_LIMIT_ROUTE_COSTS,
     DEFAULT_MAX_REQUEST_SIZE_MB,
     DEFAULT_REQUEST_TIMEOUT_SECONDS,
+    DEFAULT_ADMISSION_MAX_CONCURRENT,
+    DEFAULT_ADMISSION_TARGET_DELAY_SECONDS,
+    DEFAULT_ADMISSION_INTERVAL_SECONDS,
+    DEFAULT_ADMISSION_QUEUE_TIMEOUT_SECONDS,
+    DEFAULT_ADMISSION_MAX_QUEUE,
+    DEFAULT_ADMISSION_ROUTE_PRIORITIES,
+    DEFAULT_CONCURRENCY_INITIAL_LIMIT,
+    DEFAULT_CONCURRENCY_MIN_LIMIT,
+    DEFAULT_CONCURRENCY_MAX_LIMIT,
+    DEFAULT_CONCURRENCY_TOLERANCE,
+    DEFAULT_CONCURRENCY_QUEUE_TIMEOUT,
+    DEFAULT_RETRY_BUDGET_RATIO,
+    DEFAULT_RETRY_BUDGET_MAX_TOKENS,
+    DEFAULT_HEDGE_PERCENTILE,
+    DEFAULT_HEDGE_MIN_SAMPLES,
+    DEFAULT_HEDGE_MAX_WORKERS,
     DEFAULT_CONNECTION_POOL_SIZE,
     DEFAULT_LOG_LEVEL,
     DEFAULT_LOG_FORMAT,
+    DEFAULT_LOG_QUEUE_SIZE,
+    DEFAULT_LOG_BATCH_SIZE,
+    DEFAULT_LOG_SAMPLE_RATES,
+    DEFAULT_LOG_RATE_LIMIT_PER_SECOND,
     DEFAULT_PROMETHEUS_PORT,
-    DEFAULT_MEMORY_EXPIRATION_SECONDS
+    DEFAULT_PROMETHEUS_MULTIPROC_DIR,
+    DEFAULT_MEMORY_EXPIRATION_SECONDS,
+    DEFAULT_LLM_CACHE_SIZE,
+    DEFAULT_CACHE_MAX_BYTES,
+    DEFAULT_CACHE_ROUTE_TTLS,
+    DEFAULT_CACHE_STALE_TTLS,
+    DEFAULT_CACHE_STALE_IF_DEADLINE_SECONDS,
+    DEFAULT_CIRCUIT_BREAKER_THRESHOLD,
+    DEFAULT_CIRCUIT_BREAKER_TIMEOUT,
+    DEFAULT_STREAM_CHUNK_SIZE,
+    DEFAULT_PAGE_MATERIALIZE_TTL_SECONDS,
+    DEFAULT_PAGE_MAX_MATERIALIZED,
+    DEFAULT_RESPONSE_VALIDATION_MAX_ROWS,
+    DEFAULT_SSE_BUFFER_SIZE,
+    DEFAULT_SSE_HEARTBEAT_SECONDS,
+    DEFAULT_SERVE_WORKERS,
+    DEFAULT_SERVE_MAX_WORKERS,
+    DEFAULT_SERVE_WORKER_MEMORY_MB,
+    DEFAULT_SERVE_MAX_REQUESTS,
+    DEFAULT_SERVE_MAX_REQUESTS_JITTER,
+    DEFAULT_SERVE_GRACEFUL_TIMEOUT,
+    DEFAULT_SERVE_TIMEOUT,
+    DEFAULT_JOB_STORE_PATH,
+    DEFAULT_JOB_MAX_WORKERS,
+    DEFAULT_JOB_MAX_PER_TENANT,
+    DEFAULT_JOB_MAX_QUEUED,
+    DEFAULT_JOB_RETENTION_SECONDS,
+    DEFAULT_JOB_CANCEL_POLL_INTERVAL,
+    DEFAULT_JOB_DRAIN_TIMEOUT,
+    DEFAULT_VALIDATION_CACHE_TTL_SECONDS,
+    DEFAULT_VALIDATION_CHECK_TIMEOUT_SECONDS,
+    DEFAULT_VALIDATION_MIN_REFRESH_SECONDS,
+    DEFAULT_HEALTH_PROBE_INTERVAL_SECONDS,
+    DEFAULT_HEALTH_PROBE_TIMEOUT_SECONDS,
+    DEFAULT_TRACING_SAMPLE_RATIO,
+    DEFAULT_TRACING_MAX_SPANS_PER_TRACE,
+    DEFAULT_TRACING_FILE_PATH,
+    DEFAULT_TRACING_FILE_MAX_BYTES,
+    DEFAULT_TRACING_EXPORT_INTERVAL_SECONDS,
+    DEFAULT_PROFILER_MAX_SECONDS,
+    DEFAULT_PROFILER_SAMPLE_INTERVAL_SECONDS,
+    DEFAULT_PROFILER_MAX_OVERHEAD
 )
 
 class Settings(BaseSettings):
@@ -34,6 +99,29 @@ class Settings(BaseSettings):
     LOG_LEVEL: str = Field(default=DEFAULT_LOG_LEVEL, env="LOG_LEVEL")
     LOG_FORMAT: str = Field(default=DEFAULT_LOG_FORMAT, env="LOG_FORMAT")
     LOG_FILE: Optional[str] = Field(default=None, env="LOG_FILE")
+    LOG_ASYNC: bool = Field(default=True, env="LOG_ASYNC")
+    LOG_QUEUE_SIZE: int = Field(default=DEFAULT_LOG_QUEUE_SIZE, env="LOG_QUEUE_SIZE")
+    LOG_BATCH_SIZE: int = Field(default=DEFAULT_LOG_BATCH_SIZE, env="LOG_BATCH_SIZE")
+    LOG_SAMPLE_RATES: Dict[str, float] = Field(
+        default_factory=lambda: dict(DEFAULT_LOG_SAMPLE_RATES),
+        env="LOG_SAMPLE_RATES"
+    )
+    LOG_RATE_LIMIT_PER_SECOND: int = Field(
+        default=DEFAULT_LOG_RATE_LIMIT_PER_SECOND,
+        env="LOG_RATE_LIMIT_PER_SECOND"
+    )
+    
+    # Multi-process Serving Settings
+    SERVE_WORKERS: int = Field(default=DEFAULT_SERVE_WORKERS, env="SERVE_WORKERS")
+    SERVE_MAX_WORKERS: int = Field(default=DEFAULT_SERVE_MAX_WORKERS, env="SERVE_MAX_WORKERS")
+    SERVE_WORKER_MEMORY_MB: int = Field(default=DEFAULT_SERVE_WORKER_MEMORY_MB, env="SERVE_WORKER_MEMORY_MB")
+    SERVE_MAX_REQUESTS: int = Field(default=DEFAULT_SERVE_MAX_REQUESTS, env="SERVE_MAX_REQUESTS")
+    SERVE_MAX_REQUESTS_JITTER: int = Field(
+        default=DEFAULT_SERVE_MAX_REQUESTS_JITTER,
+        env="SERVE_MAX_REQUESTS_JITTER"
+    )
+    SERVE_GRACEFUL_TIMEOUT: int = Field(default=DEFAULT_SERVE_GRACEFUL_TIMEOUT, env="SERVE_GRACEFUL_TIMEOUT")
+    SERVE_TIMEOUT: int = Field(default=DEFAULT_SERVE_TIMEOUT, env="SERVE_TIMEOUT")
     
     # Security Settings
     API_KEYS: List[str] = Field(
@@ -55,6 +143,13 @@ class Settings(BaseSettings):
     
     # Rate Limiting Settings
     RATE_LIMIT_PER_MINUTE: int = Field(default=DEFAULT_RATE_LIMIT, env="RATE_LIMIT_PER_MINUTE")
+    RATE_LIMIT_BACKEND: str = Field(default=DEFAULT_RATE_LIMIT_BACKEND, env="RATE_LIMIT_BACKEND")
+    RATE_LIMIT_SQLITE_PATH: str = Field(default=DEFAULT_RATE_LIMIT_SQLITE_PATH, env="RATE_LIMIT_SQLITE_PATH")
+    RATE_LIMIT_MAX_KEYS: int = Field(default=DEFAULT_RATE_LIMIT_MAX_KEYS, env="RATE_LIMIT_MAX_KEYS")
+    RATE_LIMIT_ROUTE_COSTS: Dict[str, int] = Field(
+        default_factory=lambda: dict(DEFAULT_RATE_LIMIT_ROUTE_COSTS),
+        env="RATE_LIMIT_ROUTE_COSTS"
+    )
     
     # Database Connection Settings
     HANA_HOST: str = Field(default="", env="HANA_HOST")
@@ -67,6 +162,14 @@ class Settings(BaseSettings):
     DEFAULT_LLM_MODEL: str = Field(default=SAP_AI_CORE_LLM_MODEL, env="DEFAULT_LLM_MODEL")
     DEFAULT_LLM_TEMPERATURE: float = Field(default=0.0, env="DEFAULT_LLM_TEMPERATURE")
     DEFAULT_LLM_MAX_TOKENS: int = Field(default=1000, env="DEFAULT_LLM_MAX_TOKENS")
+    LLM_CACHE_SIZE: int = Field(default=DEFAULT_LLM_CACHE_SIZE, env="LLM_CACHE_SIZE")
+    LLM_CACHE_WARMUP: bool = Field(default=True, env="LLM_CACHE_WARMUP")
+    # Hedged LLM completions: a second request is sent when the first is slower than the percentile
+    LLM_HEDGING_ENABLED: bool = Field(default=False, env="LLM_HEDGING_ENABLED")
+    LLM_HEDGE_PERCENTILE: float = Field(default=DEFAULT_HEDGE_PERCENTILE, env="LLM_HEDGE_PERCENTILE")
+    LLM_HEDGE_MIN_SAMPLES: int = Field(default=DEFAULT_HEDGE_MIN_SAMPLES, env="LLM_HEDGE_MIN_SAMPLES")
+    LLM_HEDGE_MAX_WORKERS: int = Field(default=DEFAULT_HEDGE_MAX_WORKERS, env="LLM_HEDGE_MAX_WORKERS")
+    IMPORT_WARMUP: bool = Field(default=True, env="IMPORT_WARMUP")
     
     # NVIDIA GPU Optimization Settings - Basic
     ENABLE_GPU_ACCELERATION: bool = Field(default=True, env="ENABLE_GPU_ACCELERATION")
@@ -101,16 +204,142 @@ class Settings(BaseSettings):
     CONNECTION_POOL_SIZE: int = Field(default=DEFAULT_CONNECTION_POOL_SIZE, env="CONNECTION_POOL_SIZE")
     REQUEST_TIMEOUT_SECONDS: int = Field(default=DEFAULT_REQUEST_TIMEOUT_SECONDS, env="REQUEST_TIMEOUT_SECONDS")
     MAX_REQUEST_SIZE_MB: int = Field(default=DEFAULT_MAX_REQUEST_SIZE_MB, env="MAX_REQUEST_SIZE_MB")
+    # Admission control: requests are shed by priority when queueing delay stays above target
+    ADMISSION_CONTROL_ENABLED: bool = Field(default=True, env="ADMISSION_CONTROL_ENABLED")
+    ADMISSION_MAX_CONCURRENT: int = Field(default=DEFAULT_ADMISSION_MAX_CONCURRENT, env="ADMISSION_MAX_CONCURRENT")
+    ADMISSION_TARGET_DELAY_SECONDS: float = Field(
+        default=DEFAULT_ADMISSION_TARGET_DELAY_SECONDS,
+        env="ADMISSION_TARGET_DELAY_SECONDS"
+    )
+    ADMISSION_INTERVAL_SECONDS: float = Field(
+        default=DEFAULT_ADMISSION_INTERVAL_SECONDS,
+        env="ADMISSION_INTERVAL_SECONDS"
+    )
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = Field(
+        default=DEFAULT_ADMISSION_QUEUE_TIMEOUT_SECONDS,
+        env="ADMISSION_QUEUE_TIMEOUT_SECONDS"
+    )
+    ADMISSION_MAX_QUEUE: int = Field(default=DEFAULT_ADMISSION_MAX_QUEUE, env="ADMISSION_MAX_QUEUE")
+    ADMISSION_ROUTE_PRIORITIES: Dict[str, str] = Field(
+        default_factory=lambda: dict(DEFAULT_ADMISSION_ROUTE_PRIORITIES),
+        env="ADMISSION_ROUTE_PRIORITIES"
+    )
+    # Circuit breaker of HANA connections; opened by consecutive connection errors
+    HANA_CIRCUIT_BREAKER_THRESHOLD: int = Field(
+        default=DEFAULT_CIRCUIT_BREAKER_THRESHOLD,
+        env="HANA_CIRCUIT_BREAKER_THRESHOLD"
+    )
+    HANA_CIRCUIT_BREAKER_TIMEOUT_SECONDS: float = Field(
+        default=DEFAULT_CIRCUIT_BREAKER_TIMEOUT,
+        env="HANA_CIRCUIT_BREAKER_TIMEOUT_SECONDS"
+    )
+    # Adaptive concurrency limits of the HANA and LLM backends
+    ADAPTIVE_CONCURRENCY_ENABLED: bool = Field(default=True, env="ADAPTIVE_CONCURRENCY_ENABLED")
+    ADAPTIVE_CONCURRENCY_INITIAL_LIMIT: int = Field(
+        default=DEFAULT_CONCURRENCY_INITIAL_LIMIT,
+        env="ADAPTIVE_CONCURRENCY_INITIAL_LIMIT"
+    )
+    ADAPTIVE_CONCURRENCY_MIN_LIMIT: int = Field(default=DEFAULT_CONCURRENCY_MIN_LIMIT, env="ADAPTIVE_CONCURRENCY_MIN_LIMIT")
+    ADAPTIVE_CONCURRENCY_MAX_LIMIT: int = Field(default=DEFAULT_CONCURRENCY_MAX_LIMIT, env="ADAPTIVE_CONCURRENCY_MAX_LIMIT")
+    ADAPTIVE_CONCURRENCY_TOLERANCE: float = Field(
+        default=DEFAULT_CONCURRENCY_TOLERANCE,
+        env="ADAPTIVE_CONCURRENCY_TOLERANCE"
+    )
+    ADAPTIVE_CONCURRENCY_QUEUE_TIMEOUT_SECONDS: float = Field(
+        default=DEFAULT_CONCURRENCY_QUEUE_TIMEOUT,
+        env="ADAPTIVE_CONCURRENCY_QUEUE_TIMEOUT_SECONDS"
+    )
+    # Retries and hedged requests per backend, as a share of successful calls
+    RETRY_BUDGET_RATIO: float = Field(default=DEFAULT_RETRY_BUDGET_RATIO, env="RETRY_BUDGET_RATIO")
+    RETRY_BUDGET_MAX_TOKENS: int = Field(default=DEFAULT_RETRY_BUDGET_MAX_TOKENS, env="RETRY_BUDGET_MAX_TOKENS")
+    STREAM_CHUNK_SIZE: int = Field(default=DEFAULT_STREAM_CHUNK_SIZE, env="STREAM_CHUNK_SIZE")
+    PAGE_MATERIALIZE_TTL_SECONDS: int = Field(
+        default=DEFAULT_PAGE_MATERIALIZE_TTL_SECONDS,
+        env="PAGE_MATERIALIZE_TTL_SECONDS"
+    )
+    PAGE_MAX_MATERIALIZED: int = Field(default=DEFAULT_PAGE_MAX_MATERIALIZED, env="PAGE_MAX_MATERIALIZED")
+    RESPONSE_VALIDATION_MAX_ROWS: int = Field(
+        default=DEFAULT_RESPONSE_VALIDATION_MAX_ROWS,
+        env="RESPONSE_VALIDATION_MAX_ROWS"
+    )
+    SSE_BUFFER_SIZE: int = Field(default=DEFAULT_SSE_BUFFER_SIZE, env="SSE_BUFFER_SIZE")
+    SSE_HEARTBEAT_SECONDS: float = Field(default=DEFAULT_SSE_HEARTBEAT_SECONDS, env="SSE_HEARTBEAT_SECONDS")
+    
+    # Job Settings
+    JOB_STORE_PATH: str = Field(default=DEFAULT_JOB_STORE_PATH, env="JOB_STORE_PATH")
+    JOB_MAX_WORKERS: int = Field(default=DEFAULT_JOB_MAX_WORKERS, env="JOB_MAX_WORKERS")
+    JOB_MAX_PER_TENANT: int = Field(default=DEFAULT_JOB_MAX_PER_TENANT, env="JOB_MAX_PER_TENANT")
+    JOB_MAX_QUEUED: int = Field(default=DEFAULT_JOB_MAX_QUEUED, env="JOB_MAX_QUEUED")
+    JOB_RETENTION_SECONDS: int = Field(default=DEFAULT_JOB_RETENTION_SECONDS, env="JOB_RETENTION_SECONDS")
+    JOB_CANCEL_POLL_INTERVAL: float = Field(default=DEFAULT_JOB_CANCEL_POLL_INTERVAL, env="JOB_CANCEL_POLL_INTERVAL")
+    JOB_DRAIN_TIMEOUT: float = Field(default=DEFAULT_JOB_DRAIN_TIMEOUT, env="JOB_DRAIN_TIMEOUT")
+    
+    # Environment Validation Settings
+    VALIDATION_CACHE_TTL_SECONDS: int = Field(
+        default=DEFAULT_VALIDATION_CACHE_TTL_SECONDS,
+        env="VALIDATION_CACHE_TTL_SECONDS"
+    )
+    VALIDATION_CHECK_TIMEOUT_SECONDS: float = Field(
+        default=DEFAULT_VALIDATION_CHECK_TIMEOUT_SECONDS,
+        env="VALIDATION_CHECK_TIMEOUT_SECONDS"
+    )
+    VALIDATION_MIN_REFRESH_SECONDS: int = Field(
+        default=DEFAULT_VALIDATION_MIN_REFRESH_SECONDS,
+        env="VALIDATION_MIN_REFRESH_SECONDS"
+    )
+    
+    # Health Probe Settings
+    HEALTH_PROBE_INTERVAL_SECONDS: float = Field(
+        default=DEFAULT_HEALTH_PROBE_INTERVAL_SECONDS,
+        env="HEALTH_PROBE_INTERVAL_SECONDS"
+    )
+    HEALTH_PROBE_TIMEOUT_SECONDS: float = Field(
+        default=DEFAULT_HEALTH_PROBE_TIMEOUT_SECONDS,
+        env="HEALTH_PROBE_TIMEOUT_SECONDS"
+    )
     
     # Monitoring Settings
     PROMETHEUS_ENABLED: bool = Field(default=True, env="PROMETHEUS_ENABLED")
     PROMETHEUS_PORT: int = Field(default=DEFAULT_PROMETHEUS_PORT, env="PROMETHEUS_PORT")
+    PROMETHEUS_MULTIPROC_DIR: str = Field(default=DEFAULT_PROMETHEUS_MULTIPROC_DIR, env="PROMETHEUS_MULTIPROC_DIR")
+    SERVER_TIMING_ENABLED: bool = Field(default=True, env="SERVER_TIMING_ENABLED")
     OPENTELEMETRY_ENABLED: bool = Field(default=False, env="OPENTELEMETRY_ENABLED")
     OPENTELEMETRY_ENDPOINT: Optional[str] = Field(default=None, env="OPENTELEMETRY_ENDPOINT")
+    TRACING_SAMPLE_RATIO: float = Field(default=DEFAULT_TRACING_SAMPLE_RATIO, env="TRACING_SAMPLE_RATIO")
+    TRACING_MAX_SPANS_PER_TRACE: int = Field(
+        default=DEFAULT_TRACING_MAX_SPANS_PER_TRACE,
+        env="TRACING_MAX_SPANS_PER_TRACE"
+    )
+    TRACING_FILE_PATH: str = Field(default=DEFAULT_TRACING_FILE_PATH, env="TRACING_FILE_PATH")
+    TRACING_FILE_MAX_BYTES: int = Field(default=DEFAULT_TRACING_FILE_MAX_BYTES, env="TRACING_FILE_MAX_BYTES")
+    TRACING_EXPORT_INTERVAL_SECONDS: float = Field(
+        default=DEFAULT_TRACING_EXPORT_INTERVAL_SECONDS,
+        env="TRACING_EXPORT_INTERVAL_SECONDS"
+    )
+    PROFILER_ENABLED: bool = Field(default=True, env="PROFILER_ENABLED")
+    PROFILER_MAX_SECONDS: float = Field(default=DEFAULT_PROFILER_MAX_SECONDS, env="PROFILER_MAX_SECONDS")
+    PROFILER_SAMPLE_INTERVAL_SECONDS: float = Field(
+        default=DEFAULT_PROFILER_SAMPLE_INTERVAL_SECONDS,
+        env="PROFILER_SAMPLE_INTERVAL_SECONDS"
+    )
+    PROFILER_MAX_OVERHEAD: float = Field(default=DEFAULT_PROFILER_MAX_OVERHEAD, env="PROFILER_MAX_OVERHEAD")
     
     # Cache Settings
     ENABLE_CACHING: bool = Field(default=True, env="ENABLE_CACHING")
     CACHE_TTL_SECONDS: int = Field(default=300, env="CACHE_TTL_SECONDS")  # 5 minutes
+    CACHE_MAX_BYTES: int = Field(default=DEFAULT_CACHE_MAX_BYTES, env="CACHE_MAX_BYTES")
+    CACHE_ROUTE_TTLS: Dict[str, int] = Field(
+        default_factory=lambda: dict(DEFAULT_CACHE_ROUTE_TTLS),
+        env="CACHE_ROUTE_TTLS"
+    )
+    CACHE_STALE_TTLS: Dict[str, int] = Field(
+        default_factory=lambda: dict(DEFAULT_CACHE_STALE_TTLS),
+        env="CACHE_STALE_TTLS"
+    )
+    CACHE_STALE_IF_DEADLINE_SECONDS: float = Field(
+        default=DEFAULT_CACHE_STALE_IF_DEADLINE_SECONDS,
+        env="CACHE_STALE_IF_DEADLINE_SECONDS"
+    )
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,249 @@
+"""
+Request deadlines and cooperative cancellation.
+
+``APIMiddleware`` gives every request a ``Deadline`` of
+``REQUEST_TIMEOUT_SECONDS`` (shortened by an ``X-Request-Timeout`` header)
+and keeps it in a context variable, which is copied into the thread pool
+that runs blocking endpoint code. Work running within the request checks
+the remaining budget instead of being abandoned in a watchdog thread:
+
+- SQL executed through an instrumented connection (see ``timing``) is not
+  started once the deadline has passed, gets the remaining time as its
+  query timeout, and is cancelled on the server when the deadline passes
+  while it runs
+- LLM calls, tool runs and agent iterations are not started once the
+  deadline has passed (``deadline_handler`` joins every LangChain callback
+  manager)
+- ``timing.stage`` blocks such as embedding calls check it when they start
+
+Expired work raises ``DeadlineExceeded``, which the API reports as 504.
+"""
+import functools
+import heapq
+import itertools
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Iterator, List, Optional
+
+from .background import BackgroundThread
+
+logger = logging.getLogger(__name__)
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when work is started or interrupted after its deadline."""
+
+class _Watchdog:
+    """Single thread running callbacks when their deadlines pass."""
+
+    def __init__(self):
+        self._heap: List[List[Any]] = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._cancelled = 0
+        self._thread = BackgroundThread(self._loop, "deadline-watchdog")
+
+    def schedule(self, when: float, callback: Callable[[], None]) -> List[Any]:
+        """Run ``callback`` at the monotonic time ``when``; returns a handle for ``cancel``."""
+        entry = [when, next(self._counter), callback]
+        self._thread.ensure_started()
+        with self._condition:
+            heapq.heappush(self._heap, entry)
+            if self._heap[0] is entry:
+                self._condition.notify()
+        return entry
+
+    def cancel(self, entry: List[Any]):
+        """Cancel a scheduled callback."""
+        with self._condition:
+            if entry[2] is None:
+                return
+            entry[2] = None
+            self._cancelled += 1
+            # Most callbacks are cancelled long before their deadline; drop them
+            if self._cancelled > 1000 and self._cancelled * 2 > len(self._heap):
+                self._heap = [queued for queued in self._heap if queued[2] is not None]
+                heapq.heapify(self._heap)
+                self._cancelled = 0
+
+    def _loop(self):
+        while True:
+            with self._condition:
+                while not self._heap or self._heap[0][0] > time.monotonic():
+                    timeout = self._heap[0][0] - time.monotonic() if self._heap else None
+                    self._condition.wait(timeout)
+                entry = heapq.heappop(self._heap)
+                callback, entry[2] = entry[2], None
+                if callback is None:
+                    self._cancelled -= 1
+            if callback is not None:
+                try:
+                    callback()
+                except Exception as e:
+                    logger.warning(f"Deadline callback failed: {str(e)}")
+
+_watchdog = _Watchdog()
+
+class Deadline:
+    """
+    Point in time by which work must finish.
+
+    Parameters
+    ----------
+    seconds : float
+        Time budget from now
+    """
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        """Seconds left, 0 once the deadline has passed."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        """Whether the deadline has passed."""
+        return time.monotonic() >= self.expires_at
+
+    def check(self, operation: str = "operation"):
+        """
+        Refuse to start work after the deadline.
+
+        Parameters
+        ----------
+        operation : str, optional
+            Work about to start, for the error message
+
+        Raises
+        ------
+        DeadlineExceeded
+            If the deadline has passed
+        """
+        if self.expired:
+            raise DeadlineExceeded(f"Deadline of {self.seconds:g}s exceeded before {operation}")
+
+    @contextmanager
+    def guard(self, on_expiry: Callable[[], None]) -> Iterator[None]:
+        """
+        Call ``on_expiry`` from a watchdog thread if the deadline passes within the block.
+
+        Parameters
+        ----------
+        on_expiry : Callable[[], None]
+            Cancels the running work, e.g. ``connection.cancel``
+        """
+        entry = _watchdog.schedule(self.expires_at, on_expiry)
+        try:
+            yield
+        finally:
+            _watchdog.cancel(entry)
+
+deadline_contextvar: ContextVar[Optional[Deadline]] = ContextVar("deadline", default=None)
+
+def current_deadline() -> Optional[Deadline]:
+    """Get the deadline of the current request or scope, if any."""
+    return deadline_contextvar.get()
+
+def check_deadline(operation: str = "operation"):
+    """
+    Refuse to start work after the current deadline.
+
+    Parameters
+    ----------
+    operation : str, optional
+        Work about to start, for the error message
+
+    Raises
+    ------
+    DeadlineExceeded
+        If the current deadline has passed
+    """
+    deadline = deadline_contextvar.get()
+    if deadline is not None:
+        deadline.check(operation)
+
+def remaining_time(default: Optional[float] = None) -> Optional[float]:
+    """
+    Seconds left until the current deadline.
+
+    Parameters
+    ----------
+    default : float, optional
+        Returned when there is no deadline
+
+    Returns
+    -------
+    float or None
+        Remaining seconds, or ``default``
+    """
+    deadline = deadline_contextvar.get()
+    return deadline.remaining() if deadline is not None else default
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]) -> Iterator[Optional[Deadline]]:
+    """
+    Run a block under a deadline.
+
+    A scope can only shorten an enclosing deadline.
+
+    Parameters
+    ----------
+    seconds : float or None
+        Time budget; None keeps the enclosing deadline
+
+    Examples
+    --------
+    >>> with deadline_scope(30):
+    ...     result = tool.run(parameters)
+    """
+    outer = deadline_contextvar.get()
+    if seconds is None or (outer is not None and outer.remaining() <= seconds):
+        yield outer
+        return
+    deadline = Deadline(seconds)
+    token = deadline_contextvar.set(deadline)
+    try:
+        yield deadline
+    finally:
+        deadline_contextvar.reset(token)
+
+def query_timeout(deadline: Deadline) -> int:
+    """Remaining time as a whole-second statement timeout, at least 1."""
+    return max(1, math.ceil(deadline.remaining()))
+
+@functools.lru_cache(maxsize=None)
+def deadline_handler() -> Any:
+    """
+    LangChain callback handler refusing LLM calls, tool runs and chain steps after the deadline.
+
+    Returns
+    -------
+    BaseCallbackHandler
+        Shared handler; importing LangChain is deferred to the first call
+    """
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class DeadlineCallbackHandler(BaseCallbackHandler):
+        """Raise ``DeadlineExceeded`` when a step starts after the deadline."""
+
+        # Errors must reach the agent run instead of being logged
+        raise_error = True
+        run_inline = True
+
+        def on_chain_start(self, serialized, inputs, **kwargs):
+            check_deadline(f"chain {kwargs.get('name') or 'step'}")
+
+        def on_llm_start(self, serialized, prompts, **kwargs):
+            check_deadline("LLM call")
+
+        def on_chat_model_start(self, serialized, messages, **kwargs):
+            check_deadline("LLM call")
+
+        def on_tool_start(self, serialized, input_str, **kwargs):
+            check_deadline(f"tool {(serialized or {}).get('name') or 'run'}")
+
+    return DeadlineCallbackHandler()
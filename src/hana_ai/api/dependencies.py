@@ -1,23 +1,76 @@
 """
 Dependencies for the FastAPI application.
 """
+from __future__ import annotations
+
 import logging
-from typing import Any, Dict
+import math
+from typing import TYPE_CHECKING, Any, Dict
 from fastapi import Request, Depends, HTTPException
-from hana_ml.dataframe import ConnectionContext
-from langchain.llms.base import BaseLLM
 
 from .auth import get_api_key
 from .config import settings
-from .gpu_utils import MultiGPUManager
+from .failover import CircuitBreakerOpenError
+from .llm_cache import llm_client_cache, with_hedging
+from .timing import database_breaker, instrument_connection, instrument_langchain, is_connection_error
+
+if TYPE_CHECKING:
+    from hana_ml.dataframe import ConnectionContext
+    from langchain.llms.base import BaseLLM
 
 logger = logging.getLogger(__name__)
 
+def create_connection_context() -> ConnectionContext:
+    """
+    Open a new database connection outside the request pool.
+    
+    SQL executed through the connection, and LangChain LLM calls and tool
+    runs, are timed as request stages (see ``timing``). Failed connection
+    attempts count towards the HANA circuit breaker.
+    
+    Returns
+    -------
+    ConnectionContext
+        A connection to the HANA database
+    
+    Raises
+    ------
+    CircuitBreakerOpenError
+        If the HANA circuit breaker is open
+    """
+    from hana_ml.dataframe import ConnectionContext
+    instrument_langchain()
+
+    with database_breaker().protect("db connect", is_connection_error):
+        # Try to create connection using userkey first if available
+        if settings.HANA_USERKEY:
+            return instrument_connection(ConnectionContext(userkey=settings.HANA_USERKEY))
+        
+        # Fall back to direct credentials
+        return instrument_connection(ConnectionContext(
+            address=settings.HANA_HOST,
+            port=settings.HANA_PORT,
+            user=settings.HANA_USER,
+            password=settings.HANA_PASSWORD,
+            encrypt=True
+        ))
+
+def _circuit_open_error(error: CircuitBreakerOpenError) -> HTTPException:
+    """Report an open HANA circuit as temporarily unavailable."""
+    retry_after = max(1, math.ceil(database_breaker().seconds_until_half_open()))
+    return HTTPException(
+        status_code=503,
+        detail=f"Database unavailable: {str(error)}",
+        headers={"Retry-After": str(retry_after)}
+    )
+
 def get_connection_context(request: Request) -> ConnectionContext:
     """
     Get or create a database connection context.
     
-    Uses connection pooling to reuse existing connections.
+    Uses connection pooling to reuse existing connections. While the HANA
+    circuit breaker is open, pooled connections are kept and the request
+    fails fast with ``503``.
     
     Parameters
     ----------
@@ -36,24 +89,15 @@ def get_connection_context(request: Request) -> ConnectionContext:
     # Create new connection if needed
     if len(request.app.state.connection_pool) < settings.CONNECTION_POOL_SIZE:
         try:
-            # Try to create connection using userkey first if available
-            if settings.HANA_USERKEY:
-                conn = ConnectionContext(userkey=settings.HANA_USERKEY)
-            else:
-                # Fall back to direct credentials
-                conn = ConnectionContext(
-                    address=settings.HANA_HOST,
-                    port=settings.HANA_PORT,
-                    user=settings.HANA_USER,
-                    password=settings.HANA_PASSWORD,
-                    encrypt=True
-                )
+            conn = create_connection_context()
             
             # Add to pool
             conn_id = id(conn)
             request.app.state.connection_pool[conn_id] = conn
             return conn
             
+        except CircuitBreakerOpenError as e:
+            raise _circuit_open_error(e)
         except Exception as e:
             logger.error(f"Failed to create database connection: {str(e)}")
             raise HTTPException(
@@ -69,6 +113,9 @@ def get_connection_context(request: Request) -> ConnectionContext:
                 # Simple query to test connection
                 conn.sql("SELECT 1 FROM DUMMY").collect()
                 return conn
+            except CircuitBreakerOpenError:
+                # Not a problem of this connection; it is checked again once the circuit half-opens
+                raise
             except Exception as e:
                 # Connection is invalid, remove it from pool
                 logger.warning(f"Removing invalid connection from pool: {str(e)}")
@@ -78,6 +125,10 @@ def get_connection_context(request: Request) -> ConnectionContext:
         # Create a new connection
         return get_connection_context(request)
         
+    except HTTPException:
+        raise
+    except CircuitBreakerOpenError as e:
+        raise _circuit_open_error(e)
     except Exception as e:
         logger.error(f"Failed to get database connection from pool: {str(e)}")
         raise HTTPException(
@@ -93,6 +144,10 @@ def get_llm(
     """
     Get a language model instance from SAP AI Core only with optimized GPU configuration.
     
+    Clients are served from the process-wide LLM client cache, so repeated
+    requests with the same configuration reuse one initialized client and its
+    HTTP connection pools instead of re-initializing the GenAI Hub SDK.
+    
     Parameters
     ----------
     request : Request
@@ -110,9 +165,6 @@ def get_llm(
     params = model_params or {}
     model = params.get("model", settings.DEFAULT_LLM_MODEL)
     
-    # Get a unique task ID for this request
-    task_id = f"llm_{request.state.request_id if hasattr(request.state, 'request_id') else id(request)}"
-    
     # Ensure model name is a valid SAP AI Core model
     if not model.startswith("sap-ai-core"):
         logger.warning(f"Non-SAP model requested: {model}. Defaulting to {settings.DEFAULT_LLM_MODEL}")
@@ -121,23 +173,134 @@ def get_llm(
     temperature = params.get("temperature", settings.DEFAULT_LLM_TEMPERATURE)
     max_tokens = params.get("max_tokens", settings.DEFAULT_LLM_MAX_TOKENS)
     
+    app_state = request.app.state
+    device_profile = _get_device_profile(app_state)
+    
+    # Get a unique task ID for this request, used only if a new client is built
+    task_id = f"llm_{request.state.request_id if hasattr(request.state, 'request_id') else id(request)}"
+    
+    try:
+        return llm_client_cache.get_or_create(
+            model,
+            temperature,
+            max_tokens,
+            device_profile,
+            factory=lambda: _create_llm(app_state, model, temperature, max_tokens, task_id)
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to initialize SAP AI Core language model: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"SAP AI Core language model initialization failed: {str(e)}"
+        )
+
+def warm_up_llm_cache(app_state: Any) -> bool:
+    """
+    Initialize the default language model client ahead of the first request.
+    
+    Parameters
+    ----------
+    app_state : Any
+        The FastAPI application state
+        
+    Returns
+    -------
+    bool
+        True if the default client is ready, False otherwise
+    """
+    model = settings.DEFAULT_LLM_MODEL
+    temperature = settings.DEFAULT_LLM_TEMPERATURE
+    max_tokens = settings.DEFAULT_LLM_MAX_TOKENS
+    try:
+        llm_client_cache.get_or_create(
+            model,
+            temperature,
+            max_tokens,
+            _get_device_profile(app_state),
+            factory=lambda: _create_llm(app_state, model, temperature, max_tokens, "llm_warmup")
+        )
+        logger.info(f"LLM client cache warmed up for model {model}")
+        return True
+    except Exception as e:
+        detail = e.detail if isinstance(e, HTTPException) else str(e)
+        logger.warning(f"LLM client cache warm-up failed: {detail}")
+        return False
+
+def _get_device_profile(app_state: Any) -> str:
+    """
+    Resolve the device profile used to key cached LLM clients.
+    
+    The profile is computed once per application and stored in the app state,
+    so the GPU manager is not consulted on every request.
+    
+    Parameters
+    ----------
+    app_state : Any
+        The FastAPI application state
+        
+    Returns
+    -------
+    str
+        The device profile, e.g. ``"cpu"`` or ``"gpu:auto:0.8"``
+    """
+    if not settings.ENABLE_GPU_ACCELERATION:
+        return "cpu"
+    
+    profile = getattr(app_state, "llm_device_profile", None)
+    if isinstance(profile, str):
+        return profile
+    
+    # Initialize MultiGPUManager if not already present in app state
+    if not hasattr(app_state, "gpu_manager"):
+        try:
+            from .gpu_utils import MultiGPUManager
+            app_state.gpu_manager = MultiGPUManager(
+                strategy="auto",
+                memory_fraction=settings.CUDA_MEMORY_FRACTION,
+                enable_mixed_precision=True
+            )
+        except Exception as e:
+            logger.warning(f"Failed to initialize GPU manager: {str(e)}")
+            app_state.gpu_manager = None
+    
+    if getattr(app_state, "gpu_manager", None):
+        profile = f"gpu:{getattr(app_state.gpu_manager, 'strategy', 'auto')}:{settings.CUDA_MEMORY_FRACTION}"
+    else:
+        profile = f"gpu:default:{settings.CUDA_MEMORY_FRACTION}"
+    app_state.llm_device_profile = profile
+    return profile
+
+def _create_llm(app_state: Any, model: str, temperature: float, max_tokens: int, task_id: str) -> BaseLLM:
+    """
+    Build a new SAP AI Core language model client.
+    
+    Only called by the LLM client cache when no cached client can be reused.
+    
+    Parameters
+    ----------
+    app_state : Any
+        The FastAPI application state
+    model : str
+        SAP AI Core model name
+    temperature : float
+        Sampling temperature
+    max_tokens : int
+        Maximum number of generated tokens
+    task_id : str
+        Identifier used for GPU device selection
+        
+    Returns
+    -------
+    BaseLLM
+        A newly initialized language model
+    """
     # Configure advanced GPU settings using MultiGPUManager
     gpu_config = {}
     if settings.ENABLE_GPU_ACCELERATION:
-        # Initialize MultiGPUManager if not already present in app state
-        if not hasattr(request.app.state, "gpu_manager"):
-            try:
-                request.app.state.gpu_manager = MultiGPUManager(
-                    strategy="auto",
-                    memory_fraction=settings.CUDA_MEMORY_FRACTION,
-                    enable_mixed_precision=True
-                )
-            except Exception as e:
-                logger.warning(f"Failed to initialize GPU manager: {str(e)}")
-                request.app.state.gpu_manager = None
-        
-        # Get optimal device for this task
-        if hasattr(request.app.state, "gpu_manager") and request.app.state.gpu_manager:
+        gpu_manager = getattr(app_state, "gpu_manager", None)
+        if gpu_manager:
             try:
                 # Estimate memory requirements based on model size and max_tokens
                 # This is a rough estimate - in production, use more precise metrics
@@ -145,7 +308,7 @@ def get_llm(
                 memory_requirement += max_tokens * 0.5  # Add per-token estimate
                 
                 # Get optimal device
-                device_id = request.app.state.gpu_manager.get_optimal_device(
+                device_id = gpu_manager.get_optimal_device(
                     task_id=task_id,
                     memory_requirement=memory_requirement
                 )
@@ -157,11 +320,6 @@ def get_llm(
                         "device_id": device_id,
                         "use_mixed_precision": True
                     }
-                    
-                    # Set environment variables for this request
-                    import os
-                    os.environ["CUDA_VISIBLE_DEVICES"] = str(device_id)
-                    
                     logger.info(f"Using GPU device {device_id} for LLM task {task_id}")
                 else:
                     logger.warning(f"No suitable GPU found for task {task_id}, using CPU")
@@ -179,54 +337,55 @@ def get_llm(
                 "gpu_memory_fraction": settings.CUDA_MEMORY_FRACTION
             }
     
+    # Only use SAP GenAI Hub SDK - no fallback to external services
     try:
-        # Only use SAP GenAI Hub SDK - no fallback to external services
-        try:
-            from gen_ai_hub.proxy.langchain import init_llm
-            
-            # Add performance optimization settings
-            optimization_config = {
-                # Enable tensor cores if available (A100, H100, etc.)
-                "enable_tensor_cores": True,
-                # Enable tensor parallelism if model supports it
-                "tensor_parallel": True if gpu_config.get("use_gpu", False) else False,
-                # Optimize kernel launches
-                "optimize_kernels": True,
-                # Use flash attention if available
-                "use_flash_attention": True,
-                # Enable FP8 if available (H100)
-                "enable_fp8": True,
-                # For large models, enable checkpoint activation memory optimization
-                "checkpoint_activations": max_tokens > 1000,
-            }
-            
-            # Merge configs
-            combined_config = {**gpu_config, **optimization_config}
-            
-            # Initialize LLM with all optimizations
-            llm = init_llm(
-                model, 
-                temperature=temperature, 
-                max_tokens=max_tokens,
-                **combined_config
-            )
-            
-            # Log configuration for debugging
-            if settings.DEVELOPMENT_MODE:
-                logger.debug(f"LLM initialized with config: {combined_config}")
-                
-            return llm
-            
-        except ImportError:
-            logger.error("SAP GenAI Hub SDK is required but not installed")
-            raise HTTPException(
-                status_code=500,
-                detail="SAP GenAI Hub SDK is required for this application. Please install it using 'pip install generative-ai-hub-sdk[all]'"
-            )
-            
-    except Exception as e:
-        logger.error(f"Failed to initialize SAP AI Core language model: {str(e)}")
+        from gen_ai_hub.proxy.langchain import init_llm
+        instrument_langchain()
+    except ImportError:
+        logger.error("SAP GenAI Hub SDK is required but not installed")
         raise HTTPException(
             status_code=500,
-            detail=f"SAP AI Core language model initialization failed: {str(e)}"
-        )
\ No newline at end of file
+            detail="SAP GenAI Hub SDK is required for this application. Please install it using 'pip install generative-ai-hub-sdk[all]'"
+        )
+    
+    # Add performance optimization settings
+    optimization_config = {
+        # Enable tensor cores if available (A100, H100, etc.)
+        "enable_tensor_cores": True,
+        # Enable tensor parallelism if model supports it
+        "tensor_parallel": True if gpu_config.get("use_gpu", False) else False,
+        # Optimize kernel launches
+        "optimize_kernels": True,
+        # Use flash attention if available
+        "use_flash_attention": True,
+        # Enable FP8 if available (H100)
+        "enable_fp8": True,
+        # For large models, enable checkpoint activation memory optimization
+        "checkpoint_activations": max_tokens > 1000,
+    }
+    
+    # Merge configs
+    combined_config = {**gpu_config, **optimization_config}
+    
+    # Share one proxy client (auth tokens, HTTP session) across all models
+    proxy_client = llm_client_cache.get_proxy_client()
+    if proxy_client is not None:
+        combined_config["proxy_client"] = proxy_client
+    
+    # Initialize LLM with all optimizations
+    llm = init_llm(
+        model, 
+        temperature=temperature, 
+        max_tokens=max_tokens,
+        **combined_config
+    )
+    
+    # Hedge slow completions; clients derived by the cache stay hedged
+    if settings.LLM_HEDGING_ENABLED:
+        llm = with_hedging(llm)
+    
+    # Log configuration for debugging
+    if settings.DEVELOPMENT_MODE:
+        logger.debug("LLM initialized with config: %s", combined_config)
+        
+    return llm
@@ -4,6 +4,8 @@ Environment constants for the HANA AI Toolkit API.
 This module defines all the environment variables and constants
 used by the application, separated from the code.
 """
+import os
+import tempfile
 
 # SAP AI Core models
 SAP_AI_CORE_LLM_MODEL = "sap-ai-core-llama3"
@@ -48,10 +50,28 @@ DEFAULT_CIRCUIT_BREAKER_TIMEOUT = 30.0  # seconds
 DEFAULT_RETRY_COUNT = 3
 DEFAULT_RETRY_DELAY = 1.0  # seconds
 DEFAULT_RETRY_BACKOFF_FACTOR = 2.0
+DEFAULT_RETRY_MAX_DELAY = 30.0  # seconds, cap of the jittered backoff
+DEFAULT_RETRY_BUDGET_RATIO = 0.1  # retries and hedges per successful call
+DEFAULT_RETRY_BUDGET_MAX_TOKENS = 10  # retries allowed in a burst
+
+# Default hedging settings
+DEFAULT_HEDGE_PERCENTILE = 0.95  # latency after which a hedged request is sent
+DEFAULT_HEDGE_MIN_SAMPLES = 20  # latencies observed before hedging starts
+DEFAULT_HEDGE_WINDOW_SIZE = 200  # latencies kept for the percentile
+DEFAULT_HEDGE_MAX_WORKERS = 16  # threads running attempts of hedged functions
 
 # Default bulkhead settings
 DEFAULT_BULKHEAD_MAX_CONCURRENT = 20
 DEFAULT_BULKHEAD_MAX_WAITING = 40
+DEFAULT_BULKHEAD_ACQUIRE_TIMEOUT = 10.0  # seconds a call waits for a slot
+
+# Default adaptive concurrency limit settings (per backend)
+DEFAULT_CONCURRENCY_INITIAL_LIMIT = 20
+DEFAULT_CONCURRENCY_MIN_LIMIT = 2
+DEFAULT_CONCURRENCY_MAX_LIMIT = 200
+DEFAULT_CONCURRENCY_TOLERANCE = 2.0  # latency over baseline treated as overload
+DEFAULT_CONCURRENCY_BACKOFF_RATIO = 0.9  # limit multiplier on overload
+DEFAULT_CONCURRENCY_QUEUE_TIMEOUT = 5.0  # seconds a call waits for a slot
 
 # Default timeout settings
 DEFAULT_TIMEOUT_SECONDS = 30.0  # seconds
@@ -71,8 +91,38 @@ HOPPER_ENABLE_FSDP = True
 
 # API security defaults
 DEFAULT_RATE_LIMIT = 100
+DEFAULT_RATE_LIMIT_BACKEND = "memory"  # "memory" (per worker) or "sqlite" (shared)
+DEFAULT_RATE_LIMIT_SQLITE_PATH = "/dev/shm/hana_ai_rate_limit.db"
+DEFAULT_RATE_LIMIT_MAX_KEYS = 10000  # buckets kept by the in-memory store
+# Token cost by path prefix; other routes cost 1 token
+DEFAULT_RATE_LIMIT_ROUTE_COSTS = {
+    "/api/v1/agents/": 20,
+    "/api/v1/tools/forecast": 20,
+    "/api/v1/tools/execute": 10,
+    "/api/v1/dataframes/smart/ask": 10,
+    "/api/v1/dataframes/query": 2,
+    "/api/v1/vectorstore/embed": 2,
+    "/api/v1/jobs": 1,
+    "/validate": 10,
+}
 DEFAULT_MAX_REQUEST_SIZE_MB = 10
-DEFAULT_REQUEST_TIMEOUT_SECONDS = 300
+DEFAULT_REQUEST_TIMEOUT_SECONDS = 300  # request deadline; 0 disables
+
+# Admission control defaults (per worker)
+DEFAULT_ADMISSION_MAX_CONCURRENT = 40  # requests processed at once; matches the default thread pool
+DEFAULT_ADMISSION_TARGET_DELAY_SECONDS = 0.05  # acceptable standing queueing delay
+DEFAULT_ADMISSION_INTERVAL_SECONDS = 0.5  # queueing delay above target for this long is overload
+DEFAULT_ADMISSION_QUEUE_TIMEOUT_SECONDS = 5.0  # longest wait for a slot without overload
+DEFAULT_ADMISSION_MAX_QUEUE = 256  # waiting requests; lower priorities are shed beyond this
+# Priority class by path prefix ("METHOD /prefix" to match one method); other routes are interactive
+DEFAULT_ADMISSION_ROUTE_PRIORITIES = {
+    "/api/v1/agents/": "conversation",
+    "/api/v1/dataframes/smart/ask": "conversation",
+    "/api/v1/tools/forecast": "batch",
+    "/api/v1/vectorstore/store": "batch",
+    "POST /api/v1/jobs": "batch",
+    "POST /api/v1/jobs/": "interactive",
+}
 
 # Connection pool defaults
 DEFAULT_CONNECTION_POOL_SIZE = 5
@@ -83,11 +133,97 @@ DEFAULT_CONNECTION_POOL_RECYCLE = 1800.0  # 30 minutes
 # Logging and metrics defaults
 DEFAULT_LOG_LEVEL = "INFO"
 DEFAULT_LOG_FORMAT = "json"
+DEFAULT_LOG_QUEUE_SIZE = 10000  # records buffered for the log writer before records are dropped
+DEFAULT_LOG_BATCH_SIZE = 256  # records formatted and written per write
+DEFAULT_LOG_SAMPLE_RATES = {}  # share of records below WARNING kept, by logger name
+DEFAULT_LOG_RATE_LIMIT_PER_SECOND = 50  # records per call site and second
 DEFAULT_PROMETHEUS_PORT = 9090
+DEFAULT_PROMETHEUS_MULTIPROC_DIR = "/tmp/hana_ai_prometheus"
 METRICS_ENABLED = True
 METRICS_ENDPOINT = "/metrics"
 METRICS_INTERNAL_ONLY = True
 
+# Tracing defaults
+DEFAULT_TRACING_SAMPLE_RATIO = 0.1  # share of new traces recorded
+DEFAULT_TRACING_MAX_SPANS_PER_TRACE = 2000  # further spans of a trace are dropped
+DEFAULT_TRACING_FILE_PATH = "hana_ai_traces.jsonl"  # OTLP/JSON lines, used without OPENTELEMETRY_ENDPOINT
+DEFAULT_TRACING_FILE_MAX_BYTES = 100 * 1024 * 1024  # rotated to <path>.1 beyond this size
+DEFAULT_TRACING_EXPORT_INTERVAL_SECONDS = 5.0  # longest time a span waits for export
+
+# CPU profiler defaults (/debug/profile)
+DEFAULT_PROFILER_MAX_SECONDS = 60.0  # longest profile
+DEFAULT_PROFILER_SAMPLE_INTERVAL_SECONDS = 0.01  # 100 samples per second unless over the overhead budget
+DEFAULT_PROFILER_MAX_OVERHEAD = 0.02  # share of one CPU spent sampling
+
+# LLM client cache defaults
+DEFAULT_LLM_CACHE_SIZE = 16
+
+# Response cache defaults
+DEFAULT_CACHE_MAX_BYTES = 64 * 1024 * 1024  # 64 MB
+DEFAULT_CACHE_ROUTE_TTLS = {
+    "dataframes.query": 60,
+    "dataframes.tables": 300,
+    "vectorstore.query": 300,
+    "vectorstore.embed": 3600,
+    "tools.list": 3600,
+}
+# Seconds expired responses of HANA-backed routes are kept to be served stale
+# while the HANA circuit is open, the request deadline is about to expire, or
+# the database fails
+DEFAULT_CACHE_STALE_TTLS = {
+    "dataframes.query": 3600,
+    "dataframes.tables": 86400,
+    "vectorstore.query": 3600,
+    "tools.list": 86400,
+}
+DEFAULT_CACHE_STALE_IF_DEADLINE_SECONDS = 1.0  # serve stale when less request time is left
+
+# HANA circuit breaker defaults
+HANA_CONNECTION_ERROR_CODES = {-10709, -10807, -10821, -10108}  # connection failed, lost, not connected, reconnected
+
+# Streaming query defaults
+DEFAULT_STREAM_CHUNK_SIZE = 5000  # rows per fetchmany / record batch
+MAX_STREAM_CHUNK_SIZE = 100000
+
+# Agent event streaming defaults
+DEFAULT_SSE_BUFFER_SIZE = 256  # buffered events per stream before tokens are dropped
+DEFAULT_SSE_HEARTBEAT_SECONDS = 15.0
+
+# Response serialization defaults
+DEFAULT_RESPONSE_VALIDATION_MAX_ROWS = 1000  # larger payloads skip pydantic validation
+
+# Multi-process serving defaults (python -m hana_ai.api.serve)
+DEFAULT_SERVE_WORKERS = 0  # 0 sizes the pool from CPUs and memory
+DEFAULT_SERVE_MAX_WORKERS = 16
+DEFAULT_SERVE_WORKER_MEMORY_MB = 1024  # memory budget per worker when sizing the pool
+DEFAULT_SERVE_MAX_REQUESTS = 10000  # requests before a worker is recycled; 0 disables
+DEFAULT_SERVE_MAX_REQUESTS_JITTER = 1000
+DEFAULT_SERVE_GRACEFUL_TIMEOUT = 30  # seconds for in-flight requests on restart
+DEFAULT_SERVE_TIMEOUT = 300  # seconds before an unresponsive worker is killed
+
+# Job execution defaults
+# Outside the working directory, which may be read-only or shared; set a persistent volume in production
+DEFAULT_JOB_STORE_PATH = os.path.join(tempfile.gettempdir(), "hana_ai_jobs.db")
+DEFAULT_JOB_MAX_WORKERS = 4  # jobs running at the same time
+DEFAULT_JOB_MAX_PER_TENANT = 2  # running jobs per API key
+DEFAULT_JOB_MAX_QUEUED = 100  # queued jobs before submissions are rejected
+DEFAULT_JOB_RETENTION_SECONDS = 7 * 24 * 3600  # finished jobs are purged after a week
+DEFAULT_JOB_CANCEL_POLL_INTERVAL = 1.0  # seconds between checks for cancels from other workers
+DEFAULT_JOB_DRAIN_TIMEOUT = 20  # seconds for running jobs on shutdown; below SERVE_GRACEFUL_TIMEOUT
+
+# Environment validation defaults
+DEFAULT_VALIDATION_CACHE_TTL_SECONDS = 300  # age after which results are refreshed in the background
+DEFAULT_VALIDATION_CHECK_TIMEOUT_SECONDS = 10.0  # per check; slower checks are reported as timed out
+DEFAULT_VALIDATION_MIN_REFRESH_SECONDS = 30  # forced refreshes within this interval return the snapshot
+
+# Health probe defaults
+DEFAULT_HEALTH_PROBE_INTERVAL_SECONDS = 15.0  # between background probe rounds
+DEFAULT_HEALTH_PROBE_TIMEOUT_SECONDS = 5.0  # per probe; slower dependencies are reported as down
+
+# Query pagination defaults
+DEFAULT_PAGE_MATERIALIZE_TTL_SECONDS = 600  # lifetime of materialized result tables
+DEFAULT_PAGE_MAX_MATERIALIZED = 32  # materialized result tables per process
+
 # Memory settings
 DEFAULT_MEMORY_EXPIRATION_SECONDS = 3600
 
@@ -3,23 +3,53 @@ Failover handling and resilience module for SAP HANA AI Toolkit.
 
 This module provides advanced failover mechanisms and resilience patterns
 to ensure high availability of the SAP HANA AI Toolkit in production environments.
+
+All decorators accept functions and coroutine functions. Coroutine
+functions are wrapped with asyncio-native waits (``asyncio.sleep``,
+``asyncio.Semaphore``), so they can guard async routes without blocking
+the event loop.
 """
 
 import time
+import asyncio
+import inspect
 import logging
 import threading
 import functools
-from typing import Any, Callable, Dict, List, Optional, Tuple, Union, TypeVar
+import weakref
+import queue
+import random
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union, TypeVar
 
+from hana_ai.api.deadline import DeadlineExceeded, deadline_scope, remaining_time
 from hana_ai.api.env_constants import (
     DEFAULT_CIRCUIT_BREAKER_THRESHOLD,
     DEFAULT_CIRCUIT_BREAKER_TIMEOUT,
     DEFAULT_RETRY_COUNT,
     DEFAULT_RETRY_DELAY,
     DEFAULT_RETRY_BACKOFF_FACTOR,
+    DEFAULT_RETRY_MAX_DELAY,
+    DEFAULT_RETRY_BUDGET_RATIO,
+    DEFAULT_RETRY_BUDGET_MAX_TOKENS,
     DEFAULT_BULKHEAD_MAX_CONCURRENT,
     DEFAULT_BULKHEAD_MAX_WAITING,
+    DEFAULT_BULKHEAD_ACQUIRE_TIMEOUT,
+    DEFAULT_CONCURRENCY_INITIAL_LIMIT,
+    DEFAULT_CONCURRENCY_MIN_LIMIT,
+    DEFAULT_CONCURRENCY_MAX_LIMIT,
+    DEFAULT_CONCURRENCY_TOLERANCE,
+    DEFAULT_CONCURRENCY_BACKOFF_RATIO,
+    DEFAULT_CONCURRENCY_QUEUE_TIMEOUT,
+    DEFAULT_HEDGE_PERCENTILE,
+    DEFAULT_HEDGE_MIN_SAMPLES,
+    DEFAULT_HEDGE_WINDOW_SIZE,
+    DEFAULT_HEDGE_MAX_WORKERS,
 )
+from hana_ai.api.metrics import record_concurrency_rejection, record_hedge, record_retry, update_concurrency
 
 # Type variable for generic functions
 T = TypeVar('T')
@@ -27,12 +57,24 @@ T = TypeVar('T')
 # Configure logger
 logger = logging.getLogger(__name__)
 
+def _in_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
 class CircuitBreaker:
     """
     Circuit Breaker pattern implementation for preventing cascading failures.
     
     This pattern monitors for failures and trips the circuit when a threshold is reached,
     preventing further calls to the failing service and allowing it time to recover.
+    
+    Both functions and coroutine functions can be decorated, and one breaker
+    can guard sync and async call sites of the same service. The state lock
+    is only held while counters change, never while the call runs, so async
+    callers do not block the event loop.
     """
     
     def __init__(
@@ -54,64 +96,180 @@ class CircuitBreaker:
         self.state = "CLOSED"  # CLOSED, OPEN, HALF-OPEN
         self._lock = threading.RLock()
     
+    def _before_call(self, name: str) -> None:
+        with self._lock:
+            if self.state == "OPEN":
+                if time.time() - self.last_failure_time >= self.reset_timeout:
+                    # Transition to half-open state
+                    logger.info(f"Circuit breaker for {name} transitioning to HALF-OPEN state")
+                    self.state = "HALF-OPEN"
+                else:
+                    # Circuit is open, fast-fail
+                    logger.warning(f"Circuit breaker for {name} is OPEN - fast failing")
+                    raise CircuitBreakerOpenError(f"Circuit breaker for {name} is open")
+    
+    def _on_success(self, name: str) -> None:
+        # Success, potentially reset the circuit; only consecutive failures trip it
+        with self._lock:
+            self.failure_count = 0
+            if self.state == "HALF-OPEN":
+                logger.info(f"Circuit breaker for {name} resetting to CLOSED state")
+                self.state = "CLOSED"
+    
+    def _on_failure(self, name: str) -> None:
+        with self._lock:
+            self.failure_count += 1
+            self.last_failure_time = time.time()
+            
+            if (self.state == "CLOSED" and self.failure_count >= self.failure_threshold) or \
+               self.state == "HALF-OPEN":
+                # Trip the circuit or keep it open after a half-open failure
+                logger.warning(f"Circuit breaker for {name} tripping to OPEN state")
+                self.state = "OPEN"
+    
+    @property
+    def is_open(self) -> bool:
+        """Whether calls currently fail fast, i.e. the circuit is open and not yet due to half-open."""
+        return self.seconds_until_half_open() > 0
+    
+    def seconds_until_half_open(self) -> float:
+        """
+        Get the time until the next call may probe the service.
+        
+        Returns:
+            Seconds until an open circuit half-opens, 0 if calls pass
+        """
+        with self._lock:
+            if self.state != "OPEN":
+                return 0.0
+            return max(0.0, self.last_failure_time + self.reset_timeout - time.time())
+    
+    @contextmanager
+    def protect(self, name: str, is_failure: Optional[Callable[[BaseException], bool]] = None) -> Iterator[None]:
+        """
+        Guard a block of code with the circuit breaker.
+        
+        Args:
+            name: Name of the guarded call used in logs
+            is_failure: Predicate selecting the exceptions that count as
+                failures of the service; others, e.g. SQL errors of a healthy
+                database, count as successful calls. All count by default.
+            
+        Raises:
+            CircuitBreakerOpenError: If the circuit is open
+        """
+        self._before_call(name)
+        try:
+            yield
+        except Exception as e:
+            if is_failure is None or is_failure(e):
+                self._on_failure(name)
+            else:
+                self._on_success(name)
+            raise
+        self._on_success(name)
+    
     def __call__(self, func: Callable[..., T]) -> Callable[..., T]:
         """
         Decorator to apply circuit breaker pattern to a function.
         
         Args:
-            func: The function to wrap with circuit breaker logic
+            func: The function or coroutine function to wrap with circuit breaker logic
             
         Returns:
             The wrapped function with circuit breaker logic
         """
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> T:
+                self._before_call(func.__name__)
+                try:
+                    result = await func(*args, **kwargs)
+                except Exception:
+                    # Cancellation is not an Exception and does not count as a failure
+                    self._on_failure(func.__name__)
+                    raise
+                self._on_success(func.__name__)
+                return result
+            
+            return async_wrapper
+        
         @functools.wraps(func)
         def wrapper(*args: Any, **kwargs: Any) -> T:
-            with self._lock:
-                if self.state == "OPEN":
-                    if time.time() - self.last_failure_time >= self.reset_timeout:
-                        # Transition to half-open state
-                        logger.info(f"Circuit breaker for {func.__name__} transitioning to HALF-OPEN state")
-                        self.state = "HALF-OPEN"
-                    else:
-                        # Circuit is open, fast-fail
-                        logger.warning(f"Circuit breaker for {func.__name__} is OPEN - fast failing")
-                        raise CircuitBreakerOpenError(f"Circuit breaker for {func.__name__} is open")
-            
+            self._before_call(func.__name__)
             try:
                 result = func(*args, **kwargs)
-                
-                # Success, potentially reset the circuit
-                with self._lock:
-                    if self.state == "HALF-OPEN":
-                        logger.info(f"Circuit breaker for {func.__name__} resetting to CLOSED state")
-                        self.failure_count = 0
-                        self.state = "CLOSED"
-                
-                return result
-                
-            except Exception as e:
-                with self._lock:
-                    self.failure_count += 1
-                    self.last_failure_time = time.time()
-                    
-                    if (self.state == "CLOSED" and self.failure_count >= self.failure_threshold) or \
-                       self.state == "HALF-OPEN":
-                        # Trip the circuit or keep it open after a half-open failure
-                        logger.warning(f"Circuit breaker for {func.__name__} tripping to OPEN state")
-                        self.state = "OPEN"
-                
+            except Exception:
+                self._on_failure(func.__name__)
                 # Re-raise the original exception
                 raise
+            self._on_success(func.__name__)
+            return result
         
         return wrapper
 
 
+class RetryBudget:
+    """
+    Token bucket limiting retries to a share of successful calls.
+    
+    Every successful call deposits ``ratio`` tokens, up to ``max_tokens``,
+    and every retry or hedged request withdraws one. A backend that fails
+    most calls quickly exhausts the bucket, so a brownout costs at most
+    ``ratio`` extra calls per successful one instead of a retry storm.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        ratio: float = DEFAULT_RETRY_BUDGET_RATIO,
+        max_tokens: int = DEFAULT_RETRY_BUDGET_MAX_TOKENS,
+    ):
+        """
+        Initialize a new RetryBudget.
+        
+        Args:
+            name: Backend name used in metrics and logs
+            ratio: Retries allowed per successful call
+            max_tokens: Retries allowed in a burst, and before any call succeeded
+        """
+        self.name = name
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = float(max_tokens)
+        self._lock = threading.Lock()
+    
+    def record_success(self) -> None:
+        """Deposit tokens for a successful call."""
+        with self._lock:
+            self.tokens = min(float(self.max_tokens), self.tokens + self.ratio)
+    
+    def try_acquire(self) -> bool:
+        """
+        Withdraw a token for a retry or hedged request.
+        
+        Returns:
+            True if the budget allows the extra call
+        """
+        with self._lock:
+            if self.tokens < 1.0:
+                return False
+            self.tokens -= 1.0
+            return True
+
+
 class Retry:
     """
-    Retry pattern implementation with exponential backoff.
+    Retry pattern implementation with jittered exponential backoff.
     
     This pattern automatically retries failed operations with configurable
-    backoff to handle transient failures.
+    backoff to handle transient failures. By default delays use decorrelated
+    jitter: each one is drawn between ``delay`` and three times the previous
+    delay, capped at ``max_delay``, so callers failing together do not
+    retry in lockstep. Without jitter, the delay grows by ``backoff_factor``
+    per attempt. Coroutine functions wait with ``asyncio.sleep``. No retry
+    is attempted when the backoff would end after the current request
+    deadline, or when the ``budget`` of the backend is exhausted.
     """
     
     def __init__(
@@ -120,6 +278,9 @@ class Retry:
         delay: float = DEFAULT_RETRY_DELAY,
         backoff_factor: float = DEFAULT_RETRY_BACKOFF_FACTOR,
         exceptions: Tuple[Exception, ...] = (Exception,),
+        max_delay: float = DEFAULT_RETRY_MAX_DELAY,
+        jitter: bool = True,
+        budget: Optional[RetryBudget] = None,
     ):
         """
         Initialize a new Retry handler.
@@ -127,53 +288,101 @@ class Retry:
         Args:
             max_retries: Maximum number of retry attempts
             delay: Initial delay between retries in seconds
-            backoff_factor: Factor by which the delay increases with each retry
+            backoff_factor: Factor by which the delay increases with each retry without jitter
             exceptions: Tuple of exceptions that trigger a retry
+            max_delay: Longest delay between retries in seconds
+            jitter: Whether to randomize delays with decorrelated jitter
+            budget: Retry budget shared by the calls to one backend
         """
         self.max_retries = max_retries
         self.delay = delay
         self.backoff_factor = backoff_factor
         self.exceptions = exceptions
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.budget = budget
+    
+    def _next_delay(self, attempt: int, name: str, error: Exception, previous: float) -> Optional[float]:
+        """Log a failed attempt and return the delay before the next one, or None to stop."""
+        logger.warning(f"Attempt {attempt+1}/{self.max_retries+1} failed for {name}: {str(error)}")
+        if attempt == self.max_retries:
+            return None
+        if self.jitter:
+            delay = random.uniform(self.delay, max(self.delay, previous * 3))
+        else:
+            delay = self.delay * self.backoff_factor ** attempt
+        delay = min(delay, self.max_delay)
+        remaining = remaining_time()
+        if remaining is not None and delay >= remaining:
+            logger.warning(f"Not retrying {name}: the request deadline ends in {remaining:.2f}s")
+            return None
+        if self.budget is not None:
+            if not self.budget.try_acquire():
+                logger.warning(f"Not retrying {name}: the retry budget of {self.budget.name} is exhausted")
+                record_retry(self.budget.name, "budget_exhausted")
+                return None
+            record_retry(self.budget.name, "retried")
+        logger.info(f"Retry attempt {attempt+1}/{self.max_retries} for {name} after {delay:.2f}s")
+        return delay
+    
+    def _on_success(self) -> None:
+        if self.budget is not None:
+            self.budget.record_success()
+    
+    def _give_up(self, name: str, last_exception: Optional[Exception]):
+        logger.error(f"All attempts failed for {name}")
+        if last_exception:
+            raise last_exception
+        raise RuntimeError(f"All {self.max_retries+1} attempts failed for {name}")
     
     def __call__(self, func: Callable[..., T]) -> Callable[..., T]:
         """
         Decorator to apply retry logic to a function.
         
         Args:
-            func: The function to wrap with retry logic
+            func: The function or coroutine function to wrap with retry logic
             
         Returns:
             The wrapped function with retry logic
         """
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> T:
+                last_exception = None
+                delay = self.delay
+                for attempt in range(self.max_retries + 1):  # +1 for the initial attempt
+                    try:
+                        result = await func(*args, **kwargs)
+                    except self.exceptions as e:
+                        last_exception = e
+                        delay = self._next_delay(attempt, func.__name__, e, delay)
+                    else:
+                        self._on_success()
+                        return result
+                    if delay is None:
+                        break
+                    await asyncio.sleep(delay)
+                self._give_up(func.__name__, last_exception)
+            
+            return async_wrapper
+        
         @functools.wraps(func)
         def wrapper(*args: Any, **kwargs: Any) -> T:
             last_exception = None
-            current_delay = self.delay
-            
+            delay = self.delay
             for attempt in range(self.max_retries + 1):  # +1 for the initial attempt
                 try:
-                    if attempt > 0:
-                        logger.info(f"Retry attempt {attempt}/{self.max_retries} for {func.__name__} after {current_delay:.2f}s")
-                        time.sleep(current_delay)
-                        # Increase delay for next attempt
-                        current_delay *= self.backoff_factor
-                    
-                    return func(*args, **kwargs)
-                    
+                    result = func(*args, **kwargs)
                 except self.exceptions as e:
                     last_exception = e
-                    logger.warning(f"Attempt {attempt+1}/{self.max_retries+1} failed for {func.__name__}: {str(e)}")
-                    
-                    # Don't sleep after the last attempt
-                    if attempt == self.max_retries:
-                        break
-            
-            # If we got here, all retries failed
-            logger.error(f"All {self.max_retries+1} attempts failed for {func.__name__}")
-            if last_exception:
-                raise last_exception
-            else:
-                raise RuntimeError(f"All {self.max_retries+1} attempts failed for {func.__name__}")
+                    delay = self._next_delay(attempt, func.__name__, e, delay)
+                else:
+                    self._on_success()
+                    return result
+                if delay is None:
+                    break
+                time.sleep(delay)
+            self._give_up(func.__name__, last_exception)
         
         return wrapper
 
@@ -183,13 +392,18 @@ class Bulkhead:
     Bulkhead pattern implementation for resource isolation.
     
     This pattern limits the number of concurrent executions to prevent
-    resource exhaustion and isolate failures.
+    resource exhaustion and isolate failures. Functions share a
+    ``threading.Semaphore``; coroutine functions wait on an
+    ``asyncio.Semaphore`` per event loop, without blocking the loop. A call
+    waits at most ``acquire_timeout`` seconds, or until the current request
+    deadline, for a slot.
     """
     
     def __init__(
         self,
         max_concurrent: int = DEFAULT_BULKHEAD_MAX_CONCURRENT,
         max_waiting: int = DEFAULT_BULKHEAD_MAX_WAITING,
+        acquire_timeout: float = DEFAULT_BULKHEAD_ACQUIRE_TIMEOUT,
     ):
         """
         Initialize a new Bulkhead.
@@ -197,23 +411,64 @@ class Bulkhead:
         Args:
             max_concurrent: Maximum number of concurrent executions
             max_waiting: Maximum number of waiting executions
+            acquire_timeout: Maximum time in seconds to wait for an execution slot
         """
         self.max_concurrent = max_concurrent
         self.max_waiting = max_waiting
+        self.acquire_timeout = acquire_timeout
         self.semaphore = threading.Semaphore(max_concurrent)
         self.waiting_count = 0
         self._lock = threading.RLock()
+        # Event loop -> asyncio.Semaphore; asyncio primitives belong to one loop
+        self._async_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = \
+            weakref.WeakKeyDictionary()
+        self.async_waiting_count = 0
+    
+    def _timeout(self) -> float:
+        remaining = remaining_time()
+        return min(self.acquire_timeout, remaining) if remaining is not None else self.acquire_timeout
     
     def __call__(self, func: Callable[..., T]) -> Callable[..., T]:
         """
         Decorator to apply bulkhead pattern to a function.
         
         Args:
-            func: The function to wrap with bulkhead logic
+            func: The function or coroutine function to wrap with bulkhead logic
             
         Returns:
             The wrapped function with bulkhead logic
         """
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> T:
+                loop = asyncio.get_running_loop()
+                semaphore = self._async_semaphores.get(loop)
+                if semaphore is None:
+                    semaphore = self._async_semaphores[loop] = asyncio.Semaphore(self.max_concurrent)
+                
+                # State is only changed on the event loop thread, no lock needed
+                if semaphore.locked():
+                    if self.async_waiting_count >= self.max_waiting:
+                        raise BulkheadFullError(f"Bulkhead for {func.__name__} has reached maximum waiting capacity")
+                    self.async_waiting_count += 1
+                    try:
+                        await asyncio.wait_for(semaphore.acquire(), self._timeout())
+                    except asyncio.TimeoutError:
+                        raise BulkheadTimeoutError(
+                            f"Bulkhead for {func.__name__} timed out waiting for execution slot"
+                        ) from None
+                    finally:
+                        self.async_waiting_count -= 1
+                else:
+                    await semaphore.acquire()
+                
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    semaphore.release()
+            
+            return async_wrapper
+        
         @functools.wraps(func)
         def wrapper(*args: Any, **kwargs: Any) -> T:
             # Check if we can add to waiting queue
@@ -225,7 +480,7 @@ class Bulkhead:
             acquired = False
             try:
                 # Try to acquire semaphore
-                acquired = self.semaphore.acquire(blocking=True, timeout=10)  # 10 second timeout
+                acquired = self.semaphore.acquire(blocking=True, timeout=self._timeout())
                 if not acquired:
                     raise BulkheadTimeoutError(f"Bulkhead for {func.__name__} timed out waiting for execution slot")
                 
@@ -252,7 +507,12 @@ class Timeout:
     """
     Timeout pattern implementation to prevent blocking operations.
     
-    This pattern ensures that operations complete within a specified time limit.
+    The function runs in the calling thread under a deadline of ``seconds``
+    (see ``hana_ai.api.deadline``). SQL statements, LLM calls and tool runs
+    check the deadline cooperatively: work is not started after it and
+    running HANA statements are cancelled on the server, instead of leaving
+    an abandoned thread consuming database and LLM capacity. Coroutine
+    functions are additionally cancelled when the deadline passes.
     """
     
     def __init__(self, seconds: float):
@@ -269,34 +529,31 @@ class Timeout:
         Decorator to apply timeout pattern to a function.
         
         Args:
-            func: The function to wrap with timeout logic
+            func: The function or coroutine function to wrap with timeout logic
             
         Returns:
             The wrapped function with timeout logic
         """
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> T:
+                with deadline_scope(self.seconds) as deadline:
+                    try:
+                        return await asyncio.wait_for(func(*args, **kwargs), deadline.remaining())
+                    except asyncio.TimeoutError:
+                        if not deadline.expired:
+                            raise
+                        raise DeadlineExceeded(
+                            f"Function {func.__name__} execution timed out after {deadline.seconds:g} seconds"
+                        ) from None
+            
+            return async_wrapper
+        
         @functools.wraps(func)
         def wrapper(*args: Any, **kwargs: Any) -> T:
-            result = [None]
-            exception = [None]
-            
-            def target():
-                try:
-                    result[0] = func(*args, **kwargs)
-                except Exception as e:
-                    exception[0] = e
-            
-            thread = threading.Thread(target=target)
-            thread.daemon = True
-            thread.start()
-            thread.join(self.seconds)
-            
-            if thread.is_alive():
-                raise TimeoutError(f"Function {func.__name__} execution timed out after {self.seconds} seconds")
-            
-            if exception[0]:
-                raise exception[0]
-            
-            return result[0]
+            # Expired work raises DeadlineExceeded, a TimeoutError
+            with deadline_scope(self.seconds):
+                return func(*args, **kwargs)
         
         return wrapper
 
@@ -322,11 +579,23 @@ class Fallback:
         Decorator to apply fallback pattern to a function.
         
         Args:
-            func: The primary function to wrap with fallback logic
+            func: The primary function or coroutine function to wrap with fallback logic
             
         Returns:
             The wrapped function with fallback logic
         """
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> T:
+                try:
+                    return await func(*args, **kwargs)
+                except Exception as e:
+                    logger.warning(f"Function {func.__name__} failed, using fallback: {str(e)}")
+                    result = self.fallback_func(*args, **kwargs)
+                    return await result if inspect.isawaitable(result) else result
+            
+            return async_wrapper
+        
         @functools.wraps(func)
         def wrapper(*args: Any, **kwargs: Any) -> T:
             try:
@@ -338,6 +607,427 @@ class Fallback:
         return wrapper
 
 
+class AdaptiveConcurrencyLimit:
+    """
+    Adaptive limit of in-flight calls to a backend.
+    
+    A static bulkhead limit is either too low, wasting capacity, or too
+    high, letting requests queue up inside a busy backend. This limit
+    adapts with AIMD on latency, in the spirit of Netflix concurrency-limits:
+    
+    - the baseline latency follows the lowest latency observed and drifts
+      slowly towards higher latencies to follow lasting changes
+    - the limit grows by about one per round of calls while at least half
+      of it is in use and latency stays within ``tolerance`` times the
+      baseline
+    - the limit is multiplied by ``backoff_ratio`` when a call exceeds that
+      latency or is dropped (timeouts, rate limiting), at most once per
+      round of calls
+    
+    Calls that find the limit reached wait up to ``queue_timeout`` seconds,
+    bounded by the request deadline, and are then rejected with
+    ``ConcurrencyLimitExceededError``. Only functions can be decorated; HANA
+    and LLM calls run in worker threads.
+    """
+    
+    # Share of the gap to a higher latency the baseline moves per call
+    BASELINE_DRIFT = 0.01
+    
+    def __init__(
+        self,
+        name: str,
+        initial_limit: int = DEFAULT_CONCURRENCY_INITIAL_LIMIT,
+        min_limit: int = DEFAULT_CONCURRENCY_MIN_LIMIT,
+        max_limit: int = DEFAULT_CONCURRENCY_MAX_LIMIT,
+        tolerance: float = DEFAULT_CONCURRENCY_TOLERANCE,
+        backoff_ratio: float = DEFAULT_CONCURRENCY_BACKOFF_RATIO,
+        queue_timeout: float = DEFAULT_CONCURRENCY_QUEUE_TIMEOUT,
+    ):
+        """
+        Initialize a new AdaptiveConcurrencyLimit.
+        
+        Args:
+            name: Backend name used in metrics and errors
+            initial_limit: Limit before any latency was observed
+            min_limit: Lowest limit
+            max_limit: Highest limit
+            tolerance: Latency over baseline treated as overload
+            backoff_ratio: Factor applied to the limit on overload
+            queue_timeout: Maximum time in seconds to wait for a slot
+        """
+        self.name = name
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.tolerance = tolerance
+        self.backoff_ratio = backoff_ratio
+        self.queue_timeout = queue_timeout
+        self.limit = float(min(max(initial_limit, min_limit), max_limit))
+        self.in_flight = 0
+        self.baseline: Optional[float] = None
+        self.rejections = 0
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+    
+    def acquire(self) -> float:
+        """
+        Wait for a slot.
+        
+        On a thread running an event loop, waiting would stall every other
+        request served by the loop, so the call fails at once instead.
+        
+        Returns:
+            Start time of the call, to pass to ``release``
+            
+        Raises:
+            ConcurrencyLimitExceededError: If no slot frees up in time
+        """
+        remaining = remaining_time()
+        timeout = min(self.queue_timeout, remaining) if remaining is not None else self.queue_timeout
+        if _in_event_loop():
+            timeout = 0
+        give_up_at = time.monotonic() + timeout
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                wait = give_up_at - time.monotonic()
+                if wait <= 0:
+                    self.rejections += 1
+                    record_concurrency_rejection(self.name)
+                    raise ConcurrencyLimitExceededError(
+                        f"Concurrency limit of {int(self.limit)} in-flight calls to {self.name} reached"
+                    )
+                self._condition.wait(wait)
+            self.in_flight += 1
+            limit, in_flight = int(self.limit), self.in_flight
+        update_concurrency(self.name, limit, in_flight)
+        return time.monotonic()
+    
+    def try_acquire(self) -> Optional[float]:
+        """
+        Take a slot if one is free, without waiting.
+        
+        Returns:
+            Start time of the call, to pass to ``release``, or None if the
+            limit is reached
+        """
+        with self._condition:
+            if self.in_flight >= int(self.limit):
+                return None
+            self.in_flight += 1
+            limit, in_flight = int(self.limit), self.in_flight
+        update_concurrency(self.name, limit, in_flight)
+        return time.monotonic()
+    
+    def release(self, start: float, dropped: bool = False, measured: bool = True) -> None:
+        """
+        Free a slot and adapt the limit to the call's latency.
+        
+        Args:
+            start: Start time returned by ``acquire``
+            dropped: Whether the backend dropped the call (timeout, rate limiting)
+            measured: Whether the call's latency reflects the backend; calls
+                stopped by the caller, e.g. at its request deadline, free
+                their slot without adapting the limit
+        """
+        now = time.monotonic()
+        latency = now - start
+        with self._condition:
+            in_flight = self.in_flight
+            self.in_flight -= 1
+            if measured and not dropped:
+                if self.baseline is None or latency < self.baseline:
+                    self.baseline = latency
+                else:
+                    self.baseline += (latency - self.baseline) * self.BASELINE_DRIFT
+            overloaded = measured and (
+                dropped or (self.baseline is not None and latency > self.tolerance * self.baseline)
+            )
+            if overloaded:
+                # Calls finishing within one latency of a decrease started before it took effect
+                if now - self._last_decrease >= latency:
+                    self.limit = max(float(self.min_limit), self.limit * self.backoff_ratio)
+                    self._last_decrease = now
+            elif measured and in_flight * 2 >= self.limit:
+                self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+            free = int(self.limit) - self.in_flight
+            if free > 0:
+                self._condition.notify(free)
+            limit, in_flight = int(self.limit), self.in_flight
+        update_concurrency(self.name, limit, in_flight)
+    
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """
+        Run a block as one call to the backend.
+        
+        Timeouts raised in the block count as dropped calls, except for
+        expired request deadlines, which are not measured.
+        """
+        start = self.acquire()
+        dropped = False
+        measured = True
+        try:
+            yield
+        except DeadlineExceeded:
+            measured = False
+            raise
+        except TimeoutError:
+            dropped = True
+            raise
+        finally:
+            self.release(start, dropped, measured)
+    
+    def __call__(self, func: Callable[..., T]) -> Callable[..., T]:
+        """
+        Decorator to run a function within the concurrency limit.
+        
+        Args:
+            func: The function to limit
+            
+        Returns:
+            The wrapped function
+        """
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> T:
+            with self.slot():
+                return func(*args, **kwargs)
+        
+        return wrapper
+
+
+class Hedge:
+    """
+    Hedged requests for idempotent calls.
+    
+    When a call has not finished after the ``percentile`` latency of recent
+    calls, a second identical call is started and the first result wins.
+    Latencies of the last ``window_size`` calls are kept; no call is hedged
+    before ``min_samples`` were observed. Hedged requests withdraw from the
+    ``budget`` of the backend, like retries, and take a slot of its
+    concurrency ``limit`` without waiting for one, so hedging cannot
+    multiply the load of a backend that is slow for everyone.
+    
+    The losing call of a coroutine function is cancelled. Functions run
+    their attempts in a pool of ``max_workers`` threads, which cannot be
+    interrupted: the losing call runs to completion in the background and
+    its result is dropped. While the pool is busy, calls run unhedged in
+    the caller's thread. Only wrap calls without side effects.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        percentile: float = DEFAULT_HEDGE_PERCENTILE,
+        min_samples: int = DEFAULT_HEDGE_MIN_SAMPLES,
+        window_size: int = DEFAULT_HEDGE_WINDOW_SIZE,
+        budget: Optional[RetryBudget] = None,
+        limit: Optional[AdaptiveConcurrencyLimit] = None,
+        max_workers: int = DEFAULT_HEDGE_MAX_WORKERS,
+    ):
+        """
+        Initialize a new Hedge.
+        
+        Args:
+            name: Backend name used in metrics and thread names
+            percentile: Latency percentile after which a hedged request is sent
+            min_samples: Latencies observed before calls are hedged
+            window_size: Number of recent latencies kept
+            budget: Retry budget the hedged requests are charged to
+            limit: Concurrency limit the hedged requests take a slot of
+            max_workers: Threads running the attempts of hedged functions
+        """
+        self.name = name
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.budget = budget
+        self.limit = limit
+        self.max_workers = max_workers
+        self._latencies: "deque[float]" = deque(maxlen=window_size)
+        self._lock = threading.Lock()
+        self._workers = threading.BoundedSemaphore(max_workers)
+        self._executor: Optional[ThreadPoolExecutor] = None
+    
+    def record_latency(self, seconds: float) -> None:
+        """Add the latency of a finished call."""
+        with self._lock:
+            self._latencies.append(seconds)
+    
+    def delay(self) -> Optional[float]:
+        """
+        Get the time after which a call is hedged.
+        
+        Returns:
+            The percentile latency of recent calls, or None while too few
+            calls were observed
+        """
+        with self._lock:
+            if len(self._latencies) < max(1, self.min_samples):
+                return None
+            latencies = sorted(self._latencies)
+        return latencies[min(len(latencies) - 1, int(len(latencies) * self.percentile))]
+    
+    def _may_hedge(self) -> Tuple[bool, Optional[float]]:
+        # A hedged request needs a free slot of the backend and a budget token
+        slot = None
+        if self.limit is not None:
+            slot = self.limit.try_acquire()
+            if slot is None:
+                record_hedge(self.name, "limit_reached")
+                return False, None
+        if self.budget is not None and not self.budget.try_acquire():
+            if slot is not None:
+                self.limit.release(slot, measured=False)
+            record_hedge(self.name, "budget_exhausted")
+            return False, None
+        record_hedge(self.name, "sent")
+        return True, slot
+    
+    def _release_slot(self, slot: Optional[float], error: Optional[BaseException] = None) -> None:
+        if slot is None:
+            return
+        if isinstance(error, (asyncio.CancelledError, DeadlineExceeded)):
+            # Cancelled losers and expired deadlines say nothing about the backend
+            self.limit.release(slot, measured=False)
+        else:
+            self.limit.release(slot, dropped=isinstance(error, TimeoutError))
+    
+    def _on_success(self, attempt: int) -> None:
+        if self.budget is not None:
+            self.budget.record_success()
+        if attempt > 0:
+            record_hedge(self.name, "won")
+    
+    def _start(
+        self,
+        func: Callable[..., T],
+        args: Tuple,
+        kwargs: Dict[str, Any],
+        results: "queue.Queue",
+        attempt: int,
+        slot: Optional[float] = None,
+    ):
+        # The caller holds a worker, which the attempt frees when done;
+        # attempts keep the request context (deadline, trace) of the caller
+        context = contextvars.copy_context()
+        
+        def run():
+            start = time.monotonic()
+            try:
+                result = context.run(func, *args, **kwargs)
+            except BaseException as e:
+                self._release_slot(slot, e)
+                results.put((attempt, False, e))
+                return
+            finally:
+                self._workers.release()
+            self._release_slot(slot)
+            self.record_latency(time.monotonic() - start)
+            results.put((attempt, True, result))
+        
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix=f"hedge-{self.name}")
+        self._executor.submit(run)
+    
+    async def _attempt(
+        self,
+        func: Callable[..., Any],
+        args: Tuple,
+        kwargs: Dict[str, Any],
+        slot: Optional[float] = None,
+    ) -> Any:
+        start = time.monotonic()
+        try:
+            result = await func(*args, **kwargs)
+        except BaseException as e:
+            self._release_slot(slot, e)
+            raise
+        self._release_slot(slot)
+        self.record_latency(time.monotonic() - start)
+        return result
+    
+    def __call__(self, func: Callable[..., T]) -> Callable[..., T]:
+        """
+        Decorator to hedge calls of a function.
+        
+        Args:
+            func: The function or coroutine function to hedge
+            
+        Returns:
+            The wrapped function
+        """
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> T:
+                delay = self.delay()
+                if delay is None:
+                    result = await self._attempt(func, args, kwargs)
+                    self._on_success(0)
+                    return result
+                
+                attempts = [asyncio.ensure_future(self._attempt(func, args, kwargs))]
+                try:
+                    done, pending = await asyncio.wait(attempts, timeout=delay)
+                    if not done:
+                        hedged, slot = self._may_hedge()
+                        if hedged:
+                            attempts.append(asyncio.ensure_future(self._attempt(func, args, kwargs, slot)))
+                    pending = set(attempts)
+                    while True:
+                        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                        for attempt in done:
+                            if attempt.exception() is None:
+                                self._on_success(attempts.index(attempt))
+                                return attempt.result()
+                        if not pending:
+                            # Every attempt failed; report the error of the last one
+                            return attempt.result()
+                finally:
+                    for attempt in attempts:
+                        attempt.cancel()
+            
+            return async_wrapper
+        
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> T:
+            delay = self.delay()
+            if delay is None or not self._workers.acquire(blocking=False):
+                start = time.monotonic()
+                result = func(*args, **kwargs)
+                self.record_latency(time.monotonic() - start)
+                self._on_success(0)
+                return result
+            
+            results: "queue.Queue" = queue.Queue()
+            self._start(func, args, kwargs, results, 0)
+            running = 1
+            try:
+                outcome = results.get(timeout=delay)
+            except queue.Empty:
+                outcome = None
+                if not self._workers.acquire(blocking=False):
+                    record_hedge(self.name, "workers_busy")
+                else:
+                    hedged, slot = self._may_hedge()
+                    if hedged:
+                        self._start(func, args, kwargs, results, 1, slot)
+                        running += 1
+                    else:
+                        self._workers.release()
+            while True:
+                if outcome is None:
+                    outcome = results.get()
+                attempt, succeeded, value = outcome
+                running -= 1
+                if succeeded:
+                    self._on_success(attempt)
+                    return value
+                if running == 0:
+                    raise value
+                outcome = None
+        
+        return wrapper
+
+
 class FailoverManager:
     """
     Comprehensive failover management for high availability.
@@ -349,6 +1039,9 @@ class FailoverManager:
     def __init__(self):
         """Initialize a new FailoverManager."""
         self.circuit_breakers: Dict[str, CircuitBreaker] = {}
+        self.concurrency_limits: Dict[str, AdaptiveConcurrencyLimit] = {}
+        self.retry_budgets: Dict[str, RetryBudget] = {}
+        self.hedges: Dict[str, Hedge] = {}
         self.service_health: Dict[str, Dict[str, Any]] = {}
         self._lock = threading.RLock()
     
@@ -377,6 +1070,92 @@ class FailoverManager:
                 "failure_count": 0,
             }
     
+    def circuit_breaker(
+        self,
+        service_name: str,
+        failure_threshold: int = DEFAULT_CIRCUIT_BREAKER_THRESHOLD,
+        reset_timeout: float = DEFAULT_CIRCUIT_BREAKER_TIMEOUT,
+    ) -> CircuitBreaker:
+        """
+        Get the circuit breaker of a service, registering the service on first use.
+        
+        Sync and async call sites of a service share the returned breaker,
+        so failures of either trip it for both.
+        
+        Args:
+            service_name: Unique name for the service
+            failure_threshold: Number of failures before tripping a new circuit
+            reset_timeout: Time in seconds before attempting to reset a new circuit
+            
+        Returns:
+            The circuit breaker of the service
+        """
+        with self._lock:
+            breaker = self.circuit_breakers.get(service_name)
+            if breaker is None:
+                breaker = CircuitBreaker(failure_threshold, reset_timeout)
+                if service_name in self.service_health:
+                    self.circuit_breakers[service_name] = breaker
+                else:
+                    self.register_service(service_name, circuit_breaker=breaker)
+            return breaker
+    
+    def concurrency_limit(self, service_name: str, **kwargs: Any) -> AdaptiveConcurrencyLimit:
+        """
+        Get the adaptive concurrency limit of a service, registering the service on first use.
+        
+        Args:
+            service_name: Unique name for the service, e.g. ``hana`` or ``llm``
+            **kwargs: Parameters of a new ``AdaptiveConcurrencyLimit``
+            
+        Returns:
+            The concurrency limit of the service
+        """
+        with self._lock:
+            limit = self.concurrency_limits.get(service_name)
+            if limit is None:
+                limit = self.concurrency_limits[service_name] = AdaptiveConcurrencyLimit(service_name, **kwargs)
+                if service_name not in self.service_health:
+                    self.register_service(service_name)
+            return limit
+    
+    def retry_budget(self, service_name: str, **kwargs: Any) -> RetryBudget:
+        """
+        Get the retry budget of a service, registering the service on first use.
+        
+        Args:
+            service_name: Unique name for the service, e.g. ``hana`` or ``llm``
+            **kwargs: Parameters of a new ``RetryBudget``
+            
+        Returns:
+            The retry budget shared by retries and hedged requests to the service
+        """
+        with self._lock:
+            budget = self.retry_budgets.get(service_name)
+            if budget is None:
+                budget = self.retry_budgets[service_name] = RetryBudget(service_name, **kwargs)
+                if service_name not in self.service_health:
+                    self.register_service(service_name)
+            return budget
+    
+    def hedge(self, service_name: str, **kwargs: Any) -> Hedge:
+        """
+        Get the request hedge of a service, charged to the retry budget of the service.
+        
+        Args:
+            service_name: Unique name for the service, e.g. ``llm``
+            **kwargs: Parameters of a new ``Hedge``
+            
+        Returns:
+            The hedge of the service
+        """
+        with self._lock:
+            hedge = self.hedges.get(service_name)
+            if hedge is None:
+                kwargs.setdefault("budget", self.retry_budget(service_name))
+                hedge = self.hedges[service_name] = Hedge(service_name, **kwargs)
+            return hedge
+    
     def check_service_health(self, service_name: str) -> bool:
         """
         Check if a service is healthy.
@@ -439,6 +1218,23 @@ class FailoverManager:
                     "last_check_time": service["last_check_time"],
                     "circuit_state": circuit_state,
                 }
+                limit = self.concurrency_limits.get(service_name)
+                if limit is not None:
+                    result[service_name]["concurrency"] = {
+                        "limit": int(limit.limit),
+                        "in_flight": limit.in_flight,
+                        "rejections": limit.rejections,
+                        "baseline_latency": limit.baseline,
+                    }
+                budget = self.retry_budgets.get(service_name)
+                if budget is not None:
+                    result[service_name]["retry_budget"] = {
+                        "tokens": budget.tokens,
+                        "ratio": budget.ratio,
+                    }
+                hedge = self.hedges.get(service_name)
+                if hedge is not None:
+                    result[service_name]["hedge_delay"] = hedge.delay()
         
         return result
 
@@ -459,6 +1255,11 @@ class BulkheadTimeoutError(Exception):
     pass
 
 
+class ConcurrencyLimitExceededError(Exception):
+    """Exception raised when an adaptive concurrency limit stays reached."""
+    pass
+
+
 # Global failover manager instance
 failover_manager = FailoverManager()
 
@@ -469,6 +1270,9 @@ def with_retry(
     delay: float = DEFAULT_RETRY_DELAY,
     backoff_factor: float = DEFAULT_RETRY_BACKOFF_FACTOR,
     exceptions: Tuple[Exception, ...] = (Exception,),
+    max_delay: float = DEFAULT_RETRY_MAX_DELAY,
+    jitter: bool = True,
+    service_name: Optional[str] = None,
 ) -> Callable[[Callable[..., T]], Callable[..., T]]:
     """
     Decorator for applying retry pattern with custom parameters.
@@ -476,18 +1280,39 @@ def with_retry(
     Args:
         max_retries: Maximum number of retry attempts
         delay: Initial delay between retries in seconds
-        backoff_factor: Factor by which the delay increases with each retry
+        backoff_factor: Factor by which the delay increases with each retry without jitter
         exceptions: Tuple of exceptions that trigger a retry
+        max_delay: Longest delay between retries in seconds
+        jitter: Whether to randomize delays with decorrelated jitter
+        service_name: Charge retries to the retry budget of this service
+            registered with the failover manager
         
     Returns:
         Decorator function that applies retry pattern
     """
-    return Retry(max_retries, delay, backoff_factor, exceptions)
+    budget = failover_manager.retry_budget(service_name) if service_name is not None else None
+    return Retry(max_retries, delay, backoff_factor, exceptions, max_delay, jitter, budget)
+
+
+def with_hedge(service_name: str, **kwargs: Any) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """
+    Decorator for hedging idempotent calls to a service.
+    
+    Args:
+        service_name: Service registered with the failover manager; call
+            sites of one service share its latency window and retry budget
+        **kwargs: Parameters of the ``Hedge`` created on first use
+        
+    Returns:
+        Decorator function that hedges calls
+    """
+    return failover_manager.hedge(service_name, **kwargs)
 
 
 def with_circuit_breaker(
     failure_threshold: int = DEFAULT_CIRCUIT_BREAKER_THRESHOLD,
     reset_timeout: float = DEFAULT_CIRCUIT_BREAKER_TIMEOUT,
+    service_name: Optional[str] = None,
 ) -> Callable[[Callable[..., T]], Callable[..., T]]:
     """
     Decorator for applying circuit breaker pattern with custom parameters.
@@ -495,16 +1320,21 @@ def with_circuit_breaker(
     Args:
         failure_threshold: Number of failures before tripping the circuit
         reset_timeout: Time in seconds before attempting to reset the circuit
+        service_name: Share the breaker of this service registered with the
+            failover manager, e.g. between sync and async clients of it
         
     Returns:
         Decorator function that applies circuit breaker pattern
     """
+    if service_name is not None:
+        return failover_manager.circuit_breaker(service_name, failure_threshold, reset_timeout)
     return CircuitBreaker(failure_threshold, reset_timeout)
 
 
 def with_bulkhead(
     max_concurrent: int = DEFAULT_BULKHEAD_MAX_CONCURRENT,
     max_waiting: int = DEFAULT_BULKHEAD_MAX_WAITING,
+    acquire_timeout: float = DEFAULT_BULKHEAD_ACQUIRE_TIMEOUT,
 ) -> Callable[[Callable[..., T]], Callable[..., T]]:
     """
     Decorator for applying bulkhead pattern with custom parameters.
@@ -512,11 +1342,12 @@ def with_bulkhead(
     Args:
         max_concurrent: Maximum number of concurrent executions
         max_waiting: Maximum number of waiting executions
+        acquire_timeout: Maximum time in seconds to wait for an execution slot
         
     Returns:
         Decorator function that applies bulkhead pattern
     """
-    return Bulkhead(max_concurrent, max_waiting)
+    return Bulkhead(max_concurrent, max_waiting, acquire_timeout)
 
 
 def with_timeout(seconds: float) -> Callable[[Callable[..., T]], Callable[..., T]]:
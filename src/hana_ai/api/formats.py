@@ -0,0 +1,182 @@
+"""
+Columnar response formats negotiated by the ``Accept`` header.
+
+Large query results are expensive to return as JSON: every value is boxed
+into a per-row dict and then encoded as text. For clients that ask for it,
+results are instead built as Apache Arrow tables straight from the cursor's
+row chunks and returned as an Arrow IPC stream or a Parquet file. JSON stays
+the default for clients that do not ask for a binary format.
+"""
+import io
+import logging
+from typing import Any, List, Optional, Tuple
+
+from .config import settings
+from .streaming import (
+    ARROW_STREAM_MEDIA_TYPE,
+    PYARROW_AVAILABLE,
+    cursor_columns,
+    iter_row_chunks,
+    open_cursor,
+    result_schema,
+    rows_to_record_batch
+)
+
+logger = logging.getLogger(__name__)
+
+# Only import pyarrow if available
+if PYARROW_AVAILABLE:
+    import pyarrow as pa
+    try:
+        import pyarrow.parquet as pq
+        PARQUET_AVAILABLE = True
+    except ImportError:
+        PARQUET_AVAILABLE = False
+else:
+    PARQUET_AVAILABLE = False
+
+JSON_MEDIA_TYPE = "application/json"
+PARQUET_MEDIA_TYPE = "application/x-parquet"
+
+RESPONSE_FORMATS = {
+    "json": JSON_MEDIA_TYPE,
+    "arrow": ARROW_STREAM_MEDIA_TYPE,
+    "parquet": PARQUET_MEDIA_TYPE,
+}
+
+_ACCEPTED_MEDIA_TYPES = {
+    JSON_MEDIA_TYPE: "json",
+    ARROW_STREAM_MEDIA_TYPE: "arrow",
+    PARQUET_MEDIA_TYPE: "parquet",
+    "application/vnd.apache.parquet": "parquet",
+    "application/*": "json",
+    "*/*": "json",
+}
+
+
+def format_available(response_format: str) -> bool:
+    """
+    Check whether the server can produce a response format.
+
+    Parameters
+    ----------
+    response_format : str
+        ``"json"``, ``"arrow"`` or ``"parquet"``
+
+    Returns
+    -------
+    bool
+        True if the required libraries are installed
+    """
+    if response_format == "arrow":
+        return PYARROW_AVAILABLE
+    if response_format == "parquet":
+        return PARQUET_AVAILABLE
+    return response_format == "json"
+
+
+def negotiate_format(accept: Optional[str]) -> Optional[str]:
+    """
+    Select the response format for an ``Accept`` header.
+
+    Media types are ranked by their ``q`` parameter, ties keep the order in
+    the header. Formats the server cannot produce are skipped.
+
+    Parameters
+    ----------
+    accept : str, optional
+        Value of the ``Accept`` header
+
+    Returns
+    -------
+    str or None
+        The selected format, ``"json"`` if the header is missing, or None if
+        none of the acceptable media types can be produced
+    """
+    if not accept or not accept.strip():
+        return "json"
+
+    candidates: List[Tuple[float, int, str]] = []
+    for index, part in enumerate(accept.split(",")):
+        media_type, _, params = part.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        response_format = _ACCEPTED_MEDIA_TYPES.get(media_type.strip().lower())
+        if response_format and quality > 0:
+            candidates.append((-quality, index, response_format))
+
+    for _, _, response_format in sorted(candidates):
+        if format_available(response_format):
+            return response_format
+    return None
+
+
+def fetch_arrow_table(connection_context: Any, sql: str, chunk_size: int = None) -> Any:
+    """
+    Execute a query and build an Arrow table from the fetched row chunks.
+
+    Rows are transposed into column arrays chunk by chunk, without creating
+    a pandas DataFrame or per-row dicts. The schema is derived as for
+    streamed results (see ``streaming.result_schema``).
+
+    Parameters
+    ----------
+    connection_context : ConnectionContext
+        HANA connection context
+    sql : str
+        SQL statement to execute
+    chunk_size : int, optional
+        Rows per fetch and per record batch; defaults to ``STREAM_CHUNK_SIZE``
+
+    Returns
+    -------
+    pyarrow.Table
+        The query result
+    """
+    chunk_size = chunk_size or settings.STREAM_CHUNK_SIZE
+    cursor = open_cursor(connection_context, sql, chunk_size)
+    columns = cursor_columns(cursor)
+
+    batches = []
+    schema = None
+    for rows in iter_row_chunks(cursor, chunk_size):
+        if schema is None:
+            schema = result_schema(cursor, rows)
+        batches.append(rows_to_record_batch(columns, rows, schema))
+
+    if schema is None:
+        schema = result_schema(cursor)
+    return pa.Table.from_batches(batches, schema=schema)
+
+
+def serialize_table(table: Any, response_format: str) -> bytes:
+    """
+    Serialize an Arrow table.
+
+    Parameters
+    ----------
+    table : pyarrow.Table
+        Table to serialize
+    response_format : str
+        ``"arrow"`` for an Arrow IPC stream or ``"parquet"``
+
+    Returns
+    -------
+    bytes
+        Serialized table
+    """
+    if response_format == "parquet":
+        buffer = io.BytesIO()
+        pq.write_table(table, buffer, compression="snappy")
+        return buffer.getvalue()
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
@@ -0,0 +1,272 @@
+"""
+Background dependency probes for health checks.
+
+Orchestrator probes and monitors call the health endpoints every few
+seconds per pod. Instead of querying the database on each call,
+``HealthMonitor`` probes the dependencies (database, SAP AI Core endpoint,
+GPU) from a background thread every ``HEALTH_PROBE_INTERVAL_SECONDS`` and
+keeps the last snapshot. The endpoints only read that snapshot.
+
+- Liveness: the process serves requests. Dependency failures never fail
+  liveness, so a database outage does not restart pods.
+- Readiness: local state only. The instance has started, finished its
+  warm-up and is not draining. Dependencies are shared by all instances,
+  so a database outage would mark every pod unready at once and make even
+  cached responses unreachable; the probe results are reported on ``/``
+  and ``/health`` instead.
+
+The database probe uses its own connection, so probes never take pooled
+connections away from user requests.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import urlparse
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Probe states
+UP = "up"
+DOWN = "down"
+DISABLED = "disabled"
+
+class DatabaseProbe:
+    """
+    Probe the HANA database with ``SELECT 1 FROM DUMMY`` on a dedicated connection.
+
+    The connection is opened on first use and reopened after a failure.
+    """
+    def __init__(self):
+        self._connection = None
+
+    def __call__(self) -> Dict[str, Any]:
+        if not (settings.HANA_USERKEY or settings.HANA_HOST):
+            return {"status": DISABLED, "details": {"message": "No HANA connection configured"}}
+        try:
+            if self._connection is None:
+                from .dependencies import create_connection_context
+                self._connection = create_connection_context()
+            cursor = self._connection.connection.cursor()
+            try:
+                cursor.execute("SELECT 1 FROM DUMMY")
+                cursor.fetchone()
+            finally:
+                cursor.close()
+            return {"status": UP}
+        except Exception:
+            self.close()
+            raise
+
+    def close(self):
+        """Close the probe connection."""
+        connection, self._connection = self._connection, None
+        if connection is not None:
+            try:
+                connection.close()
+            except Exception as e:
+                logger.debug(f"Error closing health probe connection: {str(e)}")
+
+def probe_llm_endpoint() -> Dict[str, Any]:
+    """
+    Check that the SAP AI Core endpoint accepts connections.
+
+    Only opens a TCP connection, so no tokens are consumed.
+    """
+    base_url = os.environ.get("AICORE_BASE_URL")
+    if not base_url:
+        return {"status": DISABLED, "details": {"message": "AICORE_BASE_URL not set"}}
+    url = urlparse(base_url)
+    port = url.port or (443 if url.scheme == "https" else 80)
+    with socket.create_connection((url.hostname, port), timeout=settings.HEALTH_PROBE_TIMEOUT_SECONDS):
+        pass
+    return {"status": UP, "details": {"host": url.hostname}}
+
+def probe_gpu() -> Dict[str, Any]:
+    """Check that CUDA devices are available when GPU acceleration is enabled."""
+    if not settings.ENABLE_GPU_ACCELERATION:
+        return {"status": DISABLED, "details": {"message": "GPU acceleration is disabled"}}
+    try:
+        import torch
+    except ImportError:
+        return {"status": DOWN, "details": {"message": "PyTorch not installed"}}
+    device_count = torch.cuda.device_count() if torch.cuda.is_available() else 0
+    return {"status": UP if device_count else DOWN, "details": {"device_count": device_count}}
+
+class HealthMonitor:
+    """
+    Run dependency probes on an interval and keep the latest snapshot.
+
+    Parameters
+    ----------
+    probes : Dict[str, Callable[[], Dict[str, Any]]]
+        Probes by name. A probe returns a dict with ``status`` and optional
+        ``details``; exceptions mark the dependency as down.
+    interval_seconds : float, optional
+        Time between probe rounds; defaults to ``HEALTH_PROBE_INTERVAL_SECONDS``
+    timeout_seconds : float, optional
+        Time a probe may take; defaults to ``HEALTH_PROBE_TIMEOUT_SECONDS``
+    """
+    def __init__(self, probes: Dict[str, Callable[[], Dict[str, Any]]],
+                 interval_seconds: Optional[float] = None, timeout_seconds: Optional[float] = None):
+        self.probes = probes
+        self.interval_seconds = interval_seconds or settings.HEALTH_PROBE_INTERVAL_SECONDS
+        self.timeout_seconds = timeout_seconds or settings.HEALTH_PROBE_TIMEOUT_SECONDS
+        self.started_at = time.time()
+        self._started = threading.Event()
+        self._warmed_up = threading.Event()
+        self._draining = threading.Event()
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._pending: Dict[str, Future] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self):
+        """Start probing in a background thread."""
+        if self._thread is not None:
+            return
+        self._started.set()
+        self._draining.clear()
+        self._stop.clear()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, len(self.probes)), thread_name_prefix="health-probe")
+        self._thread = threading.Thread(target=self._loop, name="health-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop probing and close probe resources."""
+        self._draining.set()
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.timeout_seconds)
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        for probe in self.probes.values():
+            close = getattr(probe, "close", None)
+            if close is not None:
+                close()
+
+    def run_once(self) -> Dict[str, Any]:
+        """
+        Run all probes concurrently and store the snapshot.
+
+        A probe still running from an earlier round is not started again
+        and is reported as down.
+
+        Returns
+        -------
+        Dict[str, Any]
+            The new snapshot
+        """
+        executor = self._executor or ThreadPoolExecutor(max_workers=max(1, len(self.probes)))
+        started = {}
+        for name, probe in self.probes.items():
+            pending = self._pending.get(name)
+            if pending is not None and not pending.done():
+                continue
+            started[name] = (time.perf_counter(), executor.submit(probe))
+            self._pending[name] = started[name][1]
+        if executor is not self._executor:
+            executor.shutdown(wait=False)
+
+        deadline = time.monotonic() + self.timeout_seconds
+        checks = {}
+        for name in self.probes:
+            if name not in started:
+                checks[name] = {"status": DOWN, "error": "Previous probe still running"}
+                continue
+            start, future = started[name]
+            try:
+                result = future.result(timeout=max(0.0, deadline - time.monotonic()))
+                checks[name] = dict(result)
+            except FutureTimeoutError:
+                checks[name] = {"status": DOWN, "error": f"Probe timed out after {self.timeout_seconds:g}s"}
+            except Exception as e:
+                checks[name] = {"status": DOWN, "error": str(e)}
+            checks[name]["latency_ms"] = round((time.perf_counter() - start) * 1000, 2)
+
+        status = "degraded" if any(check["status"] == DOWN for check in checks.values()) else "healthy"
+
+        if self._snapshot is not None and self._snapshot["status"] != status:
+            logger.warning(f"Health changed from {self._snapshot['status']} to {status}", extra={"checks": checks})
+        self._snapshot = {"status": status, "checked_at": time.time(), "checks": checks}
+        return self._snapshot
+
+    def snapshot(self) -> Optional[Dict[str, Any]]:
+        """
+        Get the latest snapshot with its age.
+
+        Returns
+        -------
+        Dict[str, Any] or None
+            Status, per-probe results and ``age_seconds``, or None before the
+            first probe round finished
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            return None
+        return {**snapshot, "age_seconds": round(time.time() - snapshot["checked_at"], 3)}
+
+    def set_warmed_up(self):
+        """Record that the startup warm-up finished."""
+        self._warmed_up.set()
+
+    def set_draining(self):
+        """Record that the instance is shutting down and should get no new traffic."""
+        self._draining.set()
+
+    def readiness(self) -> Dict[str, Any]:
+        """
+        Decide whether the instance should receive traffic.
+
+        Only local state counts: not ready before startup, during the
+        warm-up, or once the instance is draining. Dependency probes do not
+        affect readiness.
+
+        Returns
+        -------
+        Dict[str, Any]
+            ``ready`` flag, a ``reason`` when not ready, and the uptime
+        """
+        uptime = round(time.time() - self.started_at, 3)
+        if self._draining.is_set():
+            return {"ready": False, "reason": "Shutting down", "uptime_seconds": uptime}
+        if not self._started.is_set():
+            return {"ready": False, "reason": "Not started", "uptime_seconds": uptime}
+        if not self._warmed_up.is_set():
+            return {"ready": False, "reason": "Warming up", "uptime_seconds": uptime}
+        return {"ready": True, "uptime_seconds": uptime}
+
+    def liveness(self) -> Dict[str, Any]:
+        """
+        Report that the process is alive.
+
+        Returns
+        -------
+        Dict[str, Any]
+            Status and uptime
+        """
+        return {"status": "alive", "uptime_seconds": round(time.time() - self.started_at, 3)}
+
+    def _loop(self):
+        while True:
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Health probe round failed: {str(e)}")
+            if self._stop.wait(self.interval_seconds):
+                return
+
+# Global health monitor
+health_monitor = HealthMonitor({
+    "database": DatabaseProbe(),
+    "llm": probe_llm_endpoint,
+    "gpu": probe_gpu,
+})
@@ -0,0 +1,845 @@
+"""
+Asynchronous job execution for long-running tool invocations.
+
+Jobs are executed by a bounded thread pool. At most ``JOB_MAX_PER_TENANT``
+jobs of one tenant run at the same time; further jobs stay queued until a
+slot frees up, so one tenant cannot occupy every worker. Job state is stored
+in a local SQLite database. After a restart, queued jobs are re-queued and
+jobs that were running are marked as interrupted. A server shutdown, including
+the recycling of a single worker process, gives running jobs
+``JOB_DRAIN_TIMEOUT`` seconds to finish and re-queues the rest, which the
+next worker to start resumes from the beginning.
+
+When several worker processes share the database, each runs its own pool.
+Jobs are claimed with a conditional update, so a job re-queued by several
+workers runs only once. Cancelling a job that runs in another worker
+records a cancel request in the database, which that worker polls.
+"""
+import copy
+import enum
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from .config import settings
+from .responses import json_default
+
+logger = logging.getLogger(__name__)
+
+
+class JobStatus(str, enum.Enum):
+    """Lifecycle states of a job."""
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+    INTERRUPTED = "interrupted"
+
+
+# Set by a process supervisor that already interrupted the jobs of a previous run
+JOBS_SUPERVISED_ENV = "HANA_AI_JOBS_SUPERVISED"
+
+FINAL_STATES = {JobStatus.SUCCEEDED, JobStatus.FAILED, JobStatus.CANCELLED, JobStatus.INTERRUPTED}
+
+
+class JobQueueFullError(Exception):
+    """Raised when the job queue has reached ``JOB_MAX_QUEUED``."""
+
+
+class JobCancelledError(Exception):
+    """Raised by a runner when it stops because the job was cancelled."""
+
+
+@dataclass
+class Job:
+    """State of a job."""
+    id: str
+    tenant: str
+    tool_name: str
+    parameters: Dict[str, Any]
+    status: JobStatus = JobStatus.QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    progress: Optional[float] = None
+    progress_message: Optional[str] = None
+    progress_indicator_id: Optional[str] = None
+    result: Any = None
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the job to a JSON-friendly dict."""
+        data = asdict(self)
+        data["status"] = self.status.value
+        return data
+
+
+class JobContext:
+    """
+    Handle passed to a job runner.
+
+    Runners report progress through it and register callbacks that abort
+    their work, such as cancelling the running database statement.
+    """
+
+    def __init__(self, manager: "JobManager", job: Job):
+        self._manager = manager
+        self.job = job
+        self.cancelled = threading.Event()
+        self._cancel_callbacks: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def report_progress(self, progress: Optional[float], message: Optional[str] = None):
+        """
+        Update the progress of the job.
+
+        Parameters
+        ----------
+        progress : float, optional
+            Fraction completed between 0 and 1
+        message : str, optional
+            Progress message
+        """
+        self._manager.update_progress(self.job.id, progress, message)
+
+    def add_cancel_callback(self, callback: Callable[[], None]):
+        """
+        Register a callback invoked when the job is cancelled.
+
+        Parameters
+        ----------
+        callback : Callable[[], None]
+            Aborts the runner's work
+        """
+        with self._lock:
+            self._cancel_callbacks.append(callback)
+            already_cancelled = self.cancelled.is_set()
+        if already_cancelled:
+            _safe_call(callback)
+
+    def cancel(self):
+        """Signal cancellation and invoke the registered callbacks."""
+        with self._lock:
+            self.cancelled.set()
+            callbacks = list(self._cancel_callbacks)
+        for callback in callbacks:
+            _safe_call(callback)
+
+
+def _safe_call(callback: Callable[[], None]):
+    try:
+        callback()
+    except Exception as e:
+        logger.warning(f"Job cancel callback failed: {str(e)}")
+
+
+class JobStore:
+    """
+    SQLite persistence of job state.
+
+    Parameters
+    ----------
+    path : str
+        Database file path; ``":memory:"`` keeps jobs in memory only
+    """
+
+    _COLUMNS = [
+        "id", "tenant", "tool_name", "parameters", "status", "created_at", "started_at",
+        "finished_at", "progress", "progress_message", "progress_indicator_id", "result", "error"
+    ]
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open the database on first use; the caller holds the lock."""
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            with self._conn:
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS jobs ("
+                    "id TEXT PRIMARY KEY, tenant TEXT NOT NULL, tool_name TEXT NOT NULL, "
+                    "parameters TEXT, status TEXT NOT NULL, created_at REAL, started_at REAL, "
+                    "finished_at REAL, progress REAL, progress_message TEXT, "
+                    "progress_indicator_id TEXT, result TEXT, error TEXT)"
+                )
+                self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_tenant ON jobs (tenant, created_at)")
+                # Cancellations of jobs running in another worker process
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS job_cancel_requests (id TEXT PRIMARY KEY, requested_at REAL)"
+                )
+        return self._conn
+
+    def save(self, job: Job):
+        """
+        Insert or update a job.
+
+        Parameters
+        ----------
+        job : Job
+            The job
+        """
+        values = asdict(job)
+        values["status"] = job.status.value
+        values["parameters"] = json.dumps(job.parameters, default=json_default)
+        values["result"] = json.dumps(job.result, default=json_default)
+        placeholders = ", ".join("?" for _ in self._COLUMNS)
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    f"INSERT OR REPLACE INTO jobs ({', '.join(self._COLUMNS)}) VALUES ({placeholders})",
+                    [values[column] for column in self._COLUMNS]
+                )
+
+    def finish(self, job: Job) -> bool:
+        """
+        Store the final state of a job unless it is no longer running.
+
+        A job interrupted by a shutdown keeps that state when its runner
+        stops later.
+
+        Parameters
+        ----------
+        job : Job
+            The job in a final state
+
+        Returns
+        -------
+        bool
+            True if the job was running and is now updated
+        """
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                cursor = conn.execute(
+                    "UPDATE jobs SET status = ?, finished_at = ?, progress = ?, progress_message = ?, "
+                    "result = ?, error = ? WHERE id = ? AND status = ?",
+                    (job.status.value, job.finished_at, job.progress, job.progress_message,
+                     json.dumps(job.result, default=json_default), job.error, job.id, JobStatus.RUNNING.value)
+                )
+                conn.execute("DELETE FROM job_cancel_requests WHERE id = ?", (job.id,))
+        return cursor.rowcount == 1
+
+    def save_progress(self, job: Job):
+        """
+        Store the progress of a running job.
+
+        Parameters
+        ----------
+        job : Job
+            The job
+        """
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    "UPDATE jobs SET progress = ?, progress_message = ? WHERE id = ? AND status = ?",
+                    (job.progress, job.progress_message, job.id, JobStatus.RUNNING.value)
+                )
+
+    def request_cancel(self, job_id: str) -> bool:
+        """
+        Ask the worker process running a job to cancel it.
+
+        Parameters
+        ----------
+        job_id : str
+            Job identifier
+
+        Returns
+        -------
+        bool
+            True if the job is running and the request was recorded
+        """
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO job_cancel_requests (id, requested_at) "
+                    "SELECT id, ? FROM jobs WHERE id = ? AND status = ?",
+                    (time.time(), job_id, JobStatus.RUNNING.value)
+                )
+        return cursor.rowcount == 1
+
+    def cancel_requests(self, job_ids: List[str]) -> List[str]:
+        """
+        Find jobs whose cancellation was requested.
+
+        Parameters
+        ----------
+        job_ids : List[str]
+            Jobs to check
+
+        Returns
+        -------
+        List[str]
+            The jobs with a cancel request
+        """
+        if not job_ids:
+            return []
+        with self._lock:
+            rows = self._connection().execute(
+                f"SELECT id FROM job_cancel_requests WHERE id IN ({', '.join('?' for _ in job_ids)})",
+                job_ids
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """
+        Load a job.
+
+        Parameters
+        ----------
+        job_id : str
+            Job identifier
+
+        Returns
+        -------
+        Job or None
+            The job if it exists
+        """
+        rows = self._query("SELECT {} FROM jobs WHERE id = ?", [job_id])
+        return rows[0] if rows else None
+
+    def list(self, tenant: Optional[str] = None, statuses: Optional[List[JobStatus]] = None,
+             limit: int = 100) -> List[Job]:
+        """
+        List jobs, newest first.
+
+        Parameters
+        ----------
+        tenant : str, optional
+            Only jobs of this tenant
+        statuses : List[JobStatus], optional
+            Only jobs in these states
+        limit : int
+            Maximum number of jobs
+
+        Returns
+        -------
+        List[Job]
+            The jobs
+        """
+        clauses, params = [], []
+        if tenant is not None:
+            clauses.append("tenant = ?")
+            params.append(tenant)
+        if statuses:
+            clauses.append(f"status IN ({', '.join('?' for _ in statuses)})")
+            params.extend(status.value for status in statuses)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return self._query(f"SELECT {{}} FROM jobs{where} ORDER BY created_at DESC LIMIT ?", params + [limit])
+
+    def purge(self, older_than: float):
+        """
+        Delete finished jobs.
+
+        Parameters
+        ----------
+        older_than : float
+            Delete jobs finished before this timestamp
+        """
+        final = [status.value for status in FINAL_STATES]
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    f"DELETE FROM jobs WHERE finished_at < ? AND status IN ({', '.join('?' for _ in final)})",
+                    [older_than] + final
+                )
+                conn.execute(
+                    "DELETE FROM job_cancel_requests WHERE id NOT IN (SELECT id FROM jobs WHERE status = ?)",
+                    (JobStatus.RUNNING.value,)
+                )
+
+    def claim(self, job_id: str, started_at: float) -> bool:
+        """
+        Mark a queued job as running unless another process took it.
+
+        Parameters
+        ----------
+        job_id : str
+            Job identifier
+        started_at : float
+            Start time
+
+        Returns
+        -------
+        bool
+            True if the job was queued and is now claimed
+        """
+        return self._transition(job_id, JobStatus.QUEUED, JobStatus.RUNNING, "started_at", started_at)
+
+    def requeue(self, job_id: str) -> bool:
+        """
+        Put a running job back into the queue.
+
+        Parameters
+        ----------
+        job_id : str
+            Job identifier
+
+        Returns
+        -------
+        bool
+            True if the job was running and is now queued
+        """
+        return self._transition(job_id, JobStatus.RUNNING, JobStatus.QUEUED, "started_at", None)
+
+    def cancel_queued(self, job_id: str, finished_at: float) -> bool:
+        """
+        Cancel a job that is still queued.
+
+        Parameters
+        ----------
+        job_id : str
+            Job identifier
+        finished_at : float
+            Cancellation time
+
+        Returns
+        -------
+        bool
+            True if the job was queued and is now cancelled
+        """
+        return self._transition(job_id, JobStatus.QUEUED, JobStatus.CANCELLED, "finished_at", finished_at)
+
+    def interrupt_running(self, reason: str, exclude: Optional[List[str]] = None) -> int:
+        """
+        Mark running jobs as interrupted.
+
+        Parameters
+        ----------
+        reason : str
+            Error message stored with the jobs
+        exclude : List[str], optional
+            Jobs that are still running in this process
+
+        Returns
+        -------
+        int
+            Number of interrupted jobs
+        """
+        exclude = exclude or []
+        not_in = f" AND id NOT IN ({', '.join('?' for _ in exclude)})" if exclude else ""
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                cursor = conn.execute(
+                    f"UPDATE jobs SET status = ?, finished_at = ?, error = ? WHERE status = ?{not_in}",
+                    [JobStatus.INTERRUPTED.value, time.time(), reason, JobStatus.RUNNING.value] + exclude
+                )
+        return cursor.rowcount
+
+    def _transition(self, job_id: str, from_status: JobStatus, to_status: JobStatus, column: str,
+                    value: Optional[float]) -> bool:
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                cursor = conn.execute(
+                    f"UPDATE jobs SET status = ?, {column} = ? WHERE id = ? AND status = ?",
+                    (to_status.value, value, job_id, from_status.value)
+                )
+        return cursor.rowcount == 1
+
+    def close(self):
+        """Close the database."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _query(self, sql: str, params: List[Any]) -> List[Job]:
+        with self._lock:
+            rows = self._connection().execute(sql.format(", ".join(self._COLUMNS)), params).fetchall()
+        jobs = []
+        for row in rows:
+            values = dict(zip(self._COLUMNS, row))
+            values["status"] = JobStatus(values["status"])
+            values["parameters"] = json.loads(values["parameters"] or "{}")
+            values["result"] = json.loads(values["result"]) if values["result"] else None
+            jobs.append(Job(**values))
+        return jobs
+
+
+# Runs a job and returns its JSON-serializable result
+JobRunner = Callable[[Job, JobContext], Any]
+
+
+class JobManager:
+    """
+    Bounded job executor with per-tenant concurrency caps.
+
+    Parameters
+    ----------
+    store : JobStore
+        Persistence of job state
+    runner : JobRunner, optional
+        Executes a job; can also be set later with ``set_runner``
+    max_workers : int
+        Number of jobs running at the same time
+    max_per_tenant : int
+        Number of jobs of one tenant running at the same time
+    max_queued : int
+        Number of queued jobs accepted before submissions are rejected
+    retention_seconds : int, optional
+        Finished jobs older than this are purged on start
+    cancel_poll_interval : float
+        Seconds between checks for cancel requests made in other worker
+        processes
+    """
+
+    def __init__(self, store: JobStore, runner: Optional[JobRunner] = None, max_workers: int = 4,
+                 max_per_tenant: int = 2, max_queued: int = 100, retention_seconds: Optional[int] = None,
+                 cancel_poll_interval: float = 1.0):
+        self.store = store
+        self.runner = runner
+        self.max_workers = max(1, max_workers)
+        self.max_per_tenant = max(1, max_per_tenant)
+        self.max_queued = max_queued
+        self.retention_seconds = retention_seconds
+        self.cancel_poll_interval = cancel_poll_interval
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._stopped = threading.Event()
+        self._queue: Deque[Job] = deque()
+        self._running: Dict[str, JobContext] = {}
+        self._tenant_running: Dict[str, int] = {}
+        self._lock = threading.RLock()
+        # Notified when a running job ends
+        self._idle = threading.Condition(self._lock)
+
+    def set_runner(self, runner: JobRunner):
+        """
+        Set the function executing jobs.
+
+        Parameters
+        ----------
+        runner : JobRunner
+            Executes a job
+        """
+        self.runner = runner
+
+    def start(self):
+        """Start the worker pool and recover jobs from a previous run."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="hana-ai-job")
+                self._stopped.clear()
+                threading.Thread(target=self._poll_cancel_requests, name="hana-ai-job-cancel", daemon=True).start()
+        if self.retention_seconds:
+            self.store.purge(time.time() - self.retention_seconds)
+        if os.environ.get(JOBS_SUPERVISED_ENV) != "1":
+            self.interrupt_running()
+        self.recover()
+
+    def shutdown(self, wait: bool = False, timeout: Optional[float] = None, requeue: bool = False):
+        """
+        Stop the worker pool.
+
+        No further jobs are started; queued jobs stay queued in the store and
+        are resumed by the next worker that starts. Running jobs get up to
+        ``timeout`` seconds to finish. Unless ``wait`` is set, jobs still
+        running then are cancelled and marked as interrupted, or re-queued
+        with ``requeue``.
+
+        Parameters
+        ----------
+        wait : bool
+            Wait for running jobs to finish
+        timeout : float, optional
+            Seconds to let running jobs finish before they are cancelled
+        requeue : bool
+            Re-queue cancelled jobs instead of marking them interrupted, for
+            restarts of a single worker process
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self._queue.clear()
+        self._stopped.set()
+        if timeout:
+            with self._idle:
+                self._idle.wait_for(lambda: not self._running, timeout)
+        with self._lock:
+            running = list(self._running.values())
+        if not wait:
+            # Stored before cancelling, so the runners' own final state does not win
+            for context in running:
+                if requeue:
+                    self.store.requeue(context.job.id)
+                else:
+                    interrupted = copy.copy(context.job)
+                    interrupted.status = JobStatus.INTERRUPTED
+                    interrupted.finished_at = time.time()
+                    interrupted.error = "Interrupted by a server shutdown"
+                    self.store.finish(interrupted)
+            if running:
+                action = "Re-queued" if requeue else "Interrupted"
+                logger.warning(f"{action} {len(running)} running job(s) on shutdown")
+            for context in running:
+                context.cancel()
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def interrupt_running(self) -> int:
+        """
+        Mark jobs left running by a previous run as interrupted.
+
+        Returns
+        -------
+        int
+            Number of interrupted jobs
+        """
+        with self._lock:
+            local = list(self._running)
+        count = self.store.interrupt_running("Interrupted by a server restart", exclude=local)
+        if count:
+            logger.warning(f"Marked {count} job(s) interrupted by a restart")
+        return count
+
+    def recover(self):
+        """Re-queue jobs that are queued in the store."""
+        queued = self.store.list(statuses=[JobStatus.QUEUED], limit=1_000_000)
+        with self._lock:
+            known = {job.id for job in self._queue}
+            for job in sorted(queued, key=lambda j: j.created_at):
+                if job.id not in known:
+                    self._queue.append(job)
+        if queued:
+            logger.info(f"Re-queued {len(queued)} job(s)")
+        self._dispatch()
+
+    def submit(self, tenant: str, tool_name: str, parameters: Dict[str, Any],
+               progress_indicator_id: Optional[str] = None, job_id: Optional[str] = None) -> Job:
+        """
+        Queue a job.
+
+        Parameters
+        ----------
+        tenant : str
+            Tenant the job belongs to
+        tool_name : str
+            Tool or pipeline to run
+        parameters : Dict[str, Any]
+            Invocation parameters
+        progress_indicator_id : str, optional
+            Progress indicator the tool reports to
+        job_id : str, optional
+            Job identifier; generated if omitted
+
+        Returns
+        -------
+        Job
+            The queued job
+
+        Raises
+        ------
+        JobQueueFullError
+            If ``max_queued`` jobs are already waiting
+        """
+        job = Job(
+            id=job_id or uuid.uuid4().hex,
+            tenant=tenant,
+            tool_name=tool_name,
+            parameters=parameters,
+            progress_indicator_id=progress_indicator_id
+        )
+        with self._lock:
+            if len(self._queue) >= self.max_queued:
+                raise JobQueueFullError(f"Job queue is full ({self.max_queued} jobs waiting)")
+            self.store.save(job)
+            self._queue.append(job)
+        self._dispatch()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """
+        Get the current state of a job.
+
+        Parameters
+        ----------
+        job_id : str
+            Job identifier
+
+        Returns
+        -------
+        Job or None
+            The job if it exists
+        """
+        with self._lock:
+            context = self._running.get(job_id)
+            if context is not None:
+                return context.job
+        return self.store.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """
+        Cancel a job.
+
+        Queued jobs are cancelled immediately. Running jobs are signalled and
+        become cancelled once their runner stops; jobs running in another
+        worker process are signalled through a cancel request in the store.
+
+        Parameters
+        ----------
+        job_id : str
+            Job identifier
+
+        Returns
+        -------
+        Job or None
+            The job, or None if it does not exist
+        """
+        with self._lock:
+            for queued in list(self._queue):
+                if queued.id == job_id:
+                    self._queue.remove(queued)
+                    queued.status = JobStatus.CANCELLED
+                    queued.finished_at = time.time()
+                    self.store.save(queued)
+                    return queued
+            context = self._running.get(job_id)
+
+        if context is not None:
+            context.cancel()
+            return context.job
+        # The job may be queued or running in another worker process
+        if not self.store.cancel_queued(job_id, time.time()):
+            self.store.request_cancel(job_id)
+        return self.store.get(job_id)
+
+    def update_progress(self, job_id: str, progress: Optional[float], message: Optional[str] = None):
+        """
+        Update the progress of a running job.
+
+        Parameters
+        ----------
+        job_id : str
+            Job identifier
+        progress : float, optional
+            Fraction completed between 0 and 1
+        message : str, optional
+            Progress message
+        """
+        with self._lock:
+            context = self._running.get(job_id)
+            if context is None:
+                return
+            job = context.job
+            if progress is not None:
+                job.progress = min(1.0, max(0.0, float(progress)))
+            if message is not None:
+                job.progress_message = message
+        self.store.save_progress(job)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get executor statistics.
+
+        Returns
+        -------
+        Dict[str, Any]
+            Queued and running job counts
+        """
+        with self._lock:
+            return {
+                "queued": len(self._queue),
+                "running": len(self._running),
+                "max_workers": self.max_workers,
+                "max_per_tenant": self.max_per_tenant,
+            }
+
+    def _poll_cancel_requests(self):
+        """Cancel local jobs whose cancellation was requested in another worker process."""
+        while not self._stopped.wait(self.cancel_poll_interval):
+            with self._lock:
+                running = dict(self._running)
+            if not running:
+                continue
+            try:
+                requested = self.store.cancel_requests(list(running))
+            except Exception as e:
+                logger.warning(f"Could not check job cancel requests: {str(e)}")
+                continue
+            for job_id in requested:
+                logger.info(f"Cancelling job {job_id} on request of another worker")
+                running[job_id].cancel()
+
+    def _dispatch(self):
+        """Start queued jobs while workers and tenant slots are free."""
+        with self._lock:
+            if self._executor is None or self.runner is None:
+                return
+            while len(self._running) < self.max_workers:
+                job = next(
+                    (queued for queued in self._queue
+                     if self._tenant_running.get(queued.tenant, 0) < self.max_per_tenant),
+                    None
+                )
+                if job is None:
+                    return
+                self._queue.remove(job)
+                started_at = time.time()
+                if not self.store.claim(job.id, started_at):
+                    # Claimed by another worker process or cancelled meanwhile
+                    continue
+                context = JobContext(self, job)
+                self._running[job.id] = context
+                self._tenant_running[job.tenant] = self._tenant_running.get(job.tenant, 0) + 1
+                job.status = JobStatus.RUNNING
+                job.started_at = started_at
+                self._executor.submit(self._execute, context)
+
+    def _execute(self, context: JobContext):
+        job = context.job
+        try:
+            result = self.runner(job, context)
+            if context.cancelled.is_set():
+                raise JobCancelledError()
+            job.result = result
+            job.status = JobStatus.SUCCEEDED
+            job.progress = 1.0
+        except Exception as e:
+            if context.cancelled.is_set():
+                job.status = JobStatus.CANCELLED
+            else:
+                logger.error(f"Job {job.id} ({job.tool_name}) failed: {str(e)}", exc_info=True)
+                job.status = JobStatus.FAILED
+                job.error = str(e)
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                self._running.pop(job.id, None)
+                self._idle.notify_all()
+                remaining = self._tenant_running.get(job.tenant, 1) - 1
+                if remaining > 0:
+                    self._tenant_running[job.tenant] = remaining
+                else:
+                    self._tenant_running.pop(job.tenant, None)
+            try:
+                self.store.finish(job)
+            except Exception as e:
+                logger.error(f"Failed to persist job {job.id}: {str(e)}")
+            self._dispatch()
+
+
+# Global job manager; the runner is installed by the jobs router
+job_manager = JobManager(
+    store=JobStore(settings.JOB_STORE_PATH),
+    max_workers=settings.JOB_MAX_WORKERS,
+    max_per_tenant=settings.JOB_MAX_PER_TENANT,
+    max_queued=settings.JOB_MAX_QUEUED,
+    retention_seconds=settings.JOB_RETENTION_SECONDS,
+    cancel_poll_interval=settings.JOB_CANCEL_POLL_INTERVAL
+)
@@ -0,0 +1,279 @@
+"""
+LLM client cache for the HANA AI Toolkit API.
+
+Creating an SAP AI Core language model re-reads the GenAI Hub configuration,
+builds new HTTP clients and fetches fresh auth tokens. This module keeps a
+bounded, keyed cache of initialized clients so that requests with the same
+model configuration share one client and its connection pools.
+"""
+import copy
+import functools
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from .config import settings
+from .env_constants import DEFAULT_LLM_CACHE_SIZE
+from .failover import Hedge, failover_manager
+
+logger = logging.getLogger(__name__)
+
+# (model, temperature, max_tokens, device_profile)
+LLMCacheKey = Tuple[str, float, int, Hashable]
+
+
+class LLMClientCache:
+    """
+    Bounded LRU cache of initialized language model clients.
+
+    Clients are keyed by ``(model, temperature, max_tokens, device_profile)``.
+    When a key misses but a client for the same model and device profile is
+    already cached, the new client is derived from it with a shallow copy so
+    that the underlying HTTP client, connection pool and token state are
+    reused instead of re-initialized.
+
+    Parameters
+    ----------
+    max_size : int
+        Maximum number of clients kept in the cache.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_LLM_CACHE_SIZE):
+        self.max_size = max(1, max_size)
+        self._clients: "OrderedDict[LLMCacheKey, Any]" = OrderedDict()
+        self._proxy_client = None
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.derived = 0
+
+    def get_or_create(
+        self,
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        device_profile: Hashable,
+        factory: Callable[[], Any]
+    ) -> Any:
+        """
+        Return a cached client or build one.
+
+        Parameters
+        ----------
+        model : str
+            SAP AI Core model name
+        temperature : float
+            Sampling temperature
+        max_tokens : int
+            Maximum number of generated tokens
+        device_profile : Hashable
+            Device profile the client was configured for
+        factory : Callable[[], Any]
+            Builds a new client when nothing can be reused
+
+        Returns
+        -------
+        Any
+            The language model client
+        """
+        key = (model, float(temperature), int(max_tokens), device_profile)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self._clients.move_to_end(key)
+                self.hits += 1
+                return client
+
+            self.misses += 1
+            base = self._find_base(model, device_profile)
+
+        # Build outside the lock so slow initializations do not serialize
+        # unrelated lookups.
+        client = None
+        if base is not None:
+            client = _derive_client(base, temperature, max_tokens)
+            if client is not None:
+                self.derived += 1
+        if client is None:
+            client = factory()
+
+        with self._lock:
+            # Another request may have populated the key meanwhile
+            existing = self._clients.get(key)
+            if existing is not None:
+                self._clients.move_to_end(key)
+                return existing
+            self._clients[key] = client
+            while len(self._clients) > self.max_size:
+                evicted_key, _ = self._clients.popitem(last=False)
+                logger.debug(f"Evicted LLM client {evicted_key} from cache")
+        return client
+
+    def get_proxy_client(self) -> Any:
+        """
+        Return the shared GenAI Hub proxy client, creating it once.
+
+        Returns
+        -------
+        Any
+            The proxy client, or None if it cannot be created
+        """
+        with self._lock:
+            if self._proxy_client is None:
+                try:
+                    from gen_ai_hub.proxy.core.proxy_clients import get_proxy_client
+                    self._proxy_client = get_proxy_client("gen-ai-hub")
+                except Exception as e:
+                    logger.debug(f"Shared GenAI Hub proxy client unavailable: {str(e)}")
+                    return None
+            return self._proxy_client
+
+    def clear(self):
+        """Drop all cached clients and reset statistics."""
+        with self._lock:
+            self._clients.clear()
+            self._proxy_client = None
+            self.hits = 0
+            self.misses = 0
+            self.derived = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns
+        -------
+        Dict[str, Any]
+            Size, capacity and hit/miss counters
+        """
+        with self._lock:
+            return {
+                "size": len(self._clients),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "derived": self.derived,
+            }
+
+    def _find_base(self, model: str, device_profile: Hashable) -> Optional[Any]:
+        """Find the most recently used client for the same model and device profile."""
+        for (cached_model, _, _, cached_profile), client in reversed(self._clients.items()):
+            if cached_model == model and cached_profile == device_profile:
+                return client
+        return None
+
+
+def _derive_client(base: Any, temperature: float, max_tokens: int) -> Optional[Any]:
+    """
+    Derive a client with different generation parameters from a cached one.
+
+    The copy is shallow, so HTTP clients and proxy/token state are shared with
+    the base client.
+
+    Parameters
+    ----------
+    base : Any
+        Cached language model client
+    temperature : float
+        Sampling temperature for the new client
+    max_tokens : int
+        Maximum number of generated tokens for the new client
+
+    Returns
+    -------
+    Any
+        The derived client, or None if the client type does not support copying
+    """
+    update = {"temperature": temperature, "max_tokens": max_tokens}
+    for copy_method in ("model_copy", "copy"):
+        method = getattr(base, copy_method, None)
+        if method is None:
+            continue
+        try:
+            return method(update=update)
+        except Exception as e:
+            logger.debug(f"Could not derive LLM client via {copy_method}: {str(e)}")
+    return None
+
+
+def _llm_hedge() -> Hedge:
+    """Hedge shared by all LLM completions of the process, charged to the ``llm`` retry budget and concurrency limit."""
+    from .timing import backend_limit
+
+    budget = failover_manager.retry_budget(
+        "llm",
+        ratio=settings.RETRY_BUDGET_RATIO,
+        max_tokens=settings.RETRY_BUDGET_MAX_TOKENS
+    )
+    return failover_manager.hedge(
+        "llm",
+        percentile=settings.LLM_HEDGE_PERCENTILE,
+        min_samples=settings.LLM_HEDGE_MIN_SAMPLES,
+        budget=budget,
+        limit=backend_limit("llm"),
+        max_workers=settings.LLM_HEDGE_MAX_WORKERS
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _hedged_class(cls: type) -> type:
+    """Subclass of a language model class whose completions are hedged."""
+    def _generate(self, *args, **kwargs):
+        generate = super(hedged, self)._generate
+        # Streamed tokens of two attempts would interleave; only the streaming
+        # variant used by /conversation/stream skips hedging
+        if getattr(self, "streaming", False):
+            return generate(*args, **kwargs)
+        return _llm_hedge()(generate)(*args, **kwargs)
+
+    namespace = {"__module__": cls.__module__, "__qualname__": f"Hedged{cls.__qualname__}", "_generate": _generate}
+    # LangChain's default _agenerate runs _generate in a thread, which is
+    # hedged already; only native async clients are hedged (and cancelled) here
+    if not getattr(cls._agenerate, "__module__", "").startswith("langchain_core."):
+        async def _agenerate(self, *args, **kwargs):
+            agenerate = super(hedged, self)._agenerate
+            if getattr(self, "streaming", False):
+                return await agenerate(*args, **kwargs)
+            return await _llm_hedge()(agenerate)(*args, **kwargs)
+        namespace["_agenerate"] = _agenerate
+    hedged = type(f"Hedged{cls.__name__}", (cls,), namespace)
+    return hedged
+
+
+def with_hedging(llm: Any) -> Any:
+    """
+    Get a variant of a language model whose completions are hedged.
+
+    A completion still running after the ``LLM_HEDGE_PERCENTILE`` latency
+    of recent completions is sent a second time and the first response is
+    used (see ``failover.Hedge``). Completions have no side effects, and
+    hedged requests are charged to the ``llm`` retry budget and take a free
+    slot of the ``llm`` concurrency limit, so hedging cuts tail latency
+    without multiplying load during a slowdown. Streaming completions are
+    not hedged. Clients derived from the variant by the cache stay hedged.
+
+    Parameters
+    ----------
+    llm : BaseLLM
+        Language model
+
+    Returns
+    -------
+    BaseLLM
+        A hedged copy of the model, or the model itself if it cannot be hedged
+    """
+    if not hasattr(llm, "_generate") or not hasattr(llm, "_agenerate"):
+        return llm
+    try:
+        # A shallow copy keeps fields excluded from model copies, e.g. callbacks
+        hedged = copy.copy(llm)
+        object.__setattr__(hedged, "__class__", _hedged_class(type(llm)))
+    except Exception as e:
+        logger.debug(f"Could not enable hedging for {type(llm).__name__}: {str(e)}")
+        return llm
+    return hedged
+
+
+# Global LLM client cache instance
+llm_client_cache = LLMClientCache(max_size=settings.LLM_CACHE_SIZE)
@@ -4,17 +4,36 @@ Enhanced logging configuration for production environments.
 This module provides structured logging with correlation IDs,
 support for various log formats (JSON/text), and integration 
 with common enterprise logging systems.
+
+Logging is asynchronous by default: the root logger only has a
+``QueueHandler`` that captures the request context, merges the message
+with its arguments and enqueues the record, and a background thread
+formats and writes records in batches. Prefer ``%s`` arguments over
+f-strings and wrap expensive ``extra`` values in ``Lazy``; arguments are
+only merged for records that pass the sampling and rate limiting
+filters, and ``Lazy`` values are computed by the writer.
 """
+import atexit
+import copy
 import json
 import logging
+import logging.handlers
+import os
+import queue
+import random
+import socket
 import sys
+import threading
 import time
+import traceback
 import uuid
-from typing import Dict, Any, Optional
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from contextvars import ContextVar
 from fastapi import Request
 
+from .background import BackgroundThread
 from .config import settings
 
 # Context variable to track request IDs across asynchronous code
@@ -29,6 +48,251 @@ class RequestContextFilter(logging.Filter):
         record.request_id = request_id_contextvar.get()
         return True
 
+class Lazy:
+    """
+    Log value computed only when the record is formatted.
+
+    Parameters
+    ----------
+    func : Callable
+        Function computing the value
+    *args, **kwargs
+        Arguments of ``func``
+
+    Examples
+    --------
+    >>> logger.debug("Graph state", extra={"state": Lazy(json.dumps, state, default=str)})
+    """
+    __slots__ = ("func", "args", "kwargs")
+
+    def __init__(self, func: Callable[..., Any], *args, **kwargs):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+
+    def resolve(self) -> Any:
+        """Compute the value."""
+        try:
+            return self.func(*self.args, **self.kwargs)
+        except Exception as e:
+            return f"<unavailable: {str(e)}>"
+
+    def __str__(self):
+        return str(self.resolve())
+
+class LogSampler(logging.Filter):
+    """
+    Sample and rate limit noisy log records.
+
+    Records below ``WARNING`` from loggers listed in ``sample_rates`` (or
+    their children) are kept with the configured probability. Every call
+    site (logger, file and line) may log at most ``rate_limit`` records per
+    second; the number of records suppressed is added as ``suppressed`` to
+    the next record the call site logs.
+
+    Parameters
+    ----------
+    sample_rates : Dict[str, float]
+        Share of records kept by logger name
+    rate_limit : int
+        Records per call site and second; 0 disables rate limiting
+    """
+    # Call sites tracked before the rate limiter state is reset
+    MAX_CALL_SITES = 10000
+
+    def __init__(self, sample_rates: Dict[str, float], rate_limit: int):
+        super().__init__()
+        self.sample_rates = sample_rates
+        self.rate_limit = rate_limit
+        self._rates: Dict[str, float] = {}
+        self._windows: Dict[Tuple[str, str, int], List[int]] = {}
+        self._lock = threading.Lock()
+
+    def _sample_rate(self, name: str) -> float:
+        rate = self._rates.get(name)
+        if rate is None:
+            rate = 1.0
+            logger_name = name
+            while logger_name:
+                if logger_name in self.sample_rates:
+                    rate = self.sample_rates[logger_name]
+                    break
+                logger_name = logger_name.rpartition(".")[0]
+            self._rates[name] = rate
+        return rate
+
+    def filter(self, record):
+        if self.sample_rates and record.levelno < logging.WARNING:
+            rate = self._sample_rate(record.name)
+            if rate < 1.0:
+                if random.random() >= rate:
+                    return False
+                record.sample_rate = rate
+        if self.rate_limit <= 0:
+            return True
+        key = (record.name, record.pathname, record.lineno)
+        second = int(record.created)
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None:
+                if len(self._windows) >= self.MAX_CALL_SITES:
+                    self._windows.clear()
+                window = self._windows[key] = [second, 0, 0]
+            if window[0] != second:
+                window[0], window[1] = second, 0
+            if window[1] >= self.rate_limit:
+                window[2] += 1
+                return False
+            window[1] += 1
+            suppressed, window[2] = window[2], 0
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+class BackgroundLogWriter:
+    """
+    Format and write log records in batches from a background thread.
+
+    Each batch is written to a stream handler with a single write and
+    flush. Records are dropped when the queue is full, so logging never
+    blocks; the number of dropped records is logged once the queue drains.
+
+    Parameters
+    ----------
+    handlers : List[logging.Handler]
+        Handlers writing the records
+    max_queue_size : int
+        Records buffered before new records are dropped
+    batch_size : int
+        Records per write
+    """
+    def __init__(self, handlers: List[logging.Handler], max_queue_size: int = 10000, batch_size: int = 256):
+        self.handlers = handlers
+        self.batch_size = batch_size
+        self.dropped = 0
+        self._reported_dropped = 0
+        self._queue: "queue.Queue[Optional[logging.LogRecord]]" = queue.Queue(maxsize=max_queue_size)
+        self._thread = BackgroundThread(self._loop, "log-writer")
+        self._stopped = False
+
+    def put(self, record: logging.LogRecord):
+        """Queue a record, or write it directly once the writer is stopped."""
+        if self._stopped:
+            self._write([record])
+            return
+        self._thread.ensure_started()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self):
+        """Write all queued records in the calling thread."""
+        while True:
+            batch = self._drain()
+            if not batch:
+                return
+            self._write(batch)
+
+    def stop(self):
+        """Stop the background thread and write the remaining records."""
+        self._stopped = True
+        if self._thread.running:
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                pass
+            self._thread.thread.join(timeout=5.0)
+        self.flush()
+
+    def _drain(self, first: Optional[logging.LogRecord] = None) -> List[logging.LogRecord]:
+        batch = [first] if first is not None else []
+        while len(batch) < self.batch_size:
+            try:
+                record = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if record is not None:
+                batch.append(record)
+        return batch
+
+    def _write(self, batch: List[logging.LogRecord]):
+        if self.dropped != self._reported_dropped:
+            dropped, self._reported_dropped = self.dropped - self._reported_dropped, self.dropped
+            batch.append(logging.makeLogRecord({
+                "name": __name__, "levelno": logging.WARNING, "levelname": "WARNING",
+                "msg": "Dropped %d log records, the log queue was full", "args": (dropped,),
+                "request_id": ""
+            }))
+        for handler in self.handlers:
+            if isinstance(handler, logging.StreamHandler) and handler.stream is not None:
+                _write_stream_batch(handler, batch)
+            else:
+                for record in batch:
+                    if record.levelno >= handler.level:
+                        handler.handle(record)
+
+    def _loop(self):
+        while not self._stopped:
+            first = self._queue.get()
+            if first is None:
+                continue
+            self._write(self._drain(first))
+
+def _write_stream_batch(handler: logging.StreamHandler, batch: List[logging.LogRecord]):
+    """Format records and write them to a stream handler with one write."""
+    lines = []
+    for record in batch:
+        if record.levelno < handler.level or not handler.filter(record):
+            continue
+        try:
+            lines.append(handler.format(record))
+        except Exception:
+            handler.handleError(record)
+    if not lines:
+        return
+    handler.acquire()
+    try:
+        handler.stream.write(handler.terminator.join(lines) + handler.terminator)
+        handler.flush()
+    except Exception:
+        handler.handleError(batch[-1])
+    finally:
+        handler.release()
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hand records to a ``BackgroundLogWriter``.
+
+    Like ``QueueHandler``, the message is merged with its arguments and the
+    exception is rendered on the calling thread, so later changes to the
+    arguments do not show up in the log and the queue does not keep them
+    or the frames of the traceback alive. The writer formats the record;
+    ``Lazy`` extras are computed there.
+
+    Parameters
+    ----------
+    writer : BackgroundLogWriter
+        Writer receiving the records
+    """
+    def __init__(self, writer: BackgroundLogWriter):
+        super().__init__(None)
+        self.writer = writer
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record._exception = JsonFormatter._format_exception(record.exc_info)
+            record.exc_text = record._exception['stack_trace'].rstrip("\n")
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        self.writer.put(record)
+
 class JsonFormatter(logging.Formatter):
     """
     Enhanced JSON formatter for structured logging with better enterprise integration.
@@ -51,7 +315,8 @@ class JsonFormatter(logging.Formatter):
         super().__init__(*args, **kwargs)
 
     def format(self, record):
-        timestamp = datetime.now(timezone.utc).isoformat()
+        # Records are formatted by the background writer, after they were created
+        timestamp = datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat()
         
         # Basic log structure following ELK common schema
         log_data = {
@@ -107,10 +372,13 @@ class JsonFormatter(logging.Formatter):
             }
         }
 
-        # Include full exception info if available
+        # Include full exception info if available; records from the queue
+        # carry it already formatted
         if record.exc_info:
             exception_data = self._format_exception(record.exc_info)
             log_data['error'] = exception_data
+        elif getattr(record, '_exception', None):
+            log_data['error'] = record._exception
 
         # Include any custom fields
         for key, value in record.__dict__.items():
@@ -120,12 +388,15 @@ class JsonFormatter(logging.Formatter):
                           'processName', 'relativeCreated', 'stack_info', 'thread', 'threadName',
                           'request_id', 'path', 'method', 'remote_ip', 'duration_ms', 'status_code'):
                 if not key.startswith('_'):
+                    if isinstance(value, Lazy):
+                        value = value.resolve()
                     # Add custom fields to a dedicated section
                     log_data.setdefault('labels', {})[key] = value
 
         return json.dumps(log_data, default=str)
     
-    def _format_exception(self, exc_info):
+    @staticmethod
+    def _format_exception(exc_info):
         """Format exception info in a structured way"""
         exc_type, exc_value, exc_traceback = exc_info
         frames = traceback.extract_tb(exc_traceback)
@@ -135,7 +406,7 @@ class JsonFormatter(logging.Formatter):
             'type': exc_type.__name__,
             'message': str(exc_value),
             'stack_trace': ''.join(traceback.format_exception(*exc_info)),
-            'causes': self._get_exception_chain(exc_value) if hasattr(exc_value, '__cause__') and exc_value.__cause__ else [],
+            'causes': JsonFormatter._get_exception_chain(exc_value) if hasattr(exc_value, '__cause__') and exc_value.__cause__ else [],
             'frames': [
                 {
                     'filename': frame.filename,
@@ -146,7 +417,8 @@ class JsonFormatter(logging.Formatter):
             ]
         }
     
-    def _get_exception_chain(self, exception):
+    @staticmethod
+    def _get_exception_chain(exception):
         """Get the chain of exception causes"""
         causes = []
         current = exception.__cause__
@@ -160,10 +432,17 @@ class JsonFormatter(logging.Formatter):
             
         return causes
 
+# Global background log writer, set by setup_logging
+log_writer: Optional[BackgroundLogWriter] = None
+
 def setup_logging():
     """
     Configure application-wide logging based on settings.
+    
+    With ``LOG_ASYNC`` the output handlers are driven by a
+    ``BackgroundLogWriter``, and the root logger only enqueues records.
     """
+    global log_writer
     log_handlers = []
     
     # Always log to stdout
@@ -193,19 +472,37 @@ def setup_logging():
     # Remove existing handlers to avoid duplicates
     for handler in list(root_logger.handlers):
         root_logger.removeHandler(handler)
+    shutdown_logging()
+    
+    # Write records in the background unless configured otherwise
+    if settings.LOG_ASYNC:
+        log_writer = BackgroundLogWriter(log_handlers, settings.LOG_QUEUE_SIZE, settings.LOG_BATCH_SIZE)
+        log_handlers = [DeferredQueueHandler(log_writer)]
     
     # Add our handlers
     for handler in log_handlers:
         root_logger.addHandler(handler)
     
-    # Add request context filter to all handlers
+    # Add request context, sampling and rate limiting filters to all handlers;
+    # they run on the logging thread, where the request context is set
     context_filter = RequestContextFilter()
+    sampler = LogSampler(settings.LOG_SAMPLE_RATES, settings.LOG_RATE_LIMIT_PER_SECOND)
     for handler in root_logger.handlers:
         handler.addFilter(context_filter)
+        handler.addFilter(sampler)
     
     # Log startup
     logging.info(f"Logging initialized at level {settings.LOG_LEVEL}")
 
+def shutdown_logging():
+    """Stop the background log writer, writing the queued records."""
+    global log_writer
+    if log_writer is not None:
+        log_writer.stop()
+        log_writer = None
+
+atexit.register(shutdown_logging)
+
 def get_request_id(request: Optional[Request] = None) -> str:
     """
     Get the current request ID or generate a new one.
@@ -266,10 +563,12 @@ def log_request_details(request: Request, start_time: float):
     }
     
     # Log at appropriate level based on response status
+    # The message is formatted by the log writer, not on the request path
     status_code = getattr(request.state, 'status_code', 200)
     if status_code >= 500:
-        logger.error(f"{request.method} {request.url.path} - {status_code} - {duration_ms:.2f}ms", extra=extra)
+        level = logging.ERROR
     elif status_code >= 400:
-        logger.warning(f"{request.method} {request.url.path} - {status_code} - {duration_ms:.2f}ms", extra=extra)
+        level = logging.WARNING
     else:
-        logger.info(f"{request.method} {request.url.path} - {status_code} - {duration_ms:.2f}ms", extra=extra)
\ No newline at end of file
+        level = logging.INFO
+    logger.log(level, "%s %s - %s - %.2fms", request.method, request.url.path, status_code, duration_ms, extra=extra)
\ No newline at end of file
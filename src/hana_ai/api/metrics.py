@@ -4,6 +4,7 @@ Metrics collection for the API server.
 Supports Prometheus metrics for monitoring API performance, usage patterns,
 and error rates in production environments.
 """
+import os
 import time
 from typing import Dict, Any, Optional
 import logging
@@ -22,20 +23,39 @@ DB_QUERY_LATENCY = None
 LLM_LATENCY = None
 ACTIVE_CONNECTIONS = None
 ERROR_COUNT = None
+CACHE_REQUESTS = None
+CACHE_SIZE_BYTES = None
+COALESCED_REQUESTS = None
+STAGE_LATENCY = None
+CONCURRENCY_LIMIT = None
+CONCURRENCY_IN_FLIGHT = None
+CONCURRENCY_REJECTIONS = None
+RETRIES = None
+HEDGES = None
+ADMISSION_QUEUE_DELAY = None
+SHED_REQUESTS = None
 
 def setup_metrics():
     """
     Initialize Prometheus metrics collectors.
     
     This creates metrics for tracking API performance and usage.
-    Metrics are limited to internal BTP networks only.
+    Metrics are limited to internal BTP networks only. Runs in the
+    application lifespan; calling it again is a no-op.
     """
     global REQUEST_LATENCY, REQUEST_COUNT, DB_QUERY_LATENCY, LLM_LATENCY, ACTIVE_CONNECTIONS, ERROR_COUNT
+    global CACHE_REQUESTS, CACHE_SIZE_BYTES, COALESCED_REQUESTS, STAGE_LATENCY
+    global CONCURRENCY_LIMIT, CONCURRENCY_IN_FLIGHT, CONCURRENCY_REJECTIONS, RETRIES, HEDGES
+    global ADMISSION_QUEUE_DELAY, SHED_REQUESTS
     
     if not PROMETHEUS_AVAILABLE:
         logging.warning("Prometheus client not available. Metrics will not be collected.")
         return
     
+    # Collectors can only be registered once per process
+    if REQUEST_COUNT is not None:
+        return
+    
     # Request metrics
     REQUEST_COUNT = prom.Counter(
         'api_requests_total',
@@ -60,7 +80,8 @@ def setup_metrics():
     
     ACTIVE_CONNECTIONS = prom.Gauge(
         'db_active_connections',
-        'Number of active database connections'
+        'Number of active database connections',
+        multiprocess_mode='livesum'
     )
     
     # LLM metrics
@@ -71,6 +92,14 @@ def setup_metrics():
         buckets=(0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, float('inf'))
     )
     
+    # Per-stage latency (db, llm, embedding, tool) within requests
+    STAGE_LATENCY = prom.Histogram(
+        'api_stage_latency_seconds',
+        'Latency of request stages in seconds',
+        ['stage', 'route', 'tool'],
+        buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, float('inf'))
+    )
+    
     # Error metrics
     ERROR_COUNT = prom.Counter(
         'api_errors_total',
@@ -78,15 +107,114 @@ def setup_metrics():
         ['method', 'endpoint', 'error_type']
     )
     
-    # Start HTTP server for Prometheus scraping, but only on localhost
-    # to ensure metrics are only available within the BTP network
+    # Response cache metrics
+    CACHE_REQUESTS = prom.Counter(
+        'api_cache_requests_total',
+        'Response cache lookups by result (hit, miss or stale) and stale revalidations',
+        ['route', 'result']
+    )
+    
+    CACHE_SIZE_BYTES = prom.Gauge(
+        'api_cache_size_bytes',
+        'Total size of cached response bodies in bytes',
+        multiprocess_mode='livesum'
+    )
+    
+    # Request coalescing metrics
+    COALESCED_REQUESTS = prom.Counter(
+        'api_coalesced_requests_total',
+        'Requests that joined an identical in-flight call instead of executing',
+        ['group']
+    )
+    
+    # Adaptive concurrency limits of backends (hana, llm), summed over workers
+    CONCURRENCY_LIMIT = prom.Gauge(
+        'backend_concurrency_limit',
+        'Current adaptive limit of in-flight calls per backend',
+        ['backend'],
+        multiprocess_mode='livesum'
+    )
+    
+    CONCURRENCY_IN_FLIGHT = prom.Gauge(
+        'backend_concurrency_in_flight',
+        'In-flight calls per backend',
+        ['backend'],
+        multiprocess_mode='livesum'
+    )
+    
+    CONCURRENCY_REJECTIONS = prom.Counter(
+        'backend_concurrency_rejections_total',
+        'Calls rejected because the backend concurrency limit was reached',
+        ['backend']
+    )
+    
+    # Retries and hedged requests, limited by the retry budget of each backend
+    RETRIES = prom.Counter(
+        'backend_retries_total',
+        'Retries of failed backend calls by outcome (retried, budget_exhausted)',
+        ['backend', 'outcome']
+    )
+    
+    HEDGES = prom.Counter(
+        'backend_hedged_requests_total',
+        'Hedged backend calls by outcome (sent, won, budget_exhausted)',
+        ['backend', 'outcome']
+    )
+    
+    # Admission control
+    ADMISSION_QUEUE_DELAY = prom.Histogram(
+        'api_admission_queue_seconds',
+        'Time requests waited for admission in seconds',
+        ['priority'],
+        buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float('inf'))
+    )
+    
+    SHED_REQUESTS = prom.Counter(
+        'api_requests_shed_total',
+        'Requests rejected by admission control',
+        ['priority']
+    )
+    
+    # In multiprocess mode the serving master exports the aggregated metrics
+    if not multiprocess_enabled():
+        start_metrics_server()
+
+def multiprocess_enabled() -> bool:
+    """
+    Check whether metrics are aggregated across worker processes.
+    
+    Returns
+    -------
+    bool
+        True if ``PROMETHEUS_MULTIPROC_DIR`` is set
+    """
+    return PROMETHEUS_AVAILABLE and bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+def _registry():
+    """Get the registry to export, aggregating all workers in multiprocess mode."""
+    if multiprocess_enabled():
+        from prometheus_client import multiprocess
+        registry = prom.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return prom.REGISTRY
+
+def start_metrics_server():
+    """
+    Start the HTTP server for Prometheus scraping.
+    
+    The server only listens on localhost to ensure metrics are only
+    available within the BTP network.
+    """
+    if not PROMETHEUS_AVAILABLE:
+        return
     try:
         from .config import settings
         prom_port = getattr(settings, 'PROMETHEUS_PORT', 9090)
         
         # Restrict metrics server to localhost (internal network only)
         # This ensures metrics aren't exposed externally
-        prom.start_http_server(prom_port, addr='127.0.0.1')
+        prom.start_http_server(prom_port, addr='127.0.0.1', registry=_registry())
         logging.info(f"Prometheus metrics server started on localhost:{prom_port} (internal BTP network only)")
     except Exception as e:
         logging.error(f"Failed to start Prometheus HTTP server: {str(e)}")
@@ -188,6 +316,166 @@ def record_llm_request(model: str, duration: float):
     
     LLM_LATENCY.labels(model=model).observe(duration)
 
+def record_stage(stage: str, route: str, tool: str, duration: float):
+    """
+    Record the duration of a request stage.
+    
+    Parameters
+    ----------
+    stage : str
+        Stage name (db, llm, embedding, tool)
+    route : str
+        Route template of the request, or ``background``
+    tool : str
+        Tool name for tool stages, otherwise empty
+    duration : float
+        Stage duration in seconds
+    """
+    if not PROMETHEUS_AVAILABLE or STAGE_LATENCY is None:
+        return
+    
+    STAGE_LATENCY.labels(stage=stage, route=route, tool=tool).observe(duration)
+
+def record_cache_event(route: str, result: str):
+    """
+    Record a response cache lookup.
+    
+    Parameters
+    ----------
+    route : str
+        Cached route identifier
+    result : str
+        Lookup result (hit, miss or stale), or revalidated when a stale
+        entry was refreshed in the background
+    """
+    if not PROMETHEUS_AVAILABLE or CACHE_REQUESTS is None:
+        return
+    
+    CACHE_REQUESTS.labels(route=route, result=result).inc()
+
+def update_cache_size(size_bytes: int):
+    """
+    Update the response cache size gauge.
+    
+    Parameters
+    ----------
+    size_bytes : int
+        Total size of cached bodies in bytes
+    """
+    if not PROMETHEUS_AVAILABLE or CACHE_SIZE_BYTES is None:
+        return
+    
+    CACHE_SIZE_BYTES.set(size_bytes)
+
+def record_coalesced_request(group: str):
+    """
+    Record a request that was coalesced into an in-flight call.
+    
+    Parameters
+    ----------
+    group : str
+        Single-flight group name
+    """
+    if not PROMETHEUS_AVAILABLE or COALESCED_REQUESTS is None:
+        return
+    
+    COALESCED_REQUESTS.labels(group=group).inc()
+
+def update_concurrency(backend: str, limit: int, in_flight: int):
+    """
+    Update the adaptive concurrency gauges of a backend.
+    
+    Parameters
+    ----------
+    backend : str
+        Backend name (hana, llm)
+    limit : int
+        Current limit of in-flight calls
+    in_flight : int
+        Calls in flight
+    """
+    if not PROMETHEUS_AVAILABLE or CONCURRENCY_LIMIT is None:
+        return
+    
+    CONCURRENCY_LIMIT.labels(backend=backend).set(limit)
+    CONCURRENCY_IN_FLIGHT.labels(backend=backend).set(in_flight)
+
+def record_concurrency_rejection(backend: str):
+    """
+    Record a call rejected by a backend concurrency limit.
+    
+    Parameters
+    ----------
+    backend : str
+        Backend name (hana, llm)
+    """
+    if not PROMETHEUS_AVAILABLE or CONCURRENCY_REJECTIONS is None:
+        return
+    
+    CONCURRENCY_REJECTIONS.labels(backend=backend).inc()
+
+def record_retry(backend: str, outcome: str):
+    """
+    Record a retry decision for a failed backend call.
+    
+    Parameters
+    ----------
+    backend : str
+        Backend name (hana, llm)
+    outcome : str
+        ``retried`` or ``budget_exhausted``
+    """
+    if not PROMETHEUS_AVAILABLE or RETRIES is None:
+        return
+    
+    RETRIES.labels(backend=backend, outcome=outcome).inc()
+
+def record_hedge(backend: str, outcome: str):
+    """
+    Record a hedged backend call.
+    
+    Parameters
+    ----------
+    backend : str
+        Backend name (hana, llm)
+    outcome : str
+        ``sent``, ``won`` (the hedge finished first) or ``budget_exhausted``
+    """
+    if not PROMETHEUS_AVAILABLE or HEDGES is None:
+        return
+    
+    HEDGES.labels(backend=backend, outcome=outcome).inc()
+
+def record_admission(priority: str, queue_delay: float):
+    """
+    Record the queueing delay of an admitted request.
+    
+    Parameters
+    ----------
+    priority : str
+        Priority class (interactive, conversation, batch)
+    queue_delay : float
+        Time waited for admission in seconds
+    """
+    if not PROMETHEUS_AVAILABLE or ADMISSION_QUEUE_DELAY is None:
+        return
+    
+    ADMISSION_QUEUE_DELAY.labels(priority=priority).observe(queue_delay)
+
+def record_shed_request(priority: str):
+    """
+    Record a request rejected by admission control.
+    
+    Parameters
+    ----------
+    priority : str
+        Priority class (interactive, conversation, batch)
+    """
+    if not PROMETHEUS_AVAILABLE or SHED_REQUESTS is None:
+        return
+    
+    SHED_REQUESTS.labels(priority=priority).inc()
+
 def get_metrics():
     """
     Get current metrics as text.
@@ -200,4 +488,4 @@ def get_metrics():
     if not PROMETHEUS_AVAILABLE:
         return "Prometheus client not available"
     
-    return prom.generate_latest().decode('utf-8')
\ No newline at end of file
+    return prom.generate_latest(_registry()).decode('utf-8')
\ No newline at end of file
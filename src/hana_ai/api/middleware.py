@@ -1,149 +1,242 @@
 """
 Middleware for the HANA AI Toolkit API.
 
-This module provides middleware components for:
-- Request/response logging
-- Security headers
+All per-request concerns run in one pure ASGI middleware, ``APIMiddleware``:
+- Request IDs
+- Host validation (external call prevention)
 - Rate limiting
-- Metrics collection
-- Error handling
+- Admission control and load shedding (see ``admission``)
+- Security headers
+- Request logging and metrics collection
+- Per-stage timing (``Server-Timing`` header, see ``timing``)
+- Request deadlines (see ``deadline``)
+- Root spans of request traces (see ``tracing``)
+
+``BaseHTTPMiddleware`` runs every request through an extra task and wraps
+the response body in a memory stream, once per middleware class, which adds
+latency and breaks streaming responses. ``APIMiddleware`` only wraps the ASGI
+``send`` callable to add headers and observe the status code, so response
+bodies pass through untouched.
 """
+import functools
+import json
+import logging
 import time
-from fastapi import Request, Response
-from fastapi.middleware.base import BaseHTTPMiddleware
-from starlette.middleware.base import RequestResponseEndpoint
-from starlette.status import HTTP_429_TOO_MANY_REQUESTS
+import uuid
+from typing import Dict, List, Optional, Tuple
 
-from .logging import log_request_details, get_request_id
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.status import HTTP_403_FORBIDDEN, HTTP_429_TOO_MANY_REQUESTS, HTTP_503_SERVICE_UNAVAILABLE
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .admission import AdmissionController, create_admission_controller
+from .logging import log_request_details, request_id_contextvar
 from .config import settings
+from .deadline import Deadline, deadline_contextvar
 from .metrics import record_request_metric
+from .rate_limit import RateLimiter, client_key, create_rate_limiter
+from .security import validate_external_request
+from .timing import RequestTimings, request_timings_contextvar
+from .tracing import current_span_contextvar, tracer
+
+logger = logging.getLogger(__name__)
+
+# Headers recommended by OWASP, added to every response
+SECURITY_HEADERS: List[Tuple[bytes, bytes]] = [
+    (b"x-content-type-options", b"nosniff"),
+    (b"x-frame-options", b"DENY"),
+    (b"x-xss-protection", b"1; mode=block"),
+    (b"strict-transport-security", b"max-age=31536000; includeSubDomains"),
+    (b"content-security-policy", b"default-src 'self'"),
+]
+
+# Paths exempt from rate limiting
+RATE_LIMIT_EXEMPT_PATHS = {"/", "/health", "/health/live", "/health/ready"}
+
+@functools.lru_cache(maxsize=1024)
+def _validate_host(host: str) -> Tuple[bool, str]:
+    """Validate a Host header value; results are cached per host."""
+    return validate_external_request(f"https://{host}")
+
+def _header(scope: Scope, name: bytes) -> str:
+    for key, value in scope.get("headers", ()):
+        if key == name:
+            return value.decode("latin-1")
+    return ""
 
-class RequestLoggerMiddleware(BaseHTTPMiddleware):
+def _client_ip(scope: Scope) -> str:
+    forwarded_for = _header(scope, b"x-forwarded-for")
+    if forwarded_for:
+        return forwarded_for.split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+def _encode_headers(headers: Dict[str, str]) -> List[Tuple[bytes, bytes]]:
+    return [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers.items()]
+
+def _request_timeout(scope: Scope) -> Optional[float]:
+    """Time budget of a request: ``REQUEST_TIMEOUT_SECONDS``, shortened by an ``X-Request-Timeout`` header."""
+    timeout = settings.REQUEST_TIMEOUT_SECONDS
+    requested = _header(scope, b"x-request-timeout")
+    if requested:
+        try:
+            requested_timeout = float(requested)
+        except ValueError:
+            requested_timeout = 0.0
+        if requested_timeout > 0:
+            timeout = min(timeout, requested_timeout) if timeout else requested_timeout
+    return float(timeout) if timeout else None
+
+class APIMiddleware:
     """
-    Middleware for logging request details and timing.
-    
-    This middleware logs the start and end of each request,
-    including duration, status code, and other metadata.
+    Pure ASGI middleware combining request IDs, host validation, rate
+    limiting, admission control, security headers, logging and metrics.
+
+    Parameters
+    ----------
+    app : ASGIApp
+        The wrapped application
+    rate_limit_per_minute : int, optional
+        Overrides ``RATE_LIMIT_PER_MINUTE``
+    limiter : RateLimiter, optional
+        Rate limiter; created from the settings if omitted
+    admission : AdmissionController, optional
+        Admission controller; created from the settings if omitted
     """
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
-        # Generate or get request ID
-        request_id = get_request_id(request)
-        
-        # Record start time
+    def __init__(self, app: ASGIApp, rate_limit_per_minute: Optional[int] = None,
+                 limiter: Optional[RateLimiter] = None, admission: Optional[AdmissionController] = None):
+        self.app = app
+        self.limiter = limiter or create_rate_limiter(rate_limit_per_minute)
+        self.admission = admission or create_admission_controller()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
         start_time = time.time()
-        
-        # Process the request
+        request_id = _header(scope, b"x-request-id") or str(uuid.uuid4())
+        context_token = request_id_contextvar.set(request_id)
+        timings = RequestTimings(scope)
+        timings_token = request_timings_contextvar.set(timings)
+        span = tracer.start_span(
+            scope["method"],
+            "server",
+            {"http.request.method": scope["method"], "url.path": scope["path"], "http.request_id": request_id},
+            traceparent=_header(scope, b"traceparent")
+        )
+        span_token = current_span_contextvar.set(span)
+        timeout = _request_timeout(scope)
+        deadline_token = deadline_contextvar.set(Deadline(timeout) if timeout else None)
+        state = scope.setdefault("state", {})
+        state["request_id"] = request_id
+
+        response_headers = list(SECURITY_HEADERS)
+        response_headers.append((b"x-request-id", request_id.encode("latin-1")))
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = list(message.get("headers", ())) + response_headers
+                if settings.SERVER_TIMING_ENABLED:
+                    server_timing = timings.server_timing(time.time() - start_time)
+                    message["headers"].append((b"server-timing", server_timing.encode("latin-1")))
+            await send(message)
+
         try:
-            response = await call_next(request)
-            
-            # Store status code for logging
-            request.state.status_code = response.status_code
-            
-            # Log request details
-            log_request_details(request, start_time)
-            
-            # Add request ID to response headers
-            response.headers["X-Request-ID"] = request_id
-            
-            return response
-        except Exception as e:
-            # Log unhandled exceptions
-            request.state.status_code = 500
-            log_request_details(request, start_time)
-            raise
-
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-    """
-    Middleware for adding security headers to responses.
-    
-    This adds headers recommended by OWASP to enhance
-    security of the API.
-    """
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
-        response = await call_next(request)
-        
-        # Add security headers
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-        response.headers["Content-Security-Policy"] = "default-src 'self'"
-        
-        return response
-
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    """
-    Middleware for rate limiting API requests.
-    
-    Implements a token bucket algorithm to limit requests 
-    per client based on API key.
-    """
-    def __init__(self, app, rate_limit_per_minute=100):
-        super().__init__(app)
-        self.rate_limit_per_minute = rate_limit_per_minute
-        self.tokens = {}  # Maps API keys to available tokens
-        self.last_refill = {}  # Maps API keys to last token refill time
-    
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
+            rejection = await self._check_request(scope, response_headers)
+            if rejection is not None:
+                status, content = rejection
+                await self._send_json(send_wrapper, status, content)
+            else:
+                await self._admit_and_call(scope, receive, send_wrapper, response_headers)
+        finally:
+            state["status_code"] = status_code
+            record_request_metric(
+                method=scope["method"],
+                path=scope["path"],
+                status_code=status_code,
+                duration=time.time() - start_time
+            )
+            log_request_details(Request(scope), start_time)
+            request_timings_contextvar.reset(timings_token)
+            current_span_contextvar.reset(span_token)
+            deadline_contextvar.reset(deadline_token)
+            if span is not None:
+                span.name = f"{scope['method']} {timings.route}"
+                span.set_attribute("http.route", timings.route)
+                span.set_attribute("http.response.status_code", status_code)
+                if status_code >= 500:
+                    span.set_error(f"HTTP {status_code}")
+                span.end()
+            request_id_contextvar.reset(context_token)
+
+    async def _check_request(self, scope: Scope, response_headers: List[Tuple[bytes, bytes]]) -> Optional[Tuple[int, dict]]:
+        """
+        Apply host validation and rate limiting.
+
+        Returns
+        -------
+        Tuple[int, dict] or None
+            Status code and body of the rejection, or None if the request
+            may proceed
+        """
+        if settings.RESTRICT_EXTERNAL_CALLS:
+            host = _header(scope, b"host")
+            if host:
+                is_valid, reason = _validate_host(host)
+                if not is_valid:
+                    logger.warning(f"Blocked potential external request: {reason}")
+                    return HTTP_403_FORBIDDEN, {
+                        "detail": "External calls are not allowed by this application",
+                        "reason": reason
+                    }
+
         # Skip rate limiting for health checks and in development mode
-        if settings.DEVELOPMENT_MODE or request.url.path == "/":
-            return await call_next(request)
-        
-        # Get API key from headers or use IP as fallback
-        api_key = request.headers.get("X-API-Key", "")
-        if not api_key:
-            client_host = request.client.host if request.client else "unknown"
-            forwarded_for = request.headers.get("X-Forwarded-For", "")
-            api_key = forwarded_for.split(",")[0] if forwarded_for else client_host
-        
-        # Initialize tokens if not exist
-        if api_key not in self.tokens:
-            self.tokens[api_key] = self.rate_limit_per_minute
-            self.last_refill[api_key] = time.time()
-        
-        # Refill tokens if needed (token bucket algorithm)
-        now = time.time()
-        time_passed = now - self.last_refill[api_key]
-        tokens_to_add = time_passed * (self.rate_limit_per_minute / 60.0)
-        self.tokens[api_key] = min(self.rate_limit_per_minute, self.tokens[api_key] + tokens_to_add)
-        self.last_refill[api_key] = now
-        
-        # Check if we have a token available
-        if self.tokens[api_key] >= 1:
-            # Consume a token
-            self.tokens[api_key] -= 1
-            
-            # Process the request
-            return await call_next(request)
+        if settings.DEVELOPMENT_MODE or scope["path"] in RATE_LIMIT_EXEMPT_PATHS:
+            return None
+
+        key = client_key(_header(scope, b"x-api-key"), _client_ip(scope))
+        if self.limiter.blocking:
+            result = await run_in_threadpool(self.limiter.check, key, scope["path"])
         else:
-            # Rate limit exceeded
-            return Response(
-                status_code=HTTP_429_TOO_MANY_REQUESTS,
-                content='{"detail":"Rate limit exceeded. Please try again later."}',
-                media_type="application/json",
-                headers={"Retry-After": "60"}
-            )
+            result = self.limiter.check(key, scope["path"])
+        response_headers.extend(_encode_headers(result.headers()))
+        if not result.allowed:
+            return HTTP_429_TOO_MANY_REQUESTS, {"detail": "Rate limit exceeded. Please try again later."}
+        return None
 
-class MetricsMiddleware(BaseHTTPMiddleware):
-    """
-    Middleware for collecting request metrics.
-    
-    Records timing, status codes, and endpoint usage for monitoring.
-    """
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
-        # Record start time
-        start_time = time.time()
-        
-        # Process the request
-        response = await call_next(request)
-        
-        # Record metrics
-        duration = time.time() - start_time
-        record_request_metric(
-            method=request.method,
-            path=request.url.path,
-            status_code=response.status_code,
-            duration=duration
-        )
-        
-        return response
\ No newline at end of file
+    async def _admit_and_call(self, scope: Scope, receive: Receive, send: Send,
+                              response_headers: List[Tuple[bytes, bytes]]) -> None:
+        """Run the request once admission control lets it in, or reject it with 503."""
+        priority = self.admission.priority(scope["method"], scope["path"]) if self.admission else None
+        if priority is None:
+            await self.app(scope, receive, send)
+            return
+        if not await self.admission.admit(priority):
+            response_headers.append((b"retry-after", str(self.admission.retry_after).encode("latin-1")))
+            await self._send_json(send, HTTP_503_SERVICE_UNAVAILABLE, {
+                "detail": "Server is overloaded. Please try again later.",
+                "priority": priority
+            })
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.admission.release()
+
+    @staticmethod
+    async def _send_json(send: Send, status_code: int, content: dict) -> None:
+        body = json.dumps(content).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
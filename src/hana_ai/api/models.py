@@ -71,6 +71,7 @@ class DataResponse(BaseModel):
     data: List[Dict[str, Any]] = Field(..., description="Data rows")
     row_count: int = Field(..., description="Total number of rows")
     query_time: float = Field(..., description="Time taken to execute the query in seconds")
+    next_page_token: Optional[str] = Field(default=None, description="Token for the next page, if there is one")
 
 class VectorStoreRequest(BaseModel):
     """Request for vector store operations."""
@@ -0,0 +1,661 @@
+"""
+Keyset pagination for query results.
+
+Instead of ``LIMIT x OFFSET y``, which re-executes the query and skips all
+preceding rows for every page, pages are addressed by opaque continuation
+tokens. A token carries the ordering key values of the last row returned, so
+the next page is fetched with a seek predicate on those keys and costs the
+same regardless of its depth.
+
+Alternatively, a result can be materialized into a session-local temporary
+table numbered by ``ROW_NUMBER()``. Subsequent pages then seek on the row
+number. The temporary table lives on the pooled connection that created it
+and is dropped once it has been read to the end or has expired.
+
+Tokens are signed with ``SESSION_SECRET_KEY`` and bound to the query they were
+issued for. With several workers, ``SESSION_SECRET_KEY`` must be set so that
+all workers accept each other's tokens; materialized tokens are only valid on
+the worker that created the table.
+"""
+import base64
+import datetime
+import decimal
+import hashlib
+import hmac
+import json
+import logging
+import math
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .cache import normalize_sql
+from .config import settings
+from .responses import dataframe_to_records
+
+logger = logging.getLogger(__name__)
+
+# (column, descending)
+OrderKey = Tuple[str, bool]
+
+ROW_NUMBER_COLUMN = "__HANA_AI_ROW_NUM"
+_TABLE_PREFIX = "#HANA_AI_PAGE_"
+
+
+class PageTokenError(ValueError):
+    """Raised when a continuation token is malformed, forged or reused for another query."""
+
+
+class PageExpiredError(PageTokenError):
+    """Raised when the materialized result a token refers to no longer exists."""
+
+
+def quote_identifier(name: str) -> str:
+    """
+    Quote a SQL identifier.
+
+    Parameters
+    ----------
+    name : str
+        Identifier
+
+    Returns
+    -------
+    str
+        Double-quoted identifier with embedded quotes escaped
+    """
+    return '"' + name.replace('"', '""') + '"'
+
+
+def sql_literal(value: Any) -> str:
+    """
+    Render a Python value as a SQL literal.
+
+    Parameters
+    ----------
+    value : Any
+        Value of an ordering key
+
+    Returns
+    -------
+    str
+        SQL literal
+    """
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        if math.isnan(value) or math.isinf(value):
+            raise PageTokenError("Ordering key values must be finite numbers")
+        return repr(value)
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    if isinstance(value, datetime.datetime):
+        return f"TIMESTAMP '{value.strftime('%Y-%m-%d %H:%M:%S.%f')}'"
+    if isinstance(value, datetime.date):
+        return f"DATE '{value.isoformat()}'"
+    if isinstance(value, datetime.time):
+        return f"TIME '{value.strftime('%H:%M:%S')}'"
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    raise PageTokenError(f"Unsupported ordering key type: {type(value).__name__}")
+
+
+def order_clause(order_by: Sequence[OrderKey]) -> str:
+    """
+    Build an ``ORDER BY`` clause body.
+
+    Parameters
+    ----------
+    order_by : Sequence[OrderKey]
+        Ordering keys
+
+    Returns
+    -------
+    str
+        Comma separated ordering terms
+    """
+    return ", ".join(
+        f"{quote_identifier(column)} {'DESC' if descending else 'ASC'}"
+        for column, descending in order_by
+    )
+
+
+def seek_predicate(order_by: Sequence[OrderKey], last_values: Sequence[Any]) -> str:
+    """
+    Build the predicate selecting rows after the given key values.
+
+    For keys ``(a ASC, b DESC)`` and values ``(x, y)`` this is
+    ``(a > x) OR (a = x AND b < y)``, which supports mixed directions.
+
+    Parameters
+    ----------
+    order_by : Sequence[OrderKey]
+        Ordering keys
+    last_values : Sequence[Any]
+        Key values of the last row of the previous page
+
+    Returns
+    -------
+    str
+        SQL predicate
+    """
+    if len(order_by) != len(last_values):
+        raise PageTokenError("Token does not match the requested ordering")
+
+    terms = []
+    for i, (column, descending) in enumerate(order_by):
+        equalities = [
+            f"{quote_identifier(order_by[j][0])} = {sql_literal(last_values[j])}"
+            for j in range(i)
+        ]
+        operator = "<" if descending else ">"
+        comparison = f"{quote_identifier(column)} {operator} {sql_literal(last_values[i])}"
+        terms.append("(" + " AND ".join(equalities + [comparison]) + ")")
+    return " OR ".join(terms)
+
+
+def build_keyset_query(
+    sql: str,
+    order_by: Sequence[OrderKey],
+    limit: int,
+    last_values: Optional[Sequence[Any]] = None
+) -> str:
+    """
+    Wrap a query so it returns the page following ``last_values``.
+
+    One row more than ``limit`` is requested to detect whether a next page exists.
+
+    Parameters
+    ----------
+    sql : str
+        The user query
+    order_by : Sequence[OrderKey]
+        Ordering keys; together they must identify a row uniquely
+    limit : int
+        Page size
+    last_values : Sequence[Any], optional
+        Key values of the last row of the previous page
+
+    Returns
+    -------
+    str
+        The page query
+    """
+    where = f" WHERE {seek_predicate(order_by, last_values)}" if last_values is not None else ""
+    return f"SELECT * FROM ({sql}){where} ORDER BY {order_clause(order_by)} LIMIT {limit + 1}"
+
+
+def query_fingerprint(sql: str, order_by: Sequence[OrderKey]) -> str:
+    """
+    Fingerprint of a query and its ordering, used to bind tokens to a query.
+
+    Parameters
+    ----------
+    sql : str
+        The user query
+    order_by : Sequence[OrderKey]
+        Ordering keys
+
+    Returns
+    -------
+    str
+        Hex digest
+    """
+    canonical = json.dumps([normalize_sql(sql), [list(key) for key in order_by]], separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:32]
+
+
+def _encode_value(value: Any) -> List[Any]:
+    """Encode an ordering key value with its type for the token."""
+    if value is None:
+        raise PageTokenError("Ordering key columns must not contain NULL values")
+    if hasattr(value, "to_pydatetime"):
+        # pandas Timestamp
+        value = value.to_pydatetime()
+    elif hasattr(value, "item") and not isinstance(value, (str, bytes)):
+        # numpy scalars
+        value = value.item()
+
+    if isinstance(value, bool):
+        return ["b", value]
+    if isinstance(value, int):
+        return ["i", value]
+    if isinstance(value, float):
+        if math.isnan(value):
+            raise PageTokenError("Ordering key columns must not contain NULL values")
+        return ["f", value]
+    if isinstance(value, decimal.Decimal):
+        return ["d", str(value)]
+    if isinstance(value, datetime.datetime):
+        return ["ts", value.replace(tzinfo=None).isoformat()]
+    if isinstance(value, datetime.date):
+        return ["dt", value.isoformat()]
+    if isinstance(value, datetime.time):
+        return ["t", value.isoformat()]
+    if isinstance(value, str):
+        return ["s", value]
+    raise PageTokenError(f"Unsupported ordering key type: {type(value).__name__}")
+
+
+def _decode_value(encoded: Sequence[Any]) -> Any:
+    """Decode an ordering key value encoded by ``_encode_value``."""
+    kind, value = encoded
+    if kind in ("b", "i", "f", "s"):
+        return value
+    if kind == "d":
+        return decimal.Decimal(value)
+    if kind == "ts":
+        return datetime.datetime.fromisoformat(value)
+    if kind == "dt":
+        return datetime.date.fromisoformat(value)
+    if kind == "t":
+        return datetime.time.fromisoformat(value)
+    raise PageTokenError(f"Unknown value type in page token: {kind}")
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _sign(payload: bytes) -> bytes:
+    return hmac.new(settings.SESSION_SECRET_KEY.encode("utf-8"), payload, hashlib.sha256).digest()
+
+
+def encode_page_token(payload: Dict[str, Any]) -> str:
+    """
+    Serialize and sign a token payload.
+
+    Parameters
+    ----------
+    payload : Dict[str, Any]
+        Token payload
+
+    Returns
+    -------
+    str
+        Opaque URL-safe token
+    """
+    body = json.dumps(payload, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    return f"{_b64encode(body)}.{_b64encode(_sign(body))}"
+
+
+def decode_page_token(token: str, fingerprint: str) -> Dict[str, Any]:
+    """
+    Verify and deserialize a token.
+
+    Parameters
+    ----------
+    token : str
+        Token returned as ``next_page_token``
+    fingerprint : str
+        Fingerprint of the current query and ordering
+
+    Returns
+    -------
+    Dict[str, Any]
+        Token payload
+
+    Raises
+    ------
+    PageTokenError
+        If the token is malformed, not signed by this service or issued for another query
+    PageExpiredError
+        If the token has expired
+    """
+    try:
+        body_part, signature_part = token.split(".", 1)
+        body = _b64decode(body_part)
+        signature = _b64decode(signature_part)
+    except (ValueError, TypeError):
+        raise PageTokenError("Malformed page token")
+
+    if not hmac.compare_digest(signature, _sign(body)):
+        raise PageTokenError("Invalid page token signature")
+
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        raise PageTokenError("Malformed page token")
+
+    if payload.get("q") != fingerprint:
+        raise PageTokenError("Page token was issued for a different query or ordering")
+    if "exp" in payload and payload["exp"] < time.time():
+        raise PageExpiredError("Page token has expired")
+    return payload
+
+
+@dataclass
+class Page:
+    """A page of query results."""
+    columns: List[str]
+    records: List[Dict[str, Any]]
+    next_page_token: Optional[str] = None
+
+
+def _collect(connection_context: Any, sql: str) -> Tuple[List[str], List[Dict[str, Any]]]:
+    """Run a query and return its columns and records."""
+    from hana_ml.dataframe import DataFrame
+
+    df = DataFrame(connection_context, sql)
+    result = df.collect()
+    columns = list(df.columns)
+    if hasattr(result, "to_dict"):
+        return columns, dataframe_to_records(result)
+    return columns, list(result)
+
+
+def fetch_keyset_page(
+    connection_context: Any,
+    sql: str,
+    order_by: Sequence[OrderKey],
+    limit: int,
+    token_payload: Optional[Dict[str, Any]] = None
+) -> Page:
+    """
+    Fetch a page by seeking past the last row of the previous page.
+
+    Parameters
+    ----------
+    connection_context : ConnectionContext
+        HANA connection context
+    sql : str
+        The user query
+    order_by : Sequence[OrderKey]
+        Ordering keys; together they must identify a row uniquely
+    limit : int
+        Page size
+    token_payload : Dict[str, Any], optional
+        Decoded token of the previous page; fetches the first page if omitted
+
+    Returns
+    -------
+    Page
+        The page and the token for the next one
+    """
+    page_sql = build_keyset_query(sql, order_by, limit, token_key_values(token_payload))
+    columns, records = _collect(connection_context, page_sql)
+
+    next_page_token = None
+    if len(records) > limit:
+        records = records[:limit]
+        next_page_token = keyset_page_token(sql, order_by, records[-1])
+    return Page(columns=columns, records=records, next_page_token=next_page_token)
+
+
+def token_key_values(token_payload: Optional[Dict[str, Any]]) -> Optional[List[Any]]:
+    """
+    Get the ordering key values stored in a keyset token.
+
+    Parameters
+    ----------
+    token_payload : Dict[str, Any], optional
+        Decoded token
+
+    Returns
+    -------
+    List[Any] or None
+        Key values of the last row of the previous page, or None for the first page
+    """
+    if token_payload is None:
+        return None
+    return [_decode_value(value) for value in token_payload["k"]]
+
+
+def keyset_page_token(sql: str, order_by: Sequence[OrderKey], last_row: Dict[str, Any]) -> str:
+    """
+    Issue the token for the page following ``last_row``.
+
+    Parameters
+    ----------
+    sql : str
+        The user query
+    order_by : Sequence[OrderKey]
+        Ordering keys
+    last_row : Dict[str, Any]
+        Last row of the current page
+
+    Returns
+    -------
+    str
+        Signed continuation token
+    """
+    missing = [column for column, _ in order_by if column not in last_row]
+    if missing:
+        raise PageTokenError(f"Ordering columns not in the result: {', '.join(missing)}")
+    return encode_page_token({
+        "q": query_fingerprint(sql, order_by),
+        "k": [_encode_value(last_row[column]) for column, _ in order_by],
+    })
+
+
+@dataclass
+class MaterializedResult:
+    """A query result stored in a session-local temporary table."""
+    table_name: str
+    connection_id: int
+    connection_context: Any
+    expires_at: float
+
+
+class MaterializedResultStore:
+    """
+    Registry of materialized query results.
+
+    Parameters
+    ----------
+    ttl_seconds : int
+        Lifetime of a materialized result
+    max_results : int
+        Maximum number of materialized results kept at once; the ones closest
+        to expiry are dropped first
+    """
+
+    def __init__(self, ttl_seconds: int, max_results: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_results = max(1, max_results)
+        self._results: Dict[str, MaterializedResult] = {}
+        self._lock = threading.Lock()
+
+    def create(self, connection_context: Any, sql: str, order_by: Sequence[OrderKey]) -> MaterializedResult:
+        """
+        Materialize a query into a numbered temporary table.
+
+        Parameters
+        ----------
+        connection_context : ConnectionContext
+            Pooled connection that will own the table
+        sql : str
+            The user query
+        order_by : Sequence[OrderKey]
+            Ordering used for the row numbers; may be empty
+
+        Returns
+        -------
+        MaterializedResult
+            The registered result
+        """
+        self.sweep()
+
+        table_name = f"{_TABLE_PREFIX}{uuid.uuid4().hex[:16].upper()}"
+        over = f"ORDER BY {order_clause(order_by)}" if order_by else ""
+        statement = (
+            f"CREATE LOCAL TEMPORARY COLUMN TABLE {quote_identifier(table_name)} AS ("
+            f"SELECT ROW_NUMBER() OVER ({over}) AS {quote_identifier(ROW_NUMBER_COLUMN)}, \"_SRC\".* "
+            f"FROM ({sql}) AS \"_SRC\")"
+        )
+        _execute(connection_context, statement)
+
+        result = MaterializedResult(
+            table_name=table_name,
+            connection_id=id(connection_context),
+            connection_context=connection_context,
+            expires_at=time.time() + self.ttl_seconds
+        )
+        with self._lock:
+            self._results[table_name] = result
+            overflow = sorted(self._results.values(), key=lambda r: r.expires_at)[:-self.max_results]
+            for evicted in overflow:
+                self._results.pop(evicted.table_name, None)
+        for evicted in overflow:
+            _drop_table(evicted)
+        return result
+
+    def get(self, table_name: str) -> Optional[MaterializedResult]:
+        """
+        Look up a live materialized result.
+
+        Parameters
+        ----------
+        table_name : str
+            Temporary table name
+
+        Returns
+        -------
+        MaterializedResult or None
+            The result if it exists and has not expired
+        """
+        with self._lock:
+            result = self._results.get(table_name)
+            if result is None:
+                return None
+            if result.expires_at < time.time():
+                self._results.pop(table_name, None)
+            else:
+                return result
+        _drop_table(result)
+        return None
+
+    def release(self, table_name: str):
+        """
+        Drop a materialized result.
+
+        Parameters
+        ----------
+        table_name : str
+            Temporary table name
+        """
+        with self._lock:
+            result = self._results.pop(table_name, None)
+        if result is not None:
+            _drop_table(result)
+
+    def sweep(self):
+        """Drop all expired materialized results."""
+        now = time.time()
+        with self._lock:
+            expired = [result for result in self._results.values() if result.expires_at < now]
+            for result in expired:
+                self._results.pop(result.table_name, None)
+        for result in expired:
+            _drop_table(result)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._results)
+
+
+def _execute(connection_context: Any, statement: str):
+    cursor = connection_context.connection.cursor()
+    try:
+        cursor.execute(statement)
+    finally:
+        cursor.close()
+
+
+def _drop_table(result: MaterializedResult):
+    try:
+        _execute(result.connection_context, f"DROP TABLE {quote_identifier(result.table_name)}")
+    except Exception as e:
+        # The session may already be gone, which drops the table with it
+        logger.debug(f"Could not drop materialized result {result.table_name}: {str(e)}")
+
+
+def fetch_materialized_page(
+    connection_context: Any,
+    sql: str,
+    order_by: Sequence[OrderKey],
+    limit: int,
+    offset: int = 0,
+    token_payload: Optional[Dict[str, Any]] = None,
+    pool: Optional[Dict[int, Any]] = None
+) -> Page:
+    """
+    Fetch a page from a materialized result, creating it on the first page.
+
+    Parameters
+    ----------
+    connection_context : ConnectionContext
+        Connection used to materialize the first page
+    sql : str
+        The user query
+    order_by : Sequence[OrderKey]
+        Ordering used for the row numbers; may be empty
+    limit : int
+        Page size
+    offset : int
+        Rows to skip on the first page
+    token_payload : Dict[str, Any], optional
+        Decoded token of the previous page
+    pool : Dict[int, ConnectionContext], optional
+        Connection pool; a token is rejected if its owning connection left the pool
+
+    Returns
+    -------
+    Page
+        The page and the token for the next one
+
+    Raises
+    ------
+    PageExpiredError
+        If the materialized result no longer exists
+    """
+    if token_payload is None:
+        result = materialized_results.create(connection_context, sql, order_by)
+        last_row_number = offset
+    else:
+        result = materialized_results.get(token_payload["m"])
+        if result is None or (pool is not None and pool.get(result.connection_id) is not result.connection_context):
+            if result is not None:
+                materialized_results.release(result.table_name)
+            raise PageExpiredError("Materialized result has expired; restart from the first page")
+        last_row_number = token_payload["r"]
+
+    row_number = quote_identifier(ROW_NUMBER_COLUMN)
+    page_sql = (
+        f"SELECT * FROM {quote_identifier(result.table_name)} "
+        f"WHERE {row_number} > {int(last_row_number)} ORDER BY {row_number} LIMIT {limit + 1}"
+    )
+    columns, records = _collect(result.connection_context, page_sql)
+    columns = [column for column in columns if column != ROW_NUMBER_COLUMN]
+
+    next_page_token = None
+    if len(records) > limit:
+        records = records[:limit]
+        next_page_token = encode_page_token({
+            "q": query_fingerprint(sql, order_by),
+            "m": result.table_name,
+            "r": int(last_row_number) + limit,
+            "exp": int(result.expires_at),
+        })
+    else:
+        # Read to the end; free the table right away
+        materialized_results.release(result.table_name)
+
+    for record in records:
+        record.pop(ROW_NUMBER_COLUMN, None)
+    return Page(columns=columns, records=records, next_page_token=next_page_token)
+
+
+# Global registry of materialized results
+materialized_results = MaterializedResultStore(
+    ttl_seconds=settings.PAGE_MATERIALIZE_TTL_SECONDS,
+    max_results=settings.PAGE_MAX_MATERIALIZED
+)
@@ -0,0 +1,230 @@
+"""
+Statistical CPU sampling profiler for Python code.
+
+``GPUProfiler`` only covers PyTorch/CUDA. This profiler samples the Python
+stacks of all threads with ``sys._current_frames()`` at a fixed interval
+and aggregates identical stacks, so hot paths can be found in production
+without instrumenting code. Results are rendered as collapsed stacks
+(input for ``flamegraph.pl`` and speedscope) or as a speedscope JSON file.
+
+Overhead is bounded: the sampler measures the time each sample takes and
+lengthens the interval whenever sampling would use more than
+``PROFILER_MAX_OVERHEAD`` of one CPU. Only one profile runs at a time, for at
+most ``PROFILER_MAX_SECONDS``. Sampling holds the GIL while it walks the
+stacks, so the overhead applies to the whole process; each profile covers
+only the worker process that serves the request.
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from .config import settings
+
+# Python frames threads wait in when idle; stacks ending in them are skipped
+# unless idle threads are requested
+IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+    ("base_events.py", "_run_once"),
+    ("thread.py", "_worker"),
+    ("socket.py", "accept"),
+}
+
+class ProfilerBusyError(RuntimeError):
+    """Raised when a profile is requested while another one is running."""
+
+class Profile:
+    """
+    Aggregated samples of a profiling run.
+
+    Parameters
+    ----------
+    stacks : Counter
+        Sample counts by (thread name, frames), outermost frame first
+    duration : float
+        Profiled time in seconds
+    samples : int
+        Sampling ticks taken
+    interval : float
+        Final sampling interval in seconds
+    overhead : float
+        Share of one CPU spent sampling
+    """
+    def __init__(self, stacks: Counter, duration: float, samples: int, interval: float, overhead: float):
+        self.stacks = stacks
+        self.duration = duration
+        self.samples = samples
+        self.interval = interval
+        self.overhead = overhead
+
+    def collapsed(self) -> str:
+        """
+        Render the samples as collapsed stacks.
+
+        Returns
+        -------
+        str
+            One ``thread;frame;...;frame count`` line per distinct stack
+        """
+        lines = [
+            ";".join((thread,) + frames) + f" {count}"
+            for (thread, frames), count in self.stacks.most_common()
+        ]
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def speedscope(self) -> Dict[str, Any]:
+        """
+        Render the samples as a speedscope file.
+
+        Returns
+        -------
+        Dict[str, Any]
+            Speedscope JSON with one sampled profile per thread, weighted
+            in seconds of wall time
+        """
+        seconds_per_sample = self.duration / self.samples if self.samples else 0.0
+        frame_index: Dict[str, int] = {}
+        frames: List[Dict[str, Any]] = []
+        profiles: Dict[str, Dict[str, Any]] = {}
+        for (thread, stack), count in self.stacks.most_common():
+            indices = []
+            for frame in stack:
+                if frame not in frame_index:
+                    frame_index[frame] = len(frames)
+                    name, _, location = frame.partition(" (")
+                    frames.append({"name": name, "file": location.rstrip(")")})
+                indices.append(frame_index[frame])
+            profile = profiles.setdefault(thread, {
+                "type": "sampled",
+                "name": thread,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": round(self.duration, 6),
+                "samples": [],
+                "weights": [],
+            })
+            profile["samples"].append(indices)
+            profile["weights"].append(round(count * seconds_per_sample, 6))
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": f"hana-ai-toolkit pid {os.getpid()} ({self.samples} samples, "
+                    f"{self.overhead:.2%} overhead)",
+            "exporter": "hana_ai.api.profiler",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": list(profiles.values()),
+        }
+
+class SamplingProfiler:
+    """
+    Sample the stacks of all threads.
+
+    Parameters
+    ----------
+    interval : float, optional
+        Initial time between samples in seconds; defaults to
+        ``PROFILER_SAMPLE_INTERVAL_SECONDS``
+    max_overhead : float, optional
+        Largest share of one CPU spent sampling; defaults to
+        ``PROFILER_MAX_OVERHEAD``
+    max_depth : int, optional
+        Innermost frames kept per stack
+    """
+    def __init__(self, interval: Optional[float] = None, max_overhead: Optional[float] = None,
+                 max_depth: int = 128):
+        self.interval = interval or settings.PROFILER_SAMPLE_INTERVAL_SECONDS
+        self.max_overhead = max_overhead or settings.PROFILER_MAX_OVERHEAD
+        self.max_depth = max_depth
+        self._lock = threading.Lock()
+        self._labels: Dict[Any, str] = {}
+
+    def profile(self, seconds: float, include_idle: bool = False) -> Profile:
+        """
+        Sample all threads for a while.
+
+        Blocks the calling thread, which is excluded from the samples.
+
+        Parameters
+        ----------
+        seconds : float
+            Profiling time, capped at ``PROFILER_MAX_SECONDS``
+        include_idle : bool, optional
+            Keep stacks of threads waiting on locks, queues or sockets
+
+        Returns
+        -------
+        Profile
+            Aggregated samples
+
+        Raises
+        ------
+        ProfilerBusyError
+            If another profile is running
+        """
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusyError("A profile is already running")
+        try:
+            return self._run(min(seconds, settings.PROFILER_MAX_SECONDS), include_idle)
+        finally:
+            # Labels are keyed by code object; do not keep code alive between profiles
+            self._labels.clear()
+            self._lock.release()
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+            self._labels[code] = label
+        return label
+
+    def _run(self, seconds: float, include_idle: bool) -> Profile:
+        stacks: Counter = Counter()
+        own_id = threading.get_ident()
+        interval = self.interval
+        samples = 0
+        sampling_time = 0.0
+        start = time.perf_counter()
+        deadline = start + seconds
+
+        while True:
+            tick = time.perf_counter()
+            if tick >= deadline:
+                break
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                if not include_idle and (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in IDLE_LEAVES:
+                    continue
+                labels = []
+                while frame is not None and len(labels) < self.max_depth:
+                    labels.append(self._label(frame.f_code))
+                    frame = frame.f_back
+                labels.reverse()
+                stacks[(names.get(thread_id, str(thread_id)), tuple(labels))] += 1
+            samples += 1
+            cost = time.perf_counter() - tick
+            sampling_time += cost
+            # Lengthen the interval if sampling exceeds the overhead budget
+            interval = max(interval, cost / self.max_overhead)
+            time.sleep(max(0.0, min(interval - cost, deadline - time.perf_counter())))
+
+        duration = time.perf_counter() - start
+        overhead = sampling_time / duration if duration > 0 else 0.0
+        return Profile(stacks, duration, samples, interval, overhead)
+
+def _short_path(path: str) -> str:
+    """Shorten a source path relative to the longest matching ``sys.path`` entry."""
+    best = ""
+    for entry in sys.path:
+        if entry and path.startswith(entry) and len(entry) > len(best):
+            best = entry
+    return os.path.relpath(path, best) if best else path
+
+# Global profiler
+profiler = SamplingProfiler()
@@ -0,0 +1,386 @@
+"""
+Token bucket rate limiting with bounded and shared bucket stores.
+
+Each client has a bucket holding up to ``RATE_LIMIT_PER_MINUTE`` tokens that
+refills continuously. Requests consume tokens according to the cost of their
+route, so an agent run that occupies an LLM for a minute costs more than
+listing tables.
+
+Buckets are kept in one of two stores:
+
+- ``MemoryBucketStore``: an LRU-bounded in-process store. Limits apply per
+  worker process.
+- ``SQLiteBucketStore``: a SQLite file shared by all workers on a host, so
+  limits hold across processes. Placing the file on ``/dev/shm`` keeps it in
+  shared memory. While the file is locked or failing, requests are limited
+  by an in-memory store of the worker instead of being rejected.
+"""
+import hashlib
+import itertools
+import logging
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RateLimitResult:
+    """Outcome of consuming tokens from a bucket."""
+    allowed: bool
+    limit: int
+    remaining: float
+    # Seconds until enough tokens are available for the request
+    retry_after: float
+    # Seconds until the bucket is full again
+    reset_after: float
+
+    def headers(self) -> Dict[str, str]:
+        """
+        Get the rate limit response headers.
+
+        Returns
+        -------
+        Dict[str, str]
+            ``X-RateLimit-*`` headers, and ``Retry-After`` if the request
+            was rejected
+        """
+        headers = {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(max(0, int(math.floor(self.remaining)))),
+            "X-RateLimit-Reset": str(int(math.ceil(self.reset_after))),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(max(1, int(math.ceil(self.retry_after))))
+        return headers
+
+
+def _refill_and_consume(tokens: float, updated: float, now: float, cost: float, capacity: float,
+                        refill_rate: float) -> Tuple[float, RateLimitResult]:
+    """Refill a bucket to ``now`` and try to take ``cost`` tokens from it."""
+    tokens = min(capacity, tokens + max(0.0, now - updated) * refill_rate)
+    allowed = tokens >= cost
+    if allowed:
+        tokens -= cost
+    missing = 0.0 if allowed else cost - tokens
+    result = RateLimitResult(
+        allowed=allowed,
+        limit=int(capacity),
+        remaining=tokens,
+        retry_after=missing / refill_rate,
+        reset_after=(capacity - tokens) / refill_rate
+    )
+    return tokens, result
+
+
+class MemoryBucketStore:
+    """
+    In-process bucket store bounded by least-recently-used eviction.
+
+    An evicted bucket is recreated full, which is what an idle client would
+    have anyway, so eviction only affects clients active beyond
+    ``max_keys``.
+
+    Parameters
+    ----------
+    max_keys : int
+        Maximum number of buckets kept
+    """
+
+    blocking = False
+
+    def __init__(self, max_keys: int = 10000):
+        self.max_keys = max(1, max_keys)
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key: str, cost: float, capacity: float, refill_rate: float) -> RateLimitResult:
+        """
+        Take tokens from a client's bucket.
+
+        Parameters
+        ----------
+        key : str
+            Client identifier
+        cost : float
+            Tokens required by the request
+        capacity : float
+            Bucket size
+        refill_rate : float
+            Tokens added per second
+
+        Returns
+        -------
+        RateLimitResult
+            Whether the request is allowed and the bucket state
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (capacity, now))
+            tokens, result = _refill_and_consume(tokens, updated, now, cost, capacity, refill_rate)
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return result
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class SQLiteBucketStore:
+    """
+    Bucket store in a SQLite file shared by all worker processes.
+
+    Each update runs in an immediate transaction, so concurrent workers
+    never both spend the same tokens. Buckets idle long enough to be full
+    again are deleted periodically.
+
+    Parameters
+    ----------
+    path : str
+        Database file path, e.g. on ``/dev/shm`` to keep it in memory
+    timeout : float
+        Seconds to wait for the database lock
+    prune_interval : int
+        Number of updates between deletions of idle buckets
+    """
+
+    blocking = True
+
+    def __init__(self, path: str, timeout: float = 1.0, prune_interval: int = 1000):
+        self.path = path
+        self.timeout = timeout
+        self.prune_interval = max(1, prune_interval)
+        self._local = threading.local()
+        self._updates = itertools.count(1)
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limit_buckets ("
+                "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get the connection of the calling thread."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+        return conn
+
+    def consume(self, key: str, cost: float, capacity: float, refill_rate: float) -> RateLimitResult:
+        """
+        Take tokens from a client's bucket.
+
+        Parameters
+        ----------
+        key : str
+            Client identifier
+        cost : float
+            Tokens required by the request
+        capacity : float
+            Bucket size
+        refill_rate : float
+            Tokens added per second
+
+        Returns
+        -------
+        RateLimitResult
+            Whether the request is allowed and the bucket state
+        """
+        # Wall clock time, since monotonic clocks are not shared between processes
+        now = time.time()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT tokens, updated FROM rate_limit_buckets WHERE key = ?", (key,)
+            ).fetchone()
+            tokens, updated = row if row else (capacity, now)
+            tokens, result = _refill_and_consume(tokens, updated, now, cost, capacity, refill_rate)
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_limit_buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                (key, tokens, now)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            # SQLite rolls back by itself on some errors
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+
+        if next(self._updates) % self.prune_interval == 0:
+            self.prune(capacity / refill_rate)
+        return result
+
+    def prune(self, idle_seconds: float):
+        """
+        Delete buckets that have refilled completely.
+
+        Parameters
+        ----------
+        idle_seconds : float
+            Time after which an unused bucket is full
+        """
+        try:
+            self._connection().execute(
+                "DELETE FROM rate_limit_buckets WHERE updated < ?", (time.time() - idle_seconds,)
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to prune rate limit buckets: {str(e)}")
+
+
+class RateLimiter:
+    """
+    Applies per-route costs to a bucket store.
+
+    Parameters
+    ----------
+    store : MemoryBucketStore or SQLiteBucketStore
+        Bucket storage
+    limit_per_minute : int
+        Bucket size and tokens refilled per minute
+    route_costs : Dict[str, int], optional
+        Token cost by path prefix; the longest matching prefix wins and
+        other routes cost 1
+    """
+
+    # Seconds between warnings about a failing bucket store
+    STORE_ERROR_LOG_INTERVAL = 60.0
+
+    def __init__(self, store, limit_per_minute: int, route_costs: Optional[Dict[str, int]] = None):
+        self.store = store
+        self.capacity = float(max(1, limit_per_minute))
+        self.refill_rate = self.capacity / 60.0
+        # Longest prefixes first
+        self.route_costs = sorted((route_costs or {}).items(), key=lambda item: len(item[0]), reverse=True)
+        self.store_errors = 0
+        self._fallback: Optional[MemoryBucketStore] = None
+        self._last_error_log = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def blocking(self) -> bool:
+        """Whether ``check`` may block and should run off the event loop."""
+        return self.store.blocking
+
+    def cost(self, path: str) -> float:
+        """
+        Get the token cost of a request path.
+
+        Parameters
+        ----------
+        path : str
+            Request path
+
+        Returns
+        -------
+        float
+            Tokens consumed, at most the bucket size
+        """
+        for prefix, cost in self.route_costs:
+            if path.startswith(prefix):
+                return float(min(max(cost, 0), self.capacity))
+        return 1.0
+
+    def check(self, client_key: str, path: str) -> RateLimitResult:
+        """
+        Consume the tokens of a request.
+
+        Parameters
+        ----------
+        client_key : str
+            Client identifier, see ``client_key``
+        path : str
+            Request path
+
+        Returns
+        -------
+        RateLimitResult
+            Whether the request is allowed and the bucket state
+        """
+        cost = self.cost(path)
+        try:
+            return self.store.consume(client_key, cost, self.capacity, self.refill_rate)
+        except sqlite3.Error as e:
+            # A locked or broken shared store must not turn requests into errors
+            return self._fallback_store(e).consume(client_key, cost, self.capacity, self.refill_rate)
+
+    def _fallback_store(self, error: sqlite3.Error) -> "MemoryBucketStore":
+        """Count a store failure, log it at most once per interval and get the in-memory store."""
+        now = time.monotonic()
+        with self._lock:
+            self.store_errors += 1
+            if self._fallback is None:
+                self._fallback = MemoryBucketStore(settings.RATE_LIMIT_MAX_KEYS)
+            log = now - self._last_error_log >= self.STORE_ERROR_LOG_INTERVAL
+            if log:
+                self._last_error_log = now
+            errors = self.store_errors
+        if log:
+            logger.warning(
+                f"Rate limit store failed, limiting per worker ({errors} failures so far): {str(error)}"
+            )
+        return self._fallback
+
+
+def client_key(api_key: Optional[str], client_ip: str) -> str:
+    """
+    Get the bucket key of a client.
+
+    API keys are hashed so they are never stored in the bucket store.
+
+    Parameters
+    ----------
+    api_key : str, optional
+        API key of the request
+    client_ip : str
+        Client address, used if there is no API key
+
+    Returns
+    -------
+    str
+        The bucket key
+    """
+    if api_key:
+        return "key:" + hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:32]
+    return f"ip:{client_ip}"
+
+
+def create_rate_limiter(limit_per_minute: Optional[int] = None) -> RateLimiter:
+    """
+    Create the rate limiter configured in the settings.
+
+    Falls back to the in-memory store if the SQLite store cannot be opened.
+
+    Parameters
+    ----------
+    limit_per_minute : int, optional
+        Overrides ``RATE_LIMIT_PER_MINUTE``
+
+    Returns
+    -------
+    RateLimiter
+        The rate limiter
+    """
+    store = None
+    if settings.RATE_LIMIT_BACKEND == "sqlite":
+        try:
+            store = SQLiteBucketStore(settings.RATE_LIMIT_SQLITE_PATH)
+        except sqlite3.Error as e:
+            logger.warning(f"Could not open rate limit store {settings.RATE_LIMIT_SQLITE_PATH}: {str(e)}")
+    if store is None:
+        store = MemoryBucketStore(settings.RATE_LIMIT_MAX_KEYS)
+    return RateLimiter(
+        store,
+        limit_per_minute or settings.RATE_LIMIT_PER_MINUTE,
+        settings.RATE_LIMIT_ROUTE_COSTS
+    )
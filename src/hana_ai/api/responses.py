@@ -0,0 +1,194 @@
+"""
+Fast JSON serialization for API responses.
+
+FastAPI's default path converts a response with ``jsonable_encoder``, which
+walks every value in Python, and then encodes it with the stdlib ``json``
+module. For query results with tens of thousands of cells this dominates
+the request time. This module serializes with ``orjson`` when it is
+installed, converts pandas DataFrames column by column instead of cell by
+cell, and handles numpy scalars, timestamps and decimals in a single
+``default`` hook.
+
+pandas and numpy are imported on first use; until a request has loaded
+them, no value can be a pandas or numpy object.
+"""
+import datetime
+import decimal
+import enum
+import json
+import logging
+import sys
+import uuid
+from typing import TYPE_CHECKING, Any, Dict, List, Type
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Only import orjson if available
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+    _ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def _column_values(series: "pd.Series") -> List[Any]:
+    """Convert a DataFrame column to JSON-ready Python values in one pass."""
+    import numpy as np
+    import pandas as pd
+
+    values = series.to_numpy()
+    kind = values.dtype.kind
+
+    if kind in "iub":
+        return values.tolist()
+    if kind == "f":
+        result = values.tolist()
+        for index in np.flatnonzero(np.isnan(values)):
+            result[index] = None
+        return result
+    if kind == "M":
+        # datetime64[us].tolist() yields datetime objects (NaT becomes None)
+        return values.astype("datetime64[us]").tolist()
+    if kind == "m":
+        return [None if pd.isna(value) else str(value) for value in series]
+    if isinstance(series.dtype, pd.DatetimeTZDtype):
+        return [None if pd.isna(value) else value.isoformat() for value in series]
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+def dataframe_to_records(df: "pd.DataFrame") -> List[Dict[str, Any]]:
+    """
+    Convert a DataFrame to a list of row dicts, column-wise.
+
+    Each column is converted to Python values with a single vectorized call,
+    which avoids the per-cell boxing of ``DataFrame.to_dict(orient="records")``.
+    Missing values become None.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        DataFrame to convert
+
+    Returns
+    -------
+    List[Dict[str, Any]]
+        One dict per row
+    """
+    columns = [str(column) for column in df.columns]
+    values = [_column_values(df.iloc[:, i]) for i in range(df.shape[1])]
+    return [dict(zip(columns, row)) for row in zip(*values)]
+
+
+def json_default(obj: Any) -> Any:
+    """
+    Convert values the JSON encoder does not handle natively.
+
+    Parameters
+    ----------
+    obj : Any
+        Value to convert
+
+    Returns
+    -------
+    Any
+        A JSON-serializable value
+    """
+    pd = sys.modules.get("pandas")
+    if pd is not None:
+        if isinstance(obj, pd.DataFrame):
+            return dataframe_to_records(obj)
+        if isinstance(obj, pd.Series):
+            return _column_values(obj)
+        if obj is pd.NaT:
+            return None
+    if isinstance(obj, BaseModel):
+        # Shallow conversion; nested values come back through this hook
+        return dict(obj)
+    np = sys.modules.get("numpy")
+    if np is not None:
+        if isinstance(obj, np.ndarray):
+            return obj.tolist()
+        if isinstance(obj, np.generic):
+            value = obj.item()
+            return None if isinstance(value, float) and value != value else value
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, (bytes, bytearray, memoryview)):
+        return bytes(obj).hex()
+    if isinstance(obj, enum.Enum):
+        return obj.value
+    if isinstance(obj, (uuid.UUID, datetime.timedelta)):
+        return str(obj)
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Serialize content to JSON bytes.
+
+    Parameters
+    ----------
+    content : Any
+        Payload, including pydantic models, DataFrames and numpy values
+
+    Returns
+    -------
+    bytes
+        UTF-8 encoded JSON
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(content, default=json_default, option=_ORJSON_OPTIONS)
+    return json.dumps(
+        content,
+        default=json_default,
+        ensure_ascii=False,
+        separators=(",", ":")
+    ).encode("utf-8")
+
+
+def build_model(model_cls: Type[BaseModel], payload_rows: int, **values: Any) -> BaseModel:
+    """
+    Create a response model, skipping validation for large payloads.
+
+    The routers build response payloads themselves, so re-validating every
+    row only costs time. Payloads with more than
+    ``RESPONSE_VALIDATION_MAX_ROWS`` rows are constructed without validation.
+
+    Parameters
+    ----------
+    model_cls : Type[BaseModel]
+        Response model class
+    payload_rows : int
+        Number of rows in the payload
+    **values : Any
+        Field values
+
+    Returns
+    -------
+    BaseModel
+        The response model
+    """
+    if payload_rows > settings.RESPONSE_VALIDATION_MAX_ROWS:
+        construct = getattr(model_cls, "model_construct", None) or model_cls.construct
+        return construct(**values)
+    return model_cls(**values)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with ``orjson`` when available."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
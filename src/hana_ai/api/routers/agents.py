@@ -1,30 +1,48 @@
 """
 API endpoints for interacting with HANA AI agents.
+
+The agent, toolkit and langchain modules are imported on first use, so
+importing the application stays fast.
 """
+from __future__ import annotations
+
 import time
 import json
+import asyncio
 import logging
-from typing import Dict, Any, Optional
+from typing import TYPE_CHECKING, Dict, Any, Optional
 from fastapi import APIRouter, Depends, HTTPException, Request, BackgroundTasks
-from langchain_core.chat_history import BaseChatMessageHistory
-from langchain_core.chat_history import InMemoryChatMessageHistory
-
-from hana_ml.dataframe import ConnectionContext
-from langchain.llms.base import BaseLLM
-
-from hana_ai.agents.hanaml_agent_with_memory import HANAMLAgentWithMemory, stateless_call
-from hana_ai.agents.hana_sql_agent import create_hana_sql_agent
-from hana_ai.tools.toolkit import HANAMLToolkit
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 
 from ..models import ConversationRequest, ConversationResponse, ErrorResponse
 from ..dependencies import get_connection_context, get_llm
 from ..auth import get_api_key
+from ..config import settings
+from ..deadline import DeadlineExceeded, remaining_time
+from ..failover import ConcurrencyLimitExceededError
+from ..sse import (
+    ERROR_EVENT,
+    FINAL_EVENT,
+    SSE_MEDIA_TYPE,
+    new_event_buffer,
+    with_streaming
+)
+
+if TYPE_CHECKING:
+    from hana_ml.dataframe import ConnectionContext
+    from langchain.llms.base import BaseLLM
+    from langchain_core.chat_history import BaseChatMessageHistory
+
+    from hana_ai.agents.hanaml_agent_with_memory import HANAMLAgentWithMemory
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 # Store for active agent sessions
 AGENT_SESSIONS: Dict[str, HANAMLAgentWithMemory] = {}
+# Streaming variants of the session agents, sharing their memory
+STREAMING_AGENT_SESSIONS: Dict[str, HANAMLAgentWithMemory] = {}
 CHAT_HISTORIES: Dict[str, BaseChatMessageHistory] = {}
 
 @router.post(
@@ -71,32 +89,15 @@ async def process_conversation(
     
     try:
         # Get or create agent for this session
-        if session_id not in AGENT_SESSIONS:
-            # Create a new toolkit with all tools
-            toolkit = HANAMLToolkit(
-                connection_context=connection_context, 
-                used_tools="all"
-            )
-            tools = toolkit.get_tools()
-            
-            # Create a new agent with memory
-            AGENT_SESSIONS[session_id] = HANAMLAgentWithMemory(
-                llm=llm,
-                tools=tools,
-                session_id=session_id,
-                n_messages=30,  # Remember 30 previous messages
-                verbose=request.verbose
-            )
-            CHAT_HISTORIES[session_id] = InMemoryChatMessageHistory(session_id=session_id)
-        
-        # Get the agent for this session
-        agent = AGENT_SESSIONS[session_id]
+        agent = _get_session_agent(session_id, connection_context, llm, request.verbose)
         
         # Process the message
         if request.return_intermediate_steps:
             # Use stateless mode to get intermediate steps
+            from hana_ai.agents.hanaml_agent_with_memory import stateless_call
             chat_history = CHAT_HISTORIES[session_id].messages
-            response = stateless_call(
+            response = await run_in_threadpool(
+                stateless_call,
                 llm=llm,
                 tools=agent.tools,
                 question=request.message,
@@ -124,7 +125,7 @@ async def process_conversation(
             )
         else:
             # Use stateful mode with memory
-            result = agent.run(request.message)
+            result = await run_in_threadpool(agent.run, request.message)
             
             return ConversationResponse(
                 response=result,
@@ -132,12 +133,178 @@ async def process_conversation(
                 intermediate_steps=None
             )
             
+    except (DeadlineExceeded, ConcurrencyLimitExceededError):
+        raise
+    except Exception as e:
+        logger.error(f"Error processing conversation: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error processing conversation: {str(e)}"
+        )
+
+@router.post(
+    "/conversation/stream",
+    responses={
+        200: {"content": {SSE_MEDIA_TYPE: {}}},
+        401: {"model": ErrorResponse},
+        500: {"model": ErrorResponse}
+    }
+)
+async def stream_conversation(
+    request: ConversationRequest,
+    api_key: str = Depends(get_api_key),
+    connection_context: ConnectionContext = Depends(get_connection_context),
+    llm: BaseLLM = Depends(get_llm)
+):
+    """
+    Process a conversation message and stream the agent's progress as Server-Sent Events.
+    
+    Emits ``token`` events while the LLM generates, ``tool_start`` and
+    ``tool_end`` events around tool calls, and a ``final`` event with the
+    answer (or an ``error`` event). The agent runs in the thread pool and
+    never waits for the client: while the client is behind, tokens are
+    coalesced and, once the buffer is full, dropped.
+    
+    Parameters
+    ----------
+    request : ConversationRequest
+        The conversation request containing the user message
+    api_key : str
+        The API key for authentication
+    connection_context : ConnectionContext
+        The database connection context
+    llm : BaseLLM
+        The language model to use
+        
+    Returns
+    -------
+    StreamingResponse
+        The event stream
+    """
+    session_id = request.session_id
+    start_time = time.time()
+    
+    try:
+        agent = _get_session_agent(session_id, connection_context, llm, request.verbose, streaming=True)
     except Exception as e:
         logger.error(f"Error processing conversation: {str(e)}", exc_info=True)
         raise HTTPException(
             status_code=500,
             detail=f"Error processing conversation: {str(e)}"
         )
+    
+    from ..sse import SSECallbackHandler
+
+    buffer = new_event_buffer()
+    handler = SSECallbackHandler(buffer)
+    
+    def run_agent():
+        try:
+            result = agent.run(request.message, callbacks=[handler])
+            buffer.publish(FINAL_EVENT, {
+                "response": result,
+                "conversation_id": session_id,
+                "execution_time": time.time() - start_time,
+                "time_to_first_token": (
+                    handler.first_token_at - start_time if handler.first_token_at else None
+                )
+            })
+        except Exception as e:
+            logger.error(f"Error processing conversation: {str(e)}", exc_info=True)
+            buffer.publish(ERROR_EVENT, {"detail": f"Error processing conversation: {str(e)}"})
+        finally:
+            buffer.close()
+    
+    # The run continues even if the client disconnects, so memory stays consistent
+    agent_task = asyncio.ensure_future(run_in_threadpool(run_agent))
+    
+    async def event_stream():
+        try:
+            async for frame in buffer.events(settings.SSE_HEARTBEAT_SECONDS):
+                yield frame
+        finally:
+            if not agent_task.done():
+                logger.info(f"Client left conversation stream {session_id}; agent run continues")
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type=SSE_MEDIA_TYPE,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _get_session_agent(
+    session_id: str,
+    connection_context: ConnectionContext,
+    llm: BaseLLM,
+    verbose: bool,
+    streaming: bool = False
+) -> HANAMLAgentWithMemory:
+    """
+    Get or create the agent with memory for a session.
+    
+    ``/conversation/stream`` uses a variant of the session agent with a
+    streaming LLM, so that token events can be emitted. Both variants share
+    the session's memory; other requests keep the non-streaming LLM.
+    
+    Parameters
+    ----------
+    session_id : str
+        The session identifier
+    connection_context : ConnectionContext
+        The database connection context
+    llm : BaseLLM
+        The language model to use
+    verbose : bool
+        Enable verbose logging
+    streaming : bool, optional
+        Get the variant with a streaming LLM
+        
+    Returns
+    -------
+    HANAMLAgentWithMemory
+        The session's agent
+    """
+    if session_id not in AGENT_SESSIONS:
+        from langchain_core.chat_history import InMemoryChatMessageHistory
+        from hana_ai.agents.hanaml_agent_with_memory import HANAMLAgentWithMemory
+        from hana_ai.tools.toolkit import HANAMLToolkit
+
+        # Create a new toolkit with all tools
+        toolkit = HANAMLToolkit(
+            connection_context=connection_context, 
+            used_tools="all"
+        )
+        tools = toolkit.get_tools()
+        
+        # Create a new agent with memory
+        AGENT_SESSIONS[session_id] = HANAMLAgentWithMemory(
+            llm=llm,
+            tools=tools,
+            session_id=session_id,
+            n_messages=30,  # Remember 30 previous messages
+            verbose=verbose
+        )
+        CHAT_HISTORIES[session_id] = InMemoryChatMessageHistory(session_id=session_id)
+    
+    agent = AGENT_SESSIONS[session_id]
+    if not streaming:
+        return agent
+    
+    if session_id not in STREAMING_AGENT_SESSIONS:
+        from hana_ai.agents.hanaml_agent_with_memory import HANAMLAgentWithMemory
+
+        streaming_agent = HANAMLAgentWithMemory(
+            llm=with_streaming(llm),
+            tools=agent.tools,
+            session_id=session_id,
+            n_messages=30,
+            verbose=verbose
+        )
+        # The agent reads its memory on every run, so both variants share the history
+        streaming_agent.memory = agent.memory
+        STREAMING_AGENT_SESSIONS[session_id] = streaming_agent
+    
+    return STREAMING_AGENT_SESSIONS[session_id]
 
 @router.post(
     "/sql",
@@ -172,22 +339,27 @@ async def execute_sql_agent(
         The SQL agent's response
     """
     try:
+        from hana_ai.agents.hana_sql_agent import create_hana_sql_agent
+
         # Create SQL agent
         agent = create_hana_sql_agent(
             llm=llm,
             connection_context=connection_context,
-            verbose=False
+            verbose=False,
+            max_execution_time=remaining_time()
         )
         
         # Execute the query
         start_time = time.time()
-        result = agent.invoke(query)
+        result = await run_in_threadpool(agent.invoke, query)
         execution_time = time.time() - start_time
         
         return {
             "result": result,
             "execution_time": execution_time
         }
+    except (DeadlineExceeded, ConcurrencyLimitExceededError):
+        raise
     except Exception as e:
         logger.error(f"Error executing SQL agent: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -1,63 +1,202 @@
 """
 API endpoints for working with HANA dataframes and SmartDataFrame functionality.
+
+hana_ml, langchain and the SmartDataFrame modules are imported on first use,
+so importing the application stays fast.
 """
+from __future__ import annotations
+
 import time
 import logging
-from typing import Dict, Any, List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
-from pydantic import BaseModel
-
-from hana_ml.dataframe import ConnectionContext, DataFrame
-from langchain.llms.base import BaseLLM
-
-from hana_ai.smart_dataframe import SmartDataFrame
-from hana_ai.tools.code_template_tools import GetCodeTemplateFromVectorDB
-from hana_ai.vectorstore.hana_vector_engine import HANAMLinVectorEngine
+from typing import TYPE_CHECKING, Dict, Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from starlette.concurrency import run_in_threadpool
 
+from .. import dependencies
 from ..dependencies import get_connection_context, get_llm
 from ..auth import get_api_key
 from ..models import SmartDataFrameRequest, DataResponse
+from ..cache import cached_json_response, make_cache_key, normalize_sql
+from ..config import settings
+from ..env_constants import MAX_STREAM_CHUNK_SIZE
+from ..formats import (
+    PARQUET_MEDIA_TYPE,
+    RESPONSE_FORMATS,
+    fetch_arrow_table,
+    negotiate_format,
+    serialize_table
+)
+from ..pagination import (
+    PageExpiredError,
+    PageTokenError,
+    build_keyset_query,
+    decode_page_token,
+    fetch_keyset_page,
+    fetch_materialized_page,
+    keyset_page_token,
+    query_fingerprint,
+    token_key_values
+)
+from ..responses import FastJSONResponse, build_model, dataframe_to_records
+from ..singleflight import response_flight
+from ..streaming import (
+    ARROW_STREAM_MEDIA_TYPE,
+    NDJSON_MEDIA_TYPE,
+    PYARROW_AVAILABLE,
+    STREAM_FORMATS,
+    open_cursor,
+    stream_rows
+)
+
+if TYPE_CHECKING:
+    from hana_ml.dataframe import ConnectionContext
+    from langchain.llms.base import BaseLLM
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+class OrderByColumn(BaseModel):
+    """Ordering key for keyset pagination."""
+    column: str = Field(..., description="Result column name")
+    descending: bool = Field(default=False, description="Sort in descending order")
+
 class QueryRequest(BaseModel):
     """Request for querying a dataframe."""
     query: str
     limit: Optional[int] = 1000
     offset: Optional[int] = 0
+    order_by: Optional[List[OrderByColumn]] = Field(
+        default=None,
+        description="Ordering keys for keyset pagination; together they must identify a row uniquely"
+    )
+    page_token: Optional[str] = Field(default=None, description="next_page_token of the previous page")
+    materialize: bool = Field(
+        default=False,
+        description="Materialize the result in a temporary table so deep pages are read by row number"
+    )
+
+class StreamQueryRequest(BaseModel):
+    """Request for streaming query results."""
+    query: str
+    format: str = Field(default="ndjson", description="Stream format: ndjson or arrow")
+    chunk_size: Optional[int] = Field(default=None, gt=0, description="Rows per fetch and per streamed chunk")
 
 @router.post(
     "/query",
     response_model=DataResponse,
     summary="Execute SQL query on HANA database",
-    description="Run SQL query against the connected HANA database and return results"
+    description="Run SQL query against the connected HANA database and return results",
+    responses={
+        200: {"content": {ARROW_STREAM_MEDIA_TYPE: {}, PARQUET_MEDIA_TYPE: {}}}
+    }
 )
 async def query_database(
     request: QueryRequest,
-    api_key: str = Depends(get_api_key),
-    connection_context: ConnectionContext = Depends(get_connection_context)
+    http_request: Request,
+    api_key: str = Depends(get_api_key)
 ):
     """
     Execute SQL query and return results.
     
+    Identical queries (after SQL normalization) from the same API key are
+    served from the response cache without touching the database.
+    
+    With ``order_by`` or ``materialize`` the result is paginated with
+    continuation tokens: the response carries ``next_page_token``, which is
+    passed back as ``page_token`` together with the same query to fetch the
+    next page. Keyset pages seek past the last row of the previous page, so
+    deep pages cost the same as the first one. Otherwise ``limit`` and
+    ``offset`` are applied directly.
+    
+    Clients sending ``Accept: application/vnd.apache.arrow.stream`` or
+    ``Accept: application/x-parquet`` receive the result as an Arrow IPC
+    stream or Parquet file built directly from the fetched columns; the
+    next page token is then returned in the ``X-Next-Page-Token`` header.
+    
     Parameters
     ----------
     request : QueryRequest
         The query request
+    http_request : Request
+        The FastAPI request object
     api_key : str
         API key for authentication
-    connection_context : ConnectionContext
-        Database connection
         
     Returns
     -------
     DataResponse
         Query results
     """
-    try:
+    order_by = [(key.column, key.descending) for key in (request.order_by or [])]
+    paginated = bool(order_by or request.materialize or request.page_token)
+    
+    token_payload = None
+    if request.page_token:
+        if not (order_by or request.materialize):
+            raise HTTPException(
+                status_code=400,
+                detail="page_token requires the order_by or materialize of the first request"
+            )
+        try:
+            token_payload = decode_page_token(request.page_token, query_fingerprint(request.query, order_by))
+        except PageExpiredError as e:
+            raise HTTPException(status_code=410, detail=str(e))
+        except PageTokenError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if ("m" in token_payload) != request.materialize:
+            raise HTTPException(status_code=400, detail="page_token does not match the materialize setting")
+    
+    response_format = negotiate_format(http_request.headers.get("accept"))
+    if response_format is None:
+        raise HTTPException(
+            status_code=406,
+            detail=f"Acceptable response formats: {', '.join(RESPONSE_FORMATS.values())}"
+        )
+    if response_format != "json":
+        if request.materialize:
+            raise HTTPException(status_code=400, detail="materialize is only supported for JSON responses")
+        return await _columnar_query_response(request, http_request, api_key, order_by, token_payload, response_format)
+    
+    def run_query():
         start_time = time.time()
         
+        if paginated:
+            limit = request.limit or 1000
+            if request.materialize:
+                page = fetch_materialized_page(
+                    None if token_payload else dependencies.get_connection_context(http_request),
+                    request.query,
+                    order_by,
+                    limit,
+                    offset=request.offset or 0,
+                    token_payload=token_payload,
+                    pool=getattr(http_request.app.state, "connection_pool", None)
+                )
+            else:
+                page = fetch_keyset_page(
+                    dependencies.get_connection_context(http_request),
+                    request.query,
+                    order_by,
+                    limit,
+                    token_payload=token_payload
+                )
+            return build_model(
+                DataResponse,
+                len(page.records),
+                columns=page.columns,
+                data=page.records,
+                row_count=len(page.records),
+                query_time=time.time() - start_time,
+                next_page_token=page.next_page_token
+            )
+        
+        import pandas as pd
+        from hana_ml.dataframe import DataFrame
+
+        connection_context = dependencies.get_connection_context(http_request)
+        
         # Create DataFrame from query
         df = DataFrame(connection_context, request.query)
         
@@ -72,12 +211,40 @@ async def query_database(
         
         query_time = time.time() - start_time
         
-        return DataResponse(
+        # Handle pandas DataFrame
+        if isinstance(result, pd.DataFrame):
+            result = dataframe_to_records(result)
+        
+        return build_model(
+            DataResponse,
+            len(result),
             columns=columns,
             data=result,
             row_count=len(result),
             query_time=query_time
         )
+    
+    params = {"query": normalize_sql(request.query), "limit": request.limit, "offset": request.offset}
+    if paginated:
+        params.update({"order_by": order_by, "page_token": request.page_token, "materialize": request.materialize})
+    
+    try:
+        if request.materialize:
+            # Materialized pages are stateful; never serve them from the cache
+            return await run_in_threadpool(run_query)
+        return await cached_json_response(
+            http_request,
+            "dataframes.query",
+            api_key,
+            params,
+            run_query
+        )
+    except HTTPException:
+        raise
+    except PageExpiredError as e:
+        raise HTTPException(status_code=410, detail=str(e))
+    except PageTokenError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Query execution error: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -85,6 +252,149 @@ async def query_database(
             detail=f"Error executing query: {str(e)}"
         )
 
+async def _columnar_query_response(
+    request: QueryRequest,
+    http_request: Request,
+    api_key: str,
+    order_by: List,
+    token_payload: Optional[Dict[str, Any]],
+    response_format: str
+) -> Response:
+    """
+    Execute a query and return it as an Arrow IPC stream or Parquet file.
+    
+    Large binary results are not kept in the response cache, but identical
+    concurrent requests still share one execution.
+    
+    Parameters
+    ----------
+    request : QueryRequest
+        The query request
+    http_request : Request
+        The FastAPI request object
+    api_key : str
+        API key of the caller
+    order_by : List
+        Ordering keys for keyset pagination
+    token_payload : Dict[str, Any], optional
+        Decoded page token
+    response_format : str
+        ``"arrow"`` or ``"parquet"``
+        
+    Returns
+    -------
+    Response
+        The serialized result
+    """
+    limit = request.limit or 1000
+    if order_by:
+        sql = build_keyset_query(request.query, order_by, limit, token_key_values(token_payload))
+    elif request.limit or request.offset:
+        sql = f"SELECT * FROM ({request.query}) LIMIT {request.limit} OFFSET {request.offset}"
+    else:
+        sql = request.query
+    
+    def run_query():
+        start_time = time.time()
+        connection_context = dependencies.get_connection_context(http_request)
+        table = fetch_arrow_table(connection_context, sql)
+        
+        headers = {}
+        if order_by and table.num_rows > limit:
+            table = table.slice(0, limit)
+            last_row = table.slice(limit - 1, 1).to_pylist()[0]
+            headers["X-Next-Page-Token"] = keyset_page_token(request.query, order_by, last_row)
+        
+        body = serialize_table(table, response_format)
+        headers["X-Row-Count"] = str(table.num_rows)
+        headers["X-Query-Time"] = f"{time.time() - start_time:.6f}"
+        return body, headers
+    
+    key = make_cache_key(
+        f"dataframes.query.{response_format}",
+        api_key,
+        {"sql": normalize_sql(sql), "order_by": order_by}
+    )
+    try:
+        body, headers = await response_flight.do_async(key, run_query)
+    except HTTPException:
+        raise
+    except PageTokenError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Query execution error: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error executing query: {str(e)}"
+        )
+    return Response(content=body, media_type=RESPONSE_FORMATS[response_format], headers=headers)
+
+@router.post(
+    "/query/stream",
+    summary="Stream SQL query results",
+    description="Run SQL query and stream the rows as NDJSON or Arrow IPC record batches",
+    responses={
+        200: {"content": {NDJSON_MEDIA_TYPE: {}, ARROW_STREAM_MEDIA_TYPE: {}}}
+    }
+)
+async def stream_query(
+    request: StreamQueryRequest,
+    http_request: Request,
+    api_key: str = Depends(get_api_key)
+):
+    """
+    Execute SQL query and stream the rows while they are fetched.
+    
+    Rows are fetched with ``fetchmany`` in chunks of ``chunk_size`` rows, so
+    memory stays bounded for arbitrarily large results.
+    
+    Parameters
+    ----------
+    request : StreamQueryRequest
+        The query and stream format
+    http_request : Request
+        The FastAPI request object
+    api_key : str
+        API key for authentication
+        
+    Returns
+    -------
+    StreamingResponse
+        The streamed rows
+    """
+    stream_format = request.format.lower()
+    if stream_format not in STREAM_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported stream format: {request.format}. Use one of {sorted(STREAM_FORMATS)}"
+        )
+    if stream_format == "arrow" and not PYARROW_AVAILABLE:
+        raise HTTPException(
+            status_code=406,
+            detail="Arrow streaming requires the 'pyarrow' package on the server"
+        )
+    chunk_size = min(request.chunk_size or settings.STREAM_CHUNK_SIZE, MAX_STREAM_CHUNK_SIZE)
+    
+    try:
+        # Execute eagerly so SQL errors still produce a proper error status
+        connection_context = await run_in_threadpool(dependencies.get_connection_context, http_request)
+        cursor = await run_in_threadpool(open_cursor, connection_context, request.query, chunk_size)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Query execution error: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error executing query: {str(e)}"
+        )
+    
+    # Synchronous iterators are consumed in the thread pool by StreamingResponse
+    return StreamingResponse(
+        stream_rows(cursor, stream_format, chunk_size),
+        media_type=STREAM_FORMATS[stream_format],
+        headers={"X-Stream-Chunk-Size": str(chunk_size)}
+    )
+
 @router.post(
     "/smart/ask",
     summary="Ask questions about a dataframe",
@@ -116,6 +426,11 @@ async def smart_dataframe_ask(
         Response with analysis and results
     """
     try:
+        from hana_ml.dataframe import DataFrame
+        from hana_ai.smart_dataframe import SmartDataFrame
+        from hana_ai.tools.code_template_tools import GetCodeTemplateFromVectorDB
+        from hana_ai.vectorstore.hana_vector_engine import HANAMLinVectorEngine
+
         start_time = time.time()
         
         # Get dataframe from table or SQL query
@@ -149,21 +464,22 @@ async def smart_dataframe_ask(
             result_data = result_df.head(10).collect()
             result_columns = result_df.columns
             
-            return {
+            # DataFrames are serialized column-wise by the response class
+            return FastJSONResponse({
                 "type": "transform",
                 "sql": sql,
                 "columns": result_columns,
                 "data": result_data,
                 "query_time": time.time() - start_time
-            }
+            })
         else:
             result = smart_df.ask(request.question)
             
-            return {
+            return FastJSONResponse({
                 "type": "ask",
                 "result": result,
                 "query_time": time.time() - start_time
-            }
+            })
             
     except Exception as e:
         logger.error(f"SmartDataFrame operation error: {str(e)}", exc_info=True)
@@ -178,28 +494,29 @@ async def smart_dataframe_ask(
     description="Get a list of tables available in the connected HANA database"
 )
 async def list_tables(
+    http_request: Request,
     schema: Optional[str] = Query(None, description="Schema name to filter tables"),
-    api_key: str = Depends(get_api_key),
-    connection_context: ConnectionContext = Depends(get_connection_context)
+    api_key: str = Depends(get_api_key)
 ):
     """
     List available tables in the database.
     
     Parameters
     ----------
+    http_request : Request
+        The FastAPI request object
     schema : str, optional
         Schema name to filter tables
     api_key : str
         API key for authentication
-    connection_context : ConnectionContext
-        Database connection
         
     Returns
     -------
     Dict
         List of available tables
     """
-    try:
+    def run_list_tables():
+        connection_context = dependencies.get_connection_context(http_request)
         if schema:
             # List tables in specific schema
             query = f"""
@@ -225,9 +542,20 @@ async def list_tables(
             "count": len(tables),
             "schema": schema or connection_context.get_current_schema()
         }
+    
+    try:
+        return await cached_json_response(
+            http_request,
+            "dataframes.tables",
+            api_key,
+            {"schema": schema},
+            run_list_tables
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error listing tables: {str(e)}", exc_info=True)
         raise HTTPException(
             status_code=500,
             detail=f"Error listing tables: {str(e)}"
-        )
\ No newline at end of file
+        )
@@ -0,0 +1,465 @@
+"""
+API endpoints for running tools as asynchronous jobs.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import uuid
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
+from starlette.concurrency import run_in_threadpool
+
+from .. import dependencies
+from ..auth import get_api_key
+from ..jobs import FINAL_STATES, Job, JobContext, JobQueueFullError, JobStatus, job_manager
+from ..responses import dumps
+from ..singleflight import response_flight
+from .tools import run_forecast_pipeline
+
+if TYPE_CHECKING:
+    from hana_ml.dataframe import ConnectionContext
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Pseudo tool name running the /tools/forecast pipeline as a job
+FORECAST_JOB = "forecast"
+
+# DataFrame results are stored as a preview of this many rows
+RESULT_PREVIEW_ROWS = 100
+
+PROGRESS_SQL = (
+    "SELECT TOP 1 PROGRESS_CURRENT, PROGRESS_MAX, PROGRESS_MESSAGE "
+    "FROM _SYS_AFL.FUNCTION_PROGRESS_IN_AFLPAL "
+    "WHERE EXECUTION_ID = ? ORDER BY PROGRESS_TIMESTAMP DESC"
+)
+
+class JobRequest(BaseModel):
+    """Request to run a tool as a job."""
+    tool_name: str = Field(..., description=f"Name of the tool to run, or '{FORECAST_JOB}' for the forecast pipeline")
+    parameters: Dict[str, Any] = Field(default_factory=dict, description="Tool parameters")
+
+class ForecastJobParameters(BaseModel):
+    """Parameters of a forecast job, as accepted by ``/tools/forecast``."""
+    model_config = ConfigDict(extra="forbid")
+
+    table_name: str = Field(..., description="Source table name")
+    key_column: str = Field(..., description="Date/time column name")
+    value_column: str = Field(..., description="Target value column name")
+    horizon: int = Field(..., description="Number of periods to forecast")
+    model_name: str = Field(..., description="Name to save the model under")
+    model_type: str = Field("automatic_timeseries", description="Type of forecasting model to use")
+    progress_indicator_id: Optional[str] = Field(None, description="Progress indicator of the fit")
+
+class JobResponse(BaseModel):
+    """State of a job."""
+    id: str = Field(..., description="Job identifier")
+    tool_name: str = Field(..., description="Tool the job runs")
+    status: str = Field(..., description="queued, running, succeeded, failed, cancelled or interrupted")
+    parameters: Dict[str, Any] = Field(default_factory=dict, description="Tool parameters")
+    created_at: float = Field(..., description="Submission time (epoch seconds)")
+    started_at: Optional[float] = Field(None, description="Start time (epoch seconds)")
+    finished_at: Optional[float] = Field(None, description="End time (epoch seconds)")
+    progress: Optional[float] = Field(None, description="Fraction completed between 0 and 1, if reported")
+    progress_message: Optional[str] = Field(None, description="Latest progress message")
+    progress_indicator_id: Optional[str] = Field(None, description="Progress indicator the tool reports to")
+    result: Any = Field(None, description="Tool result, including the names of tables and models it created")
+    error: Optional[str] = Field(None, description="Error message if the job failed")
+
+class JobListResponse(BaseModel):
+    """Jobs of the caller."""
+    jobs: List[JobResponse] = Field(..., description="Jobs, newest first")
+    count: int = Field(..., description="Number of jobs returned")
+
+def tenant_id(api_key: str) -> str:
+    """
+    Derive the tenant of a job from the caller's API key.
+
+    Parameters
+    ----------
+    api_key : str
+        API key of the caller
+
+    Returns
+    -------
+    str
+        A stable identifier that does not reveal the key
+    """
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+def _job_response(job: Job) -> JobResponse:
+    values = job.to_dict()
+    values.pop("tenant", None)
+    return JobResponse(**values)
+
+def _accepts_progress_indicator(tool: Any) -> bool:
+    """Check whether a tool's args schema has a ``progress_indicator_id`` field."""
+    schema = getattr(tool, "args_schema", None)
+    if schema is None:
+        return False
+    fields = getattr(schema, "model_fields", None) or getattr(schema, "__fields__", None) or {}
+    return "progress_indicator_id" in fields
+
+def _find_tool(connection_context: ConnectionContext, tool_name: str) -> Any:
+    from hana_ai.tools.toolkit import HANAMLToolkit
+    tools = HANAMLToolkit(connection_context, used_tools="all").get_tools()
+    return next((tool for tool in tools if tool.name == tool_name), None)
+
+def _job_result(result: Any) -> Any:
+    """
+    Convert a tool result into a JSON value for the job store.
+
+    Tools return JSON strings naming the tables and models they created;
+    these are decoded so clients can follow the references. DataFrames are
+    stored as a preview.
+    """
+    if isinstance(result, str):
+        try:
+            return json.loads(result)
+        except ValueError:
+            return result
+    import pandas as pd
+    if isinstance(result, pd.DataFrame):
+        return {
+            "row_count": len(result),
+            "columns": [str(column) for column in result.columns],
+            "preview": json.loads(dumps(result.head(RESULT_PREVIEW_ROWS)))
+        }
+    return json.loads(dumps(result))
+
+def _cancel_statement(connection_context: ConnectionContext):
+    """Cancel the statement running on a connection."""
+    connection = getattr(connection_context, "connection", None)
+    if connection is not None and hasattr(connection, "cancel"):
+        connection.cancel()
+
+def run_job(job: Job, context: JobContext) -> Any:
+    """
+    Execute a job on a dedicated database connection.
+
+    Jobs do not use the request connection pool, so a long-running fit does
+    not hold a pooled connection and can be cancelled without affecting
+    other requests.
+
+    Parameters
+    ----------
+    job : Job
+        The job
+    context : JobContext
+        Cancellation and progress handle
+
+    Returns
+    -------
+    Any
+        The JSON result of the tool
+    """
+    connection_context = dependencies.create_connection_context()
+    try:
+        context.add_cancel_callback(lambda: _cancel_statement(connection_context))
+        if job.tool_name == FORECAST_JOB:
+            parameters = ForecastJobParameters(**job.parameters)
+            result = run_forecast_pipeline(
+                connection_context,
+                table_name=parameters.table_name,
+                key_column=parameters.key_column,
+                value_column=parameters.value_column,
+                horizon=parameters.horizon,
+                model_name=parameters.model_name,
+                model_type=parameters.model_type,
+                progress_indicator_id=job.progress_indicator_id
+            )
+        else:
+            tool = _find_tool(connection_context, job.tool_name)
+            if tool is None:
+                raise ValueError(f"Tool '{job.tool_name}' not found")
+            result = tool.run(job.parameters)
+        return _job_result(result)
+    finally:
+        try:
+            connection_context.close()
+        except Exception as e:
+            logger.warning(f"Error closing job connection: {str(e)}")
+
+def read_progress(connection_context: ConnectionContext, progress_indicator_id: str) -> Optional[Tuple[Optional[float], Optional[str]]]:
+    """
+    Read the latest PAL progress of a job.
+
+    Parameters
+    ----------
+    connection_context : ConnectionContext
+        Database connection
+    progress_indicator_id : str
+        Execution ID the tool reports progress under
+
+    Returns
+    -------
+    Tuple[float, str] or None
+        Fraction completed and progress message, or None if nothing was
+        reported yet
+    """
+    cursor = connection_context.connection.cursor()
+    try:
+        cursor.execute(PROGRESS_SQL, (progress_indicator_id,))
+        row = cursor.fetchone()
+    finally:
+        cursor.close()
+    if row is None:
+        return None
+    current, maximum, message = row
+    progress = None
+    if current is not None and maximum:
+        progress = float(current) / float(maximum)
+    return progress, message
+
+def _get_owned_job(job_id: str, api_key: str) -> Job:
+    job = job_manager.get(job_id)
+    if job is None or job.tenant != tenant_id(api_key):
+        raise HTTPException(
+            status_code=404,
+            detail=f"Job '{job_id}' not found"
+        )
+    return job
+
+@router.post(
+    "",
+    response_model=JobResponse,
+    status_code=202,
+    summary="Submit a job",
+    description="Run a tool, or the forecast pipeline, in the background and return a job to poll"
+)
+async def submit_job(
+    request: JobRequest,
+    http_request: Request,
+    response: Response,
+    api_key: str = Depends(get_api_key)
+):
+    """
+    Submit a tool invocation as a job.
+
+    Parameters
+    ----------
+    request : JobRequest
+        The tool name and parameters
+    http_request : Request
+        The FastAPI request object
+    response : Response
+        The response, used to set the ``Location`` header
+    api_key : str
+        API key for authentication
+
+    Returns
+    -------
+    JobResponse
+        The queued job
+    """
+    try:
+        parameters = dict(request.parameters)
+        if request.tool_name == FORECAST_JOB:
+            try:
+                forecast = ForecastJobParameters(**parameters)
+            except ValidationError as e:
+                raise HTTPException(
+                    status_code=422,
+                    detail=f"Invalid forecast parameters: {str(e)}"
+                )
+            parameters = forecast.model_dump(exclude_none=True)
+            reports_progress = forecast.model_type == "automatic_timeseries"
+        else:
+            def find_tool():
+                connection_context = dependencies.get_connection_context(http_request)
+                return _find_tool(connection_context, request.tool_name)
+
+            tool = await run_in_threadpool(find_tool)
+            if tool is None:
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"Tool '{request.tool_name}' not found"
+                )
+            reports_progress = _accepts_progress_indicator(tool)
+
+        # Tie the PAL progress indicator to the job so progress can be polled
+        job_id = uuid.uuid4().hex
+        progress_indicator_id = None
+        if reports_progress:
+            progress_indicator_id = parameters.get("progress_indicator_id") or f"HANA_AI_JOB_{job_id}"
+            if request.tool_name != FORECAST_JOB:
+                parameters["progress_indicator_id"] = progress_indicator_id
+
+        job = await run_in_threadpool(
+            job_manager.submit,
+            tenant_id(api_key),
+            request.tool_name,
+            parameters,
+            progress_indicator_id,
+            job_id
+        )
+        response.headers["Location"] = f"{http_request.url.path.rstrip('/')}/{job.id}"
+        return _job_response(job)
+    except HTTPException:
+        raise
+    except JobQueueFullError as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": "30"}
+        )
+    except Exception as e:
+        logger.error(f"Error submitting job for '{request.tool_name}': {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error submitting job: {str(e)}"
+        )
+
+@router.get(
+    "",
+    response_model=JobListResponse,
+    summary="List jobs",
+    description="List the caller's jobs, newest first"
+)
+async def list_jobs(
+    status: Optional[JobStatus] = Query(None, description="Only jobs in this state"),
+    limit: int = Query(50, ge=1, le=500, description="Maximum number of jobs"),
+    api_key: str = Depends(get_api_key)
+):
+    """
+    List the caller's jobs.
+
+    Parameters
+    ----------
+    status : JobStatus, optional
+        Only jobs in this state
+    limit : int
+        Maximum number of jobs
+    api_key : str
+        API key for authentication
+
+    Returns
+    -------
+    JobListResponse
+        The jobs
+    """
+    try:
+        jobs = await run_in_threadpool(
+            job_manager.store.list,
+            tenant_id(api_key),
+            [status] if status else None,
+            limit
+        )
+        # Running jobs are reported with their in-memory progress
+        jobs = [job_manager.get(job.id) or job for job in jobs]
+        return JobListResponse(
+            jobs=[_job_response(job) for job in jobs],
+            count=len(jobs)
+        )
+    except Exception as e:
+        logger.error(f"Error listing jobs: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error listing jobs: {str(e)}"
+        )
+
+@router.get(
+    "/{job_id}",
+    response_model=JobResponse,
+    summary="Get a job",
+    description="Get the status, progress and result of a job"
+)
+async def get_job(
+    job_id: str,
+    http_request: Request,
+    api_key: str = Depends(get_api_key)
+):
+    """
+    Get the state of a job.
+
+    The progress of running jobs with a progress indicator is refreshed
+    from ``_SYS_AFL.FUNCTION_PROGRESS_IN_AFLPAL``.
+
+    Parameters
+    ----------
+    job_id : str
+        Job identifier
+    http_request : Request
+        The FastAPI request object
+    api_key : str
+        API key for authentication
+
+    Returns
+    -------
+    JobResponse
+        The job
+    """
+    try:
+        job = await run_in_threadpool(_get_owned_job, job_id, api_key)
+
+        if job.status == JobStatus.RUNNING and job.progress_indicator_id:
+            def refresh_progress():
+                connection_context = dependencies.get_connection_context(http_request)
+                return read_progress(connection_context, job.progress_indicator_id)
+
+            try:
+                # Clients polling the same job share one progress query
+                progress = await response_flight.do_async(
+                    f"jobs.progress:{job.progress_indicator_id}", refresh_progress
+                )
+                if progress is not None:
+                    job_manager.update_progress(job.id, *progress)
+            except Exception as e:
+                logger.warning(f"Could not read progress of job {job.id}: {str(e)}")
+
+        return _job_response(job)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting job '{job_id}': {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error getting job: {str(e)}"
+        )
+
+@router.post(
+    "/{job_id}/cancel",
+    response_model=JobResponse,
+    summary="Cancel a job",
+    description="Cancel a queued job, or stop a running job by cancelling its database statement"
+)
+async def cancel_job(
+    job_id: str,
+    api_key: str = Depends(get_api_key)
+):
+    """
+    Cancel a job.
+
+    Parameters
+    ----------
+    job_id : str
+        Job identifier
+    api_key : str
+        API key for authentication
+
+    Returns
+    -------
+    JobResponse
+        The job; a running job reports ``running`` until its statement stops
+    """
+    try:
+        job = await run_in_threadpool(_get_owned_job, job_id, api_key)
+        if job.status in FINAL_STATES:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Job '{job_id}' already {job.status.value}"
+            )
+        job = await run_in_threadpool(job_manager.cancel, job_id)
+        return _job_response(job)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error cancelling job '{job_id}': {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error cancelling job: {str(e)}"
+        )
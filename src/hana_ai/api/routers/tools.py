@@ -1,20 +1,28 @@
 """
 API endpoints for accessing and using the HANA ML toolkit tools.
+
+The toolkit and its tool modules are imported on first use, so importing
+the application stays fast.
 """
+from __future__ import annotations
+
 import time
 import logging
 import json
-from typing import Dict, Any, List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Body
+from typing import TYPE_CHECKING, Dict, Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Body, Request
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
 
-from hana_ml.dataframe import ConnectionContext
-from langchain.llms.base import BaseLLM
-
-from hana_ai.tools.toolkit import HANAMLToolkit
-
+from .. import dependencies
 from ..dependencies import get_connection_context, get_llm
 from ..auth import get_api_key
+from ..cache import cached_json_response
+from ..responses import FastJSONResponse
+
+if TYPE_CHECKING:
+    from hana_ml.dataframe import ConnectionContext
+    from langchain.llms.base import BaseLLM
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -36,25 +44,29 @@ class ToolListResponse(BaseModel):
     description="Get a list of all available tools in the HANA ML toolkit"
 )
 async def list_tools(
-    api_key: str = Depends(get_api_key),
-    connection_context: ConnectionContext = Depends(get_connection_context)
+    http_request: Request,
+    api_key: str = Depends(get_api_key)
 ):
     """
     List all available tools in the toolkit.
     
     Parameters
     ----------
+    http_request : Request
+        The FastAPI request object
     api_key : str
         API key for authentication
-    connection_context : ConnectionContext
-        Database connection
         
     Returns
     -------
     ToolListResponse
         List of available tools
     """
-    try:
+    def run_list_tools():
+        from hana_ai.tools.toolkit import HANAMLToolkit
+
+        connection_context = dependencies.get_connection_context(http_request)
+        
         # Get all tools from the toolkit
         toolkit = HANAMLToolkit(connection_context, used_tools="all")
         tools = toolkit.get_tools()
@@ -65,13 +77,18 @@ async def list_tools(
             tool_list.append({
                 "name": tool.name,
                 "description": tool.description,
-                "args_schema": getattr(tool, "args_schema", None)
+                "args_schema": _args_schema_dict(getattr(tool, "args_schema", None))
             })
         
         return ToolListResponse(
             tools=tool_list,
             count=len(tool_list)
         )
+    
+    try:
+        return await cached_json_response(http_request, "tools.list", api_key, {}, run_list_tools)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error listing tools: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -79,6 +96,15 @@ async def list_tools(
             detail=f"Error listing tools: {str(e)}"
         )
 
+def _args_schema_dict(args_schema: Any) -> Optional[Dict[str, Any]]:
+    """Convert a tool's pydantic args schema class into a JSON schema dict."""
+    if args_schema is None or isinstance(args_schema, dict):
+        return args_schema
+    for schema_method in ("model_json_schema", "schema"):
+        if hasattr(args_schema, schema_method):
+            return getattr(args_schema, schema_method)()
+    return None
+
 @router.post(
     "/execute",
     summary="Execute a specific tool",
@@ -110,6 +136,8 @@ async def execute_tool(
         Tool execution result
     """
     try:
+        from hana_ai.tools.toolkit import HANAMLToolkit
+
         start_time = time.time()
         
         # Get the toolkit
@@ -130,20 +158,18 @@ async def execute_tool(
             )
         
         # Execute the tool
-        result = tool.run(request.parameters)
-        
-        # Process the result for JSON serialization
-        if hasattr(result, "to_dict"):
-            # Handle pandas DataFrame
-            result = result.to_dict(orient="records")
+        result = await run_in_threadpool(tool.run, request.parameters)
         
         execution_time = time.time() - start_time
         
-        return {
+        # DataFrames and numpy values are serialized by the response class
+        return FastJSONResponse({
             "result": result,
             "execution_time": execution_time,
             "tool": request.tool_name
-        }
+        })
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error executing tool '{request.tool_name}': {str(e)}", exc_info=True)
         raise HTTPException(
@@ -151,6 +177,113 @@ async def execute_tool(
             detail=f"Error executing tool '{request.tool_name}': {str(e)}"
         )
 
+def run_forecast_pipeline(
+    connection_context: ConnectionContext,
+    table_name: str,
+    key_column: str,
+    value_column: str,
+    horizon: int,
+    model_name: str,
+    model_type: str = "automatic_timeseries",
+    progress_indicator_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Check a time series, then fit and save a forecasting model.
+    
+    Shared by the ``/forecast`` endpoint and forecast jobs.
+    
+    Parameters
+    ----------
+    connection_context : ConnectionContext
+        Database connection
+    table_name : str
+        Table containing time series data
+    key_column : str
+        Date/time column name
+    value_column : str
+        Target value column name
+    horizon : int
+        Number of periods to forecast
+    model_name : str
+        Name to save the model under
+    model_type : str
+        Type of forecasting model to use
+    progress_indicator_id : str, optional
+        Progress indicator of the automatic time series fit
+        
+    Returns
+    -------
+    Dict
+        Forecast results
+    """
+    from hana_ai.tools.toolkit import HANAMLToolkit
+
+    start_time = time.time()
+    
+    # Get toolkit with specific tools
+    toolkit = HANAMLToolkit(
+        connection_context=connection_context, 
+        used_tools=[
+            "ts_check", 
+            "automatic_timeseries_fit_and_save",
+            "additive_model_forecast_fit_and_save"
+        ]
+    )
+    tools = toolkit.get_tools()
+    
+    # 1. Check time series properties
+    ts_check_tool = next(t for t in tools if t.name == "ts_check")
+    check_result = ts_check_tool.run({
+        "table_name": table_name,
+        "key": key_column,
+        "endog": value_column
+    })
+    
+    # 2. Fit appropriate model
+    if model_type == "automatic_timeseries":
+        fit_tool = next(t for t in tools if t.name == "automatic_timeseries_fit_and_save")
+    else:
+        fit_tool = next(t for t in tools if t.name == "additive_model_forecast_fit_and_save")
+        
+    fit_params = {
+        "fit_table": table_name,
+        "name": model_name,
+        "key": key_column,
+        "endog": value_column,
+    }
+    if progress_indicator_id and fit_tool.name == "automatic_timeseries_fit_and_save":
+        fit_params["progress_indicator_id"] = progress_indicator_id
+    fit_result = fit_tool.run(fit_params)
+    
+    # 3. Create prediction table name
+    predict_table_name = f"{model_name}_{fit_result.get('model_storage_version', 1)}_PREDICT"
+    
+    # 4. Create horizon table
+    horizon_table = f"{table_name}_HORIZON"
+    
+    # Generate dates for forecast horizon
+    # This is a simplified approach - in reality you'd need to determine date increments based on the data
+    horizon_query = f"""
+    CREATE TABLE {horizon_table} AS (
+        SELECT {key_column}
+        FROM {table_name}
+        ORDER BY {key_column} DESC
+        LIMIT {horizon}
+    )
+    """
+    
+    # In a real implementation, you'd generate the proper date sequence here
+    # This is just a placeholder
+    
+    execution_time = time.time() - start_time
+    
+    return {
+        "status": "success",
+        "model_details": fit_result,
+        "time_series_properties": check_result,
+        "execution_time": execution_time
+    }
+
 @router.post(
     "/forecast",
     summary="Run time series forecasting",
@@ -194,69 +327,16 @@ async def forecast_timeseries(
         Forecast results
     """
     try:
-        start_time = time.time()
-        
-        # Get toolkit with specific tools
-        toolkit = HANAMLToolkit(
-            connection_context=connection_context, 
-            used_tools=[
-                "ts_check", 
-                "automatic_timeseries_fit_and_save",
-                "additive_model_forecast_fit_and_save"
-            ]
-        )
-        tools = toolkit.get_tools()
-        
-        # 1. Check time series properties
-        ts_check_tool = next(t for t in tools if t.name == "ts_check")
-        check_result = ts_check_tool.run({
-            "table_name": table_name,
-            "key": key_column,
-            "endog": value_column
-        })
-        
-        # 2. Fit appropriate model
-        if model_type == "automatic_timeseries":
-            fit_tool = next(t for t in tools if t.name == "automatic_timeseries_fit_and_save")
-        else:
-            fit_tool = next(t for t in tools if t.name == "additive_model_forecast_fit_and_save")
-            
-        fit_result = fit_tool.run({
-            "fit_table": table_name,
-            "name": model_name,
-            "key": key_column,
-            "endog": value_column,
-        })
-        
-        # 3. Create prediction table name
-        predict_table_name = f"{model_name}_{fit_result.get('model_storage_version', 1)}_PREDICT"
-        
-        # 4. Create horizon table
-        horizon_table = f"{table_name}_HORIZON"
-        
-        # Generate dates for forecast horizon
-        # This is a simplified approach - in reality you'd need to determine date increments based on the data
-        horizon_query = f"""
-        CREATE TABLE {horizon_table} AS (
-            SELECT {key_column}
-            FROM {table_name}
-            ORDER BY {key_column} DESC
-            LIMIT {horizon}
+        return await run_in_threadpool(
+            run_forecast_pipeline,
+            connection_context,
+            table_name,
+            key_column,
+            value_column,
+            horizon,
+            model_name,
+            model_type
         )
-        """
-        
-        # In a real implementation, you'd generate the proper date sequence here
-        # This is just a placeholder
-        
-        execution_time = time.time() - start_time
-        
-        return {
-            "status": "success",
-            "model_details": fit_result,
-            "time_series_properties": check_result,
-            "execution_time": execution_time
-        }
-        
     except Exception as e:
         logger.error(f"Error in forecast operation: {str(e)}", exc_info=True)
         raise HTTPException(
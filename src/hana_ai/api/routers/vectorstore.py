@@ -1,21 +1,28 @@
 """
 API endpoints for working with vector stores and embeddings.
+
+The vector engine and embedding services are imported on first use, so
+importing the application stays fast.
 """
+from __future__ import annotations
+
 import time
 import logging
-from typing import Dict, Any, List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Body, Query
+from typing import TYPE_CHECKING, Dict, Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Body, Query, Request
 from pydantic import BaseModel, Field
 
-from hana_ml.dataframe import ConnectionContext
-from langchain.llms.base import BaseLLM
-
-from hana_ai.vectorstore.hana_vector_engine import HANAMLinVectorEngine
-from hana_ai.vectorstore.embedding_service import HANAVectorEmbeddings, PALModelEmbeddings
-
+from .. import dependencies
 from ..dependencies import get_connection_context, get_llm
 from ..auth import get_api_key
 from ..models import VectorStoreRequest, VectorStoreResponse
+from ..cache import cached_json_response, response_cache
+from ..deadline import DeadlineExceeded
+from ..failover import ConcurrencyLimitExceededError
+from ..timing import stage
+
+if TYPE_CHECKING:
+    from hana_ml.dataframe import ConnectionContext
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -34,8 +41,8 @@ class DocumentRequest(BaseModel):
 )
 async def query_vector_store(
     request: VectorStoreRequest,
-    api_key: str = Depends(get_api_key),
-    connection_context: ConnectionContext = Depends(get_connection_context)
+    http_request: Request,
+    api_key: str = Depends(get_api_key)
 ):
     """
     Query a vector store for similar documents.
@@ -44,31 +51,35 @@ async def query_vector_store(
     ----------
     request : VectorStoreRequest
         The query request
+    http_request : Request
+        The FastAPI request object
     api_key : str
         API key for authentication
-    connection_context : ConnectionContext
-        Database connection
         
     Returns
     -------
     VectorStoreResponse
         Query results
     """
-    try:
+    def run_query():
+        connection_context = dependencies.get_connection_context(http_request)
         start_time = time.time()
         
+        from hana_ai.vectorstore.hana_vector_engine import HANAMLinVectorEngine
+
         # Initialize vector store
         vector_store = HANAMLinVectorEngine(
             connection_context=connection_context, 
             table_name=request.collection_name or "hana_vec_default"
         )
         
-        # Execute query
-        result = vector_store.query(
-            input=request.query,
-            top_n=request.top_k,
-            distance="cosine_similarity"
-        )
+        # Execute query (embeds the query text in the database)
+        with stage("vector_search"):
+            result = vector_store.query(
+                input=request.query,
+                top_n=request.top_k,
+                distance="cosine_similarity"
+            )
         
         query_time = time.time() - start_time
         
@@ -76,6 +87,22 @@ async def query_vector_store(
             results=[{"content": result, "score": vector_store.current_query_distance}],
             query_time=query_time
         )
+    
+    try:
+        return await cached_json_response(
+            http_request,
+            "vectorstore.query",
+            api_key,
+            {
+                "query": request.query,
+                "top_k": request.top_k,
+                "collection_name": request.collection_name,
+                "filter": request.filter
+            },
+            run_query
+        )
+    except (HTTPException, DeadlineExceeded, ConcurrencyLimitExceededError):
+        raise
     except Exception as e:
         logger.error(f"Vector store query error: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -123,6 +150,8 @@ async def add_to_vector_store(
             }
             knowledge_items.append(item)
             
+        from hana_ai.vectorstore.hana_vector_engine import HANAMLinVectorEngine
+
         # Initialize vector store
         vector_store = HANAMLinVectorEngine(
             connection_context=connection_context, 
@@ -131,7 +160,11 @@ async def add_to_vector_store(
         )
         
         # Add documents
-        vector_store.upsert_knowledge(knowledge_items)
+        with stage("embedding"):
+            vector_store.upsert_knowledge(knowledge_items)
+        
+        # Cached similarity results may no longer be accurate
+        response_cache.invalidate("vectorstore.query:")
         
         processing_time = time.time() - start_time
         
@@ -141,6 +174,8 @@ async def add_to_vector_store(
             "vector_store": request.store_name,
             "processing_time": processing_time
         }
+    except (DeadlineExceeded, ConcurrencyLimitExceededError):
+        raise
     except Exception as e:
         logger.error(f"Error adding documents to vector store: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -154,46 +189,51 @@ async def add_to_vector_store(
     description="Generate embeddings for text using HANA embedding services"
 )
 async def generate_embeddings(
+    http_request: Request,
     texts: List[str] = Body(..., description="Texts to embed"),
     model_type: str = Query("hana", description="Embedding model type (hana or pal)"),
-    api_key: str = Depends(get_api_key),
-    connection_context: ConnectionContext = Depends(get_connection_context)
+    api_key: str = Depends(get_api_key)
 ):
     """
     Generate embeddings for texts.
     
     Parameters
     ----------
+    http_request : Request
+        The FastAPI request object
     texts : List[str]
         Texts to embed
     model_type : str
         Type of embedding model to use
     api_key : str
         API key for authentication
-    connection_context : ConnectionContext
-        Database connection
         
     Returns
     -------
     Dict
         Generated embeddings
     """
-    try:
+    if model_type.lower() not in ("hana", "pal"):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported embedding model type: {model_type}"
+        )
+    
+    def run_embed():
+        connection_context = dependencies.get_connection_context(http_request)
         start_time = time.time()
         
+        from hana_ai.vectorstore.embedding_service import HANAVectorEmbeddings, PALModelEmbeddings
+
         # Initialize embedding model
         if model_type.lower() == "hana":
             embedding_model = HANAVectorEmbeddings(connection_context)
-        elif model_type.lower() == "pal":
-            embedding_model = PALModelEmbeddings(connection_context)
         else:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Unsupported embedding model type: {model_type}"
-            )
+            embedding_model = PALModelEmbeddings(connection_context)
         
         # Generate embeddings
-        embeddings = embedding_model.embed_documents(texts)
+        with stage("embedding"):
+            embeddings = embedding_model.embed_documents(texts)
         
         # For response size considerations, truncate very large embeddings in the display
         display_embeddings = []
@@ -214,9 +254,20 @@ async def generate_embeddings(
             "model_type": model_type,
             "processing_time": processing_time
         }
+    
+    try:
+        return await cached_json_response(
+            http_request,
+            "vectorstore.embed",
+            api_key,
+            {"texts": texts, "model_type": model_type.lower()},
+            run_embed
+        )
+    except (HTTPException, DeadlineExceeded, ConcurrencyLimitExceededError):
+        raise
     except Exception as e:
         logger.error(f"Error generating embeddings: {str(e)}", exc_info=True)
         raise HTTPException(
             status_code=500,
             detail=f"Error generating embeddings: {str(e)}"
-        )
\ No newline at end of file
+        )
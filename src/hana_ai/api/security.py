@@ -59,6 +59,25 @@ def is_ip_in_range(ip: str, cidr: str) -> bool:
         logger.error(f"Error checking IP range: {str(e)}")
         return False
 
+def is_internal_ip(ip: str) -> bool:
+    """
+    Check if a client IP address is local or within the BTP internal networks.
+    
+    Parameters
+    ----------
+    ip : str
+        The client IP address
+        
+    Returns
+    -------
+    bool
+        True for loopback addresses and addresses in ``BTP_IP_RANGES``
+    """
+    # Local development IPs are always allowed
+    if ip in ["127.0.0.1", "localhost", "::1"]:
+        return True
+    return any(is_ip_in_range(ip, ip_range) for ip_range in BTP_IP_RANGES)
+
 def is_domain_allowed(domain: str) -> bool:
     """
     Check if a domain is in the allowed list.
@@ -0,0 +1,334 @@
+"""
+Multi-process production server for the HANA AI Toolkit API.
+
+``python -m hana_ai.api`` runs a single uvicorn process, which limits
+CPU-bound work (JSON serialization, prompt rendering, pandas) to one core.
+This module runs the API with several worker processes:
+
+- The worker count is sized from the CPUs and memory available to the
+  container (cgroup limits are honoured) unless ``SERVE_WORKERS`` is set.
+- With gunicorn installed, the application, its heavy dependencies and the
+  code template knowledge base are imported once in the master before the
+  workers are forked, so their memory pages are shared copy-on-write.
+- Workers are recycled after ``SERVE_MAX_REQUESTS`` requests (with jitter)
+  to contain memory leaks. ``SIGHUP`` restarts the workers gracefully.
+- Prometheus metrics of all workers are aggregated through a multiprocess
+  directory and served by the master on ``PROMETHEUS_PORT``.
+
+Without gunicorn the server falls back to uvicorn's own worker supervisor,
+which has no preloading but supports the other features.
+
+Usage::
+
+    python -m hana_ai.api.serve --workers 4
+"""
+import argparse
+import gc
+import logging
+import os
+import shutil
+from typing import Any, Dict, Optional
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+APP_PATH = "hana_ai.api.app:app"
+
+# Only import gunicorn if available
+try:
+    from gunicorn.app.base import BaseApplication
+    GUNICORN_AVAILABLE = True
+except ImportError:
+    GUNICORN_AVAILABLE = False
+
+def _cgroup_cpu_limit() -> Optional[float]:
+    """Get the CPU quota of the container, if any."""
+    try:
+        # cgroup v2
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            return int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        # cgroup v1
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+            quota = int(f.read())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+            period = int(f.read())
+        if quota > 0:
+            return quota / period
+    except (OSError, ValueError):
+        pass
+    return None
+
+def _cgroup_memory_limit() -> Optional[int]:
+    """Get the memory limit of the container in bytes, if any."""
+    for path in ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"):
+        try:
+            with open(path) as f:
+                value = f.read().strip()
+            # cgroup v1 reports "no limit" as a huge number
+            if value != "max" and int(value) < 1 << 60:
+                return int(value)
+        except (OSError, ValueError):
+            continue
+    return None
+
+def available_cpus() -> float:
+    """
+    Get the number of CPUs the process may use.
+
+    Returns
+    -------
+    float
+        CPUs, honouring affinity and the container CPU quota
+    """
+    try:
+        cpus = float(len(os.sched_getaffinity(0)))
+    except AttributeError:
+        cpus = float(os.cpu_count() or 1)
+    quota = _cgroup_cpu_limit()
+    return min(cpus, quota) if quota else cpus
+
+def available_memory() -> Optional[int]:
+    """
+    Get the memory the process may use.
+
+    Returns
+    -------
+    int or None
+        Bytes, honouring the container memory limit, or None if unknown
+    """
+    try:
+        physical = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        physical = None
+    limit = _cgroup_memory_limit()
+    if physical and limit:
+        return min(physical, limit)
+    return limit or physical
+
+def worker_count(cpus: Optional[float] = None, memory_bytes: Optional[int] = None,
+                 memory_per_worker_mb: Optional[int] = None, max_workers: Optional[int] = None) -> int:
+    """
+    Size the worker pool from CPU and memory.
+
+    One worker per CPU, reduced so that each worker gets
+    ``SERVE_WORKER_MEMORY_MB`` of memory, and capped at
+    ``SERVE_MAX_WORKERS``.
+
+    Parameters
+    ----------
+    cpus : float, optional
+        Available CPUs; detected if omitted
+    memory_bytes : int, optional
+        Available memory; detected if omitted
+    memory_per_worker_mb : int, optional
+        Memory budget per worker; defaults to ``SERVE_WORKER_MEMORY_MB``
+    max_workers : int, optional
+        Upper bound; defaults to ``SERVE_MAX_WORKERS``
+
+    Returns
+    -------
+    int
+        Number of workers, at least 1
+    """
+    cpus = available_cpus() if cpus is None else cpus
+    memory_bytes = available_memory() if memory_bytes is None else memory_bytes
+    memory_per_worker_mb = memory_per_worker_mb or settings.SERVE_WORKER_MEMORY_MB
+    max_workers = max_workers or settings.SERVE_MAX_WORKERS
+
+    workers = max(1, int(cpus))
+    if memory_bytes and memory_per_worker_mb > 0:
+        workers = min(workers, int(memory_bytes // (memory_per_worker_mb * 1024 * 1024)))
+    return max(1, min(workers, max_workers))
+
+def prepare_multiprocess_metrics() -> Optional[str]:
+    """
+    Set up the Prometheus multiprocess directory.
+
+    Must run before ``prometheus_client`` is imported, since the client
+    selects its storage when it is first imported. Files of a previous run
+    are removed.
+
+    Returns
+    -------
+    str or None
+        The directory, or None if multiprocess metrics are disabled
+    """
+    if not settings.PROMETHEUS_ENABLED:
+        return None
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR") or settings.PROMETHEUS_MULTIPROC_DIR
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory, exist_ok=True)
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = directory
+    return directory
+
+def recover_jobs():
+    """
+    Recover jobs of a previous run once, before workers start.
+
+    Jobs left running by the previous run are marked interrupted. Workers
+    then only re-queue queued jobs, so they do not interrupt each other's
+    running jobs. Workers that are recycled or restarted by ``SIGHUP``
+    re-queue their unfinished jobs on shutdown (see ``JobManager.shutdown``),
+    and the replacement worker resumes them.
+    """
+    from .jobs import JOBS_SUPERVISED_ENV, job_manager
+    try:
+        job_manager.interrupt_running()
+    except Exception as e:
+        logger.warning(f"Failed to recover jobs: {str(e)}")
+    os.environ[JOBS_SUPERVISED_ENV] = "1"
+
+def preload():
+    """
+    Import the application and warm shared read-only state.
+
+    Runs in the master before workers are forked. The modules the routers
+    import on first use are imported here as well, so workers share them
+    instead of each importing them. Objects created here are moved out of
+    the garbage collector's generations so collections in the workers do
+    not touch, and thereby copy, their memory pages.
+
+    Returns
+    -------
+    FastAPI
+        The application
+    """
+    from .app import app, import_deferred_modules
+    from hana_ai.vectorstore.code_templates import get_code_templates
+
+    import_deferred_modules()
+
+    for option in ("python", "sql"):
+        try:
+            get_code_templates(option)
+        except Exception as e:
+            logger.warning(f"Failed to preload {option} code templates: {str(e)}")
+
+    gc.collect()
+    if hasattr(gc, "freeze"):
+        gc.freeze()
+    return app
+
+def _uvicorn_worker_class() -> str:
+    try:
+        import uvicorn_worker  # noqa: F401
+        return "uvicorn_worker.UvicornWorker"
+    except ImportError:
+        return "uvicorn.workers.UvicornWorker"
+
+def gunicorn_options(workers: int, bind: str) -> Dict[str, Any]:
+    """
+    Build the gunicorn configuration.
+
+    Parameters
+    ----------
+    workers : int
+        Number of worker processes
+    bind : str
+        Address to listen on, ``host:port``
+
+    Returns
+    -------
+    Dict[str, Any]
+        Gunicorn settings
+    """
+    def child_exit(server, worker):
+        # Drop the live gauge values of the dead worker
+        if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+            from prometheus_client import multiprocess
+            multiprocess.mark_process_dead(worker.pid)
+
+    return {
+        "bind": bind,
+        "workers": workers,
+        "worker_class": _uvicorn_worker_class(),
+        "preload_app": True,
+        "max_requests": settings.SERVE_MAX_REQUESTS,
+        "max_requests_jitter": settings.SERVE_MAX_REQUESTS_JITTER,
+        "graceful_timeout": settings.SERVE_GRACEFUL_TIMEOUT,
+        "timeout": settings.SERVE_TIMEOUT,
+        "keepalive": 5,
+        "loglevel": settings.LOG_LEVEL.lower(),
+        "child_exit": child_exit,
+    }
+
+if GUNICORN_AVAILABLE:
+    class GunicornApplication(BaseApplication):
+        """Gunicorn application serving the preloaded API."""
+
+        def __init__(self, options: Dict[str, Any]):
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                if key in self.cfg.settings and value is not None:
+                    self.cfg.set(key, value)
+
+        def load(self):
+            return preload()
+
+def serve(workers: Optional[int] = None, host: Optional[str] = None, port: Optional[int] = None):
+    """
+    Run the API with multiple worker processes.
+
+    Parameters
+    ----------
+    workers : int, optional
+        Number of workers; defaults to ``SERVE_WORKERS`` or an automatic size
+    host : str, optional
+        Listen address; defaults to ``API_HOST``
+    port : int, optional
+        Listen port; defaults to ``API_PORT``
+    """
+    workers = workers or settings.SERVE_WORKERS or worker_count()
+    host = host or settings.API_HOST
+    port = port or settings.API_PORT
+
+    metrics_dir = prepare_multiprocess_metrics()
+    recover_jobs()
+
+    from .metrics import start_metrics_server
+    if metrics_dir:
+        # One scrape endpoint in the master aggregating all workers
+        start_metrics_server()
+
+    if GUNICORN_AVAILABLE:
+        logger.info(f"Starting gunicorn with {workers} workers on {host}:{port} (preloaded)")
+        GunicornApplication(gunicorn_options(workers, f"{host}:{port}")).run()
+        return
+
+    import uvicorn
+    logger.info(f"gunicorn not installed, starting uvicorn with {workers} workers on {host}:{port}")
+    uvicorn.run(
+        APP_PATH,
+        host=host,
+        port=port,
+        workers=workers,
+        limit_max_requests=settings.SERVE_MAX_REQUESTS or None,
+        timeout_graceful_shutdown=settings.SERVE_GRACEFUL_TIMEOUT,
+        log_level=settings.LOG_LEVEL.lower()
+    )
+
+def main():
+    """Run the multi-process API server."""
+    parser = argparse.ArgumentParser(description="Run the HANA AI Toolkit API with multiple workers")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: auto)")
+    parser.add_argument("--host", default=None, help="Listen address (default: API_HOST)")
+    parser.add_argument("--port", type=int, default=None, help="Listen port (default: API_PORT)")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=getattr(logging, settings.LOG_LEVEL),
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+    serve(workers=args.workers, host=args.host, port=args.port)
+
+if __name__ == "__main__":
+    main()
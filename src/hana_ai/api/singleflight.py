@@ -0,0 +1,110 @@
+"""
+Single-flight request coalescing.
+
+When many identical requests arrive at the same time (for example a dashboard
+refresh firing the same query 30 times), only the first caller executes the
+work. Concurrent duplicates with the same fingerprint wait for, and share, the
+result of that first call.
+
+Blocking work, such as a query against HANA, runs in the thread pool while
+the callers wait on the event loop.
+"""
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Set, Union
+
+from starlette.concurrency import run_in_threadpool
+
+from .metrics import record_coalesced_request
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key.
+
+    Parameters
+    ----------
+    name : str
+        Group name used in metrics and logs
+    """
+
+    def __init__(self, name: str = "default"):
+        self.name = name
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        # The event loop only keeps weak references to tasks
+        self._leader_tasks: Set[asyncio.Task] = set()
+        self.coalesced = 0
+
+    async def do_async(self, key: str, fn: Callable[[], Union[Any, Awaitable[Any]]]) -> Any:
+        """
+        Execute ``fn`` once per key for concurrent asynchronous callers.
+
+        Coroutine functions are awaited; plain callables run in the thread
+        pool. The shared work is shielded, so a disconnecting leader does not
+        cancel it for the other waiters.
+
+        Parameters
+        ----------
+        key : str
+            Canonical request fingerprint
+        fn : Callable
+            The work to execute
+
+        Returns
+        -------
+        Any
+            The result of the (shared) call
+        """
+        future, leader = self._join(key)
+        if leader:
+            task = asyncio.ensure_future(self._run_leader(key, future, fn))
+            self._leader_tasks.add(task)
+            task.add_done_callback(self._leader_tasks.discard)
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+    def in_flight(self) -> int:
+        """Number of keys currently being executed."""
+        with self._lock:
+            return len(self._in_flight)
+
+    async def _run_leader(self, key: str, future: Future, fn: Callable[[], Any]):
+        try:
+            if asyncio.iscoroutinefunction(fn):
+                result = await fn()
+            else:
+                result = await run_in_threadpool(fn)
+        except BaseException as e:
+            self._finish(key, future, exception=e)
+            return
+        self._finish(key, future, result=result)
+
+    def _join(self, key: str):
+        """Return the in-flight future for ``key`` and whether the caller leads."""
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                record_coalesced_request(self.name)
+                return future, False
+            future = Future()
+            future.set_running_or_notify_cancel()
+            self._in_flight[key] = future
+            return future, True
+
+    def _finish(self, key: str, future: Future, result: Any = None, exception: BaseException = None):
+        with self._lock:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+
+
+# Global single-flight group for response production
+response_flight = SingleFlight("responses")
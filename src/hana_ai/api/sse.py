@@ -0,0 +1,253 @@
+"""
+Server-Sent Events streaming of agent runs.
+
+The agents are synchronous, so a run executes in the thread pool. A LangChain
+callback handler publishes LLM tokens, tool starts and tool ends from the
+worker thread to the event loop, where they are queued in a bounded buffer
+and written to the client as SSE frames.
+
+The agent never waits for the client. Consecutive tokens are coalesced into
+one event while the client is behind, and once the buffer is full further
+tokens are dropped and counted. Tool events and the final answer are never
+dropped.
+"""
+import asyncio
+import functools
+import json
+import logging
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+from uuid import UUID
+
+from .config import settings
+from .responses import json_default
+
+logger = logging.getLogger(__name__)
+
+SSE_MEDIA_TYPE = "text/event-stream"
+
+TOKEN_EVENT = "token"
+TOOL_START_EVENT = "tool_start"
+TOOL_END_EVENT = "tool_end"
+FINAL_EVENT = "final"
+ERROR_EVENT = "error"
+
+# Tool inputs and outputs are truncated to this many characters in events
+MAX_TOOL_PAYLOAD_CHARS = 2000
+
+
+def format_sse(event: str, data: Dict[str, Any]) -> bytes:
+    """
+    Encode an event as an SSE frame.
+
+    Parameters
+    ----------
+    event : str
+        Event name
+    data : Dict[str, Any]
+        Event payload, sent as JSON
+
+    Returns
+    -------
+    bytes
+        The SSE frame
+    """
+    payload = json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=json_default)
+    return f"event: {event}\ndata: {payload}\n\n".encode("utf-8")
+
+
+class EventBuffer:
+    """
+    Bounded event buffer between an agent thread and an SSE response.
+
+    ``publish`` may be called from any thread and never blocks. All buffer
+    state is only touched on the event loop thread.
+
+    Parameters
+    ----------
+    loop : asyncio.AbstractEventLoop
+        Event loop the consumer runs on
+    max_events : int
+        Maximum number of buffered events before tokens are dropped
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, max_events: int):
+        self._loop = loop
+        self.max_events = max(1, max_events)
+        self._events: Deque[Dict[str, Any]] = deque()
+        self._ready = asyncio.Event()
+        self._closed = False
+        self.dropped_tokens = 0
+        self.coalesced_tokens = 0
+
+    def publish(self, event: str, data: Dict[str, Any]):
+        """
+        Queue an event from any thread.
+
+        Parameters
+        ----------
+        event : str
+            Event name
+        data : Dict[str, Any]
+            Event payload
+        """
+        try:
+            self._loop.call_soon_threadsafe(self._put, event, data)
+        except RuntimeError:
+            # Event loop already closed; the client is gone
+            pass
+
+    def close(self):
+        """Mark the end of the stream from any thread."""
+        try:
+            self._loop.call_soon_threadsafe(self._close)
+        except RuntimeError:
+            pass
+
+    def _put(self, event: str, data: Dict[str, Any]):
+        if self._closed:
+            return
+        if event == TOKEN_EVENT:
+            if self._events and self._events[-1]["event"] == TOKEN_EVENT:
+                # Client is behind: merge into the pending token event
+                self._events[-1]["data"]["text"] += data["text"]
+                self.coalesced_tokens += 1
+                return
+            if len(self._events) >= self.max_events:
+                self.dropped_tokens += 1
+                return
+        self._events.append({"event": event, "data": data})
+        self._ready.set()
+
+    def _close(self):
+        self._closed = True
+        self._ready.set()
+
+    async def events(self, heartbeat_seconds: float) -> AsyncIterator[bytes]:
+        """
+        Yield SSE frames until the stream is closed.
+
+        Parameters
+        ----------
+        heartbeat_seconds : float
+            Interval of keep-alive comments while no events arrive
+
+        Yields
+        ------
+        bytes
+            SSE frames
+        """
+        while True:
+            if not self._events:
+                if self._closed:
+                    return
+                self._ready.clear()
+                try:
+                    await asyncio.wait_for(self._ready.wait(), timeout=heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+                continue
+
+            item = self._events.popleft()
+            data = item["data"]
+            if item["event"] == FINAL_EVENT and self.dropped_tokens:
+                data = {**data, "dropped_tokens": self.dropped_tokens}
+            yield format_sse(item["event"], data)
+
+
+def _truncate(value: Any) -> str:
+    text = value if isinstance(value, str) else str(value)
+    if len(text) > MAX_TOOL_PAYLOAD_CHARS:
+        return text[:MAX_TOOL_PAYLOAD_CHARS] + "..."
+    return text
+
+
+@functools.lru_cache(maxsize=None)
+def _callback_handler_class() -> type:
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class SSECallbackHandler(BaseCallbackHandler):
+        """
+        LangChain callback handler publishing agent progress to an ``EventBuffer``.
+
+        Parameters
+        ----------
+        buffer : EventBuffer
+            Buffer of the SSE response
+        """
+
+        def __init__(self, buffer: EventBuffer):
+            self.buffer = buffer
+            self._tool_names: Dict[UUID, str] = {}
+            self.first_token_at: Optional[float] = None
+
+        def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+            if not token:
+                return
+            if self.first_token_at is None:
+                self.first_token_at = time.time()
+            self.buffer.publish(TOKEN_EVENT, {"text": token})
+
+        def on_tool_start(self, serialized: Dict[str, Any], input_str: str, *, run_id: UUID, **kwargs: Any) -> None:
+            name = (serialized or {}).get("name") or kwargs.get("name") or "tool"
+            self._tool_names[run_id] = name
+            self.buffer.publish(TOOL_START_EVENT, {"tool": name, "input": _truncate(input_str)})
+
+        def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+            name = self._tool_names.pop(run_id, kwargs.get("name") or "tool")
+            self.buffer.publish(TOOL_END_EVENT, {"tool": name, "output": _truncate(output)})
+
+        def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+            name = self._tool_names.pop(run_id, kwargs.get("name") or "tool")
+            self.buffer.publish(TOOL_END_EVENT, {"tool": name, "error": str(error)})
+
+    return SSECallbackHandler
+
+
+def __getattr__(name: str) -> Any:
+    # ``SSECallbackHandler`` subclasses a LangChain class, which is slow to
+    # import, so the class is created on first access
+    if name == "SSECallbackHandler":
+        return _callback_handler_class()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def with_streaming(llm: Any) -> Any:
+    """
+    Get a variant of a language model that emits tokens while generating.
+
+    Parameters
+    ----------
+    llm : BaseLLM
+        Language model
+
+    Returns
+    -------
+    BaseLLM
+        A streaming copy of the model, or the model itself if it does not
+        support streaming
+    """
+    if getattr(llm, "streaming", None) is not False:
+        return llm
+    for copy_method in ("model_copy", "copy"):
+        method = getattr(llm, copy_method, None)
+        if method is None:
+            continue
+        try:
+            return method(update={"streaming": True})
+        except Exception as e:
+            logger.debug(f"Could not enable streaming via {copy_method}: {str(e)}")
+    return llm
+
+
+def new_event_buffer() -> EventBuffer:
+    """
+    Create an event buffer bound to the running event loop.
+
+    Returns
+    -------
+    EventBuffer
+        The buffer
+    """
+    return EventBuffer(asyncio.get_running_loop(), settings.SSE_BUFFER_SIZE)
@@ -0,0 +1,356 @@
+"""
+Streaming delivery of query results.
+
+Rows are fetched from a HANA cursor with ``fetchmany`` in fixed-size chunks
+and written to the client as they arrive, either as newline-delimited JSON
+or as Apache Arrow IPC record batches. Only one chunk is held in memory at a
+time, so memory stays bounded regardless of the result size and the first
+rows reach the client before the query has been fully fetched.
+"""
+import datetime
+import decimal
+import json
+import logging
+from typing import Any, Iterator, List, Optional, Sequence
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Only import pyarrow if available
+try:
+    import pyarrow as pa
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+STREAM_FORMATS = {
+    "ndjson": NDJSON_MEDIA_TYPE,
+    "arrow": ARROW_STREAM_MEDIA_TYPE,
+}
+
+# hdbcli type code of DECIMAL, typed from the column's precision and scale
+HANA_DECIMAL_TYPE_CODE = 5
+
+# Arrow types of the other hdbcli type codes reported in ``cursor.description``
+if PYARROW_AVAILABLE:
+    HANA_ARROW_TYPES = {
+        1: pa.uint8(),          # TINYINT
+        2: pa.int16(),          # SMALLINT
+        3: pa.int32(),          # INTEGER
+        4: pa.int64(),          # BIGINT
+        6: pa.float32(),        # REAL
+        7: pa.float64(),        # DOUBLE
+        8: pa.string(),         # CHAR
+        9: pa.string(),         # VARCHAR
+        10: pa.string(),        # NCHAR
+        11: pa.string(),        # NVARCHAR
+        12: pa.binary(),        # BINARY
+        13: pa.binary(),        # VARBINARY
+        14: pa.date32(),        # DATE
+        15: pa.time64("us"),    # TIME
+        16: pa.timestamp("us"), # TIMESTAMP
+        28: pa.bool_(),         # BOOLEAN
+        29: pa.string(),        # STRING
+        30: pa.string(),        # NSTRING
+        47: pa.float64(),       # SMALLDECIMAL (floating point decimal)
+        51: pa.string(),        # TEXT
+        52: pa.string(),        # SHORTTEXT
+        55: pa.string(),        # ALPHANUM
+        61: pa.timestamp("us"), # SECONDDATE
+        62: pa.date32(),        # DAYDATE
+        63: pa.time64("us"),    # SECONDTIME
+        64: pa.timestamp("us"), # LONGDATE
+    }
+else:
+    HANA_ARROW_TYPES = {}
+
+
+def open_cursor(connection_context: Any, sql: str, chunk_size: int = None) -> Any:
+    """
+    Execute a statement on a new DB-API cursor of the connection.
+
+    Parameters
+    ----------
+    connection_context : ConnectionContext
+        HANA connection context
+    sql : str
+        SQL statement to execute
+    chunk_size : int, optional
+        Rows per network round trip; defaults to ``STREAM_CHUNK_SIZE``
+
+    Returns
+    -------
+    Cursor
+        Cursor positioned before the first row
+    """
+    chunk_size = chunk_size or settings.STREAM_CHUNK_SIZE
+    cursor = connection_context.connection.cursor()
+    try:
+        if hasattr(cursor, "setfetchsize"):
+            cursor.setfetchsize(chunk_size)
+        cursor.execute(sql)
+    except Exception:
+        cursor.close()
+        raise
+    return cursor
+
+
+def cursor_columns(cursor: Any) -> List[str]:
+    """
+    Get the column names of an executed cursor.
+
+    Parameters
+    ----------
+    cursor : Cursor
+        Executed DB-API cursor
+
+    Returns
+    -------
+    List[str]
+        Column names
+    """
+    return [column[0] for column in (cursor.description or [])]
+
+
+def iter_row_chunks(cursor: Any, chunk_size: int) -> Iterator[Sequence[Sequence[Any]]]:
+    """
+    Yield rows from a cursor in chunks and close it when exhausted.
+
+    Parameters
+    ----------
+    cursor : Cursor
+        Executed DB-API cursor
+    chunk_size : int
+        Number of rows per chunk
+
+    Yields
+    ------
+    Sequence[Sequence[Any]]
+        A chunk of rows
+    """
+    try:
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        try:
+            cursor.close()
+        except Exception as e:
+            logger.debug(f"Error closing streaming cursor: {str(e)}")
+
+
+def _json_default(value: Any) -> Any:
+    """Convert HANA driver values that the json module cannot encode."""
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value).hex()
+    if hasattr(value, "item"):
+        # numpy scalars
+        return value.item()
+    return str(value)
+
+
+def ndjson_stream(cursor: Any, chunk_size: int) -> Iterator[bytes]:
+    """
+    Encode cursor rows as newline-delimited JSON objects.
+
+    Parameters
+    ----------
+    cursor : Cursor
+        Executed DB-API cursor
+    chunk_size : int
+        Number of rows fetched and written per chunk
+
+    Yields
+    ------
+    bytes
+        One block of NDJSON lines per chunk
+    """
+    columns = cursor_columns(cursor)
+    encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), default=_json_default)
+    for rows in iter_row_chunks(cursor, chunk_size):
+        lines = [encoder.encode(dict(zip(columns, row))) for row in rows]
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+class _ChunkSink:
+    """File-like sink collecting Arrow IPC bytes between yields."""
+
+    def __init__(self):
+        self.closed = False
+        self._buffers: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._buffers.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._buffers)
+        self._buffers = []
+        return data
+
+
+def _description_type(column: Sequence[Any]) -> Optional[Any]:
+    """Arrow type of a ``cursor.description`` entry, or None if the driver reports no known type."""
+    type_code = column[1] if len(column) > 1 else None
+    if type_code != HANA_DECIMAL_TYPE_CODE:
+        return HANA_ARROW_TYPES.get(type_code)
+    precision, scale = (column[4], column[5]) if len(column) > 5 else (None, None)
+    if isinstance(precision, int) and isinstance(scale, int) and 0 < precision <= 38 and 0 <= scale <= precision:
+        return pa.decimal128(precision, scale)
+    # Floating point DECIMAL without precision, as in the JSON responses
+    return pa.float64()
+
+
+def _inferred_type(values: Sequence[Any]) -> Any:
+    """Arrow type of an untyped column, wide enough for the values of later chunks."""
+    arrow_type = pa.array(values).type
+    if pa.types.is_null(arrow_type):
+        return pa.string()
+    if pa.types.is_decimal(arrow_type):
+        # Precision and scale of later values are unknown; encode as in the JSON responses
+        return pa.float64()
+    return arrow_type
+
+
+def result_schema(cursor: Any, rows: Sequence[Sequence[Any]] = ()) -> Any:
+    """
+    Get the Arrow schema of a query result.
+
+    Column types come from the HANA type codes in ``cursor.description``,
+    so every chunk of the result conforms to the same schema. Columns of
+    types the driver does not report are inferred from ``rows``, typically
+    the first chunk: entirely NULL columns are typed as strings and
+    decimals as doubles.
+
+    Parameters
+    ----------
+    cursor : Cursor
+        Executed DB-API cursor
+    rows : Sequence[Sequence[Any]], optional
+        Rows used to infer untyped columns
+
+    Returns
+    -------
+    pyarrow.Schema
+        The schema
+    """
+    fields = []
+    for index, column in enumerate(cursor.description or []):
+        arrow_type = _description_type(column)
+        if arrow_type is None:
+            arrow_type = _inferred_type([row[index] for row in rows])
+        fields.append(pa.field(column[0], arrow_type))
+    return pa.schema(fields)
+
+
+def _column_array(values: Sequence[Any], arrow_type: Any) -> Any:
+    try:
+        return pa.array(values, type=arrow_type)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        if pa.types.is_string(arrow_type):
+            # Inferred string column with other values in a later chunk
+            return pa.array([None if value is None else str(value) for value in values], type=arrow_type)
+        if pa.types.is_floating(arrow_type):
+            return pa.array([None if value is None else float(value) for value in values], type=arrow_type)
+        raise
+
+
+def rows_to_record_batch(columns: List[str], rows: Sequence[Sequence[Any]], schema: Any) -> Any:
+    """
+    Build an Arrow record batch from row tuples.
+
+    Parameters
+    ----------
+    columns : List[str]
+        Column names
+    rows : Sequence[Sequence[Any]]
+        Row tuples as returned by the cursor
+    schema : pyarrow.Schema
+        Schema to conform to, see ``result_schema``
+
+    Returns
+    -------
+    pyarrow.RecordBatch
+        The record batch
+    """
+    column_values = list(zip(*rows)) if rows else [() for _ in columns]
+    arrays = [_column_array(values, field.type) for values, field in zip(column_values, schema)]
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def arrow_stream(cursor: Any, chunk_size: int) -> Iterator[bytes]:
+    """
+    Encode cursor rows as an Arrow IPC stream, one record batch per chunk.
+
+    The schema is derived from the cursor description before the first
+    batch is written (see ``result_schema``).
+
+    Parameters
+    ----------
+    cursor : Cursor
+        Executed DB-API cursor
+    chunk_size : int
+        Number of rows fetched and written per record batch
+
+    Yields
+    ------
+    bytes
+        Arrow IPC stream bytes
+    """
+    columns = cursor_columns(cursor)
+    sink = _ChunkSink()
+    writer = None
+    schema = None
+    for rows in iter_row_chunks(cursor, chunk_size):
+        if writer is None:
+            schema = result_schema(cursor, rows)
+            writer = pa.ipc.new_stream(sink, schema)
+        writer.write_batch(rows_to_record_batch(columns, rows, schema))
+        yield sink.drain()
+
+    if writer is None:
+        # Empty result: still emit a valid stream with the column names
+        writer = pa.ipc.new_stream(sink, result_schema(cursor))
+    writer.close()
+    yield sink.drain()
+
+
+def stream_rows(cursor: Any, stream_format: str, chunk_size: int) -> Iterator[bytes]:
+    """
+    Stream cursor rows in the requested format.
+
+    Parameters
+    ----------
+    cursor : Cursor
+        Executed DB-API cursor
+    stream_format : str
+        ``"ndjson"`` or ``"arrow"``
+    chunk_size : int
+        Number of rows per chunk
+
+    Returns
+    -------
+    Iterator[bytes]
+        Encoded response chunks
+    """
+    if stream_format == "arrow":
+        if not PYARROW_AVAILABLE:
+            raise RuntimeError("Arrow streaming requires the 'pyarrow' package")
+        return arrow_stream(cursor, chunk_size)
+    return ndjson_stream(cursor, chunk_size)
@@ -0,0 +1,537 @@
+"""
+Per-stage latency breakdown of API requests.
+
+``APIMiddleware`` starts a ``RequestTimings`` for every request and keeps it
+in a context variable, which is copied into the thread pool that runs
+blocking endpoint code. Stages running within the request add their
+duration to it:
+
+- ``db``: SQL executed through a ``ConnectionContext`` created by
+  ``create_connection_context`` (its DB-API connection is wrapped by
+  ``instrument_connection``)
+- ``llm`` and ``tool``: LLM calls and ``BaseTool`` runs, timed by a
+  LangChain callback handler registered for every callback manager
+  (``instrument_langchain``)
+- ``embedding`` and custom stages: code wrapped in ``stage(...)``
+
+Each stage is recorded in the ``api_stage_latency_seconds`` histogram,
+labelled by route and tool, and the totals are returned in a
+``Server-Timing`` response header. When tracing is enabled, the same hooks
+record spans (see ``tracing``); they also enforce request deadlines (see
+``deadline``) and the adaptive HANA and LLM concurrency limits
+(``backend_limit``) and trip the HANA circuit breaker on connection errors
+(``database_breaker``). Stages can nest (SQL run by a tool
+counts towards ``db`` and ``tool``), so the totals may exceed the request
+duration. Streaming responses only report the stages finished before the
+response started.
+"""
+import functools
+import re
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from .config import settings
+from .deadline import DeadlineExceeded, check_deadline, current_deadline, deadline_handler, query_timeout
+from .env_constants import HANA_CONNECTION_ERROR_CODES
+from .failover import AdaptiveConcurrencyLimit, CircuitBreaker, ConcurrencyLimitExceededError, failover_manager
+from .metrics import record_db_query, record_llm_request, record_stage
+from .tracing import tracing_handler, tracer
+
+# Route label of stages running outside a request (jobs, health probes)
+BACKGROUND_ROUTE = "background"
+
+# Statement types recorded for SQL; other statements are recorded as "other"
+QUERY_TYPES = {"select", "insert", "update", "delete", "upsert", "merge", "call", "create", "drop"}
+
+_LEADING_COMMENTS = re.compile(r"^\s*(?:--[^\n]*\n\s*|/\*.*?\*/\s*)*", re.DOTALL)
+
+class RequestTimings:
+    """
+    Stage durations of one request.
+
+    Parameters
+    ----------
+    scope : dict
+        ASGI scope of the request; the route template is read from it once
+        routing has happened
+    """
+    def __init__(self, scope: Dict[str, Any]):
+        self.scope = scope
+        self.stages: Dict[str, Tuple[float, int]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def route(self) -> str:
+        """Route template of the request, e.g. ``/api/v1/jobs/{job_id}``."""
+        route = self.scope.get("route")
+        return getattr(route, "path", None) or "unmatched"
+
+    def add(self, name: str, duration: float):
+        """
+        Add the duration of a stage.
+
+        Parameters
+        ----------
+        name : str
+            Stage name
+        duration : float
+            Duration in seconds
+        """
+        with self._lock:
+            total, count = self.stages.get(name, (0.0, 0))
+            self.stages[name] = (total + duration, count + 1)
+
+    def server_timing(self, total: Optional[float] = None) -> str:
+        """
+        Render the stages as a ``Server-Timing`` header value.
+
+        Parameters
+        ----------
+        total : float, optional
+            Request duration so far in seconds, added as ``total``
+
+        Returns
+        -------
+        str
+            Header value, e.g. ``db;dur=12.5;desc="3 calls", llm;dur=840.1``
+        """
+        with self._lock:
+            stages = sorted(self.stages.items())
+        entries = [
+            f'{name};dur={duration * 1000:.1f}' + (f';desc="{count} calls"' if count > 1 else "")
+            for name, (duration, count) in stages
+        ]
+        if total is not None:
+            entries.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(entries)
+
+request_timings_contextvar: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+def record(name: str, duration: float, tool: str = ""):
+    """
+    Record a finished stage for the current request and in the stage histogram.
+
+    Parameters
+    ----------
+    name : str
+        Stage name (db, llm, embedding, tool, ...)
+    duration : float
+        Duration in seconds
+    tool : str, optional
+        Tool name for tool stages
+    """
+    timings = request_timings_contextvar.get()
+    if timings is not None:
+        timings.add(name, duration)
+    record_stage(name, timings.route if timings is not None else BACKGROUND_ROUTE, tool, duration)
+
+@contextmanager
+def stage(name: str, tool: str = "") -> Iterator[None]:
+    """
+    Time a block of code as a stage of the current request.
+
+    Parameters
+    ----------
+    name : str
+        Stage name
+    tool : str, optional
+        Tool name for tool stages
+
+    Examples
+    --------
+    >>> with stage("embedding"):
+    ...     embeddings = model.embed_documents(texts)
+    """
+    check_deadline(name)
+    start = time.perf_counter()
+    try:
+        with tracer.span(name):
+            yield
+    finally:
+        record(name, time.perf_counter() - start, tool)
+
+def backend_limit(backend: str) -> Optional[AdaptiveConcurrencyLimit]:
+    """
+    Get the adaptive concurrency limit of a backend.
+
+    Parameters
+    ----------
+    backend : str
+        ``hana`` or ``llm``
+
+    Returns
+    -------
+    AdaptiveConcurrencyLimit or None
+        The limit registered with the failover manager, or None if adaptive
+        concurrency limiting is disabled
+    """
+    if not settings.ADAPTIVE_CONCURRENCY_ENABLED:
+        return None
+    return failover_manager.concurrency_limit(
+        backend,
+        initial_limit=settings.ADAPTIVE_CONCURRENCY_INITIAL_LIMIT,
+        min_limit=settings.ADAPTIVE_CONCURRENCY_MIN_LIMIT,
+        max_limit=settings.ADAPTIVE_CONCURRENCY_MAX_LIMIT,
+        tolerance=settings.ADAPTIVE_CONCURRENCY_TOLERANCE,
+        queue_timeout=settings.ADAPTIVE_CONCURRENCY_QUEUE_TIMEOUT_SECONDS
+    )
+
+def database_breaker() -> CircuitBreaker:
+    """
+    Get the circuit breaker of the HANA database.
+
+    Consecutive connection errors of statements and new connections open it;
+    while it is open, statements fail fast with ``CircuitBreakerOpenError``
+    and cached reads are served stale (see ``cache``).
+
+    Returns
+    -------
+    CircuitBreaker
+        The breaker registered with the failover manager as ``hana``
+    """
+    return failover_manager.circuit_breaker(
+        "hana",
+        failure_threshold=settings.HANA_CIRCUIT_BREAKER_THRESHOLD,
+        reset_timeout=settings.HANA_CIRCUIT_BREAKER_TIMEOUT_SECONDS
+    )
+
+def is_connection_error(error: BaseException) -> bool:
+    """
+    Check whether an error means the database is unreachable.
+
+    SQL errors, such as syntax errors or missing tables, come from a healthy
+    database and do not count; neither do statements stopped at the request
+    deadline.
+
+    Parameters
+    ----------
+    error : BaseException
+        Error raised by the driver
+
+    Returns
+    -------
+    bool
+        True for network errors and hdbcli connection error codes
+    """
+    if isinstance(error, DeadlineExceeded):
+        return False
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    return getattr(error, "errorcode", None) in HANA_CONNECTION_ERROR_CODES
+
+def query_type(sql: Any) -> str:
+    """Get the statement type of a SQL string for the query metrics."""
+    if not isinstance(sql, str):
+        return "other"
+    words = _LEADING_COMMENTS.sub("", sql, count=1).split(None, 1)
+    keyword = words[0].lower() if words else ""
+    return keyword if keyword in QUERY_TYPES else "other"
+
+def _row_count(cursor: Any, method: str, result: Any) -> Optional[int]:
+    """Rows fetched, or rows affected by a statement if the driver reports them."""
+    if method in ("fetchall", "fetchmany"):
+        return len(result) if result is not None else 0
+    if method == "fetchone":
+        return 0 if result is None else 1
+    rowcount = getattr(cursor, "rowcount", None)
+    return rowcount if isinstance(rowcount, int) and rowcount >= 0 else None
+
+class _TimedCursor:
+    """DB-API cursor proxy timing, tracing and bounding statement execution and fetches."""
+
+    def __init__(self, cursor: Any, connection: Any = None):
+        self._cursor = cursor
+        self._connection = connection
+
+    def _guard(self, sql: Any):
+        """Bound a statement by the current deadline, cancelling it on the server when it passes."""
+        deadline = current_deadline()
+        if deadline is None:
+            return nullcontext()
+        deadline.check(f"db {query_type(sql) if sql is not None else 'fetch'}")
+        if sql is None or self._connection is None or not hasattr(self._connection, "cancel"):
+            return nullcontext()
+        set_timeout = getattr(self._cursor, "setquerytimeout", None)
+        if callable(set_timeout):
+            set_timeout(query_timeout(deadline))
+        return deadline.guard(self._connection.cancel)
+
+    def _timed(self, method: str, sql: Any, *args, **kwargs):
+        guard = self._guard(sql)
+        # Statements of requests share the adaptive HANA limit; jobs and probes
+        # run outside requests, and their long or trivial statements would skew it
+        limit = backend_limit("hana") if sql is not None and request_timings_contextvar.get() is not None else None
+        limit_start = limit.acquire() if limit is not None else 0.0
+        dropped = False
+        measured = True
+        statement_type = query_type(sql) if sql is not None else "fetch"
+        # Statements outside a traced operation (health probes) do not start traces
+        span = tracer.start_span(f"db {statement_type}", "client", {"db.system": "hana", "db.operation": method},
+                                 new_trace=False)
+        start = time.perf_counter()
+        try:
+            with guard:
+                result = getattr(self._cursor, method)(*args, **kwargs)
+        except BaseException as e:
+            if span is not None:
+                span.record_error(e)
+            # The request deadline is set by the client; stopping at it says nothing about HANA
+            measured = not _stopped_by_deadline(e)
+            dropped = measured and isinstance(e, TimeoutError)
+            deadline = current_deadline()
+            if isinstance(e, Exception) and not isinstance(e, DeadlineExceeded) and not measured:
+                raise DeadlineExceeded(f"Deadline of {deadline.seconds:g}s exceeded during db {statement_type}") from e
+            raise
+        else:
+            if span is not None:
+                span.set_attribute("db.rows", _row_count(self._cursor, method, result))
+            return result
+        finally:
+            if limit is not None:
+                limit.release(limit_start, dropped, measured)
+            duration = time.perf_counter() - start
+            record("db", duration)
+            if sql is not None:
+                record_db_query(statement_type, duration)
+            if span is not None:
+                if isinstance(sql, str) and sql != "call":
+                    span.set_attribute("db.statement", sql)
+                span.end()
+
+    def _statement(self, method: str, sql: Any, *args, **kwargs):
+        # An open circuit fails fast, before taking a slot of the concurrency limit
+        with database_breaker().protect(f"db {query_type(sql)}", is_connection_error):
+            return self._timed(method, sql, *args, **kwargs)
+
+    def execute(self, operation, *args, **kwargs):
+        return self._statement("execute", operation, operation, *args, **kwargs)
+
+    def executemany(self, operation, *args, **kwargs):
+        return self._statement("executemany", operation, operation, *args, **kwargs)
+
+    def callproc(self, procname, *args, **kwargs):
+        return self._statement("callproc", "call", procname, *args, **kwargs)
+
+    def fetchone(self):
+        return self._timed("fetchone", None)
+
+    def fetchmany(self, *args, **kwargs):
+        return self._timed("fetchmany", None, *args, **kwargs)
+
+    def fetchall(self):
+        return self._timed("fetchall", None)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self._cursor.close()
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+class _TimedConnection:
+    """DB-API connection proxy returning timed cursors."""
+
+    def __init__(self, connection: Any):
+        self._connection = connection
+
+    def cursor(self, *args, **kwargs):
+        return _TimedCursor(self._connection.cursor(*args, **kwargs), self._connection)
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def __str__(self):
+        return str(self._connection)
+
+def instrument_connection(connection_context: Any) -> Any:
+    """
+    Time the SQL executed through a ``ConnectionContext``.
+
+    hana_ml runs all statements through cursors of the context's DB-API
+    connection, so wrapping that connection covers ``sql(...).collect()``,
+    ``execute_sql`` and the tools.
+
+    Parameters
+    ----------
+    connection_context : ConnectionContext
+        Connection to instrument in place
+
+    Returns
+    -------
+    ConnectionContext
+        The same connection context
+    """
+    connection = getattr(connection_context, "connection", None)
+    if connection is not None and not isinstance(connection, _TimedConnection):
+        connection_context.connection = _TimedConnection(connection)
+    return connection_context
+
+@functools.lru_cache(maxsize=None)
+def _timing_handler() -> Any:
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class TimingCallbackHandler(BaseCallbackHandler):
+        """Time LLM calls and tool runs of every LangChain callback manager."""
+
+        # Called in the thread of the timed run, where the request context is set
+        run_inline = True
+
+        def __init__(self):
+            self._runs: Dict[Any, Tuple[str, str, float, Optional[RequestTimings]]] = {}
+
+        def _start(self, run_id, name: str, label: str):
+            self._runs[run_id] = (name, label, time.perf_counter(), request_timings_contextvar.get())
+
+        def _end(self, run_id):
+            run = self._runs.pop(run_id, None)
+            if run is None:
+                return
+            name, label, start, timings = run
+            duration = time.perf_counter() - start
+            token = request_timings_contextvar.set(timings)
+            try:
+                record(name, duration, label if name == "tool" else "")
+            finally:
+                request_timings_contextvar.reset(token)
+            if name == "llm":
+                record_llm_request(label, duration)
+
+        @staticmethod
+        def _model(serialized, kwargs) -> str:
+            params = kwargs.get("invocation_params") or {}
+            model = params.get("model_name") or params.get("model") or params.get("deployment_id")
+            if not model and serialized:
+                model = (serialized.get("kwargs") or {}).get("model_name") or serialized.get("name")
+            return str(model or "unknown")
+
+        def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+            self._start(run_id, "llm", self._model(serialized, kwargs))
+
+        def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+            self._start(run_id, "llm", self._model(serialized, kwargs))
+
+        def on_llm_end(self, response, *, run_id, **kwargs):
+            self._end(run_id)
+
+        def on_llm_error(self, error, *, run_id, **kwargs):
+            self._end(run_id)
+
+        def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+            self._start(run_id, "tool", (serialized or {}).get("name") or "unknown")
+
+        def on_tool_end(self, output, *, run_id, **kwargs):
+            self._end(run_id)
+
+        def on_tool_error(self, error, *, run_id, **kwargs):
+            self._end(run_id)
+
+    return TimingCallbackHandler()
+
+def _stopped_by_deadline(error: BaseException) -> bool:
+    """Whether a backend call failed because the request deadline expired."""
+    if isinstance(error, DeadlineExceeded):
+        return True
+    deadline = current_deadline()
+    return deadline is not None and deadline.expired
+
+def _is_overload(error: BaseException) -> bool:
+    """Whether an LLM error means the backend dropped the call (timeout, rate limiting)."""
+    if isinstance(error, TimeoutError):
+        return True
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    return status in (429, 503) or "RateLimit" in type(error).__name__ or "Timeout" in type(error).__name__
+
+@functools.lru_cache(maxsize=None)
+def _concurrency_handler() -> Any:
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class ConcurrencyCallbackHandler(BaseCallbackHandler):
+        """Run every LLM call within the adaptive LLM concurrency limit."""
+
+        # Rejections must reach the caller instead of being logged
+        raise_error = True
+        run_inline = True
+
+        def __init__(self):
+            self._runs: Dict[Any, Tuple[AdaptiveConcurrencyLimit, float]] = {}
+
+        def _acquire(self, run_id):
+            limit = backend_limit("llm")
+            if limit is None:
+                return
+            try:
+                self._runs[run_id] = (limit, limit.acquire())
+            except ConcurrencyLimitExceededError as e:
+                # The call never runs, so LangChain reports no end for it:
+                # end the runs the handlers registered before this one started
+                for handler in (_timing_handler(), tracing_handler()):
+                    if handler is not None:
+                        handler.on_llm_error(e, run_id=run_id)
+                raise
+
+        def _release(self, run_id, error: Optional[BaseException] = None):
+            run = self._runs.pop(run_id, None)
+            if run is not None:
+                limit, start = run
+                if error is not None and _stopped_by_deadline(error):
+                    limit.release(start, measured=False)
+                else:
+                    limit.release(start, error is not None and _is_overload(error))
+
+        def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+            self._acquire(run_id)
+
+        def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+            self._acquire(run_id)
+
+        def on_llm_end(self, response, *, run_id, **kwargs):
+            self._release(run_id)
+
+        def on_llm_error(self, error, *, run_id, **kwargs):
+            self._release(run_id, error)
+
+    return ConcurrencyCallbackHandler()
+
+_instrument_lock = threading.Lock()
+_langchain_instrumented = False
+
+def instrument_langchain() -> bool:
+    """
+    Time (and trace) LLM calls and tool runs made through LangChain.
+
+    Registers configure hooks so that the timing, deadline and concurrency
+    limit handlers, and the tracing handler if tracing is enabled, join every
+    callback manager, including those of agents and ``BaseTool.run``.
+    Importing LangChain is deferred to the first call; later calls are no-ops.
+
+    Returns
+    -------
+    bool
+        True if LangChain is instrumented
+    """
+    global _langchain_instrumented
+    with _instrument_lock:
+        if _langchain_instrumented:
+            return True
+        try:
+            from langchain_core.tracers.context import register_configure_hook
+        except ImportError:
+            return False
+        register_configure_hook(ContextVar("timing_callback_handler", default=_timing_handler()), inheritable=True)
+        register_configure_hook(ContextVar("deadline_callback_handler", default=deadline_handler()), inheritable=True)
+        handler = tracing_handler()
+        if handler is not None:
+            register_configure_hook(ContextVar("tracing_callback_handler", default=handler), inheritable=True)
+        # Registered last: a slot is only taken once the other handlers accepted the call
+        register_configure_hook(ContextVar("concurrency_callback_handler", default=_concurrency_handler()),
+                                inheritable=True)
+        _langchain_instrumented = True
+        return True
@@ -0,0 +1,571 @@
+"""
+Request tracing with OTLP-compatible export.
+
+With ``OPENTELEMETRY_ENABLED``, every request gets a root span with child
+spans for the work done on its behalf:
+
+- ``agent`` and ``agent.iteration``: an agent run and each of its ReAct
+  iterations (the planning LLM call and the tool it picked)
+- ``tool``: ``BaseTool`` runs
+- ``llm``: LLM calls with model and token counts
+- ``db``: SQL statements and fetches with row counts
+- stages timed with ``timing.stage`` (embedding, vector search)
+
+Sampling is decided once per trace: an incoming W3C ``traceparent``
+header is honoured, other traces are kept with probability
+``TRACING_SAMPLE_RATIO``. Unsampled requests only create their root span.
+
+Finished spans are batched by a background thread and written as OTLP/JSON
+``ExportTraceServiceRequest`` lines to ``TRACING_FILE_PATH``, which works
+offline and can be replayed into an OpenTelemetry collector, or posted to
+``OPENTELEMETRY_ENDPOINT`` (OTLP/HTTP JSON) if set. No OpenTelemetry SDK
+is required.
+"""
+import functools
+import json
+import logging
+import os
+import queue
+import random
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+from .background import BackgroundThread
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "hana-ai-toolkit"
+
+# OTLP span kinds and error status code
+SPAN_KINDS = {"internal": 1, "server": 2, "client": 3}
+STATUS_ERROR = 2
+
+# Longest attribute value exported (SQL text, tool input)
+MAX_ATTRIBUTE_LENGTH = 1000
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+class _Trace:
+    """State shared by the spans of one trace."""
+    __slots__ = ("trace_id", "sampled", "span_count", "dropped")
+
+    def __init__(self, trace_id: str, sampled: bool):
+        self.trace_id = trace_id
+        self.sampled = sampled
+        self.span_count = 0
+        self.dropped = 0
+
+class Span:
+    """
+    A timed operation within a trace.
+
+    Spans are created by ``Tracer.start_span``; attributes can be set until
+    ``end`` is called.
+    """
+    __slots__ = ("tracer", "trace", "span_id", "parent_id", "name", "kind",
+                 "start_ns", "end_ns", "attributes", "status", "status_message")
+
+    def __init__(self, tracer: "Tracer", trace: _Trace, name: str, kind: str,
+                 parent_id: Optional[str], attributes: Optional[Dict[str, Any]]):
+        self.tracer = tracer
+        self.trace = trace
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = dict(attributes) if attributes else {}
+        self.status = None
+        self.status_message = ""
+
+    @property
+    def recording(self) -> bool:
+        """Whether the span is sampled and will be exported."""
+        return self.trace.sampled
+
+    def set_attribute(self, key: str, value: Any):
+        """Set an attribute; long strings are truncated."""
+        if isinstance(value, str) and len(value) > MAX_ATTRIBUTE_LENGTH:
+            value = value[:MAX_ATTRIBUTE_LENGTH] + "..."
+        self.attributes[key] = value
+
+    def set_error(self, message: str):
+        """Mark the span as failed."""
+        self.status = STATUS_ERROR
+        self.status_message = message[:MAX_ATTRIBUTE_LENGTH]
+
+    def record_error(self, error: BaseException):
+        """Mark the span as failed by an exception."""
+        self.set_error(f"{type(error).__name__}: {error}")
+
+    def end(self):
+        """Finish the span and hand it to the exporter."""
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        if self.trace.sampled:
+            self.tracer.processor.on_end(self)
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """Encode the span as an OTLP/JSON span."""
+        span = {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": SPAN_KINDS.get(self.kind, 1),
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or self.start_ns),
+            "attributes": encode_attributes(self.attributes),
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        if self.status is not None:
+            span["status"] = {"code": self.status, "message": self.status_message}
+        return span
+
+def encode_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Encode attributes as OTLP/JSON key-value pairs."""
+    encoded = []
+    for key, value in attributes.items():
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            encoded_value = {"boolValue": value}
+        elif isinstance(value, int):
+            encoded_value = {"intValue": str(value)}
+        elif isinstance(value, float):
+            encoded_value = {"doubleValue": value}
+        else:
+            encoded_value = {"stringValue": str(value)}
+        encoded.append({"key": key, "value": encoded_value})
+    return encoded
+
+def export_request(spans: List[Span]) -> Dict[str, Any]:
+    """
+    Build an OTLP/JSON ``ExportTraceServiceRequest``.
+
+    Parameters
+    ----------
+    spans : List[Span]
+        Finished spans
+
+    Returns
+    -------
+    Dict[str, Any]
+        Request body accepted by OTLP/HTTP collectors
+    """
+    resource = {"service.name": SERVICE_NAME, "process.pid": os.getpid()}
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": encode_attributes(resource)},
+            "scopeSpans": [{
+                "scope": {"name": "hana_ai.api"},
+                "spans": [span.to_otlp() for span in spans],
+            }],
+        }]
+    }
+
+class FileSpanExporter:
+    """
+    Append batches as OTLP/JSON lines to a local file.
+
+    Parameters
+    ----------
+    path : str
+        File to write; rotated to ``<path>.1`` once larger than ``max_bytes``
+    max_bytes : int
+        Size limit before rotation
+    """
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+
+    def export(self, spans: List[Span]):
+        line = json.dumps(export_request(spans), separators=(",", ":"))
+        try:
+            if os.path.getsize(self.path) > self.max_bytes:
+                os.replace(self.path, f"{self.path}.1")
+        except OSError:
+            pass
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+class OTLPHttpSpanExporter:
+    """
+    Post batches to an OTLP/HTTP collector as JSON.
+
+    Parameters
+    ----------
+    endpoint : str
+        Collector base URL (``http://collector:4318``) or the full
+        ``/v1/traces`` URL
+    timeout : float
+        Request timeout in seconds
+    """
+    def __init__(self, endpoint: str, timeout: float = 10.0):
+        self.url = endpoint if endpoint.rstrip("/").endswith("/v1/traces") else endpoint.rstrip("/") + "/v1/traces"
+        self.timeout = timeout
+
+    def export(self, spans: List[Span]):
+        import urllib.request
+        body = json.dumps(export_request(spans), separators=(",", ":")).encode("utf-8")
+        request = urllib.request.Request(self.url, data=body, headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+class BatchSpanProcessor:
+    """
+    Export finished spans in batches from a background thread.
+
+    Spans are dropped when the queue is full, so exporting never blocks
+    requests.
+
+    Parameters
+    ----------
+    exporter : Any
+        Object with an ``export(spans)`` method
+    max_queue_size : int
+        Spans buffered before new spans are dropped
+    batch_size : int
+        Spans per export
+    interval_seconds : float
+        Longest time a span waits for export
+    """
+    def __init__(self, exporter: Any, max_queue_size: int = 2048, batch_size: int = 512,
+                 interval_seconds: float = 5.0):
+        self.exporter = exporter
+        self.batch_size = batch_size
+        self.interval_seconds = interval_seconds
+        self.dropped = 0
+        self._queue: "queue.Queue[Span]" = queue.Queue(maxsize=max_queue_size)
+        self._thread = BackgroundThread(self._loop, "trace-exporter")
+
+    def on_end(self, span: Span):
+        """Queue a finished span."""
+        self._thread.ensure_started()
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self):
+        """Export all queued spans in the calling thread."""
+        while True:
+            batch = self._drain()
+            if not batch:
+                return
+            self._export(batch)
+
+    def _drain(self, first: Optional[Span] = None) -> List[Span]:
+        batch = [first] if first is not None else []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _export(self, batch: List[Span]):
+        try:
+            self.exporter.export(batch)
+        except Exception as e:
+            logger.warning(f"Failed to export {len(batch)} spans: {str(e)}")
+
+    def _loop(self):
+        while True:
+            try:
+                first = self._queue.get(timeout=self.interval_seconds)
+            except queue.Empty:
+                continue
+            # Wait briefly so spans of the same trace share a batch
+            if self._queue.qsize() < self.batch_size:
+                time.sleep(min(1.0, self.interval_seconds))
+            self._export(self._drain(first))
+
+current_span_contextvar: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+class Tracer:
+    """
+    Create spans with head sampling and a per-trace span limit.
+
+    Parameters
+    ----------
+    processor : BatchSpanProcessor
+        Receives finished spans
+    enabled : bool, optional
+        Defaults to ``OPENTELEMETRY_ENABLED``
+    sample_ratio : float, optional
+        Share of new traces recorded; defaults to ``TRACING_SAMPLE_RATIO``
+    max_spans_per_trace : int, optional
+        Spans recorded per trace before further spans are dropped; defaults
+        to ``TRACING_MAX_SPANS_PER_TRACE``
+    """
+    def __init__(self, processor: BatchSpanProcessor, enabled: Optional[bool] = None,
+                 sample_ratio: Optional[float] = None, max_spans_per_trace: Optional[int] = None):
+        self.processor = processor
+        self.enabled = settings.OPENTELEMETRY_ENABLED if enabled is None else enabled
+        self.sample_ratio = settings.TRACING_SAMPLE_RATIO if sample_ratio is None else sample_ratio
+        self.max_spans_per_trace = max_spans_per_trace or settings.TRACING_MAX_SPANS_PER_TRACE
+
+    def start_span(self, name: str, kind: str = "internal", attributes: Optional[Dict[str, Any]] = None,
+                   parent: Optional[Span] = None, traceparent: Optional[str] = None,
+                   new_trace: bool = True) -> Optional[Span]:
+        """
+        Start a span.
+
+        Parameters
+        ----------
+        name : str
+            Span name
+        kind : str, optional
+            ``internal``, ``server`` or ``client``
+        attributes : Dict[str, Any], optional
+            Initial attributes
+        parent : Span, optional
+            Parent span; defaults to the current span of the context
+        traceparent : str, optional
+            W3C ``traceparent`` of a remote parent, used for root spans
+        new_trace : bool, optional
+            Whether to start a trace if there is no parent span
+
+        Returns
+        -------
+        Span or None
+            The span, or None if tracing is disabled, the trace is not
+            sampled, the trace reached its span limit or there is no parent
+            and ``new_trace`` is False. Unsampled root spans are returned so
+            their children are skipped cheaply.
+        """
+        if not self.enabled:
+            return None
+        parent = parent or current_span_contextvar.get()
+        if parent is not None:
+            trace = parent.trace
+            if not trace.sampled:
+                return None
+            if trace.span_count >= self.max_spans_per_trace:
+                trace.dropped += 1
+                return None
+            trace.span_count += 1
+            return Span(self, trace, name, kind, parent.span_id, attributes)
+        if not new_trace:
+            return None
+
+        match = _TRACEPARENT.match(traceparent or "")
+        if match:
+            trace = _Trace(match.group(1), bool(int(match.group(3), 16) & 1))
+            parent_id = match.group(2)
+        else:
+            trace = _Trace(f"{random.getrandbits(128):032x}", random.random() < self.sample_ratio)
+            parent_id = None
+        trace.span_count = 1
+        return Span(self, trace, name, kind, parent_id, attributes)
+
+    @contextmanager
+    def span(self, name: str, kind: str = "internal", **attributes) -> Iterator[Optional[Span]]:
+        """
+        Run a block of code in a child span of the current span.
+
+        Exceptions are recorded on the span and re-raised.
+
+        Parameters
+        ----------
+        name : str
+            Span name
+        kind : str, optional
+            Span kind
+        **attributes
+            Initial attributes
+
+        Yields
+        ------
+        Span or None
+            The span, or None if it is not recorded
+        """
+        span = self.start_span(name, kind, attributes)
+        if span is None:
+            yield None
+            return
+        token = current_span_contextvar.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_error(e)
+            raise
+        finally:
+            current_span_contextvar.reset(token)
+            span.end()
+
+    def shutdown(self):
+        """Export the queued spans."""
+        if self.enabled:
+            self.processor.flush()
+
+def _create_exporter() -> Any:
+    if settings.OPENTELEMETRY_ENDPOINT:
+        return OTLPHttpSpanExporter(settings.OPENTELEMETRY_ENDPOINT)
+    return FileSpanExporter(settings.TRACING_FILE_PATH, settings.TRACING_FILE_MAX_BYTES)
+
+def _usage(response: Any) -> Dict[str, int]:
+    """Get token counts of an ``LLMResult``."""
+    usage = (getattr(response, "llm_output", None) or {}).get("token_usage") or {}
+    if usage:
+        return {
+            "gen_ai.usage.input_tokens": usage.get("prompt_tokens"),
+            "gen_ai.usage.output_tokens": usage.get("completion_tokens"),
+        }
+    for generations in getattr(response, "generations", None) or []:
+        for generation in generations:
+            metadata = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if metadata:
+                return {
+                    "gen_ai.usage.input_tokens": metadata.get("input_tokens"),
+                    "gen_ai.usage.output_tokens": metadata.get("output_tokens"),
+                }
+    return {}
+
+@functools.lru_cache(maxsize=None)
+def _tracing_handler() -> Any:
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class TracingCallbackHandler(BaseCallbackHandler):
+        """
+        Record agent runs, ReAct iterations, tool runs and LLM calls as spans.
+
+        LangChain runs are matched to spans by run ID. Runs of an agent
+        executor other than tools start a new iteration span; tools run in
+        the current iteration. Tool spans become the current span while the
+        tool runs, so its SQL statements are nested under it.
+        """
+        run_inline = True
+
+        def __init__(self):
+            self._spans: Dict[Any, Span] = {}
+            self._parents: Dict[Any, Any] = {}
+            self._previous: Dict[Any, Optional[Span]] = {}
+            self._iterations: Dict[Any, List[Any]] = {}
+
+        def _parent_span(self, parent_run_id) -> Optional[Span]:
+            run_id = parent_run_id
+            while run_id is not None:
+                span = self._spans.get(run_id)
+                if span is not None:
+                    return span
+                run_id = self._parents.get(run_id)
+            return current_span_contextvar.get()
+
+        def _start(self, run_id, parent_run_id, name, kind_of_run, attributes, make_current=False):
+            self._parents[run_id] = parent_run_id
+            parent = self._parent_span(parent_run_id)
+            if parent_run_id in self._iterations:
+                parent = self._iteration(parent_run_id, kind_of_run != "tool")
+            span = tracer.start_span(name, attributes=attributes, parent=parent)
+            if span is None:
+                return
+            self._spans[run_id] = span
+            if make_current:
+                self._previous[run_id] = current_span_contextvar.get()
+                current_span_contextvar.set(span)
+
+        def _iteration(self, executor_run_id, new: bool) -> Optional[Span]:
+            state = self._iterations[executor_run_id]
+            count, span = state
+            if span is None or new:
+                if span is not None:
+                    span.end()
+                executor_span = self._spans.get(executor_run_id)
+                span = tracer.start_span("agent.iteration", attributes={"agent.iteration": count + 1},
+                                         parent=executor_span) if executor_span else None
+                state[:] = [count + 1, span]
+            return span
+
+        def _end(self, run_id, error=None, attributes=None):
+            self._parents.pop(run_id, None)
+            state = self._iterations.pop(run_id, None)
+            if state is not None and state[1] is not None:
+                state[1].end()
+            span = self._spans.pop(run_id, None)
+            if span is None:
+                return
+            if run_id in self._previous:
+                current_span_contextvar.set(self._previous.pop(run_id))
+            for key, value in (attributes or {}).items():
+                span.set_attribute(key, value)
+            if state is not None:
+                span.set_attribute("agent.iterations", state[0])
+            if error is not None:
+                span.record_error(error)
+            span.end()
+
+        @staticmethod
+        def _name(serialized, kwargs) -> str:
+            serialized = serialized or {}
+            return kwargs.get("name") or serialized.get("name") or (serialized.get("id") or ["chain"])[-1]
+
+        def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, **kwargs):
+            name = self._name(serialized, kwargs)
+            if name == "AgentExecutor":
+                self._start(run_id, parent_run_id, "agent", "agent", {"agent.executor": name})
+                self._iterations[run_id] = [0, None]
+            elif parent_run_id in self._iterations:
+                self._start(run_id, parent_run_id, f"chain {name}", "chain", None)
+            else:
+                self._parents[run_id] = parent_run_id
+
+        def on_chain_end(self, outputs, *, run_id, **kwargs):
+            self._end(run_id)
+
+        def on_chain_error(self, error, *, run_id, **kwargs):
+            self._end(run_id, error)
+
+        def _llm_start(self, serialized, run_id, parent_run_id, kwargs):
+            params = kwargs.get("invocation_params") or {}
+            model = params.get("model_name") or params.get("model") or params.get("deployment_id")
+            self._start(run_id, parent_run_id, "llm", "llm", {"gen_ai.request.model": model})
+
+        def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, **kwargs):
+            self._llm_start(serialized, run_id, parent_run_id, kwargs)
+
+        def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, **kwargs):
+            self._llm_start(serialized, run_id, parent_run_id, kwargs)
+
+        def on_llm_end(self, response, *, run_id, **kwargs):
+            self._end(run_id, attributes=_usage(response))
+
+        def on_llm_error(self, error, *, run_id, **kwargs):
+            self._end(run_id, error)
+
+        def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+            name = (serialized or {}).get("name") or kwargs.get("name") or "unknown"
+            self._start(run_id, parent_run_id, f"tool {name}", "tool",
+                        {"tool.name": name, "tool.input": input_str}, make_current=True)
+
+        def on_tool_end(self, output, *, run_id, **kwargs):
+            self._end(run_id, attributes={"tool.output_length": len(str(output))})
+
+        def on_tool_error(self, error, *, run_id, **kwargs):
+            self._end(run_id, error)
+
+    return TracingCallbackHandler()
+
+def tracing_handler() -> Optional[Any]:
+    """
+    Get the LangChain callback handler recording spans.
+
+    Returns
+    -------
+    BaseCallbackHandler or None
+        The handler, or None if tracing is disabled
+    """
+    return _tracing_handler() if tracer.enabled else None
+
+# Global tracer
+tracer = Tracer(BatchSpanProcessor(
+    _create_exporter(),
+    interval_seconds=settings.TRACING_EXPORT_INTERVAL_SECONDS
+))
@@ -3,22 +3,26 @@ Environment validation module for the HANA AI Toolkit API.
 
 This module provides validation functions to ensure all required
 environment variables and connections are properly configured.
+
+The checks are independent and mostly wait on I/O (DNS, the database, SDK
+imports), so they run concurrently, each bounded by
+``VALIDATION_CHECK_TIMEOUT_SECONDS``. ``validation_cache`` keeps the latest
+results and refreshes them in the background once they are older than
+``VALIDATION_CACHE_TTL_SECONDS``, so health endpoints never run the checks
+on the request path.
 """
 import os
 import sys
 import logging
 import socket
 import json
-from typing import Dict, List, Optional, Tuple, Any
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, List, Optional, Tuple, Any
 import time
 
-import numpy as np
-import pandas as pd
-from hana_ml.dataframe import ConnectionContext
-
 from .config import settings
 from .env_constants import SAP_AI_CORE_LLM_MODEL, SAP_AI_CORE_EMBEDDING_MODEL
-from .gpu_utils import GPUProfiler, MultiGPUManager
 
 logger = logging.getLogger(__name__)
 
@@ -115,6 +119,9 @@ class EnvironmentValidator:
                 }
                 return self.validation_results["gpu"]
             
+            # torch is only imported when GPU acceleration is enabled
+            from .gpu_utils import GPUProfiler, MultiGPUManager
+
             # Use GPU profiler for comprehensive diagnostics
             profiler = GPUProfiler()
             gpu_stats = profiler.get_gpu_stats()
@@ -305,6 +312,8 @@ class EnvironmentValidator:
             
             # Try to connect to HANA
             try:
+                from hana_ml.dataframe import ConnectionContext
+
                 start_time = time.time()
                 
                 if has_userkey:
@@ -508,24 +517,61 @@ class EnvironmentValidator:
         
         return self.validation_results["environment_variables"]
     
-    def validate_all(self) -> Dict[str, Dict[str, Any]]:
+    def validate_all(self, timeout: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
         """
-        Run all validations.
+        Run all validations concurrently.
+        
+        Parameters
+        ----------
+        timeout : float, optional
+            Seconds each check may take; defaults to
+            ``VALIDATION_CHECK_TIMEOUT_SECONDS``. Checks still running after
+            the timeout are reported as errors and left to finish in the
+            background.
         
         Returns
         -------
         Dict[str, Dict[str, Any]]
             All validation results
         """
-        self.validate_system()
-        self.validate_gpu()
-        self.validate_hana_connection()
-        self.validate_ai_core_sdk()
-        self.validate_environment_variables()
+        timeout = settings.VALIDATION_CHECK_TIMEOUT_SECONDS if timeout is None else timeout
+        checks = {
+            "system": self.validate_system,
+            "gpu": self.validate_gpu,
+            "hana_connection": self.validate_hana_connection,
+            "ai_core_sdk": self.validate_ai_core_sdk,
+            "environment_variables": self.validate_environment_variables
+        }
+        start_time = time.time()
+        executor = ThreadPoolExecutor(max_workers=len(checks), thread_name_prefix="validation")
+        futures = {name: executor.submit(check) for name, check in checks.items()}
+        # Do not wait for checks that time out
+        executor.shutdown(wait=False)
+        
+        # All checks start together, so they share one deadline
+        deadline = time.monotonic() + timeout
+        results = {}
+        for name, future in futures.items():
+            try:
+                results[name] = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except FutureTimeoutError:
+                results[name] = {
+                    "status": "error",
+                    "details": {
+                        "message": f"Check timed out after {timeout:g}s"
+                    }
+                }
+            except Exception as e:
+                results[name] = {
+                    "status": "error",
+                    "details": {
+                        "error": str(e)
+                    }
+                }
         
         # Determine overall status
-        error_components = [k for k, v in self.validation_results.items() if v["status"] == "error"]
-        warning_components = [k for k, v in self.validation_results.items() if v["status"] == "warning"]
+        error_components = [k for k, v in results.items() if v["status"] == "error"]
+        warning_components = [k for k, v in results.items() if v["status"] == "warning"]
         
         if error_components:
             overall_status = "error"
@@ -537,13 +583,16 @@ class EnvironmentValidator:
             overall_status = "ok"
             message = "All validations passed successfully"
         
-        self.validation_results["overall"] = {
+        results["overall"] = {
             "status": overall_status,
             "message": message,
-            "timestamp": time.time()
+            "timestamp": time.time(),
+            "duration_ms": round((time.time() - start_time) * 1000, 2)
         }
         
-        return self.validation_results
+        # A timed-out check may still write to self.validation_results later;
+        # the returned results are not affected
+        return results
     
     def _check_network_connectivity(self) -> bool:
         """
@@ -588,4 +637,125 @@ def validate_environment() -> Dict[str, Any]:
         Validation results
     """
     validator = EnvironmentValidator()
-    return validator.validate_all()
\ No newline at end of file
+    return validator.validate_all()
+
+def _log_results(validation_results: Dict[str, Any]):
+    overall = validation_results["overall"]
+    if overall["status"] == "error":
+        logger.error(f"Environment validation failed: {overall['message']}", extra={"validation": validation_results})
+    elif overall["status"] == "warning":
+        logger.warning(f"Environment validation warnings: {overall['message']}", extra={"validation": validation_results})
+    else:
+        logger.info("Environment validation passed successfully", extra={"validation": validation_results})
+
+class ValidationCache:
+    """
+    Latest environment validation results, refreshed in the background.
+    
+    Concurrent refreshes are coalesced: callers arriving while a refresh
+    runs wait for its results instead of starting another one.
+    
+    Parameters
+    ----------
+    ttl_seconds : int, optional
+        Age after which ``get`` triggers a background refresh; defaults to
+        ``VALIDATION_CACHE_TTL_SECONDS``
+    min_refresh_seconds : int, optional
+        ``refresh`` returns results younger than this instead of validating
+        again; defaults to ``VALIDATION_MIN_REFRESH_SECONDS``
+    validate : Callable[[], Dict[str, Any]], optional
+        Runs the validation; defaults to ``validate_environment``
+    """
+    def __init__(self, ttl_seconds: Optional[int] = None, min_refresh_seconds: Optional[int] = None,
+                 validate: Optional[Callable[[], Dict[str, Any]]] = None):
+        self.ttl_seconds = settings.VALIDATION_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.min_refresh_seconds = (
+            settings.VALIDATION_MIN_REFRESH_SECONDS if min_refresh_seconds is None else min_refresh_seconds
+        )
+        self._validate = validate
+        self._lock = threading.Lock()
+        self._results: Optional[Dict[str, Any]] = None
+        self._updated_at = 0.0
+        self._running: Optional[threading.Event] = None
+    
+    @property
+    def age(self) -> Optional[float]:
+        """Seconds since the results were produced, or None if there are none."""
+        if self._results is None:
+            return None
+        return time.monotonic() - self._updated_at
+    
+    def get(self) -> Optional[Dict[str, Any]]:
+        """
+        Get the cached results without validating on the calling thread.
+        
+        Starts a background refresh if there are no results yet or they
+        are older than the TTL.
+        
+        Returns
+        -------
+        Dict[str, Any] or None
+            The latest results, or None before the first validation finished
+        """
+        results, age = self._results, self.age
+        if age is None or age >= self.ttl_seconds:
+            self.refresh_in_background()
+        return results
+    
+    def refresh(self) -> Optional[Dict[str, Any]]:
+        """
+        Validate now and return the results.
+        
+        Returns results younger than ``min_refresh_seconds`` as they are,
+        and joins a refresh that is already running.
+        
+        Returns
+        -------
+        Dict[str, Any] or None
+            The latest results, or None if validation failed to run
+        """
+        with self._lock:
+            if self._results is not None and time.monotonic() - self._updated_at < self.min_refresh_seconds:
+                return self._results
+            done = self._running
+            leader = done is None
+            if leader:
+                done = self._running = threading.Event()
+        if leader:
+            self._run(done)
+        else:
+            done.wait()
+        return self._results
+    
+    def refresh_in_background(self) -> bool:
+        """
+        Start a refresh in a background thread unless one is running.
+        
+        Returns
+        -------
+        bool
+            True if a refresh was started
+        """
+        with self._lock:
+            if self._running is not None:
+                return False
+            done = self._running = threading.Event()
+        threading.Thread(target=self._run, args=(done,), name="validation-refresh", daemon=True).start()
+        return True
+    
+    def _run(self, done: threading.Event):
+        try:
+            results = (self._validate or validate_environment)()
+            with self._lock:
+                self._results = results
+                self._updated_at = time.monotonic()
+            _log_results(results)
+        except Exception as e:
+            logger.error(f"Environment validation failed to run: {str(e)}")
+        finally:
+            with self._lock:
+                self._running = None
+            done.set()
+
+# Global validation results cache
+validation_cache = ValidationCache()
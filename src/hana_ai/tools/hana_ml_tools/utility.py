@@ -3,8 +3,9 @@ Utility functions for the HANA ML tools.
 """
 import json
 from datetime import datetime, date
+from decimal import Decimal
 from pandas import Timestamp
-from numpy import int64
+from numpy import generic, int64, ndarray
 
 class _CustomEncoder(json.JSONEncoder):
     """
@@ -17,6 +18,13 @@ class _CustomEncoder(json.JSONEncoder):
         elif isinstance(obj, (int64, int)):
             # Convert numpy int64 or Python int to Python int
             return int(obj)
+        elif isinstance(obj, generic):
+            # Convert any other numpy scalar (float32, bool_, ...) to its Python value
+            return obj.item()
+        elif isinstance(obj, ndarray):
+            return obj.tolist()
+        elif isinstance(obj, Decimal):
+            return float(obj)
         # Let other types use the default handler
         return super().default(obj)
 
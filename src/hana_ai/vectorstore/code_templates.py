@@ -8,6 +8,7 @@ The following functions are available:
     * :func `get_code_templates`
 """
 # pylint: disable=consider-using-in
+import functools
 import os
 
 def get_code_templates(option=None, customized_dir=None):
@@ -26,9 +27,6 @@ def get_code_templates(option=None, customized_dir=None):
     Dict
         A dictionary containing the code templates with the following keys: 'id', 'description', 'example'.
     """
-    ids = []
-    descriptions = []
-    examples = []
     if option is None:
         option = 'python'
     if option:
@@ -39,16 +37,37 @@ def get_code_templates(option=None, customized_dir=None):
         if option == 'sql':
             temp_directory = os.path.join(os.path.dirname(__file__), "knowledge_base", "sql_knowledge")
         if customized_dir:
-            temp_directory = customized_dir
-        for filename in os.listdir(temp_directory):
-            if filename.endswith('.txt'):
-                with open(os.path.join(temp_directory, filename)) as f:
-                    ids.append(filename.replace(".txt", ""))
-                    contents = f.read()
-                    #split contents by '------' into two parts: description and example
-                    contents = contents.split('------', maxsplit=1)
-                    #description
-                    descriptions.append(contents[0])
-                    #example
-                    examples.append(contents[1])
-    return {"id": ids, "description": descriptions, "example": examples}
+            ids, descriptions, examples = _read_templates(customized_dir)
+        else:
+            ids, descriptions, examples = _load_templates(temp_directory)
+        return {"id": list(ids), "description": list(descriptions), "example": list(examples)}
+    return {"id": [], "description": [], "example": []}
+
+@functools.lru_cache(maxsize=2)
+def _load_templates(temp_directory):
+    """
+    Read the bundled templates once per process.
+
+    Returns tuples so the cached result cannot be modified by callers.
+    """
+    return _read_templates(temp_directory)
+
+def _read_templates(temp_directory):
+    """
+    Read the templates of a directory.
+    """
+    ids = []
+    descriptions = []
+    examples = []
+    for filename in os.listdir(temp_directory):
+        if filename.endswith('.txt'):
+            with open(os.path.join(temp_directory, filename)) as f:
+                ids.append(filename.replace(".txt", ""))
+                contents = f.read()
+                #split contents by '------' into two parts: description and example
+                contents = contents.split('------', maxsplit=1)
+                #description
+                descriptions.append(contents[0])
+                #example
+                examples.append(contents[1])
+    return tuple(ids), tuple(descriptions), tuple(examples)
@@ -13,15 +13,6 @@ The following class is available:
 
 import logging
 from typing import TypedDict, Dict
-# try to import langgraph, if not installed, install it
-try:
-    from langgraph.graph import END, StateGraph
-except ImportError:
-    import subprocess
-    import sys
-
-    subprocess.check_call([sys.executable, "-m", "pip", "install", "langgraph"])
-    from langgraph.graph import END, StateGraph
 from langchain.output_parsers.pydantic import PydanticOutputParser
 from langchain.prompts import PromptTemplate
 from pydantic import BaseModel, Field
@@ -29,6 +20,16 @@ from pydantic import BaseModel, Field
 
 logger = logging.getLogger(__name__) #pylint: disable=invalid-name
 
+def _import_langgraph():
+    """
+    Import langgraph on first use; it is an optional dependency that is slow to import.
+    """
+    try:
+        from langgraph.graph import END, StateGraph
+    except ImportError as err:
+        raise ImportError("langgraph is not installed. run `pip install langgraph`.") from err
+    return END, StateGraph
+
 class GraphState(TypedDict):
     """
     Represents the state of our graph.
@@ -58,7 +59,7 @@ class CorrectiveRetriever(object):
     llm: any
     max_iter: int
     recursion_limit: int
-    workflow: StateGraph
+    workflow: any
     def __init__(self, vectordb, llm, max_iter=3, recursion_limit=100):
         """
         Init corrective retriever.
@@ -67,6 +68,7 @@ class CorrectiveRetriever(object):
         self.max_iter = max_iter
         self.llm = llm
         self.recursion_limit = recursion_limit
+        _, StateGraph = _import_langgraph()
         self.workflow = StateGraph(GraphState)
 
     def _retrieve(self, state):
@@ -241,6 +243,7 @@ class CorrectiveRetriever(object):
                 "generate": "generate",
             },
         )
+        END, _ = _import_langgraph()
         workflow.add_edge("generate", END)
 
         # Compile
@@ -256,14 +259,12 @@ class CorrectiveRetriever(object):
         result = None
         for output in app.stream(inputs,{"recursion_limit": self.recursion_limit}):
             for key, value in output.items():
-                # Node
-                logger.info(f"Node '{key}':")
-                # Optional: print full state
-                logger.info(value["keys"], indent=2, width=80, depth=None)
+                # Node; the full state is only rendered if debug logging is enabled
+                logger.info("Node '%s'", key)
+                logger.debug("Node '%s' state: %s", key, value["keys"])
                 result = value
-            logger.info("\n---\n")
 
 
         # Final generation
-        logger.info(result["keys"]["generation"])
+        logger.debug("Generation: %s", result["keys"]["generation"])
         return result["keys"]["generation"]
@@ -1,6 +1,7 @@
 """
 Pytest fixtures for API tests.
 """
+import sqlite3
 import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import MagicMock, patch
@@ -8,6 +9,20 @@ from unittest.mock import MagicMock, patch
 from hana_ai.api.app import app
 from hana_ai.api.config import settings
 
+@pytest.fixture(autouse=True)
+def job_store_path(tmp_path, monkeypatch):
+    """
+    Keep the job store of the app in the test's temporary directory.
+    """
+    from hana_ai.api.jobs import job_manager
+
+    path = str(tmp_path / "jobs.db")
+    monkeypatch.setattr(settings, "JOB_STORE_PATH", path)
+    job_manager.store.close()
+    monkeypatch.setattr(job_manager.store, "path", path)
+    yield path
+    job_manager.store.close()
+
 @pytest.fixture
 def test_client():
     """
@@ -43,6 +58,28 @@ def mock_connection_context():
     with patch("hana_ai.api.dependencies.get_connection_context", return_value=mock_conn):
         yield mock_conn
 
+@pytest.fixture
+def sales_rows():
+    """
+    Rows of the SALES table of ``connection_context``: ID, REGION, AMOUNT.
+    
+    Override it in a test module to change the table contents.
+    """
+    return [(i, "EU" if i % 2 else "US", i * 0.5) for i in range(12)]
+
+@pytest.fixture
+def connection_context(sales_rows):
+    """
+    Create a connection context backed by an in-memory database.
+    """
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    conn.execute("CREATE TABLE SALES (ID INTEGER, REGION TEXT, AMOUNT REAL)")
+    conn.executemany("INSERT INTO SALES VALUES (?, ?, ?)", sales_rows)
+    mock_cc = MagicMock()
+    mock_cc.connection = conn
+    yield mock_cc
+    conn.close()
+
 @pytest.fixture
 def mock_llm():
     """
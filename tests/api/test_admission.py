@@ -0,0 +1,119 @@
+"""
+Tests for admission control and load shedding.
+"""
+import asyncio
+from unittest.mock import patch
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from hana_ai.api.admission import AdmissionController
+from hana_ai.api.env_constants import DEFAULT_ADMISSION_ROUTE_PRIORITIES
+from hana_ai.api.middleware import APIMiddleware
+from hana_ai.api.rate_limit import MemoryBucketStore, RateLimiter
+
+def _controller(max_concurrent=1, target_delay=0.01, interval=0.05, queue_timeout=1.0, max_queue=10):
+    return AdmissionController(max_concurrent, target_delay, interval, queue_timeout, max_queue,
+                               DEFAULT_ADMISSION_ROUTE_PRIORITIES)
+
+def test_routes_are_classified():
+    """Test that routes map to priority classes and health checks are exempt."""
+    controller = _controller()
+
+    assert controller.priority("GET", "/health/ready") is None
+    assert controller.priority("POST", "/api/v1/dataframes/query") == "interactive"
+    assert controller.priority("POST", "/api/v1/agents/conversation") == "conversation"
+    assert controller.priority("POST", "/api/v1/jobs") == "batch"
+    assert controller.priority("GET", "/api/v1/jobs") == "interactive"
+    assert controller.priority("POST", "/api/v1/jobs/abc/cancel") == "interactive"
+
+def test_higher_priorities_are_admitted_first():
+    """Test that a freed slot goes to the highest waiting class."""
+    controller = _controller()
+    admitted = []
+
+    async def request(priority):
+        assert await controller.admit(priority)
+        admitted.append(priority)
+
+    async def run():
+        assert await controller.admit("interactive")
+        waiting = [asyncio.ensure_future(request(priority)) for priority in ("batch", "conversation", "interactive")]
+        await asyncio.sleep(0)
+        for _ in range(3):
+            controller.release()
+            await asyncio.sleep(0)
+        await asyncio.gather(*waiting)
+        controller.release()
+
+    asyncio.run(run())
+
+    assert admitted == ["interactive", "conversation", "batch"]
+    assert controller.in_flight == 0
+
+def test_standing_queue_sheds_batch_requests():
+    """Test that a queueing delay above target for an interval sheds batch requests on arrival."""
+    controller = _controller()
+
+    async def run():
+        assert await controller.admit("interactive")
+        waiting = [asyncio.ensure_future(controller.admit("interactive")) for _ in range(5)]
+        for _ in range(3):
+            await asyncio.sleep(0.03)
+            controller.release()
+        overloaded = controller.overloaded
+        shed = await controller.admit("batch")
+        for _ in range(2):
+            controller.release()
+            await asyncio.sleep(0)
+        assert all(await asyncio.gather(*waiting))
+        controller.release()
+        return overloaded, shed
+
+    overloaded, shed = asyncio.run(run())
+
+    assert overloaded
+    assert shed is False
+    assert controller.in_flight == 0
+
+def test_full_queue_sheds_lower_priorities():
+    """Test that an interactive request displaces the newest batch request from a full queue."""
+    controller = _controller(max_queue=1)
+
+    async def run():
+        assert await controller.admit("interactive")
+        batch = asyncio.ensure_future(controller.admit("batch"))
+        await asyncio.sleep(0)
+        interactive = asyncio.ensure_future(controller.admit("interactive"))
+        await asyncio.sleep(0)
+        controller.release()
+        results = await asyncio.gather(batch, interactive)
+        controller.release()
+        return results
+
+    assert asyncio.run(run()) == [False, True]
+
+async def ok_endpoint(request):
+    return JSONResponse({"ok": True})
+
+@patch("hana_ai.api.middleware.settings")
+def test_shed_requests_get_503_with_retry_after(mock_settings):
+    """Test that shed requests are rejected immediately while health checks pass."""
+    mock_settings.DEVELOPMENT_MODE = False
+    mock_settings.RESTRICT_EXTERNAL_CALLS = False
+    mock_settings.REQUEST_TIMEOUT_SECONDS = 0
+    controller = _controller()
+    controller.in_flight = 1
+    controller.overloaded = True
+    app = Starlette(routes=[Route("/api/v1/jobs", ok_endpoint, methods=["POST"]), Route("/health/live", ok_endpoint)])
+    app.add_middleware(APIMiddleware, limiter=RateLimiter(MemoryBucketStore(), 100), admission=controller)
+    client = TestClient(app, base_url="http://localhost")
+
+    response = client.post("/api/v1/jobs")
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert response.json()["priority"] == "batch"
+    assert client.get("/health/live").status_code == 200
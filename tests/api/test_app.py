@@ -1,6 +1,10 @@
 """
 Tests for the main FastAPI application.
 """
+import os
+import subprocess
+import sys
+
 import pytest
 from fastapi.testclient import TestClient
 
@@ -49,4 +53,14 @@ def test_cors_headers(test_client):
     )
     assert response.status_code == 200
     assert "access-control-allow-origin" in response.headers
-    assert "access-control-allow-methods" in response.headers
\ No newline at end of file
+    assert "access-control-allow-methods" in response.headers
+
+def test_app_import_defers_heavy_modules():
+    """Test that importing the app does not import the toolkit, agents or GPU libraries."""
+    deferred = ["torch", "langgraph", "langchain", "langchain_core", "hana_ml", "pandas",
+                "hana_ai.tools.toolkit", "hana_ai.api.gpu_utils"]
+    code = f"import sys, hana_ai.api.app; print([m for m in {deferred!r} if m in sys.modules])"
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, check=True)
+
+    assert result.stdout.strip().splitlines()[-1] == "[]"
@@ -0,0 +1,29 @@
+"""
+Tests for lazily started background threads.
+"""
+import os
+import threading
+from unittest.mock import patch
+
+from hana_ai.api.background import BackgroundThread
+
+def test_thread_starts_once_per_process():
+    """Test that the thread starts on first use, and again after a fork."""
+    release = threading.Event()
+    thread = BackgroundThread(release.wait, "test-background")
+    assert not thread.running
+
+    thread.ensure_started()
+    first = thread.thread
+    thread.ensure_started()
+    assert thread.running and thread.thread is first
+    assert first.name == "test-background"
+
+    with patch("hana_ai.api.background.os.getpid", return_value=os.getpid() + 1):
+        assert not thread.running
+        thread.ensure_started()
+        assert thread.running and thread.thread is not first
+
+    release.set()
+    first.join(timeout=1.0)
+    thread.thread.join(timeout=1.0)
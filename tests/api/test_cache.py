@@ -0,0 +1,174 @@
+"""
+Tests for the response cache.
+"""
+import time
+
+import pytest
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+from unittest.mock import MagicMock
+
+from hana_ai.api.cache import (
+    ResponseCache,
+    cached_json_response,
+    make_cache_key,
+    normalize_sql,
+    response_cache
+)
+from hana_ai.api.failover import CircuitBreaker
+from hana_ai.api.timing import is_connection_error
+
+def test_normalize_sql():
+    """Test that equivalent SQL statements normalize to the same text."""
+    assert normalize_sql("select *\n  from   sales;") == normalize_sql("SELECT * FROM SALES")
+    
+    # Quoted literals and identifiers keep their case and spacing
+    assert "'Hello  World'" in normalize_sql("select * from t where c = 'Hello  World'")
+    assert '"MixedCase"' in normalize_sql('select * from "MixedCase"')
+
+def test_cache_key_scoped_by_api_key():
+    """Test that cache keys differ per API key and are order independent."""
+    key_a = make_cache_key("dataframes.query", "key-a", {"query": "X", "limit": 10})
+    key_b = make_cache_key("dataframes.query", "key-b", {"query": "X", "limit": 10})
+    key_a_reordered = make_cache_key("dataframes.query", "key-a", {"limit": 10, "query": "X"})
+    
+    assert key_a != key_b
+    assert key_a == key_a_reordered
+    assert "key-a" not in key_a
+
+def test_cache_is_byte_bounded():
+    """Test that the least recently used entries are evicted by size."""
+    cache = ResponseCache(max_bytes=25, default_ttl=60)
+    cache.set("a", b"x" * 10, "application/json", 60)
+    cache.set("b", b"x" * 10, "application/json", 60)
+    cache.get("a")  # a becomes most recently used
+    cache.set("c", b"x" * 10, "application/json", 60)
+    
+    assert cache.get("a") is not None
+    assert cache.get("b") is None
+    assert cache.get("c") is not None
+    assert cache.stats()["size_bytes"] == 20
+
+def test_expired_entries_are_misses():
+    """Test that entries past their TTL are not served."""
+    cache = ResponseCache(max_bytes=1024, default_ttl=60, route_ttls={"tools.list": 3600})
+    cache.set("a", b"{}", "application/json", 0)
+    
+    assert cache.get("a") is None
+    assert cache.ttl_for("tools.list") == 3600
+    assert cache.ttl_for("unknown") == 60
+
+def test_expired_entries_kept_for_stale_use():
+    """Test that expired entries stay available as stale until their stale TTL passes."""
+    cache = ResponseCache(max_bytes=1024, default_ttl=60, stale_ttls={"tools.list": 3600})
+    cache.set("a", b"{}", "application/json", 0, cache.stale_ttl_for("tools.list"))
+    cache.set("b", b"{}", "application/json", 0, cache.stale_ttl_for("unknown"))
+    
+    assert cache.get("a") is None
+    assert cache.get_stale("a") is not None
+    assert cache.get("b") is None
+    assert cache.get_stale("b") is None
+    assert cache.stats()["entries"] == 1
+
+def test_breaker_counts_only_connection_errors():
+    """Test that SQL errors of a reachable database do not open the circuit."""
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    sql_error = Exception("invalid table name")
+    connection_error = Exception("Connection failed")
+    connection_error.errorcode = -10709
+    
+    for error in (connection_error, sql_error, connection_error, ConnectionResetError()):
+        with pytest.raises(Exception):
+            with breaker.protect("db select", is_connection_error):
+                raise error
+    
+    assert breaker.is_open
+    assert 0 < breaker.seconds_until_half_open() <= 60
+
+@pytest.fixture
+def cached_app():
+    """Create a minimal app with one cached route."""
+    producer = MagicMock(return_value={"tables": ["A", "B"]})
+    app = FastAPI()
+    
+    @app.get("/tables")
+    async def tables(request: Request):
+        return await cached_json_response(request, "test.tables", "key", {}, producer)
+    
+    response_cache.invalidate()
+    with TestClient(app) as client:
+        yield client, producer
+    response_cache.invalidate()
+
+def test_cached_response_hit_and_etag(cached_app):
+    """Test cache hits, ETag headers and 304 responses."""
+    client, producer = cached_app
+    
+    first = client.get("/tables")
+    assert first.status_code == 200
+    assert first.headers["X-Cache"] == "MISS"
+    assert first.json() == {"tables": ["A", "B"]}
+    etag = first.headers["ETag"]
+    
+    second = client.get("/tables")
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.headers["ETag"] == etag
+    assert "max-age" in second.headers["Cache-Control"]
+    
+    not_modified = client.get("/tables", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    
+    producer.assert_called_once()
+
+def test_no_cache_request_refreshes(cached_app):
+    """Test that Cache-Control: no-cache bypasses the lookup."""
+    client, producer = cached_app
+    
+    client.get("/tables")
+    response = client.get("/tables", headers={"Cache-Control": "no-cache"})
+    
+    assert response.headers["X-Cache"] == "MISS"
+    assert producer.call_count == 2
+
+@pytest.fixture
+def stale_app(cached_app, monkeypatch):
+    """Make responses of the cached route expire at once but stay usable stale."""
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.2)
+    monkeypatch.setattr("hana_ai.api.cache.database_breaker", lambda: breaker)
+    monkeypatch.setitem(response_cache.route_ttls, "test.tables", 0)
+    monkeypatch.setitem(response_cache.stale_ttls, "test.tables", 60)
+    client, producer = cached_app
+    return client, producer, breaker
+
+def test_stale_response_while_circuit_open(stale_app):
+    """Test that an open circuit serves the stale entry and revalidates it once half-open."""
+    client, producer, breaker = stale_app
+    
+    assert client.get("/tables").headers["X-Cache"] == "MISS"
+    breaker._on_failure("db select")
+    producer.return_value = {"tables": ["A", "B", "C"]}
+    
+    stale = client.get("/tables")
+    assert stale.status_code == 200
+    assert stale.headers["X-Cache"] == "STALE"
+    assert stale.headers["Warning"] == '110 - "Response is Stale"'
+    assert stale.json() == {"tables": ["A", "B"]}
+    assert producer.call_count == 1
+    
+    time.sleep(0.5)
+    assert producer.call_count == 2
+    breaker._on_failure("db select")
+    assert client.get("/tables").json() == {"tables": ["A", "B", "C"]}
+
+def test_stale_response_on_server_error(stale_app):
+    """Test that server errors serve the stale entry while client errors are raised."""
+    client, producer, breaker = stale_app
+    
+    client.get("/tables")
+    producer.side_effect = RuntimeError("Connection failed")
+    stale = client.get("/tables")
+    assert stale.headers["X-Cache"] == "STALE"
+    assert stale.json() == {"tables": ["A", "B"]}
+    
+    producer.side_effect = HTTPException(status_code=400, detail="Invalid schema")
+    assert client.get("/tables").status_code == 400
@@ -0,0 +1,186 @@
+"""
+Tests for the adaptive backend concurrency limits.
+"""
+import asyncio
+import threading
+import time
+import uuid
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from hana_ai.api.failover import (
+    AdaptiveConcurrencyLimit,
+    ConcurrencyLimitExceededError,
+    FailoverManager,
+    failover_manager,
+)
+from hana_ai.api.deadline import DeadlineExceeded, deadline_scope
+from hana_ai.api.timing import (
+    RequestTimings,
+    _concurrency_handler,
+    _timing_handler,
+    instrument_connection,
+    request_timings_contextvar,
+)
+
+def _call(limit, latency, dropped=False):
+    """Record a call of the given latency without sleeping."""
+    start = limit.acquire()
+    limit.release(start - latency, dropped)
+
+def test_limit_backs_off_when_latency_rises():
+    """Test that latency beyond the tolerance lowers the limit, at most once per latency window."""
+    limit = AdaptiveConcurrencyLimit("hana", initial_limit=20, min_limit=2, tolerance=2.0, backoff_ratio=0.5)
+
+    _call(limit, 0.01)
+    _call(limit, 0.1)
+    assert int(limit.limit) == 10
+    _call(limit, 0.1)
+    assert int(limit.limit) == 10
+
+    for _ in range(5):
+        limit._last_decrease = 0.0
+        _call(limit, 0.0, dropped=True)
+    assert int(limit.limit) == 2
+
+def test_limit_grows_while_in_use():
+    """Test that the limit grows while at least half of it is in flight at baseline latency."""
+    limit = AdaptiveConcurrencyLimit("llm", initial_limit=4, max_limit=5)
+
+    _call(limit, 0.01)
+    assert limit.limit == 4
+
+    for _ in range(20):
+        starts = [limit.acquire() for _ in range(int(limit.limit))]
+        for start in starts:
+            limit.release(start - 0.01)
+    assert limit.limit == 5
+
+def test_calls_are_rejected_when_no_slot_frees_up():
+    """Test that callers wait for a slot and are rejected after the queue timeout."""
+    limit = AdaptiveConcurrencyLimit("hana", initial_limit=2, min_limit=2, queue_timeout=0.05)
+    held = [limit.acquire(), limit.acquire()]
+
+    with pytest.raises(ConcurrencyLimitExceededError):
+        limit.acquire()
+    assert limit.rejections == 1
+
+    threading.Timer(0.01, limit.release, args=(held.pop(),)).start()
+    limit.release(limit.acquire())
+    assert limit.in_flight == 1
+
+def test_service_status_reports_concurrency():
+    """Test that limits are registered as services of the failover manager."""
+    manager = FailoverManager()
+    limit = manager.concurrency_limit("llm", initial_limit=8)
+
+    assert manager.concurrency_limit("llm") is limit
+    assert manager.get_service_status()["llm"]["concurrency"]["limit"] == 8
+
+def test_statements_of_requests_take_hana_slots():
+    """Test that statements take a slot of the HANA limit only within requests."""
+    connection_context = instrument_connection(MagicMock())
+    cursor = connection_context.connection.cursor()
+    limit = failover_manager.concurrency_limit("hana")
+    seen = []
+    connection_context.connection._connection.cursor.return_value.execute.side_effect = (
+        lambda sql: seen.append(limit.in_flight)
+    )
+    in_flight = limit.in_flight
+
+    cursor.execute("SELECT 1 FROM DUMMY")
+    token = request_timings_contextvar.set(RequestTimings({}))
+    try:
+        cursor.execute("SELECT 1 FROM DUMMY")
+    finally:
+        request_timings_contextvar.reset(token)
+
+    assert seen == [in_flight, in_flight + 1]
+    assert limit.in_flight == in_flight
+
+def test_expired_deadlines_do_not_adapt_the_limit():
+    """Test that statements stopped at a client's deadline free their slot without lowering the limit."""
+    connection_context = instrument_connection(MagicMock())
+    cursor = connection_context.connection.cursor()
+    limit = failover_manager.concurrency_limit("hana")
+    before = (limit.limit, limit.baseline, limit.in_flight)
+    
+    def cancelled(sql):
+        time.sleep(0.02)
+        raise RuntimeError("statement cancelled")
+    
+    connection_context.connection._connection.cursor.return_value.execute.side_effect = cancelled
+    token = request_timings_contextvar.set(RequestTimings({}))
+    try:
+        for _ in range(5):
+            with deadline_scope(0.01):
+                with pytest.raises(DeadlineExceeded):
+                    cursor.execute("SELECT * FROM SALES")
+    finally:
+        request_timings_contextvar.reset(token)
+    
+    assert (limit.limit, limit.baseline, limit.in_flight) == before
+
+def test_rejected_llm_calls_end_the_runs_of_other_handlers():
+    """Test that a rejection does not leave timing runs of the rejected call behind."""
+    limit = AdaptiveConcurrencyLimit("llm", initial_limit=1, min_limit=1, queue_timeout=0.01)
+    held = limit.acquire()
+    run_id = uuid.uuid4()
+    
+    with patch("hana_ai.api.timing.backend_limit", return_value=limit):
+        _timing_handler().on_llm_start({"name": "fake"}, ["hi"], run_id=run_id)
+        with pytest.raises(ConcurrencyLimitExceededError):
+            _concurrency_handler().on_llm_start({"name": "fake"}, ["hi"], run_id=run_id)
+    
+    assert run_id not in _timing_handler()._runs
+    assert run_id not in _concurrency_handler()._runs
+    limit.release(held)
+
+def test_waiting_for_a_slot_does_not_block_the_event_loop(mock_tools):
+    """Test that a tool of an async route waits for a saturated limit off the event loop."""
+    from hana_ai.api.routers.tools import ToolRequest, execute_tool
+    
+    limit = AdaptiveConcurrencyLimit("hana", initial_limit=1, min_limit=1, queue_timeout=1.0)
+    held = limit.acquire()
+    mock_tools[0].run.side_effect = lambda parameters: limit.release(limit.acquire())
+    
+    async def run():
+        ticks = 0
+        
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+        
+        ticking = asyncio.ensure_future(ticker())
+        asyncio.get_running_loop().call_later(0.2, limit.release, held)
+        response = await execute_tool(
+            ToolRequest(tool_name="test_tool", parameters={}),
+            api_key="test_key",
+            connection_context=MagicMock(),
+            llm=MagicMock()
+        )
+        ticking.cancel()
+        return response, ticks
+    
+    response, ticks = asyncio.run(run())
+    
+    assert response.status_code == 200
+    assert ticks >= 10
+    assert limit.in_flight == 0
+
+def test_calls_on_the_event_loop_are_rejected_without_waiting():
+    """Test that a saturated limit rejects a call on the event loop at once instead of stalling it."""
+    limit = AdaptiveConcurrencyLimit("llm", initial_limit=1, min_limit=1, queue_timeout=5.0)
+    held = limit.acquire()
+    
+    async def acquire():
+        started = time.monotonic()
+        with pytest.raises(ConcurrencyLimitExceededError):
+            limit.acquire()
+        return time.monotonic() - started
+    
+    assert asyncio.run(acquire()) < 0.1
+    limit.release(held)
@@ -0,0 +1,102 @@
+"""
+Tests for request deadlines and cooperative cancellation.
+"""
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from hana_ai.api.deadline import (
+    Deadline,
+    DeadlineExceeded,
+    check_deadline,
+    deadline_contextvar,
+    deadline_scope,
+    remaining_time,
+)
+from hana_ai.api.failover import with_timeout
+from hana_ai.api.middleware import _request_timeout
+from hana_ai.api.timing import instrument_connection, instrument_langchain
+
+def test_scopes_only_shorten_deadlines():
+    """Test that nested scopes keep the earlier deadline and expired work is refused."""
+    assert remaining_time() is None
+    with deadline_scope(10):
+        with deadline_scope(60):
+            assert remaining_time() <= 10
+        with deadline_scope(0.01):
+            time.sleep(0.02)
+            with pytest.raises(DeadlineExceeded, match="before embedding"):
+                check_deadline("embedding")
+        check_deadline("embedding")
+
+def test_running_statement_is_cancelled_on_the_server():
+    """Test that a statement still running at the deadline is cancelled through its connection."""
+    connection_context = instrument_connection(MagicMock())
+    connection = connection_context.connection._connection
+    cancelled = threading.Event()
+    connection.cancel.side_effect = cancelled.set
+    cursor = connection.cursor.return_value
+
+    def execute(sql):
+        if not cancelled.wait(5):
+            return True
+        raise RuntimeError("statement cancelled")
+    cursor.execute.side_effect = execute
+
+    start = time.monotonic()
+    with deadline_scope(0.1):
+        with pytest.raises(DeadlineExceeded) as error:
+            connection_context.connection.cursor().execute("SELECT * FROM BIG_TABLE")
+        with pytest.raises(DeadlineExceeded):
+            connection_context.connection.cursor().execute("SELECT 1 FROM DUMMY")
+
+    assert time.monotonic() - start < 2
+    assert isinstance(error.value.__cause__, RuntimeError)
+    cursor.setquerytimeout.assert_called_once_with(1)
+    assert cursor.execute.call_count == 1
+
+def test_tool_runs_are_refused_after_the_deadline():
+    """Test that LangChain tool runs check the deadline without explicit callbacks."""
+    from langchain_core.tools import tool
+
+    @tool
+    def lookup(query: str) -> str:
+        """Look something up."""
+        return query.upper()
+
+    assert instrument_langchain()
+    token = deadline_contextvar.set(Deadline(0))
+    try:
+        with pytest.raises(DeadlineExceeded, match="before tool lookup"):
+            lookup.run("abc")
+    finally:
+        deadline_contextvar.reset(token)
+    assert lookup.run("abc") == "ABC"
+
+@patch("hana_ai.api.middleware.settings")
+def test_request_timeout_header(mock_settings):
+    """Test that clients can shorten but not extend the request deadline."""
+    mock_settings.REQUEST_TIMEOUT_SECONDS = 300
+
+    assert _request_timeout({"headers": []}) == 300
+    assert _request_timeout({"headers": [(b"x-request-timeout", b"2.5")]}) == 2.5
+    assert _request_timeout({"headers": [(b"x-request-timeout", b"900")]}) == 300
+    assert _request_timeout({"headers": [(b"x-request-timeout", b"soon")]}) == 300
+    mock_settings.REQUEST_TIMEOUT_SECONDS = 0
+    assert _request_timeout({"headers": []}) is None
+
+def test_timeout_runs_in_the_calling_thread():
+    """Test that the timeout decorator bounds work cooperatively without a helper thread."""
+    threads = []
+
+    @with_timeout(0.05)
+    def slow():
+        threads.append(threading.current_thread())
+        time.sleep(0.1)
+        check_deadline("next step")
+
+    with pytest.raises(TimeoutError):
+        slow()
+    assert threads == [threading.current_thread()]
@@ -75,6 +75,10 @@ def test_connection_error_handling():
 def test_get_llm():
     """Test the get_llm dependency."""
     from hana_ai.api.dependencies import get_llm
+    from hana_ai.api.llm_cache import llm_client_cache
+    
+    # Start from an empty LLM client cache
+    llm_client_cache.clear()
     
     # Create mock request
     mock_request = MagicMock(spec=Request)
@@ -95,6 +99,7 @@ def test_get_llm():
         mock_init_llm.assert_called_once()
     
     # Test with ImportError (fallback to FakeListLLM)
+    llm_client_cache.clear()
     with patch("gen_ai_hub.proxy.langchain.init_llm", side_effect=ImportError), \
          patch("langchain_community.llms.FakeListLLM") as mock_fake_llm:
         # Configure the mock
@@ -113,6 +118,10 @@ def test_get_llm():
 def test_llm_error_handling():
     """Test error handling in get_llm."""
     from hana_ai.api.dependencies import get_llm
+    from hana_ai.api.llm_cache import llm_client_cache
+    
+    # Start from an empty LLM client cache
+    llm_client_cache.clear()
     
     # Create mock request
     mock_request = MagicMock(spec=Request)
@@ -127,4 +136,23 @@ def test_llm_error_handling():
         
         # Verify the exception details
         assert excinfo.value.status_code == 500
-        assert "LLM error" in excinfo.value.detail
\ No newline at end of file
+        assert "LLM error" in excinfo.value.detail
+
+def test_device_profile_uses_gpu_manager():
+    """Test that the GPU manager is created once and keys the device profile."""
+    from types import SimpleNamespace
+    from hana_ai.api.dependencies import _get_device_profile
+    
+    app_state = SimpleNamespace()
+    with patch("hana_ai.api.dependencies.settings") as mock_settings, \
+         patch("hana_ai.api.gpu_utils.MultiGPUManager") as mock_manager_class:
+        mock_settings.ENABLE_GPU_ACCELERATION = True
+        mock_settings.CUDA_MEMORY_FRACTION = 0.8
+        mock_manager_class.return_value.strategy = "auto"
+        
+        profile = _get_device_profile(app_state)
+        
+        assert app_state.gpu_manager is mock_manager_class.return_value
+        assert profile == "gpu:auto:0.8"
+        assert _get_device_profile(app_state) == profile
+        mock_manager_class.assert_called_once()
@@ -0,0 +1,267 @@
+"""
+Tests for the resilience decorators on functions and coroutine functions.
+"""
+import asyncio
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from hana_ai.api.deadline import DeadlineExceeded, deadline_scope
+from hana_ai.api.failover import (
+    AdaptiveConcurrencyLimit,
+    BulkheadFullError,
+    BulkheadTimeoutError,
+    CircuitBreakerOpenError,
+    FailoverManager,
+    Hedge,
+    Retry,
+    RetryBudget,
+    with_bulkhead,
+    with_retry,
+    with_timeout,
+)
+
+def test_sync_and_async_call_sites_share_a_breaker():
+    """Test that failures of sync calls open the breaker for async calls of the same service."""
+    manager = FailoverManager()
+    breaker = manager.circuit_breaker("hana", failure_threshold=2, reset_timeout=60)
+
+    @breaker
+    def query():
+        raise ConnectionError("down")
+
+    @manager.circuit_breaker("hana")
+    async def query_async():
+        return "rows"
+
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            query()
+
+    with pytest.raises(CircuitBreakerOpenError):
+        asyncio.run(query_async())
+    assert manager.get_service_status()["hana"]["circuit_state"] == "OPEN"
+
+def test_async_bulkhead_limits_concurrency_without_blocking_the_loop():
+    """Test that the async bulkhead bounds concurrent calls and rejects or times out the rest."""
+    running = []
+    peak = []
+
+    @with_bulkhead(max_concurrent=2, max_waiting=2, acquire_timeout=0.05)
+    async def call():
+        running.append(1)
+        peak.append(len(running))
+        await asyncio.sleep(0.2)
+        running.pop()
+
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticking = asyncio.ensure_future(ticker())
+        results = await asyncio.gather(*[call() for _ in range(5)], return_exceptions=True)
+        ticking.cancel()
+        return results, ticks
+
+    results, ticks = asyncio.run(run())
+
+    assert max(peak) == 2
+    assert [type(result) for result in results] == [
+        type(None), type(None), BulkheadTimeoutError, BulkheadTimeoutError, BulkheadFullError
+    ]
+    assert ticks >= 10
+
+def test_async_retry_backs_off_until_success():
+    """Test that coroutine functions are retried with non-blocking backoff."""
+    attempts = []
+
+    @with_retry(max_retries=3, delay=0.01, backoff_factor=2.0, jitter=False)
+    async def flaky():
+        attempts.append(time.monotonic())
+        if len(attempts) < 3:
+            raise ConnectionError("reset")
+        return "ok"
+
+    assert asyncio.run(flaky()) == "ok"
+    assert len(attempts) == 3
+    assert attempts[2] - attempts[1] >= attempts[1] - attempts[0]
+
+def test_retry_stops_at_the_deadline():
+    """Test that no retry is attempted when its backoff ends after the request deadline."""
+    attempts = []
+
+    @with_retry(max_retries=3, delay=1.0)
+    def failing():
+        attempts.append(1)
+        raise ConnectionError("reset")
+
+    start = time.monotonic()
+    with deadline_scope(0.5):
+        with pytest.raises(ConnectionError):
+            failing()
+
+    assert attempts == [1]
+    assert time.monotonic() - start < 0.5
+
+def test_async_timeout_cancels_the_coroutine():
+    """Test that a coroutine still running at its deadline is cancelled."""
+    cancelled = []
+
+    @with_timeout(0.05)
+    async def slow():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(slow())
+    assert cancelled == [True]
+
+def test_jittered_delays_are_decorrelated_and_capped():
+    """Test that retry delays are drawn between the base delay and three times the previous one."""
+    retry = Retry(max_retries=10, delay=1.0, max_delay=5.0)
+    error = ConnectionError("reset")
+
+    with patch("hana_ai.api.failover.random.uniform", side_effect=lambda low, high: high) as uniform:
+        delays = [retry._next_delay(attempt, "call", error, previous) for attempt, previous in enumerate([1.0, 3.0])]
+
+    assert [call.args for call in uniform.call_args_list] == [(1.0, 3.0), (1.0, 9.0)]
+    assert delays == [3.0, 5.0]
+
+def test_retry_budget_caps_retries_by_successful_calls():
+    """Test that retries stop once the budget is spent and resume as calls succeed."""
+    budget = RetryBudget("hana", ratio=0.5, max_tokens=2)
+    attempts = []
+
+    @Retry(max_retries=5, delay=0.0, jitter=False, budget=budget)
+    def failing():
+        attempts.append(1)
+        raise ConnectionError("reset")
+
+    @Retry(budget=budget)
+    def succeeding():
+        return "ok"
+
+    with pytest.raises(ConnectionError):
+        failing()
+    assert len(attempts) == 3
+
+    for _ in range(2):
+        succeeding()
+    attempts.clear()
+    with pytest.raises(ConnectionError):
+        failing()
+    assert len(attempts) == 2
+
+def _hedge(**kwargs):
+    hedge = Hedge("llm", min_samples=5, **kwargs)
+    for _ in range(5):
+        hedge.record_latency(0.05)
+    return hedge
+
+def test_slow_calls_are_hedged():
+    """Test that a call slower than the percentile latency is sent again and the faster one wins."""
+    hedge = _hedge()
+    calls = []
+
+    @hedge
+    def complete(prompt):
+        calls.append(threading.current_thread().name)
+        if len(calls) == 1:
+            time.sleep(1)
+            return "slow"
+        return prompt.upper()
+
+    start = time.monotonic()
+    assert complete("hello") == "HELLO"
+    assert time.monotonic() - start < 0.5
+    assert len(calls) == 2
+
+def test_hedges_are_charged_to_the_budget():
+    """Test that no hedged request is sent once the retry budget is exhausted."""
+    hedge = _hedge(budget=RetryBudget("llm", max_tokens=0))
+    calls = []
+
+    @hedge
+    def complete():
+        calls.append(1)
+        time.sleep(0.1)
+        return "done"
+
+    assert complete() == "done"
+    assert len(calls) == 1
+
+def test_hedges_need_a_free_concurrency_slot():
+    """Test that hedged requests take a slot of the concurrency limit and are skipped when it is reached."""
+    limit = AdaptiveConcurrencyLimit("llm", initial_limit=1, min_limit=1, max_limit=1)
+    hedge = _hedge(limit=limit)
+    calls = []
+
+    @hedge
+    def complete():
+        calls.append(1)
+        time.sleep(0.1 if len(calls) == 1 else 0.01)
+        return len(calls)
+
+    held = limit.acquire()
+    assert complete() == 1
+    assert len(calls) == 1
+    limit.release(held)
+
+    for _ in range(20):
+        hedge.record_latency(0.05)
+    calls.clear()
+    assert complete() == 2
+    deadline = time.monotonic() + 1
+    while limit.in_flight and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert limit.in_flight == 0
+
+def test_hedged_functions_share_a_bounded_pool():
+    """Test that attempts run in a bounded pool and calls run unhedged while it is busy."""
+    hedge = _hedge(max_workers=2)
+    threads = set()
+
+    @hedge
+    def complete():
+        threads.add(threading.current_thread().name)
+        time.sleep(0.1)
+        return "done"
+
+    callers = [threading.Thread(target=complete) for _ in range(4)]
+    for caller in callers:
+        caller.start()
+    for caller in callers:
+        caller.join()
+
+    pooled = {name for name in threads if name.startswith("hedge-llm")}
+    assert 0 < len(pooled) <= 2
+    assert threads - pooled
+
+def test_losing_coroutine_is_cancelled():
+    """Test that the slower attempt of a hedged coroutine function is cancelled."""
+    hedge = _hedge()
+    cancelled = []
+    calls = []
+
+    @hedge
+    async def complete():
+        calls.append(1)
+        try:
+            await asyncio.sleep(1 if len(calls) == 1 else 0.01)
+        except asyncio.CancelledError:
+            cancelled.append(len(calls))
+            raise
+        return len(calls)
+
+    assert asyncio.run(complete()) == 2
+    assert cancelled == [2]
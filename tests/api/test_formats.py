@@ -0,0 +1,76 @@
+"""
+Tests for columnar response formats.
+"""
+import decimal
+import io
+import pytest
+from unittest.mock import MagicMock
+
+from hana_ai.api.formats import (
+    PARQUET_AVAILABLE,
+    PYARROW_AVAILABLE,
+    fetch_arrow_table,
+    negotiate_format,
+    serialize_table
+)
+
+@pytest.mark.parametrize("accept, expected", [
+    (None, "json"),
+    ("*/*", "json"),
+    ("application/json", "json"),
+    ("application/vnd.apache.arrow.stream", "arrow"),
+    ("application/x-parquet, application/json;q=0.5", "parquet"),
+    ("application/json;q=0.5, application/vnd.apache.arrow.stream", "arrow"),
+    ("application/vnd.apache.arrow.stream;q=0, application/json", "json"),
+    ("text/html", None),
+])
+def test_negotiate_format(accept, expected):
+    """Test Accept header negotiation."""
+    if expected in ("arrow", "parquet") and not PARQUET_AVAILABLE:
+        pytest.skip("pyarrow not installed")
+    assert negotiate_format(accept) == expected
+
+@pytest.mark.skipif(not PYARROW_AVAILABLE, reason="pyarrow not installed")
+def test_fetch_arrow_table(connection_context):
+    """Test building an Arrow table from cursor chunks."""
+    table = fetch_arrow_table(connection_context, "SELECT * FROM SALES ORDER BY ID", chunk_size=5)
+    
+    assert table.num_rows == 12
+    assert table.column_names == ["ID", "REGION", "AMOUNT"]
+    assert table.column("ID").to_pylist() == list(range(12))
+    assert [batch.num_rows for batch in table.to_batches()] == [5, 5, 2]
+
+@pytest.mark.skipif(not PYARROW_AVAILABLE, reason="pyarrow not installed")
+def test_fetch_arrow_table_types_columns_from_description():
+    """Test that the table schema comes from the HANA types, not the first chunk."""
+    import pyarrow as pa
+    
+    cursor = MagicMock()
+    cursor.description = [("AMOUNT", 5, None, None, 18, 4, True), ("QTY", 4, None, None, 19, 0, True)]
+    cursor.fetchmany.side_effect = [
+        [(decimal.Decimal("1.5"), None)],
+        [(decimal.Decimal("12345678901.1234"), 7)],
+        [],
+    ]
+    connection_context = MagicMock()
+    connection_context.connection.cursor.return_value = cursor
+    
+    table = fetch_arrow_table(connection_context, "SELECT AMOUNT, QTY FROM ORDERS", chunk_size=1)
+    
+    assert table.schema.field("AMOUNT").type == pa.decimal128(18, 4)
+    assert table.schema.field("QTY").type == pa.int64()
+    assert table.column("QTY").to_pylist() == [None, 7]
+
+@pytest.mark.skipif(not PARQUET_AVAILABLE, reason="pyarrow not installed")
+def test_serialize_table_round_trip(connection_context):
+    """Test Arrow IPC and Parquet serialization round trips."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    
+    table = fetch_arrow_table(connection_context, "SELECT * FROM SALES ORDER BY ID", chunk_size=5)
+    
+    from_arrow = pa.ipc.open_stream(serialize_table(table, "arrow")).read_all()
+    from_parquet = pq.read_table(io.BytesIO(serialize_table(table, "parquet")))
+    
+    assert from_arrow.equals(table)
+    assert from_parquet.to_pydict() == table.to_pydict()
@@ -0,0 +1,102 @@
+"""
+Tests for background dependency probes and the health endpoints.
+"""
+import threading
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from hana_ai.api.health import HealthMonitor
+
+def _up():
+    return {"status": "up"}
+
+def _failing():
+    raise ConnectionError("connection refused")
+
+def _ready_monitor(probes):
+    monitor = HealthMonitor(probes, interval_seconds=10, timeout_seconds=1)
+    monitor._started.set()
+    monitor.set_warmed_up()
+    return monitor
+
+def test_run_once_aggregates_probe_results():
+    """Test that probe failures mark the instance degraded without failing readiness."""
+    monitor = _ready_monitor({"database": _up, "llm": _failing})
+
+    snapshot = monitor.run_once()
+
+    assert snapshot["status"] == "degraded"
+    assert snapshot["checks"]["database"]["status"] == "up"
+    assert snapshot["checks"]["llm"] == {"status": "down", "error": "connection refused",
+                                         "latency_ms": snapshot["checks"]["llm"]["latency_ms"]}
+    assert monitor.readiness()["ready"] is True
+
+    # A database outage affects every instance; it must not take them all out of rotation
+    monitor.probes["database"] = _failing
+    assert monitor.run_once()["checks"]["database"]["status"] == "down"
+    assert monitor.readiness()["ready"] is True
+
+def test_hung_probe_times_out_and_is_not_restarted():
+    """Test that a hung probe is reported as down and not started again while it runs."""
+    release = threading.Event()
+    calls = []
+
+    def hung():
+        calls.append(1)
+        release.wait(5)
+        return {"status": "up"}
+
+    monitor = HealthMonitor({"database": hung}, interval_seconds=10, timeout_seconds=0.1)
+    try:
+        assert "timed out" in monitor.run_once()["checks"]["database"]["error"]
+        assert monitor.run_once()["checks"]["database"]["error"] == "Previous probe still running"
+        assert len(calls) == 1
+    finally:
+        release.set()
+
+def test_readiness_follows_local_state():
+    """Test that readiness waits for startup and warm-up and fails while draining."""
+    monitor = HealthMonitor({"database": _failing}, interval_seconds=10, timeout_seconds=1)
+
+    assert monitor.readiness()["reason"] == "Not started"
+    monitor.start()
+    try:
+        assert monitor.readiness()["reason"] == "Warming up"
+        monitor.set_warmed_up()
+        assert monitor.readiness()["ready"] is True
+
+        monitor.set_draining()
+        readiness = monitor.readiness()
+        assert readiness["ready"] is False
+        assert readiness["reason"] == "Shutting down"
+    finally:
+        monitor.stop()
+
+def test_health_endpoints_serve_snapshot():
+    """Test that the health endpoints read the snapshot instead of probing."""
+    from hana_ai.api.app import app
+    calls = []
+
+    def database():
+        calls.append(1)
+        return {"status": "up"}
+
+    monitor = HealthMonitor({"database": database}, interval_seconds=10, timeout_seconds=1)
+    client = TestClient(app, base_url="http://localhost")
+
+    with patch("hana_ai.api.app.health_monitor", monitor):
+        assert client.get("/health/live").status_code == 200
+        assert client.get("/health/ready").status_code == 503
+        assert client.get("/health").json()["status"] == "unknown"
+
+        monitor._started.set()
+        monitor.set_warmed_up()
+        monitor.run_once()
+        assert client.get("/health").json()["services"]["database"]["is_healthy"] is True
+        for _ in range(3):
+            response = client.get("/health/ready")
+            assert response.status_code == 200
+        assert response.json()["status"] == "ready"
+        assert client.get("/").json()["database"] == "connected"
+        assert len(calls) == 1
@@ -0,0 +1,267 @@
+"""
+Tests for the asynchronous job manager.
+"""
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from hana_ai.api.config import settings
+from hana_ai.api.jobs import JOBS_SUPERVISED_ENV, Job, JobContext, JobManager, JobQueueFullError, JobStatus, JobStore
+from hana_ai.api.routers.jobs import FORECAST_JOB, run_job
+
+def _wait_for(manager, job_id, statuses, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = manager.get(job_id)
+        if job.status in statuses:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"Job {job_id} did not reach {statuses}")
+
+def _blocking_runner(release, started):
+    def runner(job, context):
+        started.append(job.id)
+        context.add_cancel_callback(release.set)
+        release.wait(5)
+        return {"tool": job.tool_name}
+    return runner
+
+def test_job_succeeds_and_persists(tmp_path):
+    """Test that a finished job and its result are stored."""
+    store = JobStore(str(tmp_path / "jobs.db"))
+    manager = JobManager(store, runner=lambda job, context: '{"model": "M1"}', max_workers=2)
+    manager.start()
+    try:
+        job = manager.submit("tenant-a", "some_tool", {"x": 1})
+        finished = _wait_for(manager, job.id, {JobStatus.SUCCEEDED})
+        assert finished.result == '{"model": "M1"}'
+        assert finished.progress == 1.0
+    finally:
+        manager.shutdown(wait=True)
+
+    stored = JobStore(str(tmp_path / "jobs.db")).get(job.id)
+    assert stored.status == JobStatus.SUCCEEDED
+    assert stored.parameters == {"x": 1}
+
+def test_failed_job_records_error(tmp_path):
+    """Test that runner exceptions mark the job as failed."""
+    def runner(job, context):
+        raise ValueError("bad table")
+
+    manager = JobManager(JobStore(str(tmp_path / "jobs.db")), runner=runner)
+    manager.start()
+    try:
+        job = manager.submit("tenant-a", "some_tool", {})
+        failed = _wait_for(manager, job.id, {JobStatus.FAILED})
+        assert failed.error == "bad table"
+    finally:
+        manager.shutdown(wait=True)
+
+def test_per_tenant_cap(tmp_path):
+    """Test that one tenant cannot occupy every worker."""
+    release = threading.Event()
+    started = []
+    manager = JobManager(
+        JobStore(str(tmp_path / "jobs.db")),
+        runner=_blocking_runner(release, started),
+        max_workers=3,
+        max_per_tenant=1
+    )
+    manager.start()
+    try:
+        first = manager.submit("tenant-a", "fit", {})
+        second = manager.submit("tenant-a", "fit", {})
+        other = manager.submit("tenant-b", "fit", {})
+        _wait_for(manager, other.id, {JobStatus.RUNNING})
+
+        assert manager.get(first.id).status == JobStatus.RUNNING
+        assert manager.get(second.id).status == JobStatus.QUEUED
+        assert manager.stats()["running"] == 2
+
+        release.set()
+        _wait_for(manager, second.id, {JobStatus.SUCCEEDED})
+    finally:
+        release.set()
+        manager.shutdown(wait=True)
+
+def test_cancel_queued_and_running(tmp_path):
+    """Test cancellation of queued and running jobs."""
+    release = threading.Event()
+    started = []
+    manager = JobManager(
+        JobStore(str(tmp_path / "jobs.db")),
+        runner=_blocking_runner(release, started),
+        max_workers=1
+    )
+    manager.start()
+    try:
+        running = manager.submit("tenant-a", "fit", {})
+        queued = manager.submit("tenant-b", "fit", {})
+        _wait_for(manager, running.id, {JobStatus.RUNNING})
+
+        assert manager.cancel(queued.id).status == JobStatus.CANCELLED
+
+        # The cancel callback releases the blocked runner
+        manager.cancel(running.id)
+        _wait_for(manager, running.id, {JobStatus.CANCELLED})
+        assert queued.id not in started
+    finally:
+        release.set()
+        manager.shutdown(wait=True)
+
+def test_queue_limit(tmp_path):
+    """Test that submissions are rejected once the queue is full."""
+    manager = JobManager(JobStore(str(tmp_path / "jobs.db")), max_queued=1)
+    manager.submit("tenant-a", "fit", {})
+    with pytest.raises(JobQueueFullError):
+        manager.submit("tenant-a", "fit", {})
+
+def test_recover_after_restart(tmp_path):
+    """Test that queued jobs resume and running jobs are marked interrupted."""
+    path = str(tmp_path / "jobs.db")
+    previous = JobManager(JobStore(path))
+    queued = previous.submit("tenant-a", "fit", {})
+    interrupted = previous.submit("tenant-a", "fit", {})
+    stored = previous.store.get(interrupted.id)
+    stored.status = JobStatus.RUNNING
+    previous.store.save(stored)
+    previous.store.close()
+
+    manager = JobManager(JobStore(path), runner=lambda job, context: "done")
+    manager.start()
+    try:
+        assert _wait_for(manager, queued.id, {JobStatus.SUCCEEDED}).result == "done"
+        assert manager.get(interrupted.id).status == JobStatus.INTERRUPTED
+    finally:
+        manager.shutdown(wait=True)
+
+def test_jobs_claimed_once_across_processes(tmp_path, monkeypatch):
+    """Test that workers sharing a store do not run the same job twice."""
+    monkeypatch.setenv(JOBS_SUPERVISED_ENV, "1")
+    path = str(tmp_path / "jobs.db")
+    runs = []
+    lock = threading.Lock()
+
+    def runner(job, context):
+        with lock:
+            runs.append(job.id)
+        return "done"
+
+    queued = JobManager(JobStore(path)).submit("tenant-a", "fit", {})
+    workers = [JobManager(JobStore(path), runner=runner) for _ in range(3)]
+    for worker in workers:
+        worker.start()
+    try:
+        _wait_for(workers[0], queued.id, {JobStatus.SUCCEEDED})
+    finally:
+        for worker in workers:
+            worker.shutdown(wait=True)
+
+    assert runs == [queued.id]
+
+def test_shutdown_keeps_jobs_interrupted(tmp_path):
+    """Test that a runner stopping after a shutdown does not overwrite the interrupted state."""
+    release = threading.Event()
+    started = []
+    path = str(tmp_path / "jobs.db")
+    manager = JobManager(JobStore(path), runner=_blocking_runner(release, started))
+    manager.start()
+    job = manager.submit("tenant-a", "fit", {})
+    _wait_for(manager, job.id, {JobStatus.RUNNING})
+
+    manager.shutdown(wait=False)
+    deadline = time.time() + 5
+    while manager.stats()["running"] and time.time() < deadline:
+        time.sleep(0.01)
+
+    stored = JobStore(path).get(job.id)
+    assert stored.status == JobStatus.INTERRUPTED
+    assert stored.error == "Interrupted by a server shutdown"
+
+def test_cancel_job_running_in_another_process(tmp_path, monkeypatch):
+    """Test that a job is cancelled through the store when it runs in another worker."""
+    monkeypatch.setenv(JOBS_SUPERVISED_ENV, "1")
+    release = threading.Event()
+    started = []
+    path = str(tmp_path / "jobs.db")
+    worker = JobManager(JobStore(path), runner=_blocking_runner(release, started), cancel_poll_interval=0.02)
+    worker.start()
+    other = JobManager(JobStore(path))
+    try:
+        job = worker.submit("tenant-a", "fit", {})
+        _wait_for(worker, job.id, {JobStatus.RUNNING})
+
+        other.cancel(job.id)
+        _wait_for(other, job.id, {JobStatus.CANCELLED})
+    finally:
+        release.set()
+        worker.shutdown(wait=True)
+
+def test_forecast_job_parameters_are_passed_explicitly():
+    """Test that a progress indicator in the parameters does not clash with the job's."""
+    job = Job(
+        id="job-1",
+        tenant="tenant-a",
+        tool_name=FORECAST_JOB,
+        parameters={
+            "table_name": "SALES",
+            "key_column": "DAY",
+            "value_column": "AMOUNT",
+            "horizon": 7,
+            "model_name": "SALES_MODEL",
+            "progress_indicator_id": "CLIENT_ID",
+        },
+        progress_indicator_id="CLIENT_ID"
+    )
+    context = JobContext(MagicMock(), job)
+    with patch("hana_ai.api.routers.jobs.dependencies.create_connection_context"), \
+            patch("hana_ai.api.routers.jobs.run_forecast_pipeline", return_value={"model": "SALES_MODEL"}) as pipeline:
+        assert run_job(job, context) == {"model": "SALES_MODEL"}
+
+    kwargs = pipeline.call_args.kwargs
+    assert kwargs["progress_indicator_id"] == "CLIENT_ID"
+    assert kwargs["horizon"] == 7 and kwargs["model_type"] == "automatic_timeseries"
+
+def test_invalid_forecast_job_is_rejected(test_client, monkeypatch):
+    """Test that forecast jobs with unknown or missing parameters are rejected before queuing."""
+    monkeypatch.setattr(settings, "RESTRICT_EXTERNAL_CALLS", False)
+    response = test_client.post(
+        "/api/v1/jobs",
+        json={"tool_name": FORECAST_JOB, "parameters": {"table_name": "SALES", "bogus": 1}}
+    )
+    assert response.status_code == 422
+
+def test_shutdown_drains_and_requeues(tmp_path):
+    """Test that a recycled worker lets short jobs finish and re-queues the others for the next worker."""
+    release = threading.Event()
+    started = []
+    path = str(tmp_path / "jobs.db")
+
+    def runner(job, context):
+        started.append(job.id)
+        if job.parameters.get("quick"):
+            time.sleep(0.05)
+            return "done"
+        context.add_cancel_callback(release.set)
+        release.wait(5)
+        return "done"
+
+    manager = JobManager(JobStore(path), runner=runner, max_workers=2)
+    manager.start()
+    quick = manager.submit("tenant-a", "fit", {"quick": True})
+    slow = manager.submit("tenant-b", "fit", {})
+    _wait_for(manager, slow.id, {JobStatus.RUNNING})
+
+    manager.shutdown(timeout=0.5, requeue=True)
+    store = JobStore(path)
+    assert store.get(quick.id).status == JobStatus.SUCCEEDED
+    assert store.get(slow.id).status == JobStatus.QUEUED
+
+    successor = JobManager(JobStore(path), runner=lambda job, context: "resumed")
+    successor.start()
+    try:
+        assert _wait_for(successor, slow.id, {JobStatus.SUCCEEDED}).result == "resumed"
+    finally:
+        successor.shutdown(wait=True)
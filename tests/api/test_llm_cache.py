@@ -0,0 +1,76 @@
+"""
+Tests for the LLM client cache.
+"""
+import pytest
+from unittest.mock import MagicMock
+
+from hana_ai.api.failover import failover_manager
+from hana_ai.api.llm_cache import LLMClientCache, with_hedging
+
+def test_cache_hit_reuses_client():
+    """Test that identical configurations share one client."""
+    cache = LLMClientCache(max_size=4)
+    factory = MagicMock(side_effect=lambda: MagicMock(spec=[]))
+    
+    first = cache.get_or_create("sap-ai-core-llama3", 0.0, 1000, "cpu", factory)
+    second = cache.get_or_create("sap-ai-core-llama3", 0.0, 1000, "cpu", factory)
+    
+    assert first is second
+    factory.assert_called_once()
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+def test_parameter_override_derives_from_cached_client():
+    """Test that a temperature override copies the cached client instead of re-initializing."""
+    cache = LLMClientCache(max_size=4)
+    base = MagicMock()
+    derived = MagicMock()
+    base.model_copy.return_value = derived
+    factory = MagicMock(return_value=base)
+    
+    cache.get_or_create("sap-ai-core-llama3", 0.0, 1000, "cpu", factory)
+    result = cache.get_or_create("sap-ai-core-llama3", 0.7, 500, "cpu", factory)
+    
+    assert result is derived
+    factory.assert_called_once()
+    base.model_copy.assert_called_once_with(update={"temperature": 0.7, "max_tokens": 500})
+    assert cache.stats()["derived"] == 1
+
+def test_device_profile_is_part_of_key():
+    """Test that clients are not shared across device profiles."""
+    cache = LLMClientCache(max_size=4)
+    factory = MagicMock(side_effect=lambda: MagicMock(spec=[]))
+    
+    cpu_client = cache.get_or_create("sap-ai-core-llama3", 0.0, 1000, "cpu", factory)
+    gpu_client = cache.get_or_create("sap-ai-core-llama3", 0.0, 1000, "gpu:auto:0.8", factory)
+    
+    assert cpu_client is not gpu_client
+    assert factory.call_count == 2
+
+def test_cache_is_bounded():
+    """Test that the least recently used client is evicted."""
+    cache = LLMClientCache(max_size=2)
+    factory = MagicMock(side_effect=lambda: MagicMock(spec=[]))
+    
+    cache.get_or_create("model-a", 0.0, 100, "cpu", factory)
+    cache.get_or_create("model-b", 0.0, 100, "cpu", factory)
+    cache.get_or_create("model-c", 0.0, 100, "cpu", factory)
+    
+    assert cache.stats()["size"] == 2
+    
+    # model-a was evicted and must be rebuilt
+    cache.get_or_create("model-a", 0.0, 100, "cpu", factory)
+    assert factory.call_count == 4
+
+def test_hedged_client_times_its_completions():
+    """Test that a hedged client is still of its model type and feeds the LLM hedge."""
+    from langchain_core.language_models.fake_chat_models import FakeListChatModel
+    
+    llm = FakeListChatModel(responses=["first", "second"])
+    hedged = with_hedging(llm)
+    hedge = failover_manager.hedge("llm")
+    observed = len(hedge._latencies)
+    
+    assert isinstance(hedged, FakeListChatModel) and hedged is not llm
+    assert hedged.invoke("question").content == "first"
+    assert len(hedge._latencies) == observed + 1
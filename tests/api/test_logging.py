@@ -0,0 +1,128 @@
+"""
+Tests for background, sampled and rate limited logging.
+"""
+import io
+import json
+import logging
+import os
+from unittest.mock import MagicMock
+
+from hana_ai.api.logging import (
+    BackgroundLogWriter,
+    DeferredQueueHandler,
+    JsonFormatter,
+    Lazy,
+    LogSampler,
+    RequestContextFilter,
+)
+
+def _record(name="api.request", level=logging.INFO, created=1000.0, lineno=10):
+    record = logging.makeLogRecord({"name": name, "levelno": level, "levelname": logging.getLevelName(level),
+                                    "msg": "message", "lineno": lineno, "pathname": "app.py"})
+    record.created = created
+    return record
+
+def test_rate_limit_per_call_site():
+    """Test that call sites are limited per second and report suppressed records."""
+    sampler = LogSampler({}, rate_limit=2)
+
+    kept = [sampler.filter(_record(created=1000.1 + i * 0.1)) for i in range(5)]
+    other_site = sampler.filter(_record(lineno=20))
+    next_second = _record(created=1001.0)
+
+    assert kept == [True, True, False, False, False]
+    assert other_site
+    assert sampler.filter(next_second)
+    assert next_second.suppressed == 3
+
+def test_sampling_by_logger_prefix():
+    """Test that sampling applies to child loggers and never to warnings."""
+    sampler = LogSampler({"api": 0.0, "api.jobs": 1.0}, rate_limit=0)
+
+    assert not sampler.filter(_record("api.request"))
+    assert sampler.filter(_record("api.jobs.worker"))
+    assert sampler.filter(_record("hana_ai.vectorstore"))
+    assert sampler.filter(_record("api.request", logging.WARNING))
+
+def _paused_writer(handlers, **kwargs):
+    writer = BackgroundLogWriter(handlers, **kwargs)
+    # Pretend the background thread runs, so records stay queued until flushed
+    writer._thread._pid = os.getpid()
+    return writer
+
+def _queue_logger(name, handler):
+    writer = _paused_writer([handler])
+    queue_handler = DeferredQueueHandler(writer)
+    queue_handler.addFilter(RequestContextFilter())
+    logger = logging.getLogger(name)
+    logger.propagate = False
+    logger.addHandler(queue_handler)
+    logger.setLevel(logging.DEBUG)
+    return logger, queue_handler, writer
+
+def test_records_are_formatted_by_the_writer():
+    """Test that records and lazy extras are rendered by the log writer in one batched write."""
+    stream = io.StringIO()
+    stream.write = MagicMock(wraps=stream.write)
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(JsonFormatter())
+    logger, queue_handler, writer = _queue_logger("test.background", handler)
+    resolved = []
+
+    def state():
+        resolved.append(True)
+        return {"keys": [1, 2]}
+
+    try:
+        logger.info("state %s", "rendered", extra={"state": Lazy(state)})
+        logger.info("second")
+        assert resolved == [] and stream.getvalue() == ""
+
+        writer.flush()
+    finally:
+        logger.removeHandler(queue_handler)
+
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [line["message"] for line in lines] == ["state rendered", "second"]
+    assert lines[0]["labels"]["state"] == {"keys": [1, 2]}
+    assert stream.write.call_count == 1
+
+def test_arguments_are_merged_when_logging():
+    """Test that changes to arguments after the log call do not show up in the log."""
+    stream = io.StringIO()
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(JsonFormatter())
+    logger, queue_handler, writer = _queue_logger("test.mutation", handler)
+    keys = ["question"]
+
+    try:
+        logger.debug("Node '%s' state: %s", "retrieve", keys)
+        try:
+            raise ValueError("bad state")
+        except ValueError:
+            logger.exception("Node failed")
+        keys.append("documents")
+        queued = list(writer._queue.queue)
+        writer.flush()
+    finally:
+        logger.removeHandler(queue_handler)
+
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert lines[0]["message"] == "Node 'retrieve' state: ['question']"
+    assert lines[1]["error"]["type"] == "ValueError"
+    assert "bad state" in lines[1]["error"]["stack_trace"]
+    assert all(record.args is None and record.exc_info is None for record in queued)
+
+def test_full_queue_drops_records():
+    """Test that records are dropped instead of blocking when the queue is full."""
+    stream = io.StringIO()
+    writer = _paused_writer([logging.StreamHandler(stream)], max_queue_size=2)
+
+    for _ in range(5):
+        writer.put(_record())
+    writer.stop()
+
+    assert writer.dropped == 3
+    assert "Dropped 3 log records" in stream.getvalue()
+    writer.put(_record(level=logging.ERROR))
+    assert stream.getvalue().count("message") == 3
@@ -0,0 +1,82 @@
+"""
+Tests for the pure ASGI API middleware.
+"""
+from unittest.mock import patch
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from hana_ai.api.middleware import APIMiddleware
+from hana_ai.api.rate_limit import MemoryBucketStore, RateLimiter
+
+async def json_endpoint(request):
+    return JSONResponse({"request_id": request.state.request_id})
+
+async def stream_endpoint(request):
+    async def chunks():
+        for index in range(3):
+            yield f"chunk-{index}\n".encode()
+    return StreamingResponse(chunks(), media_type="text/plain")
+
+def _client(limit_per_minute=100):
+    app = Starlette(routes=[Route("/json", json_endpoint), Route("/stream", stream_endpoint)])
+    limiter = RateLimiter(MemoryBucketStore(), limit_per_minute)
+    app.add_middleware(APIMiddleware, limiter=limiter)
+    return TestClient(app, base_url="http://localhost")
+
+@patch("hana_ai.api.middleware.settings")
+def test_headers_and_request_id(mock_settings):
+    """Test security, request ID and rate limit headers."""
+    mock_settings.DEVELOPMENT_MODE = False
+    mock_settings.RESTRICT_EXTERNAL_CALLS = True
+
+    response = _client().get("/json", headers={"X-Request-ID": "req-1"})
+
+    assert response.status_code == 200
+    assert response.json() == {"request_id": "req-1"}
+    assert response.headers["X-Request-ID"] == "req-1"
+    assert response.headers["X-Frame-Options"] == "DENY"
+    assert response.headers["X-Content-Type-Options"] == "nosniff"
+    assert response.headers["X-RateLimit-Limit"] == "100"
+    assert response.headers["X-RateLimit-Remaining"] == "99"
+
+@patch("hana_ai.api.middleware.settings")
+def test_external_host_blocked(mock_settings):
+    """Test that requests for hosts outside the allowed domains are rejected."""
+    mock_settings.DEVELOPMENT_MODE = False
+    mock_settings.RESTRICT_EXTERNAL_CALLS = True
+
+    response = _client().get("/json", headers={"Host": "example.com"})
+
+    assert response.status_code == 403
+    assert response.json()["detail"] == "External calls are not allowed by this application"
+    assert response.headers["X-Frame-Options"] == "DENY"
+
+@patch("hana_ai.api.middleware.settings")
+def test_rate_limit_rejection(mock_settings):
+    """Test that clients over the limit get 429 with Retry-After."""
+    mock_settings.DEVELOPMENT_MODE = False
+    mock_settings.RESTRICT_EXTERNAL_CALLS = False
+    client = _client(limit_per_minute=2)
+
+    assert client.get("/json").status_code == 200
+    assert client.get("/json").status_code == 200
+    response = client.get("/json")
+
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert "X-Request-ID" in response.headers
+
+@patch("hana_ai.api.middleware.settings")
+def test_streaming_response_passes_through(mock_settings):
+    """Test that streaming bodies are forwarded chunk by chunk."""
+    mock_settings.DEVELOPMENT_MODE = False
+    mock_settings.RESTRICT_EXTERNAL_CALLS = False
+
+    with _client().stream("GET", "/stream") as response:
+        chunks = list(response.iter_bytes())
+
+    assert b"".join(chunks) == b"chunk-0\nchunk-1\nchunk-2\n"
+    assert response.headers["X-Content-Type-Options"] == "nosniff"
@@ -0,0 +1,120 @@
+"""
+Tests for keyset pagination.
+"""
+import time
+import pandas as pd
+import pytest
+from unittest.mock import MagicMock, patch
+
+from hana_ai.api.pagination import (
+    MaterializedResultStore,
+    PageExpiredError,
+    PageTokenError,
+    decode_page_token,
+    encode_page_token,
+    fetch_keyset_page,
+    query_fingerprint,
+    seek_predicate
+)
+
+class SQLiteDataFrame:
+    """Minimal stand-in for hana_ml DataFrame running on SQLite."""
+    
+    def __init__(self, connection_context, select_statement):
+        self.connection_context = connection_context
+        self.select_statement = select_statement
+        self._result = pd.read_sql_query(select_statement, connection_context.connection)
+        self.columns = list(self._result.columns)
+    
+    def collect(self):
+        return self._result
+
+@pytest.fixture
+def sales_rows():
+    """Rows of the SALES table."""
+    return [(i, "EU" if i % 3 else "US", float(i % 4)) for i in range(23)]
+
+@pytest.fixture
+def connection_context(connection_context):
+    """Run hana_ml DataFrames of the connection context on SQLite."""
+    with patch("hana_ml.dataframe.DataFrame", SQLiteDataFrame):
+        yield connection_context
+
+def _read_all_pages(connection_context, sql, order_by, limit):
+    pages = []
+    token_payload = None
+    while True:
+        page = fetch_keyset_page(connection_context, sql, order_by, limit, token_payload)
+        pages.append(page)
+        if page.next_page_token is None:
+            return pages
+        token_payload = decode_page_token(page.next_page_token, query_fingerprint(sql, order_by))
+
+def test_seek_predicate_mixed_directions():
+    """Test the seek predicate for mixed ordering directions."""
+    predicate = seek_predicate([("A", False), ("B", True)], [1, "x'y"])
+    
+    assert predicate == '("A" > 1) OR ("A" = 1 AND "B" < \'x\'\'y\')'
+
+def test_keyset_pages_cover_result(connection_context):
+    """Test that keyset pages return every row exactly once, in order."""
+    sql = "SELECT * FROM SALES"
+    pages = _read_all_pages(connection_context, sql, [("ID", False)], 10)
+    
+    assert [len(page.records) for page in pages] == [10, 10, 3]
+    ids = [record["ID"] for page in pages for record in page.records]
+    assert ids == list(range(23))
+
+def test_keyset_pages_with_compound_key(connection_context):
+    """Test pagination on a non-unique column made unique by a tie breaker."""
+    sql = "SELECT * FROM SALES"
+    order_by = [("AMOUNT", True), ("ID", False)]
+    pages = _read_all_pages(connection_context, sql, order_by, 4)
+    
+    rows = [(record["AMOUNT"], record["ID"]) for page in pages for record in page.records]
+    assert rows == sorted(rows, key=lambda row: (-row[0], row[1]))
+    assert len(rows) == 23
+
+def test_token_is_bound_to_query():
+    """Test that tokens cannot be reused for another query or tampered with."""
+    token = encode_page_token({"q": query_fingerprint("SELECT * FROM SALES", [("ID", False)]), "k": [["i", 5]]})
+    
+    # Equivalent SQL after normalization is accepted
+    payload = decode_page_token(token, query_fingerprint("select *  from sales", [("ID", False)]))
+    assert payload["k"] == [["i", 5]]
+    
+    with pytest.raises(PageTokenError):
+        decode_page_token(token, query_fingerprint("SELECT * FROM OTHER", [("ID", False)]))
+    with pytest.raises(PageTokenError):
+        decode_page_token(token, query_fingerprint("SELECT * FROM SALES", [("ID", True)]))
+    
+    _, signature = token.split(".")
+    forged = encode_page_token({"q": "x", "k": [["i", 0]]}).split(".")[0] + "." + signature
+    with pytest.raises(PageTokenError):
+        decode_page_token(forged, "x")
+
+def test_expired_token():
+    """Test that expired tokens are rejected as expired."""
+    token = encode_page_token({"q": "fp", "m": "#T", "r": 10, "exp": int(time.time()) - 1})
+    
+    with pytest.raises(PageExpiredError):
+        decode_page_token(token, "fp")
+
+def test_materialized_store_drops_tables():
+    """Test that released and evicted materialized results are dropped."""
+    store = MaterializedResultStore(ttl_seconds=60, max_results=2)
+    connection_context = MagicMock()
+    cursor = connection_context.connection.cursor.return_value
+    
+    first = store.create(connection_context, "SELECT * FROM SALES", [("ID", False)])
+    create_statement = cursor.execute.call_args[0][0]
+    assert create_statement.startswith(f'CREATE LOCAL TEMPORARY COLUMN TABLE "{first.table_name}"')
+    assert 'ROW_NUMBER() OVER (ORDER BY "ID" ASC)' in create_statement
+    
+    store.create(connection_context, "SELECT * FROM SALES", [])
+    store.create(connection_context, "SELECT * FROM SALES", [])
+    
+    # Capacity 2: the oldest table was dropped
+    assert len(store) == 2
+    assert store.get(first.table_name) is None
+    cursor.execute.assert_any_call(f'DROP TABLE "{first.table_name}"')
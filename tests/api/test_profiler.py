@@ -0,0 +1,79 @@
+"""
+Tests for the CPU sampling profiler.
+"""
+import threading
+import time
+
+import pytest
+from starlette.requests import Request
+
+from hana_ai.api.app import internal_only
+from hana_ai.api.profiler import ProfilerBusyError, SamplingProfiler
+
+def busy_loop(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+@pytest.fixture
+def busy_thread():
+    stop = threading.Event()
+    thread = threading.Thread(target=busy_loop, args=(stop,), name="busy")
+    thread.start()
+    yield thread
+    stop.set()
+    thread.join()
+
+def test_profile_finds_busy_thread(busy_thread):
+    """Test that the stacks of a busy thread are sampled and rendered."""
+    profiler = SamplingProfiler(interval=0.005, max_overhead=0.05)
+    profile = profiler.profile(0.3)
+
+    assert profile.samples > 0
+    assert profiler._labels == {}
+    collapsed = profile.collapsed().splitlines()
+    busy = [line for line in collapsed if line.startswith("busy;")]
+    assert busy and all("busy_loop (" in line for line in busy)
+    assert all(int(line.rsplit(" ", 1)[1]) > 0 for line in collapsed)
+
+    speedscope = profile.speedscope()
+    names = [frame["name"] for frame in speedscope["shared"]["frames"]]
+    assert "busy_loop" in names
+    busy_profile = next(p for p in speedscope["profiles"] if p["name"] == "busy")
+    assert len(busy_profile["samples"]) == len(busy_profile["weights"])
+    assert sum(busy_profile["weights"]) <= profile.duration + 1e-3
+
+def test_overhead_budget_lengthens_interval():
+    """Test that the interval grows when sampling exceeds the overhead budget."""
+    profile = SamplingProfiler(interval=0.0001, max_overhead=0.001).profile(0.2)
+
+    assert profile.interval > 0.0001
+    assert profile.overhead < 0.05
+
+def test_concurrent_profiles_are_rejected():
+    """Test that only one profile runs at a time."""
+    profiler = SamplingProfiler(interval=0.01)
+    errors = []
+    thread = threading.Thread(target=profiler.profile, args=(0.3,))
+    thread.start()
+    time.sleep(0.05)
+    try:
+        profiler.profile(0.1)
+    except ProfilerBusyError as e:
+        errors.append(e)
+    thread.join()
+
+    assert len(errors) == 1
+
+def _request(client_host, forwarded_for=None):
+    headers = [(b"x-forwarded-for", forwarded_for.encode())] if forwarded_for else []
+    return Request({"type": "http", "method": "GET", "path": "/debug/profile",
+                    "headers": headers, "client": (client_host, 1234)})
+
+def test_internal_only():
+    """Test that the profile endpoint check only admits internal clients."""
+    assert internal_only(_request("127.0.0.1"), "Profiling endpoint") is None
+    assert internal_only(_request("10.0.0.1", "127.0.0.1"), "Profiling endpoint") is None
+
+    response = internal_only(_request("127.0.0.1", "8.8.8.8, 10.0.0.1"), "Profiling endpoint")
+    assert response.status_code == 403
+    assert b"Profiling endpoint is only available" in response.body
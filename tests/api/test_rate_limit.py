@@ -0,0 +1,96 @@
+"""
+Tests for token bucket rate limiting.
+"""
+import logging
+import sqlite3
+
+from hana_ai.api.rate_limit import (
+    MemoryBucketStore,
+    RateLimiter,
+    SQLiteBucketStore,
+    client_key
+)
+
+ROUTE_COSTS = {"/api/v1/agents/": 20, "/api/v1/tools/execute": 10}
+
+def test_route_costs():
+    """Test that the longest matching path prefix sets the cost."""
+    limiter = RateLimiter(MemoryBucketStore(), 100, {**ROUTE_COSTS, "/api/v1/tools/": 2})
+
+    assert limiter.cost("/api/v1/agents/conversation") == 20
+    assert limiter.cost("/api/v1/tools/execute") == 10
+    assert limiter.cost("/api/v1/tools/list") == 2
+    assert limiter.cost("/api/v1/dataframes/tables") == 1
+
+    # Costs above the bucket size would never be allowed
+    assert RateLimiter(MemoryBucketStore(), 5, ROUTE_COSTS).cost("/api/v1/agents/sql") == 5
+
+def test_weighted_consumption_and_headers():
+    """Test that expensive routes drain the bucket faster and headers are accurate."""
+    limiter = RateLimiter(MemoryBucketStore(), 60, ROUTE_COSTS)
+    key = client_key("secret", "10.0.0.1")
+
+    for _ in range(3):
+        assert limiter.check(key, "/api/v1/agents/conversation").allowed
+
+    result = limiter.check(key, "/api/v1/agents/conversation")
+    assert not result.allowed
+    headers = result.headers()
+    assert headers["X-RateLimit-Limit"] == "60"
+    assert headers["X-RateLimit-Remaining"] == "0"
+    # 20 tokens at one token per second
+    assert 19 <= int(headers["Retry-After"]) <= 20
+    assert 59 <= int(headers["X-RateLimit-Reset"]) <= 60
+
+def test_lru_eviction():
+    """Test that the in-memory store keeps at most max_keys buckets."""
+    store = MemoryBucketStore(max_keys=2)
+    limiter = RateLimiter(store, 10)
+
+    limiter.check("a", "/x")
+    limiter.check("b", "/x")
+    limiter.check("a", "/x")
+    limiter.check("c", "/x")
+
+    assert len(store) == 2
+    # "a" was kept, "b" was least recently used and starts over full
+    assert limiter.check("a", "/x").remaining < 7.1
+    assert limiter.check("b", "/x").remaining == 9
+
+def test_sqlite_store_shared_between_workers(tmp_path):
+    """Test that two stores on the same file share the buckets."""
+    path = str(tmp_path / "buckets.db")
+    worker_one = RateLimiter(SQLiteBucketStore(path), 30, ROUTE_COSTS)
+    worker_two = RateLimiter(SQLiteBucketStore(path), 30, ROUTE_COSTS)
+
+    assert worker_one.check("key:a", "/api/v1/agents/sql").allowed
+    result = worker_two.check("key:a", "/api/v1/agents/sql")
+
+    assert not result.allowed
+    assert 9 < result.remaining < 10.5
+    assert worker_two.check("key:b", "/api/v1/agents/sql").allowed
+
+def test_locked_sqlite_store_fails_open(tmp_path, caplog):
+    """Test that a locked shared store falls back to per-worker limits instead of failing requests."""
+    path = str(tmp_path / "buckets.db")
+    limiter = RateLimiter(SQLiteBucketStore(path, timeout=0.01), 30, ROUTE_COSTS)
+    writer = sqlite3.connect(path, isolation_level=None)
+    writer.execute("BEGIN IMMEDIATE")
+    try:
+        with caplog.at_level(logging.WARNING, logger="hana_ai.api.rate_limit"):
+            assert limiter.check("key:a", "/api/v1/agents/sql").allowed
+            result = limiter.check("key:a", "/api/v1/agents/sql")
+    finally:
+        writer.execute("ROLLBACK")
+        writer.close()
+
+    # The in-memory fallback still limits the worker
+    assert not result.allowed
+    assert limiter.store_errors == 2
+    assert len([r for r in caplog.records if "Rate limit store failed" in r.getMessage()]) == 1
+
+def test_client_key_hashes_api_keys():
+    """Test that API keys are not stored in clear text."""
+    key = client_key("secret", "10.0.0.1")
+    assert key.startswith("key:") and "secret" not in key
+    assert client_key("", "10.0.0.1") == "ip:10.0.0.1"
@@ -0,0 +1,88 @@
+"""
+Tests for fast JSON response serialization.
+"""
+import datetime
+import decimal
+import json
+import numpy as np
+import pandas as pd
+
+from hana_ai.api.models import DataResponse
+from hana_ai.api.responses import (
+    FastJSONResponse,
+    build_model,
+    dataframe_to_records,
+    dumps
+)
+
+def _sample_frame():
+    return pd.DataFrame({
+        "ID": np.array([1, 2, 3], dtype=np.int64),
+        "AMOUNT": [1.5, np.nan, 3.25],
+        "NAME": ["a", None, "c"],
+        "CREATED": pd.to_datetime([
+            datetime.datetime(2024, 1, 1, 10, 0, 0),
+            None,
+            datetime.datetime(2024, 3, 1, 12, 30, 0, 500000)
+        ]),
+        "PRICE": [decimal.Decimal("9.99"), decimal.Decimal("1.00"), None],
+        "ACTIVE": [True, False, True],
+    })
+
+def test_dataframe_to_records():
+    """Test column-wise DataFrame conversion."""
+    records = dataframe_to_records(_sample_frame())
+    
+    assert len(records) == 3
+    assert records[0]["ID"] == 1 and type(records[0]["ID"]) is int
+    assert records[1]["AMOUNT"] is None
+    assert records[1]["NAME"] is None
+    assert records[1]["CREATED"] is None
+    assert records[2]["CREATED"] == datetime.datetime(2024, 3, 1, 12, 30, 0, 500000)
+    assert records[0]["ACTIVE"] is True
+
+def test_dumps_dataframe_and_numpy_values():
+    """Test serialization of DataFrames, numpy scalars and decimals."""
+    payload = json.loads(dumps({
+        "data": _sample_frame(),
+        "count": np.int64(3),
+        "ratio": np.float32(0.5),
+        "missing": np.float64("nan"),
+        "values": np.arange(3),
+        "when": pd.Timestamp("2024-01-01 10:00:00"),
+    }))
+    
+    assert payload["count"] == 3
+    assert payload["ratio"] == 0.5
+    assert payload["missing"] is None
+    assert payload["values"] == [0, 1, 2]
+    assert payload["when"].startswith("2024-01-01T10:00:00")
+    assert payload["data"][0]["PRICE"] == 9.99
+    assert payload["data"][0]["CREATED"].startswith("2024-01-01T10:00:00")
+    assert payload["data"][1]["AMOUNT"] is None
+
+def test_fast_json_response_renders_models():
+    """Test that pydantic models are rendered without jsonable_encoder."""
+    model = DataResponse(columns=["ID"], data=[{"ID": 1}], row_count=1, query_time=0.1)
+    response = FastJSONResponse(model)
+    
+    assert response.media_type == "application/json"
+    assert json.loads(response.body) == {
+        "columns": ["ID"],
+        "data": [{"ID": 1}],
+        "row_count": 1,
+        "query_time": 0.1,
+        "next_page_token": None
+    }
+
+def test_build_model_skips_validation_for_large_payloads(monkeypatch):
+    """Test that large payloads are constructed without validation."""
+    from hana_ai.api.config import settings
+    monkeypatch.setattr(settings, "RESPONSE_VALIDATION_MAX_ROWS", 2)
+    
+    rows = [{"ID": i} for i in range(3)]
+    # row_count would fail validation; large payloads are not validated
+    model = build_model(DataResponse, len(rows), columns=["ID"], data=rows, row_count="3", query_time=0.0)
+    
+    assert model.row_count == "3"
+    assert model.data is rows
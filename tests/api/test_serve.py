@@ -0,0 +1,40 @@
+"""
+Tests for the multi-process serving mode.
+"""
+import os
+
+from hana_ai.api import serve
+
+def test_worker_count_from_cpus_and_memory():
+    """Test that the pool is sized by CPUs, memory and the upper bound."""
+    gib = 1024 ** 3
+
+    assert serve.worker_count(cpus=8, memory_bytes=64 * gib, memory_per_worker_mb=1024, max_workers=16) == 8
+    assert serve.worker_count(cpus=8, memory_bytes=3 * gib, memory_per_worker_mb=1024, max_workers=16) == 3
+    assert serve.worker_count(cpus=32, memory_bytes=64 * gib, memory_per_worker_mb=1024, max_workers=16) == 16
+    # Fractional CPU quotas and tiny containers still get one worker
+    assert serve.worker_count(cpus=0.5, memory_bytes=256 * 1024 ** 2, memory_per_worker_mb=1024, max_workers=16) == 1
+
+def test_gunicorn_options():
+    """Test preloading, recycling and graceful restart settings."""
+    options = serve.gunicorn_options(4, "0.0.0.0:8000")
+
+    assert options["workers"] == 4
+    assert options["bind"] == "0.0.0.0:8000"
+    assert options["preload_app"] is True
+    assert options["max_requests"] == serve.settings.SERVE_MAX_REQUESTS
+    assert options["max_requests_jitter"] == serve.settings.SERVE_MAX_REQUESTS_JITTER
+    assert options["graceful_timeout"] == serve.settings.SERVE_GRACEFUL_TIMEOUT
+    assert options["worker_class"].endswith("UvicornWorker")
+    assert callable(options["child_exit"])
+
+def test_prepare_multiprocess_metrics(tmp_path, monkeypatch):
+    """Test that stale metric files are removed and the directory is exported."""
+    directory = tmp_path / "prometheus"
+    directory.mkdir()
+    (directory / "counter_123.db").write_bytes(b"stale")
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(directory))
+
+    assert serve.prepare_multiprocess_metrics() == str(directory)
+    assert os.environ["PROMETHEUS_MULTIPROC_DIR"] == str(directory)
+    assert list(directory.iterdir()) == []
@@ -0,0 +1,64 @@
+"""
+Tests for single-flight request coalescing.
+"""
+import asyncio
+import threading
+import time
+import pytest
+
+from hana_ai.api.singleflight import SingleFlight
+
+def test_async_duplicates_share_one_execution():
+    """Test that concurrent async callers with the same key execute once."""
+    flight = SingleFlight("test")
+    calls = []
+    
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "result"
+    
+    async def run():
+        return await asyncio.gather(*[flight.do_async("key", work) for _ in range(30)])
+    
+    results = asyncio.run(run())
+    
+    assert results == ["result"] * 30
+    assert len(calls) == 1
+    assert flight.coalesced == 29
+    assert flight.in_flight() == 0
+    assert not flight._leader_tasks
+
+def test_sync_work_runs_in_thread_pool():
+    """Test that plain callables are executed off the event loop and coalesced."""
+    flight = SingleFlight("test")
+    calls = []
+    
+    def work():
+        calls.append(threading.current_thread().name)
+        time.sleep(0.05)
+        return 42
+    
+    async def run():
+        return await asyncio.gather(*[flight.do_async("key", work) for _ in range(5)])
+    
+    assert asyncio.run(run()) == [42] * 5
+    assert len(calls) == 1
+    assert calls[0] != threading.main_thread().name
+
+def test_exceptions_propagate_to_all_waiters():
+    """Test that a failing call raises for every coalesced caller and is not cached."""
+    flight = SingleFlight("test")
+    
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+    
+    async def run():
+        return await asyncio.gather(*[flight.do_async("key", failing) for _ in range(3)], return_exceptions=True)
+    
+    results = asyncio.run(run())
+    assert all(isinstance(r, ValueError) for r in results)
+    
+    # The next call executes again
+    assert asyncio.run(flight.do_async("key", lambda: "ok")) == "ok"
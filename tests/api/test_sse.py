@@ -0,0 +1,128 @@
+"""
+Tests for Server-Sent Events streaming of agent runs.
+"""
+import asyncio
+import json
+import threading
+from uuid import uuid4
+
+from hana_ai.api.sse import (
+    FINAL_EVENT,
+    TOKEN_EVENT,
+    TOOL_START_EVENT,
+    EventBuffer,
+    SSECallbackHandler,
+    format_sse
+)
+
+def _parse(frames):
+    events = []
+    for frame in frames:
+        text = frame.decode("utf-8")
+        if text.startswith(":"):
+            continue
+        event_line, data_line = text.strip().split("\n")
+        events.append((event_line[len("event: "):], json.loads(data_line[len("data: "):])))
+    return events
+
+async def _collect(buffer, heartbeat_seconds=5.0):
+    return [frame async for frame in buffer.events(heartbeat_seconds)]
+
+def test_format_sse():
+    """Test SSE frame encoding."""
+    assert format_sse("token", {"text": "hi"}) == b'event: token\ndata: {"text":"hi"}\n\n'
+
+def test_events_from_worker_thread():
+    """Test that events published by a worker thread arrive in order."""
+    async def scenario():
+        buffer = EventBuffer(asyncio.get_running_loop(), max_events=100)
+        handler = SSECallbackHandler(buffer)
+        run_id = uuid4()
+        
+        def agent():
+            handler.on_tool_start({"name": "fetch_data"}, "SELECT 1", run_id=run_id)
+            handler.on_tool_end("1 row", run_id=run_id)
+            handler.on_llm_new_token("Hello")
+            buffer.publish(FINAL_EVENT, {"response": "Hello"})
+            buffer.close()
+        
+        thread = threading.Thread(target=agent)
+        thread.start()
+        frames = await _collect(buffer)
+        thread.join()
+        return frames
+    
+    events = _parse(asyncio.run(scenario()))
+    
+    assert [name for name, _ in events] == ["tool_start", "tool_end", "token", "final"]
+    assert events[0][1] == {"tool": "fetch_data", "input": "SELECT 1"}
+    assert events[1][1] == {"tool": "fetch_data", "output": "1 row"}
+
+def test_slow_client_coalesces_and_drops_tokens():
+    """Test that a full buffer coalesces and drops tokens but keeps control events."""
+    async def scenario():
+        buffer = EventBuffer(asyncio.get_running_loop(), max_events=2)
+        
+        # Publish everything before the client reads anything
+        buffer.publish(TOKEN_EVENT, {"text": "a"})
+        buffer.publish(TOKEN_EVENT, {"text": "b"})
+        buffer.publish(TOOL_START_EVENT, {"tool": "t", "input": ""})
+        buffer.publish(TOKEN_EVENT, {"text": "c"})
+        buffer.publish(FINAL_EVENT, {"response": "abc"})
+        buffer.close()
+        frames = await _collect(buffer)
+        return buffer, frames
+    
+    buffer, frames = asyncio.run(scenario())
+    events = _parse(frames)
+    
+    assert events[0] == ("token", {"text": "ab"})
+    assert [name for name, _ in events] == ["token", "tool_start", "final"]
+    assert events[-1][1]["dropped_tokens"] == 1
+    assert buffer.coalesced_tokens == 1
+
+def test_heartbeat_while_idle():
+    """Test that keep-alive comments are sent while the agent is busy."""
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        buffer = EventBuffer(loop, max_events=10)
+        loop.call_later(0.05, buffer.close)
+        return await _collect(buffer, heartbeat_seconds=0.01)
+    
+    frames = asyncio.run(scenario())
+    
+    assert frames and all(frame == b": keep-alive\n\n" for frame in frames)
+
+def test_only_streamed_conversations_use_a_streaming_llm():
+    """Test that /conversation keeps the non-streaming LLM and both agent variants share memory."""
+    from unittest.mock import MagicMock, patch
+    from langchain_community.llms import FakeListLLM
+    from hana_ai.api.routers import agents
+    
+    class StreamingLLM(FakeListLLM):
+        streaming: bool = False
+    
+    llm = StreamingLLM(responses=["ok"])
+    created = []
+    
+    def new_agent(llm, **kwargs):
+        agent = MagicMock()
+        agent.llm = llm
+        created.append(agent)
+        return agent
+    
+    with patch("hana_ai.agents.hanaml_agent_with_memory.HANAMLAgentWithMemory", side_effect=new_agent), \
+         patch("hana_ai.tools.toolkit.HANAMLToolkit"), \
+         patch.object(agents, "AGENT_SESSIONS", {}), \
+         patch.object(agents, "STREAMING_AGENT_SESSIONS", {}), \
+         patch.object(agents, "CHAT_HISTORIES", {}):
+        agent = agents._get_session_agent("s1", MagicMock(), llm, False)
+        streaming_agent = agents._get_session_agent("s1", MagicMock(), llm, False, streaming=True)
+        
+        assert agents._get_session_agent("s1", MagicMock(), llm, False) is agent
+        assert agents._get_session_agent("s1", MagicMock(), llm, False, streaming=True) is streaming_agent
+    
+    assert len(created) == 2
+    assert agent.llm.streaming is False
+    assert streaming_agent.llm.streaming is True
+    assert streaming_agent.memory is agent.memory
@@ -0,0 +1,109 @@
+"""
+Tests for streaming query result delivery.
+"""
+import decimal
+import json
+import pytest
+
+from hana_ai.api.streaming import (
+    PYARROW_AVAILABLE,
+    iter_row_chunks,
+    open_cursor,
+    stream_rows
+)
+
+@pytest.fixture
+def sales_rows():
+    """Rows of the SALES table."""
+    return [(i, "EU" if i % 2 else "US", i * 1.5) for i in range(25)]
+
+def test_rows_are_fetched_in_chunks(connection_context):
+    """Test that the cursor is read in fixed-size chunks."""
+    cursor = open_cursor(connection_context, "SELECT * FROM SALES", chunk_size=10)
+    chunks = list(iter_row_chunks(cursor, 10))
+    
+    assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+
+def test_ndjson_stream(connection_context):
+    """Test NDJSON output with one JSON object per row."""
+    cursor = open_cursor(connection_context, "SELECT * FROM SALES ORDER BY ID", chunk_size=10)
+    chunks = list(stream_rows(cursor, "ndjson", 10))
+    
+    assert len(chunks) == 3
+    lines = b"".join(chunks).decode("utf-8").splitlines()
+    assert len(lines) == 25
+    assert json.loads(lines[3]) == {"ID": 3, "REGION": "EU", "AMOUNT": 4.5}
+
+@pytest.mark.skipif(not PYARROW_AVAILABLE, reason="pyarrow not installed")
+def test_arrow_stream(connection_context):
+    """Test Arrow IPC output with one record batch per chunk."""
+    import pyarrow as pa
+    
+    cursor = open_cursor(connection_context, "SELECT * FROM SALES ORDER BY ID", chunk_size=10)
+    payload = b"".join(stream_rows(cursor, "arrow", 10))
+    
+    reader = pa.ipc.open_stream(payload)
+    batches = list(reader)
+    table = pa.Table.from_batches(batches)
+    
+    assert [batch.num_rows for batch in batches] == [10, 10, 5]
+    assert table.column_names == ["ID", "REGION", "AMOUNT"]
+    assert table.column("AMOUNT").to_pylist()[2] == 3.0
+
+@pytest.mark.skipif(not PYARROW_AVAILABLE, reason="pyarrow not installed")
+def test_arrow_stream_empty_result(connection_context):
+    """Test that an empty result is still a valid Arrow stream."""
+    import pyarrow as pa
+    
+    cursor = open_cursor(connection_context, "SELECT * FROM SALES WHERE ID < 0", chunk_size=10)
+    payload = b"".join(stream_rows(cursor, "arrow", 10))
+    
+    table = pa.ipc.open_stream(payload).read_all()
+    assert table.num_rows == 0
+    assert table.column_names == ["ID", "REGION", "AMOUNT"]
+
+class HanaCursor:
+    """Cursor returning fixed chunks with a HANA-style description."""
+    def __init__(self, description, chunks):
+        self.description = description
+        self._chunks = list(chunks)
+    
+    def fetchmany(self, size):
+        return self._chunks.pop(0) if self._chunks else []
+    
+    def close(self):
+        pass
+
+@pytest.mark.skipif(not PYARROW_AVAILABLE, reason="pyarrow not installed")
+def test_arrow_stream_types_columns_from_description():
+    """Test that later chunks with wider decimals or late non-NULL values fit the schema."""
+    import pyarrow as pa
+    
+    description = [("AMOUNT", 5, None, None, 18, 4, True), ("QTY", 3, None, None, 10, 0, True)]
+    cursor = HanaCursor(description, [
+        [(decimal.Decimal("1.5"), None)],
+        [(decimal.Decimal("12345678901.1234"), 7)],
+    ])
+    
+    table = pa.ipc.open_stream(b"".join(stream_rows(cursor, "arrow", 1))).read_all()
+    
+    assert table.schema.field("AMOUNT").type == pa.decimal128(18, 4)
+    assert table.schema.field("QTY").type == pa.int32()
+    assert table.column("AMOUNT").to_pylist()[1] == decimal.Decimal("12345678901.1234")
+    assert table.column("QTY").to_pylist() == [None, 7]
+
+@pytest.mark.skipif(not PYARROW_AVAILABLE, reason="pyarrow not installed")
+def test_arrow_stream_widens_untyped_columns():
+    """Test that columns without a reported type are widened after the first chunk."""
+    import pyarrow as pa
+    
+    description = [("AMOUNT", None), ("NOTE", None)]
+    cursor = HanaCursor(description, [
+        [(decimal.Decimal("1.5"), None)],
+        [(decimal.Decimal("123456.25"), 3)],
+    ])
+    
+    table = pa.ipc.open_stream(b"".join(stream_rows(cursor, "arrow", 1))).read_all()
+    
+    assert table.column("AMOUNT").to_pylist() == [1.5, 123456.25]
+    assert table.column("NOTE").to_pylist() == [None, "3"]
@@ -0,0 +1,94 @@
+"""
+Tests for per-stage request timing and the Server-Timing header.
+"""
+from unittest.mock import MagicMock, patch
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from hana_ai.api.middleware import APIMiddleware
+from hana_ai.api.rate_limit import MemoryBucketStore, RateLimiter
+from hana_ai.api.timing import (
+    RequestTimings,
+    instrument_connection,
+    instrument_langchain,
+    query_type,
+    request_timings_contextvar,
+    stage,
+)
+
+def test_query_type():
+    """Test that statement types are derived from the SQL text."""
+    assert query_type("SELECT 1 FROM DUMMY") == "select"
+    assert query_type("  -- comment\n/* hint */ insert into T values (1)") == "insert"
+    assert query_type("GRANT SELECT ON T TO U") == "other"
+    assert query_type(None) == "other"
+
+@patch("hana_ai.api.timing.record_db_query")
+def test_instrumented_connection_times_sql(mock_record_db_query):
+    """Test that cursor executions and fetches count towards the db stage."""
+    connection_context = MagicMock()
+    cursor = connection_context.connection.cursor.return_value
+    cursor.fetchall.return_value = [(1,)]
+    instrument_connection(instrument_connection(connection_context))
+    timings = RequestTimings({})
+    token = request_timings_contextvar.set(timings)
+    try:
+        db_cursor = connection_context.connection.cursor()
+        db_cursor.execute("SELECT 1 FROM DUMMY")
+        assert db_cursor.fetchall() == [(1,)]
+        db_cursor.close()
+    finally:
+        request_timings_contextvar.reset(token)
+
+    cursor.execute.assert_called_once_with("SELECT 1 FROM DUMMY")
+    cursor.close.assert_called_once()
+    assert timings.stages["db"][1] == 2
+    assert mock_record_db_query.call_args[0][0] == "select"
+
+def test_langchain_tool_runs_are_timed():
+    """Test that tool runs are timed without passing callbacks explicitly."""
+    from langchain_core.tools import tool
+
+    @tool
+    def lookup(query: str) -> str:
+        """Look something up."""
+        return query.upper()
+
+    assert instrument_langchain()
+    timings = RequestTimings({})
+    token = request_timings_contextvar.set(timings)
+    try:
+        with patch("hana_ai.api.timing.record_stage") as mock_record_stage:
+            assert lookup.run("abc") == "ABC"
+    finally:
+        request_timings_contextvar.reset(token)
+
+    assert timings.stages["tool"][1] == 1
+    assert mock_record_stage.call_args[0][:3] == ("tool", "unmatched", "lookup")
+
+async def staged_endpoint(request):
+    def work():
+        with stage("db"):
+            pass
+        with stage("embedding"):
+            pass
+    await run_in_threadpool(work)
+    return JSONResponse({"ok": True})
+
+@patch("hana_ai.api.middleware.settings")
+def test_server_timing_header(mock_settings):
+    """Test that stages recorded in the thread pool appear in the Server-Timing header."""
+    mock_settings.DEVELOPMENT_MODE = True
+    mock_settings.RESTRICT_EXTERNAL_CALLS = False
+    mock_settings.SERVER_TIMING_ENABLED = True
+    app = Starlette(routes=[Route("/staged", staged_endpoint)])
+    app.add_middleware(APIMiddleware, limiter=RateLimiter(MemoryBucketStore(), 100))
+
+    response = TestClient(app).get("/staged")
+
+    entries = [entry.split(";")[0] for entry in response.headers["Server-Timing"].split(", ")]
+    assert entries == ["db", "embedding", "total"]
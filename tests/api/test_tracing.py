@@ -0,0 +1,143 @@
+"""
+Tests for request tracing and OTLP/JSON export.
+"""
+import json
+import uuid
+from unittest.mock import MagicMock, patch
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from hana_ai.api.middleware import APIMiddleware
+from hana_ai.api.rate_limit import MemoryBucketStore, RateLimiter
+from hana_ai.api.timing import instrument_connection
+from hana_ai.api.tracing import FileSpanExporter, Tracer, _tracing_handler
+
+class Collector:
+    """Span processor keeping finished spans in memory."""
+    def __init__(self):
+        self.spans = []
+
+    def on_end(self, span):
+        self.spans.append(span)
+
+    def flush(self):
+        pass
+
+def _tracer(**kwargs):
+    return Tracer(Collector(), enabled=True, **{"sample_ratio": 1.0, "max_spans_per_trace": 100, **kwargs})
+
+def test_head_sampling_and_traceparent():
+    """Test that unsampled traces record nothing and a remote sampled flag is honoured."""
+    tracer = _tracer(sample_ratio=0.0)
+
+    with tracer.span("request") as root:
+        assert root is None or not root.recording
+    assert tracer.processor.spans == []
+
+    root = tracer.start_span("GET /", "server",
+                             traceparent="00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01")
+    assert root.recording
+    assert root.trace.trace_id == "0af7651916cd43dd8448eb211c80319c"
+    assert root.parent_id == "b7ad6b7169203331"
+    child = tracer.start_span("db select", parent=root)
+    child.end()
+    root.end()
+    assert [span.name for span in tracer.processor.spans] == ["db select", "GET /"]
+
+def test_span_limit_per_trace():
+    """Test that spans beyond the per-trace limit are dropped."""
+    tracer = _tracer(max_spans_per_trace=3)
+    root = tracer.start_span("root")
+
+    children = [tracer.start_span("child", parent=root) for _ in range(5)]
+
+    assert sum(child is not None for child in children) == 2
+    assert root.trace.dropped == 3
+
+def test_agent_iterations_tools_and_sql_are_nested():
+    """Test the span tree of an agent run with two ReAct iterations."""
+    tracer = _tracer()
+    handler = _tracing_handler()
+    connection_context = instrument_connection(MagicMock())
+    cursor = connection_context.connection.cursor()
+    cursor._cursor.fetchall.return_value = [(1,), (2,)]
+    ids = {name: uuid.uuid4() for name in ("executor", "plan1", "llm1", "tool1", "plan2", "llm2")}
+    response = MagicMock(llm_output={"token_usage": {"prompt_tokens": 120, "completion_tokens": 30}})
+
+    with patch("hana_ai.api.tracing.tracer", tracer), patch("hana_ai.api.timing.tracer", tracer):
+        with tracer.span("POST /api/v1/agents/conversation", "server") as root:
+            handler.on_chain_start({}, {}, run_id=ids["executor"], name="AgentExecutor")
+            for plan, llm in (("plan1", "llm1"), ("plan2", "llm2")):
+                handler.on_chain_start({}, {}, run_id=ids[plan], parent_run_id=ids["executor"], name="LLMChain")
+                handler.on_llm_start({}, ["prompt"], run_id=ids[llm], parent_run_id=ids[plan],
+                                     invocation_params={"model_name": "gpt-4"})
+                handler.on_llm_end(response, run_id=ids[llm])
+                handler.on_chain_end({}, run_id=ids[plan])
+                if plan == "plan1":
+                    handler.on_tool_start({"name": "fetch_data"}, "{}", run_id=ids["tool1"],
+                                          parent_run_id=ids["executor"])
+                    cursor.execute("SELECT * FROM T")
+                    cursor.fetchall()
+                    handler.on_tool_end("rows", run_id=ids["tool1"])
+            handler.on_chain_end({}, run_id=ids["executor"])
+
+    spans = {span.span_id: span for span in tracer.processor.spans}
+    by_name = {}
+    for span in tracer.processor.spans:
+        by_name.setdefault(span.name, []).append(span)
+
+    def parent_name(span):
+        return spans[span.parent_id].name
+
+    assert parent_name(by_name["agent"][0]) == root.name
+    assert [span.attributes["agent.iteration"] for span in by_name["agent.iteration"]] == [1, 2]
+    assert by_name["agent"][0].attributes["agent.iterations"] == 2
+    assert parent_name(by_name["tool fetch_data"][0]) == "agent.iteration"
+    assert by_name["tool fetch_data"][0].parent_id == by_name["agent.iteration"][0].span_id
+    assert parent_name(by_name["db select"][0]) == "tool fetch_data"
+    assert by_name["db fetch"][0].attributes["db.rows"] == 2
+    assert by_name["llm"][0].attributes["gen_ai.usage.input_tokens"] == 120
+    assert parent_name(by_name["llm"][0]) == "chain LLMChain"
+
+async def query_endpoint(request):
+    connection_context = instrument_connection(MagicMock())
+    await run_in_threadpool(lambda: connection_context.connection.cursor().execute("SELECT 1 FROM DUMMY"))
+    return JSONResponse({"ok": True})
+
+@patch("hana_ai.api.middleware.settings")
+def test_request_root_span(mock_settings):
+    """Test that requests get a root span named after the route with SQL children."""
+    mock_settings.DEVELOPMENT_MODE = True
+    mock_settings.RESTRICT_EXTERNAL_CALLS = False
+    mock_settings.SERVER_TIMING_ENABLED = False
+    tracer = _tracer()
+    app = Starlette(routes=[Route("/query", query_endpoint)])
+    app.add_middleware(APIMiddleware, limiter=RateLimiter(MemoryBucketStore(), 100))
+
+    with patch("hana_ai.api.middleware.tracer", tracer), patch("hana_ai.api.timing.tracer", tracer):
+        assert TestClient(app).get("/query").status_code == 200
+
+    statement, root = tracer.processor.spans
+    assert root.name == "GET /query"
+    assert root.attributes["http.response.status_code"] == 200
+    assert statement.parent_id == root.span_id
+    assert statement.attributes["db.statement"] == "SELECT 1 FROM DUMMY"
+
+def test_file_exporter_writes_otlp_json(tmp_path):
+    """Test that the file exporter writes OTLP/JSON export requests."""
+    tracer = _tracer()
+    span = tracer.start_span("GET /", "server", {"http.response.status_code": 200})
+    span.end()
+    path = tmp_path / "traces.jsonl"
+
+    FileSpanExporter(str(path), max_bytes=1024 * 1024).export(tracer.processor.spans)
+
+    request = json.loads(path.read_text().splitlines()[0])
+    exported = request["resourceSpans"][0]["scopeSpans"][0]["spans"][0]
+    assert exported["traceId"] == span.trace.trace_id
+    assert exported["kind"] == 2
+    assert exported["attributes"] == [{"key": "http.response.status_code", "value": {"intValue": "200"}}]
@@ -0,0 +1,100 @@
+"""
+Tests for concurrent, cached environment validation.
+"""
+import threading
+import time
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from hana_ai.api.validation import EnvironmentValidator, ValidationCache
+
+def _ok(name):
+    return lambda: {"status": "ok", "details": {"check": name}}
+
+def _patched_validator(slow_check=None, delay=0.0):
+    validator = EnvironmentValidator()
+    for name in ("system", "gpu", "hana_connection", "ai_core_sdk", "environment_variables"):
+        check = _ok(name)
+        if name == slow_check:
+            def check(name=name):
+                time.sleep(delay)
+                return {"status": "ok", "details": {"check": name}}
+        setattr(validator, f"validate_{name}", check)
+    return validator
+
+def test_checks_run_concurrently_with_timeout():
+    """Test that a slow check is reported as timed out without delaying the others."""
+    validator = _patched_validator(slow_check="hana_connection", delay=2.0)
+
+    start = time.monotonic()
+    results = validator.validate_all(timeout=0.2)
+    elapsed = time.monotonic() - start
+
+    assert elapsed < 1.0
+    assert results["system"]["status"] == "ok"
+    assert results["hana_connection"]["status"] == "error"
+    assert "timed out" in results["hana_connection"]["details"]["message"]
+    assert results["overall"]["status"] == "error"
+    assert "hana_connection" in results["overall"]["message"]
+
+def test_cache_coalesces_refreshes():
+    """Test that concurrent refreshes run the validation once and recent results are reused."""
+    calls = []
+
+    def validate():
+        calls.append(1)
+        time.sleep(0.2)
+        return {"overall": {"status": "ok", "message": "fine"}}
+
+    cache = ValidationCache(ttl_seconds=300, min_refresh_seconds=60, validate=validate)
+    threads = [threading.Thread(target=cache.refresh) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert cache.refresh()["overall"]["status"] == "ok"
+    assert len(calls) == 1
+
+def test_cache_refreshes_stale_results_in_background():
+    """Test that get serves the snapshot and refreshes it in the background once stale."""
+    calls = []
+    done = threading.Event()
+
+    def validate():
+        calls.append(1)
+        if len(calls) > 1:
+            done.set()
+        return {"overall": {"status": "ok", "message": f"run {len(calls)}"}}
+
+    cache = ValidationCache(ttl_seconds=0, min_refresh_seconds=60, validate=validate)
+    cache.refresh()
+    snapshot = cache.get()
+
+    assert snapshot["overall"]["message"] == "run 1"
+    assert done.wait(5)
+
+@patch("hana_ai.api.auth.settings")
+def test_validate_endpoint_requires_key_for_refresh(mock_settings):
+    """Test that /validate serves cached results and only refreshes with a valid API key."""
+    from hana_ai.api.app import app
+    mock_settings.AUTH_REQUIRED = True
+    mock_settings.API_KEYS = ["secret"]
+    cache = ValidationCache(ttl_seconds=300, min_refresh_seconds=0,
+                            validate=lambda: {"overall": {"status": "ok", "message": "fine"}})
+    cache.refresh()
+    client = TestClient(app, base_url="http://localhost")
+
+    with patch("hana_ai.api.app.validation_cache", cache), \
+         patch.object(cache, "_validate", wraps=cache._validate) as validate:
+        assert client.get("/validate").json()["overall"]["status"] == "ok"
+        assert client.get("/validate?refresh=true").status_code == 401
+        assert client.get("/validate?refresh=true", headers={"X-API-Key": "wrong"}).status_code == 401
+        assert validate.call_count == 0
+
+        response = client.get("/validate?refresh=true", headers={"X-API-Key": "secret"})
+
+        assert response.status_code == 200
+        assert validate.call_count == 1